@@ -8,6 +8,12 @@ __version__ = '0.19.0'
 MLTK_DIR = os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')
 MLTK_ROOT_DIR = os.path.dirname(MLTK_DIR).replace('\\', '/')
 
+# If the MLTK_IMPORT_PROFILE environment variable is enabled
+# then record the import time of each module, see mltk/utils/import_profiler.py
+if os.environ.get('MLTK_IMPORT_PROFILE', '0').lower() not in ('', '0', 'false', 'no'):
+    from .utils.import_profiler import enable_import_profiler
+    enable_import_profiler(output_path=os.environ.get('MLTK_IMPORT_PROFILE_PATH') or None)
+
 
 def disable_tensorflow():
     """Disable the Tensorflow Python package with a placeholder
@@ -8,6 +8,7 @@ import signal
 import atexit
 import functools
 import collections
+import queue
 
 import typer
 import numpy as np
@@ -534,7 +535,8 @@ In this case, ONLY the .tflite will be programmed and the existing audio_classif
         raw_spectrogram_stream:JLinkDataStream = None
         quantized_spectrogram_stream:JLinkDataStream = None
         audio_chunk_counter = 0
-        spec_counter = 0
+        raw_spec_counter = 0
+        quantized_spec_counter = 0
         #sample_rate = tflite_model_params['fe.sample_rate_hz']
         spectrogram_rows = tflite_model_params['fe.filterbank_n_channels']
         sample_length_ms = tflite_model_params['fe.sample_length_ms']
@@ -542,22 +544,27 @@ In this case, ONLY the .tflite will be programmed and the existing audio_classif
         window_step_ms = tflite_model_params['fe.window_step_ms']
         spectrogram_cols = (sample_length_ms - window_size_ms) // window_step_ms + 1
         spectrogram_size = spectrogram_rows*spectrogram_cols
-        raw_spectrogram_min_read_size = spectrogram_size*2
-        raw_spectrogram_buffer = bytearray()
-
-        quantized_spectrogram_min_read_size = spectrogram_size * np.dtype(input_dtype).itemsize
-        quantized_spectrogram_buffer = bytearray()
-        audio_min_read_size = 1024
+        raw_spectrogram_frame_size = spectrogram_size*2
+        quantized_spectrogram_frame_size = spectrogram_size * np.dtype(input_dtype).itemsize
+        audio_chunk_size = 4096
         audio_start_timeout = None
 
+        # The JLink processing thread adds each received frame to this queue as soon as it's received,
+        # so the device's buffers are drained while this thread writes the frames to files
+        frame_queue = queue.Queue()
+        def _open_stream(name:str, frame_size:int) -> JLinkDataStream:
+            stream = jlink_stream.open(name, mode='r')
+            stream.set_frame_callback(lambda frame: frame_queue.put((name, frame)), frame_size)
+            return stream
+
         while True:
-            if stop_event.wait(0.010):
+            if stop_event.is_set():
                 jlink_stream.disconnect()
                 break
 
             if dump_audio_dir and audio_stream is None:
                 try:
-                    audio_stream = jlink_stream.open('audio', mode='r')
+                    audio_stream = _open_stream('audio', audio_chunk_size)
                     logger.debug('Device audio stream ready')
                     # Wait a moment for any noise to be flushed from the audio stream
                     audio_start_timeout = time.time() + 4.0
@@ -567,7 +574,7 @@ In this case, ONLY the .tflite will be programmed and the existing audio_classif
             if dump_raw_spectrograms_dir and raw_spectrogram_stream is None:
                 os.makedirs(dump_raw_spectrograms_dir, exist_ok=True)
                 try:
-                    raw_spectrogram_stream = jlink_stream.open('raw_spec', mode='r')
+                    raw_spectrogram_stream = _open_stream('raw_spec', raw_spectrogram_frame_size)
                     logger.debug('Device raw spectrogram stream ready')
                 except Exception as e:
                     logger.debug(f'Failed to open device raw spectrogram stream, err: {e}')
@@ -575,52 +582,44 @@ In this case, ONLY the .tflite will be programmed and the existing audio_classif
             if dump_quantized_spectrograms_dir and quantized_spectrogram_stream is None:
                 os.makedirs(dump_quantized_spectrograms_dir, exist_ok=True)
                 try:
-                    quantized_spectrogram_stream = jlink_stream.open('quant_spec', mode='r')
+                    quantized_spectrogram_stream = _open_stream('quant_spec', quantized_spectrogram_frame_size)
                     logger.debug('Device quantized spectrogram stream ready')
                 except Exception as e:
                     logger.debug(f'Failed to open device quantized spectrogram stream, err: {e}')
 
+            try:
+                stream_name, frame = frame_queue.get(timeout=0.010)
+            except queue.Empty:
+                continue
 
-            if audio_stream is not None and audio_stream.read_data_available >= audio_min_read_size:
-                chunk_data = audio_stream.read_all(audio_stream.read_data_available)
+            if stream_name == 'audio':
                 if time.time() - audio_start_timeout >= 0:
                     if audio_chunk_counter == 0:
                         logger.info('Audio recording started')
                     chunk_path = f'{dump_audio_dir}/{audio_chunk_counter}.int16.bin'
                     audio_chunk_counter += 1
                     with open(chunk_path, 'wb') as f:
-                        f.write(chunk_data)
-
-            if raw_spectrogram_stream is not None and raw_spectrogram_stream.read_data_available >= 256:
-                raw_spectrogram_buffer.extend(raw_spectrogram_stream.read())
-
-                while len(raw_spectrogram_buffer) >= raw_spectrogram_min_read_size:
-                    if spec_counter == 0:
-                        logger.info('Raw spectrogram recording started')
-
-                    spectrogram_data = raw_spectrogram_buffer[:raw_spectrogram_min_read_size]
-                    raw_spectrogram_buffer = raw_spectrogram_buffer[raw_spectrogram_min_read_size:]
-                    spectrogram_buf = np.frombuffer(spectrogram_data, dtype=np.uint16)
-                    spectrogram_data = spectrogram_data[raw_spectrogram_min_read_size:]
-                    spectrogram = np.reshape(spectrogram_buf, (spectrogram_cols, spectrogram_rows))
-                    bin_path = f'{dump_raw_spectrograms_dir}/{spec_counter}.uint16.npy.txt'
-                    np.savetxt(bin_path, spectrogram, fmt='%d', delimiter=',')
-                    spec_counter += 1
-
-            if quantized_spectrogram_stream is not None and quantized_spectrogram_stream.read_data_available >= 256:
-                quantized_spectrogram_buffer.extend(quantized_spectrogram_stream.read())
-
-                while len(quantized_spectrogram_buffer) >= quantized_spectrogram_min_read_size:
-                    if spec_counter == 0:
-                        logger.info('Quantized spectrogram recording started')
-
-                    spectrogram_data = quantized_spectrogram_buffer[:quantized_spectrogram_min_read_size]
-                    quantized_spectrogram_buffer = quantized_spectrogram_buffer[quantized_spectrogram_min_read_size:]
-                    spectrogram_buf = np.frombuffer(spectrogram_data, dtype=input_dtype)
-                    spectrogram = np.reshape(spectrogram_buf, (spectrogram_cols, spectrogram_rows))
-                    bin_path = f'{dump_quantized_spectrograms_dir}/{spec_counter}.{_dtype_to_str(input_dtype)}.npy.txt'
-                    np.savetxt(bin_path, spectrogram, fmt='%d', delimiter=',')
-                    spec_counter += 1
+                        f.write(frame)
+
+            elif stream_name == 'raw_spec':
+                if raw_spec_counter == 0:
+                    logger.info('Raw spectrogram recording started')
+
+                spectrogram_buf = np.frombuffer(frame, dtype=np.uint16)
+                spectrogram = np.reshape(spectrogram_buf, (spectrogram_cols, spectrogram_rows))
+                bin_path = f'{dump_raw_spectrograms_dir}/{raw_spec_counter}.uint16.npy.txt'
+                np.savetxt(bin_path, spectrogram, fmt='%d', delimiter=',')
+                raw_spec_counter += 1
+
+            elif stream_name == 'quant_spec':
+                if quantized_spec_counter == 0:
+                    logger.info('Quantized spectrogram recording started')
+
+                spectrogram_buf = np.frombuffer(frame, dtype=input_dtype)
+                spectrogram = np.reshape(spectrogram_buf, (spectrogram_cols, spectrogram_rows))
+                bin_path = f'{dump_quantized_spectrograms_dir}/{quantized_spec_counter}.{_dtype_to_str(input_dtype)}.npy.txt'
+                np.savetxt(bin_path, spectrogram, fmt='%d', delimiter=',')
+                quantized_spec_counter += 1
 
 
     ###############################################################
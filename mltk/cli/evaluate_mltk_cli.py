@@ -60,7 +60,22 @@ This option places an upper limit on the number of samples per class that are us
     ),
     post_process: bool = typer.Option(False, '--post',
         help='This allows for post-processing the evaluation results (e.g. uploading to a cloud) if supported by the given MltkModel'
-    )
+    ),
+    streaming: bool = typer.Option(False, '--streaming',
+        help='''\b
+Stream the evaluation data batch-by-batch through the model and only keep the accumulated metrics in RAM.
+This is useful for evaluating large datasets.
+For auto-encoders, the score of each sample is also kept in RAM''',
+    ),
+    predictions_dir: str = typer.Option(None, '--predictions-dir',
+        help='Optional directory where the raw model predictions are written as memory-mapped .npy files',
+        metavar='<directory>'
+    ),
+    batch_scoring: bool = typer.Option(False, '--batch-scoring',
+        help='''\b
+Score each batch of auto-encoder samples at once with the vectorized scoring function.
+This is faster, but the scores may slightly differ due to floating-point rounding''',
+    ),
 ):
     """Evaluate a trained ML model
 
@@ -88,6 +103,10 @@ This option places an upper limit on the number of samples per class that are us
     # and dump the input/output images
     mltk evaluate fully_connected_autoencoder --tflite --dump
     \b
+    # Evaluate a large dataset with constant memory usage
+    # and save the raw predictions to .npy files
+    mltk evaluate audio_example1 --streaming --predictions-dir ./predictions
+    \b
     Note: All log files are generated in the <model log dir>/eval directory.
     It a MLTK model is provided, the model's archive is updated with the evaluation results.
     """
@@ -132,7 +151,10 @@ This option places an upper limit on the number of samples per class that are us
             show=show,
             verbose=True,
             update_archive=update_archive,
-            post_process=post_process
+            post_process=post_process,
+            streaming=streaming,
+            predictions_dir=predictions_dir,
+            batch_scoring=batch_scoring,
        )
     except Exception as e:
         cli.handle_exception('Failed to evaluate model', e)
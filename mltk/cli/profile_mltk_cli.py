@@ -56,6 +56,11 @@ If omitted, then attempt to automatically determine the serial COM port''',
     full_summary: bool = typer.Option(False, '--full-summary',
         help='Generate a full summary from the profiling report. This includes any extra info logged by the selected accelerator'
     ),
+    no_cache: bool = typer.Option(False, '--no-cache',
+        help='''\b
+By default, the simulator profiling results are cached and re-used if the same model is profiled again with the same options.
+Use this option to always run the simulator'''
+    ),
     app_path: str = typer.Option(None, '--app',
         help='''\b
 By default, the model_profiler app is automatically downloaded.
@@ -119,7 +124,8 @@ In this case, ONLY the .tflite will be programmed and the existing model_profile
             port=port,
             build=build,
             return_estimates=estimates,
-            post_process=post_process
+            post_process=post_process,
+            use_cache=not no_cache
         )
     except Exception as e:
         cli.handle_exception('Failed to profile model', e)
@@ -12,4 +12,80 @@ def test_help():
     run_mltk_command( '--help')
 
 
-        
\ No newline at end of file
+        
+
+def test_builtin_commands_manifest():
+    import sys
+    import json
+    import subprocess
+    from mltk.cli.utils import BUILTIN_COMMANDS
+
+    # Import all of the CLI commands (as is done for: mltk --help)
+    # and return the root commands that are registered by the modules in the mltk/cli directory
+    script = 'import sys, json\n' \
+        'sys.argv = ["mltk"]\n' \
+        'from mltk import cli\n' \
+        'cli.create_cli()\n' \
+        'commands = {}\n' \
+        'for cmd in cli.root_cli.registered_commands:\n' \
+        '    module_name = cmd.callback.__module__\n' \
+        '    if module_name.startswith("mltk.cli.") and module_name.endswith("_mltk_cli"):\n' \
+        '        commands[cmd.name] = module_name[len("mltk.cli."):]\n' \
+        'print("registered commands:", json.dumps(commands))\n'
+    retmsg = subprocess.check_output(
+        [sys.executable, '-c', script],
+        stderr=subprocess.STDOUT
+    ).decode('utf-8')
+
+    registered_commands = None
+    for line in retmsg.splitlines():
+        if line.startswith('registered commands:'):
+            registered_commands = json.loads(line[len('registered commands:'):])
+    assert registered_commands is not None, retmsg
+    assert BUILTIN_COMMANDS == registered_commands
+
+
+def test_import_profile():
+    import os
+    import sys
+    import subprocess
+
+    retmsg = subprocess.check_output(
+        [sys.executable, '-c', 'import mltk.core'],
+        env=dict(os.environ, MLTK_IMPORT_PROFILE='1', MLTK_DISABLE_TF='1'),
+        stderr=subprocess.STDOUT
+    ).decode('utf-8')
+    assert 'Slowest imports' in retmsg
+    assert 'mltk.core' in retmsg
+
+
+def test_import_profile_disabled():
+    import os
+    import sys
+    import subprocess
+
+    retmsg = subprocess.check_output(
+        [sys.executable, '-c', 'import mltk.core'],
+        env=dict(os.environ, MLTK_IMPORT_PROFILE='0', MLTK_DISABLE_TF='1'),
+        stderr=subprocess.STDOUT
+    ).decode('utf-8')
+    assert 'Slowest imports' not in retmsg
+
+
+def test_import_profile_path():
+    import os
+    import sys
+    import subprocess
+    from mltk.utils.path import create_tempdir
+
+    output_path = f'{create_tempdir("tests/import_profile")}/import_profile.txt'
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    subprocess.check_output(
+        [sys.executable, '-c', 'import mltk.core'],
+        env=dict(os.environ, MLTK_IMPORT_PROFILE='1', MLTK_IMPORT_PROFILE_PATH=output_path, MLTK_DISABLE_TF='1'),
+        stderr=subprocess.STDOUT
+    )
+    with open(output_path, 'r') as f:
+        assert 'mltk.core' in f.read()
@@ -45,4 +45,24 @@ def test_summarize_h5():
 
 def test_summarize_output():
     out_path = create_tempdir('tests') + '/summary_test.txt'
-    run_mltk_command('summarize', 'image_example1', '--output', out_path)
\ No newline at end of file
+    run_mltk_command('summarize', 'image_example1', '--output', out_path)
+
+def test_summarize_tflite_without_tensorflow():
+    import sys
+    import subprocess
+
+    # Summarizing a .tflite should not import Tensorflow
+    script = 'import sys\n' \
+        'from mltk.cli.main import main\n' \
+        f'sys.argv = ["mltk", "summarize", "{IMAGE_EXAMPLE1_TFLITE_PATH}"]\n' \
+        'try:\n' \
+        '    main()\n' \
+        'except SystemExit:\n' \
+        '    pass\n' \
+        'print("tensorflow imported:", "tensorflow" in sys.modules)\n'
+    retmsg = subprocess.check_output(
+        [sys.executable, '-c', script],
+        stderr=subprocess.STDOUT
+    ).decode('utf-8')
+    assert 'Total MACs' in retmsg
+    assert 'tensorflow imported: False' in retmsg
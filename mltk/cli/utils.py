@@ -359,9 +359,43 @@ def _check_disable_tensorflow():
 
 
 
+# Static manifest of the commands defined in the mltk/cli directory
+# <command name>: <module in mltk/cli>
+# This allows for importing only the module of the command given on the command-line
+# without reading every *_mltk_cli.py module.
+# NOTE: Modules that are not in this manifest are still discovered by reading the mltk/cli directory
+# NOTE: Only the commands of the root CLI are listed, the sub-commands (e.g. mltk build download_run)
+#       are registered when the module is imported. See test_builtin_commands_manifest()
+BUILTIN_COMMANDS = {
+    'classify_audio': 'classify_audio_mltk_cli',
+    'classify_image': 'classify_image_mltk_cli',
+    'commander': 'commander_mltk_cli',
+    'program_app': 'commander_mltk_cli',
+    'compile': 'compile_mltk_cli',
+    'custom': 'custom_mltk_cli',
+    'evaluate': 'evaluate_mltk_cli',
+    'fingerprint_reader': 'fingerprint_reader_mltk_cli',
+    'profile': 'profile_mltk_cli',
+    'quantize': 'quantize_mltk_cli',
+    'ssh': 'ssh_mltk_cli',
+    'ssh-keygen': 'ssh_mltk_cli',
+    'summarize': 'summarize_mltk_cli',
+    'tensorboard': 'tensorboard_mltk_cli',
+    'train': 'train_mltk_cli',
+    'update_params': 'update_params_mltk_cli',
+    'utest': 'utest_mltk_cli',
+    'view_audio': 'view_audio_mltk_cli',
+    'view': 'view_mltk_cli',
+}
+
+
 def _discover_and_import_commands():
     """Discover all python scripts that end with '*_mltk_cli.py'
-    and import the python module"""
+    and import the python module
+
+    If the command given on the command-line is found, then only its module is imported.
+    The commands in the mltk/cli directory are resolved using the static ``BUILTIN_COMMANDS`` manifest.
+    """
 
     from mltk import (MLTK_DIR, MLTK_ROOT_DIR)
     from mltk import cli
@@ -380,14 +414,25 @@ def _discover_and_import_commands():
     if len(sys.argv) > 1:
         cli_cmd_arg = sys.argv[1]
 
-    search_paths = as_list(get_user_setting('cli_paths'))
+    builtin_dir = fullpath(f'{MLTK_DIR}/cli')
+
+    # User-defined CLI paths take precedence over the built-in commands
+    user_search_paths = as_list(get_user_setting('cli_paths'))
     env_paths = os.getenv('MLTK_CLI_PATHS', '')
     if env_paths:
-        search_paths.extend(env_paths.split(os.pathsep))
+        user_search_paths.extend(env_paths.split(os.pathsep))
+
+    command_paths = []
+    if _find_and_import_command(user_search_paths, cli_cmd_arg, command_paths):
+        return
+
+    # If the command is a built-in command,
+    # then immediately import its module and return
+    if cli_cmd_arg in BUILTIN_COMMANDS:
+        _import_command(f'{builtin_dir}/{BUILTIN_COMMANDS[cli_cmd_arg]}.py')
+        return
 
-    search_paths.extend([
-        f'{MLTK_DIR}/cli'
-    ])
+    search_paths = [builtin_dir]
 
     # If we're executing from the MLTK repo
     # (i.e. NOT the pip Python package)
@@ -410,10 +455,24 @@ def _discover_and_import_commands():
         recursive_listdir(cpp_apps_path, regex=_include_app_dir)
         search_paths.extend(app_cli_paths)
 
-    # Find all *_mltk_cli.py files in the search paths
-    # If we find a command that matches the one provided on the command line
-    # Then just import that file and return
-    command_paths = []
+    if _find_and_import_command(search_paths, cli_cmd_arg, command_paths):
+        return
+
+    # Otherwise, if no commands matched the cli arg
+    # then just import all the commands
+    # (this is necessary for commands like: mltk --help)
+    for cli_path in command_paths:
+        _import_command(cli_path)
+
+
+def _find_and_import_command(search_paths:List[str], cli_cmd_arg:str, command_paths:List[str]) -> bool:
+    """Find all *_mltk_cli.py files in the search paths
+    If we find a command that matches the one provided on the command line
+    then just import that file and return True.
+    Otherwise, add the found files to the given command_paths list
+    """
+    from mltk import cli
+    from mltk.utils.path import fullpath
 
     for p in search_paths:
         p = fullpath(p)
@@ -436,15 +495,11 @@ def _discover_and_import_commands():
                 # Then immediately install the cli module and return so that we can execute it
                 if cli_cmd_arg in found_cmd_names:
                     _import_command(cli_path)
-                    return
+                    return True
 
                 command_paths.append(cli_path)
 
-    # Otherwise, if no commands matched the cli arg
-    # then just import all the commands
-    # (this is necessary for commands like: mltk --help)
-    for cli_path in command_paths:
-        _import_command(cli_path)
+    return False
 
 
 def _import_command(cli_path:str):
@@ -1,3 +1,6 @@
+import sys
+import types
+import importlib
 
 from .utils import (
     get_mltk_logger,
@@ -6,15 +9,76 @@ from .utils import (
 
 from .tflite_model import *
 from .tflite_model_parameters import *
-from .model import *
-from .train_model import (train_model, TrainingResults)
-from .quantize_model import quantize_model
-from .summarize_model import summarize_model
-from .view_model import view_model
-from .evaluate_classifier import (evaluate_classifier, ClassifierEvaluationResults)
-from .evaluate_autoencoder import (evaluate_autoencoder, AutoEncoderEvaluationResults)
-from .evaluate_model import (evaluate_model, EvaluationResults)
-from .profile_model import (profile_model, ProfilingModelResults)
-from .update_model_parameters import update_model_parameters
-from .compile_model import compile_model
 
+
+# The following APIs are imported on first access
+# This way, commands that only use the .tflite APIs (e.g. mltk summarize my_model.tflite)
+# do not need to import the model training/evaluation modules (and Tensorflow)
+# <attribute name>: <module that defines the attribute>
+_LAZY_ATTRIBUTES = {
+    'MltkModel': '.model',
+    'MltkModelEvent': '.model',
+    'AudioDatasetMixin': '.model',
+    'DataGeneratorDatasetMixin': '.model',
+    'DatasetMixin': '.model',
+    'MltkDataset': '.model',
+    'EvaluateMixin': '.model',
+    'EvaluateAutoEncoderMixin': '.model',
+    'EvaluateClassifierMixin': '.model',
+    'ImageDatasetMixin': '.model',
+    'SshMixin': '.model',
+    'WeightsAndBiasesMixin': '.model',
+    'TrainMixin': '.model',
+    'load_mltk_model': '.model',
+    'load_mltk_model_with_path': '.model',
+    'list_mltk_models': '.model',
+    'load_tflite_or_keras_model': '.model',
+    'load_tflite_model': '.model',
+    'is_keras_model': '.model',
+    'KerasModel': '.model',
+    'train_model': '.train_model',
+    'TrainingResults': '.train_model',
+    'quantize_model': '.quantize_model',
+    'summarize_model': '.summarize_model',
+    'view_model': '.view_model',
+    'evaluate_classifier': '.evaluate_classifier',
+    'ClassifierEvaluationResults': '.evaluate_classifier',
+    'evaluate_autoencoder': '.evaluate_autoencoder',
+    'AutoEncoderEvaluationResults': '.evaluate_autoencoder',
+    'evaluate_model': '.evaluate_model',
+    'EvaluationResults': '.evaluate_model',
+    'profile_model': '.profile_model',
+    'ProfilingModelResults': '.profile_model',
+    'update_model_parameters': '.update_model_parameters',
+    'compile_model': '.compile_model',
+}
+
+
+def __getattr__(name:str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module = importlib.import_module(module_name, __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTES.keys()))
+
+
+class _LazyModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # NOTE: Many of the APIs have the same name as the submodule that defines them (e.g. mltk.core.train_model).
+        #       When a submodule is imported, Python sets the submodule as an attribute of this package.
+        #       In this case, keep the API as the attribute (which is what happens when the API is eagerly imported)
+        if isinstance(value, types.ModuleType) and \
+            _LAZY_ATTRIBUTES.get(name) == f'.{name}' and \
+            value.__name__ == f'{__name__}.{name}':
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyModule
@@ -11,6 +11,7 @@ import sklearn
 import matplotlib.pyplot as plt
 from mltk.utils import gpu
 from mltk.utils.python import prepend_exception_msg
+from mltk.utils.npy_writer import NpyStreamWriter
 from .model import (
     MltkModel,
     KerasModel,
@@ -155,7 +156,10 @@ def evaluate_autoencoder(
     verbose: bool=None,
     show: bool=False,
     callbacks:list=None,
-    update_archive:bool=True
+    update_archive:bool=True,
+    streaming:bool=False,
+    predictions_dir:str=None,
+    batch_scoring:bool=False,
 ) -> AutoEncoderEvaluationResults:
     """Evaluate a trained auto-encoder model
 
@@ -170,6 +174,15 @@ def evaluate_autoencoder(
         show: Show the evaluation results diagrams
         callbacks: Optional callbacks to invoke while evaluating
         update_archive: Update the model archive with the eval results
+        streaming: If true, then each class's evaluation data is streamed batch-by-batch through the model and scoring function
+            rather than loading the entire class dataset into RAM. Only the per-sample scores are kept in RAM (one float32 per sample)
+            as the ROC, precision/recall and histogram results require every score,
+            so unlike the classifier streaming mode, the memory usage still grows with the number of evaluated samples.
+        predictions_dir: Optional directory where the raw model predictions of each class are written as
+            memory-mapped .npy files: ``<class>-y_pred.npy`` and ``<class>-scores.npy``
+        batch_scoring: If true, then each batch of samples is scored at once with the model's vectorized
+            :py:attr:`~mltk.core.EvaluateAutoEncoderMixin.batch_scoring_function`. This is faster but the scores may slightly differ
+            (due to floating-point rounding) from the default, which scores each sample with the model's ``scoring_function``.
 
     Returns:
         Dictionary containing evaluation results
@@ -191,7 +204,7 @@ def evaluate_autoencoder(
     if update_archive:
         update_archive = mltk_model.check_archive_file_is_writable()
 
-    scoring_function = mltk_model.get_scoring_function()
+    batch_scoring_function = mltk_model.get_batch_scoring_function(batch_scoring=batch_scoring)
     classes = classes or mltk_model.eval_classes
 
     # Build the MLTK model's corresponding as a Keras model or .tflite
@@ -235,32 +248,55 @@ def evaluate_autoencoder(
             prepend_exception_msg(e, 'Failed to load model evaluation dataset' )
             raise
 
-        eval_data = _retrieve_data(mltk_model.x)
-
         logger.info(f'Generating model predictions for {class_label} class ...')
-        if isinstance(built_model, KerasModel):
-            y_pred = built_model.predict(
-                x = eval_data,
-                callbacks=callbacks,
-                verbose=1 if verbose else 0,
-            )
+        if streaming:
+            batches = _iterate_data(mltk_model.x)
         else:
-            y_pred = built_model.predict(x = eval_data, y_dtype=np.float32)
+            batches = [_retrieve_data(mltk_model.x)]
 
-        # loop over all original images and their corresponding reconstructions
-        class_scores = np.empty((len(eval_data),), dtype=np.float32)
+        y_pred_writer = NpyStreamWriter(f'{predictions_dir}/{class_label}-y_pred.npy') if predictions_dir else None
+        class_scores = []
         dump_count = 0
-        for i, (orig, decoded) in enumerate(zip(eval_data, y_pred)):
-            try:
-                class_scores[i] = scoring_function(orig, decoded)
-            except Exception as e:
-                prepend_exception_msg(e, 'Error executing scoring function')
-                raise
-
-            if dump and dump_count < 200: # Don't dump more than 200 samples
-                dump_count += 1
-                dump_path = f'{dump_dir}/{class_label}/{i}.png'
-                _save_decoded_image(dump_path, orig, decoded, class_scores[i])
+        sample_index = 0
+        try:
+            for eval_data in batches:
+                if isinstance(built_model, KerasModel):
+                    y_pred = built_model.predict(
+                        x = eval_data,
+                        callbacks=callbacks,
+                        verbose=1 if verbose and not streaming else 0,
+                    )
+                else:
+                    y_pred = built_model.predict(x = eval_data, y_dtype=np.float32)
+
+                if y_pred_writer is not None:
+                    y_pred_writer.write(y_pred)
+
+                try:
+                    batch_scores = np.asarray(batch_scoring_function(eval_data, y_pred), dtype=np.float32).reshape(len(eval_data))
+                except Exception as e:
+                    prepend_exception_msg(e, 'Error executing scoring function')
+                    raise
+
+                class_scores.append(batch_scores)
+
+                # Don't dump more than 200 samples
+                if dump and dump_count < 200:
+                    for i, (orig, decoded, score) in enumerate(zip(eval_data, y_pred, batch_scores)):
+                        if dump_count >= 200:
+                            break
+                        dump_count += 1
+                        dump_path = f'{dump_dir}/{class_label}/{sample_index + i}.png'
+                        _save_decoded_image(dump_path, orig, decoded, score)
+
+                sample_index += len(eval_data)
+        finally:
+            if y_pred_writer is not None:
+                y_pred_writer.close()
+
+        class_scores = np.concatenate(class_scores) if class_scores else np.empty((0,), dtype=np.float32)
+        if predictions_dir:
+            np.save(f'{predictions_dir}/{class_label}-scores.npy', class_scores)
 
         all_scores.append(class_scores)
 
@@ -667,6 +703,24 @@ def _retrieve_data(x):
         return x.numpy()
 
     data = []
+    for batch_x in _iterate_data(x):
+        data.extend(batch_x)
+
+    return np.array(data)
+
+
+def _iterate_data(x):
+    """Iterate over the given evaluation data
+
+    This returns a generator, which generates the batches of samples
+    """
+    if isinstance(x, np.ndarray):
+        yield x
+        return
+    if isinstance(x, tf.Tensor):
+        yield x.numpy()
+        return
+
     if hasattr(x, 'max_samples') and x.max_samples > 0:
         max_samples = x.max_samples
     elif hasattr(x, 'samples') and x.samples > 0:
@@ -674,20 +728,19 @@ def _retrieve_data(x):
     else:
         max_samples = 10000
 
-    for batch_x, _ in x:
-        if len(data) >= max_samples:
-            break
-        for sample in batch_x:
-            data.append(sample)
-            if len(data) >= max_samples:
-                break
-
+    n_samples = 0
     try:
-        x.reset()
-    except:
-        pass
-
-    return np.array(data)
+        for batch_x, _ in x:
+            if n_samples >= max_samples:
+                break
+            batch_x = np.asarray(batch_x)[:max_samples - n_samples]
+            n_samples += len(batch_x)
+            yield batch_x
+    finally:
+        try:
+            x.reset()
+        except:
+            pass
 
 
 def _save_decoded_image(out_path, orig, decoded, score):
@@ -10,6 +10,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from mltk.utils import gpu
 from mltk.utils.python import prepend_exception_msg
+from mltk.utils.npy_writer import NpyStreamWriter
 from .model import (
     model_utils,
     MltkModel,
@@ -120,20 +121,8 @@ class ClassifierEvaluationResults(EvaluationResults):
         if not isinstance(y_pred, np.ndarray):
             y_pred = np.asarray(y_pred)
 
-        if len(y_pred.shape) == 2:
-            if y_pred.shape[1] == 1:
-                y_pred = np.squeeze(y_pred, -1)
-
-        if len(y_pred.shape) == 1:
-            n_classes = 2
-            n_samples = len(y_pred)
-            y_pred_orig = y_pred
-            y_pred = np.zeros((n_samples, n_classes), dtype=np.float32)
-            for i, pred in enumerate(y_pred_orig):
-                class_id = 0 if pred < 0.5 else 1
-                y_pred[i][class_id] = pred
-        else:
-            n_classes = y_pred.shape[1]
+        y_pred = _to_categorical_predictions(y_pred)
+        n_classes = y_pred.shape[1]
 
         if 'classes' not in self or not self['classes']:
             self['classes'] = [str(x) for x in range(n_classes)]
@@ -144,14 +133,40 @@ class ClassifierEvaluationResults(EvaluationResults):
 
         assert len(y) == len(y_pred), 'y and y_pred must have same number of samples'
 
+        metrics = ClassifierMetrics(n_classes=n_classes)
+        metrics.update(y_pred, y)
         self['overall_accuracy'] = calculate_overall_accuracy(y_pred, y)
-        self['class_accuracies'] = calculate_per_class_accuracies(y_pred, y)
-        self['fpr'], self['tpr'], self['roc_auc'], self['roc_thresholds'] = calculate_auc(y_pred, y)
+        self['class_accuracies'] = metrics.class_accuracies
+        self['fpr'], self['tpr'], self['roc_auc'], self['roc_thresholds'] = metrics.roc
         self['roc_auc_avg'] = sum(self['roc_auc']) / n_classes
         self['precision'], self['recall'] = calculate_precision_recall(y_pred, y)
         self['confusion_matrix'] = calculate_confusion_matrix(y_pred, y)
 
 
+    def calculate_from_metrics(self, metrics:'ClassifierMetrics'):
+        """Calculate the evaluation results from accumulated metrics
+
+        This is used by the streaming evaluation mode, see :py:func:`~evaluate_classifier`.
+
+        .. note::
+           Unlike :py:meth:`~calculate`, the precision and recall are calculated at the metric's ROC thresholds
+           and the confusion matrix always includes all of the classes
+
+        Args:
+            metrics: The metrics accumulated over all of the evaluation samples
+        """
+        n_classes = metrics.n_classes
+        if 'classes' not in self or not self['classes']:
+            self['classes'] = [str(x) for x in range(n_classes)]
+
+        self['overall_accuracy'] = metrics.overall_accuracy
+        self['class_accuracies'] = metrics.class_accuracies
+        self['fpr'], self['tpr'], self['roc_auc'], self['roc_thresholds'] = metrics.roc
+        self['roc_auc_avg'] = sum(self['roc_auc']) / n_classes
+        self['precision'], self['recall'] = metrics.precision_recall
+        self['confusion_matrix'] = metrics.confusion_matrix
+
+
     def generate_summary(self) -> str:
         """Generate and return a summary of the results as a string"""
         s = super().generate_summary(include_all=False)
@@ -189,6 +204,8 @@ def evaluate_classifier(
     verbose:bool=False,
     show:bool=False,
     update_archive:bool=True,
+    streaming:bool=False,
+    predictions_dir:str=None,
     **kwargs
 ) -> ClassifierEvaluationResults:
     """Evaluate a trained classification model
@@ -202,6 +219,10 @@ def evaluate_classifier(
         verbose: Enable progress bar
         show: Show the evaluation results diagrams
         update_archive: Update the model archive with the eval results
+        streaming: If true, then the metrics are accumulated batch-by-batch and the predictions are not kept in RAM.
+            This allows for evaluating large datasets with constant memory usage, see :py:meth:`ClassifierEvaluationResults.calculate_from_metrics`
+        predictions_dir: Optional directory where the raw model predictions are written as memory-mapped .npy files:
+            ``y_pred.npy`` and ``y_label.npy``
 
     Returns:
         Dictionary containing evaluation results
@@ -259,6 +280,8 @@ def evaluate_classifier(
             show=show,
             logger=logger,
             update_archive=update_archive,
+            streaming=streaming,
+            predictions_dir=predictions_dir,
         )
 
     finally:
@@ -274,6 +297,8 @@ def evaluate_classifier_with_built_model(
     show:bool=False,
     logger:logging.Logger = None,
     update_archive:bool=True,
+    streaming:bool=False,
+    predictions_dir:str=None,
 ) -> ClassifierEvaluationResults:
     """Evaluate a trained classification model with built model
 
@@ -284,6 +309,8 @@ def evaluate_classifier_with_built_model(
         show: Show the evaluation results diagrams
         update_archive: Update the model archive with the eval results
         logger: Optional python logger
+        streaming: If true, then only accumulate the metrics rather than keeping all of the predictions in RAM
+        predictions_dir: Optional directory where the raw model predictions are written as memory-mapped .npy files
 
     Returns:
         Dictionary containing evaluation results
@@ -298,21 +325,31 @@ def evaluate_classifier_with_built_model(
 
     gpu.initialize(logger=logger)
 
-    y_label, y_pred = generate_predictions(
-        mltk_model=mltk_model,
-        built_model=built_model,
-        verbose=verbose
-    )
-
     results = ClassifierEvaluationResults(
         name=mltk_model.name,
         classes=getattr(mltk_model, 'classes', None)
     )
 
-    results.calculate(
-        y=y_label,
-        y_pred=y_pred,
-    )
+    if streaming:
+        metrics = generate_metrics(
+            mltk_model=mltk_model,
+            built_model=built_model,
+            verbose=verbose,
+            predictions_dir=predictions_dir
+        )
+        results.calculate_from_metrics(metrics)
+
+    else:
+        y_label, y_pred = generate_predictions(
+            mltk_model=mltk_model,
+            built_model=built_model,
+            verbose=verbose,
+            predictions_dir=predictions_dir
+        )
+        results.calculate(
+            y=y_label,
+            y_pred=y_pred,
+        )
 
     eval_results_path = f'{eval_dir}/eval-results.json'
     with open(eval_results_path, 'w') as f:
@@ -346,7 +383,8 @@ def evaluate_classifier_with_built_model(
 def generate_predictions(
     mltk_model: MltkModel,
     built_model:Union[KerasModel, TfliteModel],
-    verbose:bool=None
+    verbose:bool=None,
+    predictions_dir:str=None,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Generate predictions using evaluation data
 
@@ -354,13 +392,89 @@ def generate_predictions(
         mltk_model: MltkModel instance
         built_model: Built/trained Keras or TfliteModel
         verbose: Enable progress bar
+        predictions_dir: Optional directory where the predictions are written as .npy files,
+            in which case the returned arrays are memory-mapped
 
     Returns:
         (y_label, y_pred) The evaluation sample labels and corresponding model predictions
     """
+    if predictions_dir:
+        y_label_writer = NpyStreamWriter(f'{predictions_dir}/y_label.npy', dtype=np.int32)
+        y_pred_writer = NpyStreamWriter(f'{predictions_dir}/y_pred.npy')
+        with y_label_writer, y_pred_writer:
+            for batch_label, batch_pred in iterate_predictions(mltk_model, built_model, verbose=verbose):
+                y_label_writer.write(batch_label)
+                y_pred_writer.write(batch_pred)
+        return y_label_writer.load(), y_pred_writer.load()
+
     y_pred = []
     y_label = []
+    for batch_label, batch_pred in iterate_predictions(mltk_model, built_model, verbose=verbose):
+        y_label.append(batch_label)
+        y_pred.append(batch_pred)
+
+    y_pred = np.concatenate(y_pred)
+    y_label = np.concatenate(y_label).astype(np.int32)
+
+    return y_label, y_pred
+
+
+def generate_metrics(
+    mltk_model: MltkModel,
+    built_model:Union[KerasModel, TfliteModel],
+    verbose:bool=None,
+    predictions_dir:str=None,
+    thresholds:List[float]=None,
+) -> 'ClassifierMetrics':
+    """Generate predictions using evaluation data and accumulate the classification metrics
+
+    Unlike :py:func:`~generate_predictions`, the predictions are not kept in RAM.
+
+    Args:
+        mltk_model: MltkModel instance
+        built_model: Built/trained Keras or TfliteModel
+        verbose: Enable progress bar
+        predictions_dir: Optional directory where the raw predictions are written as memory-mapped .npy files
+        thresholds: Optional list of thresholds used to calculate the ROC
+
+    Returns:
+        The metrics accumulated over all of the evaluation samples
+    """
+    metrics:'ClassifierMetrics' = None
+    y_label_writer = NpyStreamWriter(f'{predictions_dir}/y_label.npy', dtype=np.int32) if predictions_dir else None
+    y_pred_writer = NpyStreamWriter(f'{predictions_dir}/y_pred.npy') if predictions_dir else None
+
+    try:
+        for batch_label, batch_pred in iterate_predictions(mltk_model, built_model, verbose=verbose):
+            if y_pred_writer is not None:
+                y_label_writer.write(batch_label)
+                y_pred_writer.write(batch_pred)
+
+            batch_pred = _to_categorical_predictions(batch_pred)
+            if metrics is None:
+                metrics = ClassifierMetrics(n_classes=batch_pred.shape[1], thresholds=thresholds)
+            metrics.update(batch_pred, batch_label)
+    finally:
+        if y_pred_writer is not None:
+            y_label_writer.close()
+            y_pred_writer.close()
+
+    if metrics is None:
+        raise RuntimeError('No evaluation samples were generated')
+
+    return metrics
+
 
+def iterate_predictions(
+    mltk_model: MltkModel,
+    built_model:Union[KerasModel, TfliteModel],
+    verbose:bool=None
+):
+    """Iterate over the given MltkModel's evaluation data and generate the model's predictions
+
+    This returns a generator, which generates tuples of (batch_label, batch_pred)
+    where batch_label is a 1D array of class ids
+    """
     with get_progbar(mltk_model, verbose) as progbar:
         for batch_x, batch_y in iterate_evaluation_data(mltk_model):
             if isinstance(built_model, KerasModel):
@@ -370,16 +484,15 @@ def generate_predictions(
 
             progbar.update(len(pred))
 
-            y_pred.extend(pred)
-            if batch_y.shape[-1] == 1 or len(batch_y.shape) == 1:
-                y_label.extend(batch_y)
+            batch_y = np.asarray(batch_y)
+            if len(batch_y.shape) == 1:
+                batch_label = batch_y
+            elif batch_y.shape[-1] == 1:
+                batch_label = np.squeeze(batch_y, -1)
             else:
-                y_label.extend(np.argmax(batch_y, -1))
+                batch_label = np.argmax(batch_y, -1)
 
-    y_pred = list_to_numpy_array(y_pred)
-    y_label = np.asarray(y_label, dtype=np.int32)
-
-    return y_label, y_pred
+            yield batch_label, pred
 
 
 def plot_results(
@@ -442,87 +555,190 @@ def calculate_per_class_accuracies(y_pred:np.ndarray, y_label:np.ndarray) -> Lis
 
     Return list of each classes' accuracy
     """
+    metrics = ClassifierMetrics(n_classes=y_pred.shape[1])
+    metrics.update(y_pred, y_label)
+    return metrics.class_accuracies
 
-    n_samples, n_classes = y_pred.shape
-
-    # Initialize array of accuracies
-    accuracies = np.zeros(n_classes)
-
-    # Loop on classes
-    for class_id in range(n_classes):
-        true_positives = 0
-        # Loop on all predictions
-        for i in range(n_samples):
-            # Check if it matches the class that we are working on
-            if y_label[i] == class_id:
-                # Get prediction label
-                y_pred_label = np.argmax(y_pred[i,:])
-                # Check if the prediction is correct
-                if y_pred_label == class_id:
-                    true_positives += 1
-
-        accuracies[class_id] = _safe_divide(true_positives, np.sum(y_label == class_id))
-
-    return accuracies.tolist()
 
-
-def calculate_auc(y_pred:np.ndarray, y_label:np.ndarray, threshold=.01) -> Tuple[float, float, List[float], List[float]]:
+def calculate_auc(
+    y_pred:np.ndarray,
+    y_label:np.ndarray,
+    threshold=.01,
+    thresholds:List[float]=None
+) -> Tuple[float, float, List[float], List[float]]:
     """Classifier ROC AUC calculation
 
     y_pred contains model predictions [n_samples, n_classes]
     y_label list of each correct class id per sample [n_samples]
-    thresholds Optional list of thresholds to consider
+    threshold The step of the linear threshold range: [0, 1]
+    thresholds Optional list of thresholds to consider, this overrides the threshold argument
 
     Return tuple:
     false positive rate, true positive rate, list ROC AUC for each class, list of thresholds
     """
-    n_samples, n_classes = y_pred.shape
-
-    # thresholds, linear range
-    thresholds = np.arange(0.0, 1.01, threshold)
-
-    n_thresholds = len(thresholds)
-
-    # false positive rate
-    fpr = np.zeros((n_classes, n_thresholds))
-    # true positive rate
-    tpr = np.zeros((n_classes, n_thresholds))
-    # area under curve
-    roc_auc = np.zeros(n_classes)
-
-    # get number of positive and negative examples in the dataset
-    for class_item in range(n_classes):
-        # Sum of all true positive answers
-        all_positives = sum(y_label == class_item)
-        # Sum of all true negative answers
-        all_negatives = len(y_label) - all_positives
-
-        # iterate through all thresholds and determine fraction of true positives
-        # and false positives found at this threshold
-        for threshold_item in range(1, n_thresholds):
-            threshold = thresholds[threshold_item]
-            false_positives = 0
-            true_positives = 0
-            for i in range(n_samples):
-                # Check prediction for this threshold
-                if (y_pred[i, class_item] > threshold):
-                    if y_label[i] == class_item:
-                        true_positives += 1
-                    else:
-                        false_positives += 1
-            fpr[class_item, threshold_item] = _safe_divide(false_positives, float(all_negatives))
-            tpr[class_item, threshold_item] = _safe_divide(true_positives, float(all_positives))
-
-            # Force boundary condition
-            fpr[class_item,0] = 1
-            tpr[class_item,0] = 1
+    if thresholds is None:
+        thresholds = np.arange(0.0, 1.01, threshold)
+    metrics = ClassifierMetrics(n_classes=y_pred.shape[1], thresholds=thresholds)
+    metrics.update(y_pred, y_label)
+    return metrics.roc
+
+
+class ClassifierMetrics:
+    """Accumulates the classification metrics of a model's predictions
+
+    The predictions may be given all at once or in batches with :py:meth:`~update`.
+    Only counts are accumulated, so the memory usage does not depend on the number of samples.
+
+    The ROC of all the classes is calculated in a single pass:
+    each prediction is assigned to the bin of the threshold grid that it exceeds
+    (using a binary search of the sorted thresholds), the per-class bin counts are accumulated
+    and the true/false positive counts at every threshold are then the cumulative sums of the bins.
+
+    Args:
+        n_classes: The number of classes
+        thresholds: The sorted thresholds used to calculate the ROC, default is the linear range: [0, 1] with a step of 0.01.
+            NOTE: Like :py:func:`~calculate_auc`, the true and false positive rates of the first threshold are always 1
+    """
+    def __init__(self, n_classes:int, thresholds:List[float]=None):
+        if thresholds is None:
+            thresholds = np.arange(0.0, 1.01, .01)
+        self.n_classes = n_classes
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.n_samples = 0
+        self.n_correct = 0
+        n_bins = len(self.thresholds) + 1
+        # Number of samples of each class
+        self._class_counts = np.zeros((n_classes,), dtype=np.int64)
+        # Number of correctly predicted samples of each class
+        self._class_correct = np.zeros((n_classes,), dtype=np.int64)
+        # [class, bin] number of predictions of the class that exceed the bin's lower thresholds
+        self._all_bins = np.zeros((n_classes, n_bins), dtype=np.int64)
+        # [class, bin] same as above but only for the samples that belong to the class
+        self._positive_bins = np.zeros((n_classes, n_bins), dtype=np.int64)
+        # [actual class, predicted class] number of samples
+        self._confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+
+    def update(self, y_pred:np.ndarray, y_label:np.ndarray):
+        """Accumulate the given batch of predictions
+
+        Args:
+            y_pred: Model predictions [n_samples, n_classes]
+            y_label: The correct class id of each sample [n_samples]
+        """
+        y_pred = np.asarray(y_pred)
+        y_label = np.asarray(y_label).reshape(-1)
+        n_samples, n_classes = y_pred.shape
+        if n_classes != self.n_classes:
+            raise ValueError(f'Expected predictions with {self.n_classes} classes, got {n_classes}')
+        if len(y_label) != n_samples:
+            raise ValueError('y_pred and y_label must have same number of samples')
+
+        n_bins = self._all_bins.shape[1]
+        # Samples with a label outside of the class range do not count towards the class metrics
+        valid = (y_label >= 0) & (y_label < n_classes)
+        if not np.issubdtype(y_label.dtype, np.integer):
+            valid &= np.mod(y_label, 1) == 0
+        valid_labels = y_label[valid].astype(np.int64)
+        y_pred_label = np.argmax(y_pred, axis=1)
+        correct = y_pred_label == y_label
+
+        self.n_samples += n_samples
+        self.n_correct += int(np.sum(correct))
+        self._class_counts += np.bincount(valid_labels, minlength=n_classes)
+        self._class_correct += np.bincount(y_label[valid & correct].astype(np.int64), minlength=n_classes)
+        self._confusion += np.bincount(
+            valid_labels * n_classes + y_pred_label[valid],
+            minlength=n_classes*n_classes
+        ).reshape(n_classes, n_classes)
+
+        # bins[i,c] = the number of thresholds that are less than y_pred[i,c]
+        # i.e. the sample is counted for all of the thresholds with an index less than its bin
+        bins = np.searchsorted(self.thresholds, y_pred.reshape(-1), side='left').reshape(n_samples, n_classes)
+        bins[np.isnan(y_pred)] = 0
+        class_offsets = np.arange(n_classes, dtype=np.int64) * n_bins
+        self._all_bins += np.bincount(
+            (bins + class_offsets).reshape(-1),
+            minlength=n_classes*n_bins
+        ).reshape(n_classes, n_bins)
+        self._positive_bins += np.bincount(
+            bins[valid, valid_labels] + class_offsets[valid_labels],
+            minlength=n_classes*n_bins
+        ).reshape(n_classes, n_bins)
+
+
+    @property
+    def overall_accuracy(self) -> float:
+        """The ratio of correctly predicted samples"""
+        return self.n_correct / self.n_samples
+
+
+    @property
+    def class_accuracies(self) -> List[float]:
+        """List of each classes' accuracy"""
+        accuracies = np.zeros(self.n_classes)
+        for class_id in range(self.n_classes):
+            accuracies[class_id] = _safe_divide(self._class_correct[class_id], self._class_counts[class_id])
+        return accuracies.tolist()
+
+
+    @property
+    def confusion_matrix(self) -> List[List[int]]:
+        """The [actual class, predicted class] confusion matrix"""
+        return self._confusion.tolist()
+
+
+    @property
+    def precision_recall(self) -> Tuple[List[List[float]], List[List[float]]]:
+        """Return the tuple: list of each classes' precision, list of each classes' recall
+
+        These are calculated at each of the thresholds.
+        Like sklearn's ``precision_recall_curve()``, a final precision of 1 and recall of 0 is appended to each list.
+        """
+        true_positives, false_positives = self._get_positive_counts()
+        predicted_positives = true_positives + false_positives
+        all_positives = self._class_counts[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(predicted_positives == 0, 1., true_positives / predicted_positives)
+            recall = np.where(all_positives == 0, 0., true_positives / all_positives)
+
+        precision = np.concatenate((precision, np.ones((self.n_classes, 1))), axis=1)
+        recall = np.concatenate((recall, np.zeros((self.n_classes, 1))), axis=1)
+        return precision.tolist(), recall.tolist()
+
+
+    @property
+    def roc(self) -> Tuple[List[List[float]], List[List[float]], List[float], List[float]]:
+        """Return the tuple: false positive rate, true positive rate, list ROC AUC for each class, list of thresholds"""
+        n_thresholds = len(self.thresholds)
+        true_positives, false_positives = self._get_positive_counts()
+
+        all_positives = self._class_counts.astype(np.float64)
+        all_negatives = self.n_samples - all_positives
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fpr = np.where(all_negatives[:, None] == 0, 0., false_positives / all_negatives[:, None])
+            tpr = np.where(all_positives[:, None] == 0, 0., true_positives / all_positives[:, None])
+
+        # Force boundary condition
+        if n_thresholds > 0:
+            fpr[:, 0] = 1
+            tpr[:, 0] = 1
 
         # calculate area under curve, trapezoid integration
-        for threshold_item in range(len(thresholds)-1):
-            roc_auc[class_item] += .5*(tpr[class_item,threshold_item]+tpr[class_item,threshold_item+1])*(fpr[class_item,threshold_item]-fpr[class_item,threshold_item+1])
+        roc_auc = np.zeros(self.n_classes)
+        for threshold_item in range(n_thresholds-1):
+            roc_auc += .5*(tpr[:,threshold_item]+tpr[:,threshold_item+1])*(fpr[:,threshold_item]-fpr[:,threshold_item+1])
+
+        return fpr.tolist(), tpr.tolist(), roc_auc.tolist(), self.thresholds.tolist()
 
 
-    return fpr.tolist(), tpr.tolist(), roc_auc.tolist(), thresholds.tolist()
+    def _get_positive_counts(self) -> Tuple[np.ndarray,np.ndarray]:
+        # The number of predictions that exceed each threshold
+        # which is the reverse cumulative sum of the bins above the threshold
+        all_exceeding = np.cumsum(self._all_bins[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        true_positives = np.cumsum(self._positive_bins[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        false_positives = all_exceeding - true_positives
+        return true_positives, false_positives
 
 
 def calculate_precision_recall(y_pred:np.ndarray, y_label:np.ndarray) -> Tuple:
@@ -816,6 +1032,23 @@ def _safe_divide(num, dem):
         return num / dem
 
 
+def _to_categorical_predictions(y_pred:np.ndarray) -> np.ndarray:
+    """Convert binary predictions with the shape [n_samples] or [n_samples, 1]
+    to categorical predictions with the shape [n_samples, 2]"""
+    if len(y_pred.shape) == 2:
+        if y_pred.shape[1] == 1:
+            y_pred = np.squeeze(y_pred, -1)
+
+    if len(y_pred.shape) == 1:
+        n_samples = len(y_pred)
+        y_pred_categorical = np.zeros((n_samples, 2), dtype=np.float32)
+        class_ids = np.where(y_pred < 0.5, 0, 1)
+        y_pred_categorical[np.arange(n_samples), class_ids] = y_pred
+        y_pred = y_pred_categorical
+
+    return y_pred
+
+
 def _label_binarize(y_label):
     """This calls label_binarize() but ensures the return value
     always has the shape: [n_samples, n_classes]"""
@@ -34,7 +34,10 @@ def evaluate_model(
     callbacks:List=None,
     update_archive:bool=True,
     test:bool=False,
-    post_process:bool=False
+    post_process:bool=False,
+    streaming:bool=False,
+    predictions_dir:str=None,
+    batch_scoring:bool=False,
 ) -> EvaluationResults:
     """Evaluate a trained model
 
@@ -79,6 +82,14 @@ def evaluate_model(
         update_archive: Update the model archive with the evaluation results
         test: Optional, load the model in "test mode" if true.
         post_process: This allows for post-processing the evaluation results (e.g. uploading to a cloud) if supported by the given MltkModel
+        streaming: If true, then the evaluation data is streamed batch-by-batch through the model
+            and only the accumulated metrics are kept in RAM. This is useful for evaluating large datasets.
+            This is only supported by the :py:class:`mltk.core.EvaluateClassifierMixin` and :py:class:`mltk.core.EvaluateAutoEncoderMixin`.
+            For auto-encoders, the score of each sample is also kept in RAM, see :py:func:`mltk.core.evaluate_autoencoder`
+        predictions_dir: Optional directory where the raw model predictions are written as memory-mapped .npy files.
+            This is only supported by the :py:class:`mltk.core.EvaluateClassifierMixin` and :py:class:`mltk.core.EvaluateAutoEncoderMixin`
+        batch_scoring: If true, then score each batch of samples at once with the vectorized scoring function.
+            This is only supported by the :py:class:`mltk.core.EvaluateAutoEncoderMixin`
 
     Returns:
         Dictionary of evaluation results
@@ -126,7 +137,10 @@ def evaluate_model(
             show=show,
             verbose=verbose,
             callbacks=callbacks,
-            update_archive=update_archive
+            update_archive=update_archive,
+            streaming=streaming,
+            predictions_dir=predictions_dir,
+            batch_scoring=batch_scoring,
         )
 
     elif eval_custom_function is None and isinstance(mltk_model, EvaluateClassifierMixin):
@@ -139,7 +153,9 @@ def evaluate_model(
             show=show,
             verbose=verbose,
             callbacks=callbacks,
-            update_archive=update_archive
+            update_archive=update_archive,
+            streaming=streaming,
+            predictions_dir=predictions_dir,
         )
 
     elif isinstance(mltk_model, EvaluateMixin):
@@ -100,6 +100,27 @@ else:
     corr_loss_func = None
 
 
+# The following functions score a batch of samples at once,
+# i.e. they return a 1D array with a score for each sample in the batch
+def _sample_axes(x:np.ndarray) -> tuple:
+    return tuple(range(1, len(x.shape)))
+
+mse_batch_score_func = lambda y_true, y_pred: np.mean((y_true - y_pred) ** 2, axis=_sample_axes(y_true))
+
+def mae_batch_score_func(y_true:np.ndarray, y_pred:np.ndarray) -> np.ndarray:
+    # NOTE: The last axis is reduced first, the same as mae_loss_func()
+    scores = np.mean(np.abs(y_pred - y_true), axis=-1)
+    if len(scores.shape) > 1:
+        scores = np.mean(scores, axis=_sample_axes(scores))
+    return scores
+
+
+if _have_tfp:
+    corr_batch_score_func = lambda y_true, y_pred: np.asarray(corr_loss_func(y_true, y_pred)).reshape(len(y_true))
+else:
+    corr_batch_score_func = None
+
+
 def ssim_loss_func(y_true, y_pred):
     # https://www.tensorflow.org/api_docs/python/tf/image/ssim
     # NOTE:
@@ -15,6 +15,14 @@ from .model_utils import (
     list_mltk_models,
     load_tflite_or_keras_model,
     load_tflite_model,
-    KerasModel,
+    is_keras_model,
 )
 
+
+def __getattr__(name:str):
+    # NOTE: The KerasModel is imported on first access
+    #       so that importing this package does not import Tensorflow
+    if name == 'KerasModel':
+        from . import model_utils
+        return model_utils.KerasModel
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
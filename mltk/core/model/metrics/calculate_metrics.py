@@ -1,24 +1,27 @@
-from typing import Union
+from typing import Union, TYPE_CHECKING
 import logging
 
-from tensorflow.keras.layers import Layer as KerasLayer
-from tensorflow.keras.models import Model as KerasModel 
-
 from mltk.core import (TfliteLayer, TfliteModel)
 from mltk.utils.logger import DummyLogger
 
+from ..model_utils import is_keras_model
+
 from .layers import load_layers, parse_layer
 from .layers.layer import LayerMetrics
 
+if TYPE_CHECKING:
+    from tensorflow.keras.layers import Layer as KerasLayer
+    from tensorflow.keras.models import Model as KerasModel
+
 
 def calculate_model_metrics(
-    model: Union[TfliteModel, KerasModel], 
+    model: Union[TfliteModel, 'KerasModel'], 
     logger:logging.Logger=None
 ) -> dict:
     """Calculate the MACs/OPs required by given KerasModel or TfliteModel model"""
     load_layers() 
 
-    if not isinstance(model, (TfliteModel, KerasModel)):
+    if not (isinstance(model, TfliteModel) or is_keras_model(model)):
         raise Exception('Model must be an instance of a TfliteModel or KerasModel')
 
     logger = logger or DummyLogger()
@@ -28,7 +31,7 @@ def calculate_model_metrics(
 
     def _process_model_layers(model):
         for model_layer in model.layers:
-            if isinstance(model_layer, KerasModel):
+            if is_keras_model(model_layer):
                 _process_model_layers(model_layer)
                 continue
 
@@ -49,7 +52,7 @@ def calculate_model_metrics(
     )
 
 
-def calculate_layer_metrics(layer: Union[TfliteLayer, KerasLayer]) -> LayerMetrics:
+def calculate_layer_metrics(layer: Union[TfliteLayer, 'KerasLayer']) -> LayerMetrics:
     """Calculate the metrics for the given KerasLayer or TfliteLayer
     Return LayerMetrics(0,0) if the layer is not supported
     """
@@ -3,14 +3,13 @@ import copy
 from typing import Union
 
 
-from tensorflow.keras.layers import Layer as KerasLayer
 from mltk.core import TfliteLayer
 
-from .layer import Layer, SUPPORTED_LAYERS
+from .layer import Layer, SUPPORTED_LAYERS, is_keras_layer
 
 
-def parse_layer(model_layer: Union[TfliteLayer, KerasLayer]) -> Layer:
-    if isinstance(model_layer, KerasLayer):
+def parse_layer(model_layer: Union[TfliteLayer, 'KerasLayer']) -> Layer:
+    if is_keras_layer(model_layer):
         opcode = model_layer.__class__.__name__
     else:
         opcode = model_layer.opcode
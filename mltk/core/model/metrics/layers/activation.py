@@ -1,6 +1,6 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class Activation(Layer):
@@ -8,9 +8,9 @@ class Activation(Layer):
     def __init__(self):
         Layer.__init__(self, 'Activation')
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             output_shape = layer.output_shape
         else:
             output_shape = layer.outputs[0].shape
@@ -23,9 +23,9 @@ class ReLU(Layer):
     def __init__(self):
         Layer.__init__(self, ('ReLU', BuiltinOperator.RELU))
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             output_shape = layer.output_shape
         else:
             output_shape = layer.outputs[0].shape
@@ -38,10 +38,10 @@ class Softmax(Layer):
     def __init__(self):
         Layer.__init__(self, ('Softmax', BuiltinOperator.SOFTMAX))
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
 
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             input_shape = layer.input_shape
         else:
             input_shape = layer.inputs[0].shape
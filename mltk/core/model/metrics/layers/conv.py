@@ -2,7 +2,7 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
 from mltk.core import TfliteConv2dLayer
-from .layer import Layer, KerasLayer, TfliteLayer
+from .layer import Layer, TfliteLayer
 
 
 class Conv2D(Layer):
@@ -11,7 +11,7 @@ class Conv2D(Layer):
         Layer.__init__(self, ('Conv2D', BuiltinOperator.CONV_2D))
         
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         if isinstance(layer, TfliteConv2dLayer):
             _, _, _, in_depth = layer.input_data.shape
             _, out_h, out_w, out_depth = layer.output_data.shape
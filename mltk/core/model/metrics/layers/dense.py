@@ -1,7 +1,7 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
 from mltk.core import TfliteFullyConnectedLayer
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class Dense(Layer):
@@ -10,7 +10,7 @@ class Dense(Layer):
         Layer.__init__(self, ('Dense', BuiltinOperator.FULLY_CONNECTED))
     
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         bias_ops = 0
         if isinstance(layer, TfliteFullyConnectedLayer):
             in_depth = layer.input_data.shape[-1]
@@ -34,9 +34,9 @@ class DenseTransposeShared(Layer):
         Layer.__init__(self,'DenseTransposeShared')
     
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         bias_ops = 0
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             in_depth = layer.input_shape[-1]
             out_depth = layer.output_shape[-1]
             if layer.use_bias:
@@ -1,7 +1,7 @@
 from typing import Union
 from mltk.core import TfliteDepthwiseConv2dLayer
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, KerasLayer, TfliteLayer
+from .layer import Layer, TfliteLayer
 
 
 class DepthwiseConv2D(Layer):
@@ -10,7 +10,7 @@ class DepthwiseConv2D(Layer):
         Layer.__init__(self, ('DepthwiseConv2D', BuiltinOperator.DEPTHWISE_CONV_2D))
         
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         if isinstance(layer, TfliteDepthwiseConv2dLayer):
             _, _, _, in_depth = layer.input_data.shape
             _, out_h, out_w, out_depth = layer.output_data.shape
@@ -1,9 +1,11 @@
-from typing import Union
+from typing import Union, TYPE_CHECKING
 from abc import ABC, abstractmethod
 from collections import namedtuple
 
 from mltk.core import TfliteLayer
-from tensorflow.keras.layers import Layer as KerasLayer
+
+if TYPE_CHECKING:
+    from tensorflow.keras.layers import Layer as KerasLayer
 
 
 SUPPORTED_LAYERS = []
@@ -40,10 +42,19 @@ class Layer(ABC):
 
 
     @abstractmethod
-    def process(self, layer:Union[TfliteLayer, KerasLayer]):
+    def process(self, layer:Union[TfliteLayer, 'KerasLayer']):
         pass
     
     
+def is_keras_layer(layer) -> bool:
+    """Return if the given layer is a KerasLayer
+
+    NOTE: The layers are either a TfliteLayer or KerasLayer,
+    so Tensorflow does not need to be imported to check the layer's type
+    """
+    return not isinstance(layer, TfliteLayer)
+
+
 def flat_size(shape : list):
     out = 1
     for k in shape:
@@ -1,6 +1,6 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class Multiply(Layer):
@@ -8,10 +8,10 @@ class Multiply(Layer):
     def __init__(self):
         Layer.__init__(self, ('Multiply', BuiltinOperator.MUL))
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
         self.macs = 0
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             output_shape = layer.output_shape
         else:
             output_shape = layer.outputs[0].shape
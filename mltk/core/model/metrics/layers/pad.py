@@ -1,7 +1,7 @@
 
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class Pad(Layer):
@@ -9,13 +9,13 @@ class Pad(Layer):
     def __init__(self):
         Layer.__init__(self, ('Pad', BuiltinOperator.PAD, BuiltinOperator.PADV2))
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
         self.macs = 0
         # https://github.com/tensorflow/tflite-micro/blob/main/tensorflow/lite/kernels/internal/reference/pad.h
         # 1 mv
         # 10/2 =  5 comparisions
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             if isinstance(layer.output_shape[0], int):
                 shape = layer.output_shape
             else:
@@ -1,6 +1,6 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class AveragePooling2D(Layer):
@@ -8,10 +8,10 @@ class AveragePooling2D(Layer):
     def __init__(self):
         Layer.__init__(self, ('AveragePooling2D', BuiltinOperator.AVERAGE_POOL_2D))
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         f_h, f_w  = layer.pool_size
         self.name = layer.name
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             output_shape = layer.output_shape
         else:
             output_shape = layer.outputs[0].shape
@@ -26,10 +26,10 @@ class MaxPooling2D(Layer):
     def __init__(self):
         Layer.__init__(self, ('MaxPooling2D', BuiltinOperator.MAX_POOL_2D))
         
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         f_h, f_w  = layer.pool_size
         self.name = layer.name
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             output_shape = layer.output_shape
         else:
             output_shape = layer.outputs[0].shape
@@ -1,6 +1,6 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
-from .layer import Layer, flat_size, KerasLayer, TfliteLayer
+from .layer import Layer, flat_size, TfliteLayer, is_keras_layer
 
 
 class Quantize(Layer):
@@ -8,7 +8,7 @@ class Quantize(Layer):
     def __init__(self):
         Layer.__init__(self, ('Quantize', BuiltinOperator.QUANTIZE))
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
         self.macs = 0
         # https://github.com/tensorflow/tflite-micro/blob/main/tensorflow/lite/kernels/internal/reference/quantize.h#L31
@@ -16,7 +16,7 @@ class Quantize(Layer):
         # 1 add
         # 1 min
         # 1 max
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             input_shape = layer.input_shape
         else:
             input_shape = layer.inputs[0].shape
@@ -29,14 +29,14 @@ class Dequantize(Layer):
     def __init__(self):
         Layer.__init__(self, ('Dequantize', BuiltinOperator.DEQUANTIZE))
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
         self.macs = 0
         # https://github.com/tensorflow/tflite-micro/blob/main/tensorflow/lite/kernels/internal/reference/dequantize.h
         # 1 multiply
         # 1 substract
 
-        if isinstance(layer, KerasLayer):
+        if is_keras_layer(layer):
             input_shape = layer.input_shape
         else:
             input_shape = layer.inputs[0].shape
@@ -1,7 +1,7 @@
 from typing import Union
 from mltk.core.tflite_model.tflite_schema import BuiltinOperator
 from mltk.core import TfliteReshapeLayer
-from .layer import Layer, KerasLayer, TfliteLayer
+from .layer import Layer, TfliteLayer
 
 
 class Reshape(Layer):
@@ -9,7 +9,7 @@ class Reshape(Layer):
     def __init__(self):
         Layer.__init__(self, ('Reshape', BuiltinOperator.RESHAPE))
     
-    def process(self, layer:Union[TfliteLayer,KerasLayer]):
+    def process(self, layer:Union[TfliteLayer,'KerasLayer']):
         self.name = layer.name
         self.macs = 0
         self.ops = 0
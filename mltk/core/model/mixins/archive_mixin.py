@@ -1,9 +1,14 @@
 
 import os 
 import zipfile
+import contextlib
+import threading
+import collections
+from typing import Iterator, Dict, Tuple
 
 import mltk
 from mltk.utils.path import (create_tempdir, remove_directory, fullpath)
+from mltk.utils.zip_updater import ZipUpdater
 from mltk.core.utils import (get_mltk_logger, ArchiveFileNotFoundError)
 from .base_mixin import BaseMixin
 from ..model_attributes import MltkModelAttributesDecorator
@@ -12,6 +17,14 @@ from ..model_attributes import MltkModelAttributesDecorator
 ARCHIVE_EXTENSION = '.mltk.zip'
 TEST_ARCHIVE_EXTENSION = '-test.mltk.zip'
 
+# The maximum total size in bytes of the archive files cached by read_file()
+ARCHIVE_CACHE_MAX_SIZE = 512*1024*1024
+
+_archive_cache_lock = threading.Lock()
+# (archive path, file name) -> ((archive mtime, archive size), file data)
+_archive_cache:Dict[Tuple[str,str],Tuple[Tuple[int,int],bytes]] = collections.OrderedDict()
+_archive_cache_size = 0
+
 
 @MltkModelAttributesDecorator()
 class ArchiveMixin(BaseMixin):
@@ -22,12 +35,25 @@ class ArchiveMixin(BaseMixin):
         return f'{os.path.dirname(self.model_specification_path)}/{self.name}{get_archive_extension(test=self.test_mode_enabled)}'
 
     
+    @property
+    def h5_archive_name(self) -> str:
+        """Return the name of the .h5 model file in the model archive file (.mdk.zip)"""
+        ext = '.test.h5' if self.test_mode_enabled else '.h5' 
+        return self.name + ext
+
+
+    @property
+    def tflite_archive_name(self) -> str:
+        """Return the name of the .tflite model file in the model archive file (.mdk.zip)"""
+        ext = '.test.tflite' if self.test_mode_enabled else '.tflite' 
+        return self.name + ext
+
+
     @property
     def h5_archive_path(self):
         """Return path to .h5 model file automatically extracted from model archive file (.mdk.zip)"""
         try:
-            ext = '.test.h5' if self.test_mode_enabled else '.h5' 
-            return self.get_archive_file(self.name + ext)
+            return self.get_archive_file(self.h5_archive_name)
         except ArchiveFileNotFoundError:
             # pylint: disable=raise-missing-from
             raise ArchiveFileNotFoundError(
@@ -39,8 +65,39 @@ class ArchiveMixin(BaseMixin):
     def tflite_archive_path(self):
         """Return path to .tflite model file automatically extracted from model's archive file (.mdk.zip)"""
         try:
-            ext = '.test.tflite' if self.test_mode_enabled else '.tflite' 
-            return self.get_archive_file(self.name + ext)
+            return self.get_archive_file(self.tflite_archive_name)
+        except ArchiveFileNotFoundError:
+            # pylint: disable=raise-missing-from
+            raise ArchiveFileNotFoundError(
+                f'Failed to get .tflite file from model archive: {self.archive_path}\n' \
+                'Has the model been trained and quantized first?' ) 
+
+
+    @property
+    def h5_archive_data(self) -> bytes:
+        """Return the contents of the .h5 model file in the model archive file (.mdk.zip)
+        
+        The file is read directly from the archive (i.e. it is not extracted to the filesystem), see :py:meth:`~read_archive_file`
+
+        .. note:: Keras only loads models from a file path, so :py:func:`mltk.core.load_tflite_or_keras_model` uses :py:attr:`~h5_archive_path` instead
+        """
+        try:
+            return self.read_archive_file(self.h5_archive_name)
+        except ArchiveFileNotFoundError:
+            # pylint: disable=raise-missing-from
+            raise ArchiveFileNotFoundError(
+                f'Failed to get .h5 file from model archive: {self.archive_path}\n' \
+                'Has the model been trained first?') 
+
+
+    @property
+    def tflite_archive_data(self) -> bytes:
+        """Return the contents of the .tflite model file in the model archive file (.mdk.zip)
+        
+        The file is read directly from the archive (i.e. it is not extracted to the filesystem), see :py:meth:`~read_archive_file`
+        """
+        try:
+            return self.read_archive_file(self.tflite_archive_name)
         except ArchiveFileNotFoundError:
             # pylint: disable=raise-missing-from
             raise ArchiveFileNotFoundError(
@@ -77,6 +134,14 @@ class ArchiveMixin(BaseMixin):
         return extract_file(self.archive_path, name=name, dest_dir=dest_dir)
 
 
+    def read_archive_file(self, name: str) -> bytes:
+        """Return the contents of a file in the model's archive file without extracting it to the filesystem
+
+        The contents are cached in RAM until the archive is updated, see :py:func:`read_file`
+        """
+        return read_file(self.archive_path, name=name)
+
+
     def get_archive_dir(self, name: str, dest_dir:str = None) -> str:
         """Extract a directory from the model's archive file"""
         if dest_dir is None:
@@ -85,22 +150,27 @@ class ArchiveMixin(BaseMixin):
         return extract_dir(self.archive_path, name=name, dest_dir=dest_dir)
 
 
-    def add_archive_file(self, name):
-        """Add given log file in the log directory to the model archive"""
+    def add_archive_file(self, name, store:bool=None):
+        """Add given log file in the log directory to the model archive
+
+        Args:
+            name: Path to the file or the keyword ``__mltk_model_spec__`` to add the model specification script
+            store: If true then store the file without compression (e.g. the file is already compressed).
+                If None then this is determined by the file's extension
+        """
 
         name = name.replace('\\', '/')
 
         if name == '__mltk_model_spec__':
             with open(self.model_specification_path, 'r') as fp:
                 model_spec_data = fp.read()
-            
-            tmp_model_spec_path = create_tempdir('scratch') + f'/{self.name}.py'
-            with open(tmp_model_spec_path, 'w') as fp:
-                fp.write(f"__mltk_version__ = '{mltk.__version__}'\n\n")
-                fp.write(model_spec_data)
 
-            file_path = tmp_model_spec_path
-            arcname = os.path.basename(file_path)
+            with self.batch_archive_updates() as updater:
+                updater.add_data(
+                    f'{self.name}.py',
+                    f"__mltk_version__ = '{mltk.__version__}'\n\n" + model_spec_data
+                )
+            return
 
         elif name.startswith(self.log_dir):
             name = name.replace(f'{self.log_dir}/', '')
@@ -112,11 +182,9 @@ class ArchiveMixin(BaseMixin):
 
         if not os.path.exists(file_path):
             raise FileNotFoundError(f'File not found: {file_path}')
-      
-        zip_fp = self._create_archive(exclude=[arcname])
-        get_mltk_logger().debug(f'Archiving {file_path} -> {arcname}')
-        zip_fp.write(file_path, arcname=arcname)
-        zip_fp.close()
+
+        with self.batch_archive_updates() as updater:
+            updater.add_file(file_path, arcname=arcname, store=store)
  
 
     def add_archive_dir(self, base_dir, create_new=False, recursive=False):
@@ -124,47 +192,51 @@ class ArchiveMixin(BaseMixin):
 
         search_dir = f'{self.log_dir}/{base_dir}'
 
-        src_paths = []
-        arcnames = []
-        for root, _, files in os.walk(search_dir):
-            for fn in files:
-                src_path = f'{root}/{fn}'.replace('\\', '/')
-                arcname = os.path.relpath(src_path, self.log_dir).replace('\\', '/')
-                src_paths.append(src_path)
-                arcnames.append(arcname)
-            
-            if not recursive:
-                break
-
-        zip_fp = self._create_archive(create_new=create_new, exclude=arcnames)
-        for i, src_path in enumerate(src_paths):
-            zip_fp.write(src_path, arcname=arcnames[i])
-        zip_fp.close()
-    
-
-    def _create_archive(self, create_new=False, exclude=None):
-        if exclude is None:
-            exclude = []
-        
-        if not create_new and os.path.exists(self.archive_path):
-            tmp_dir = create_tempdir(f'tmp_archives/{self.name}')
-            remove_directory(tmp_dir)
-            with zipfile.ZipFile(self.archive_path, 'r') as zip_fp:
-                members = [x for x in zip_fp.namelist() if x not in exclude]
-                zip_fp.extractall(tmp_dir, members=members)
-            
-            zip_fp = zipfile.ZipFile(self.archive_path, 'w', zipfile.ZIP_DEFLATED)
-            for root, _, files in os.walk(tmp_dir):
+        with self.batch_archive_updates(create_new=create_new) as updater:
+            for root, _, files in os.walk(search_dir):
                 for fn in files:
-                    src_path = f'{root}/{fn}'
-                    arcname = os.path.relpath(src_path, tmp_dir).replace('\\', '/')
-                    zip_fp.write(src_path, arcname=arcname)
-
-            remove_directory(tmp_dir)
-        else:
-            zip_fp = zipfile.ZipFile(self.archive_path, 'w', zipfile.ZIP_DEFLATED)
-
-        return zip_fp
+                    src_path = f'{root}/{fn}'.replace('\\', '/')
+                    arcname = os.path.relpath(src_path, self.log_dir).replace('\\', '/')
+                    updater.add_file(src_path, arcname=arcname)
+
+                if not recursive:
+                    break
+
+
+    @contextlib.contextmanager
+    def batch_archive_updates(self, create_new=False) -> Iterator[ZipUpdater]:
+        """Batch the model archive updates
+
+        All of the :py:meth:`~add_archive_file` and :py:meth:`~add_archive_dir` calls made within this context
+        are written to the model archive with a single update when the outermost context exits.
+        The existing archive members are not re-compressed, see :py:class:`mltk.utils.zip_updater.ZipUpdater`.
+
+        .. highlight:: python
+        .. code-block:: python
+
+            with mltk_model.batch_archive_updates():
+                mltk_model.add_archive_file('__mltk_model_spec__')
+                mltk_model.add_archive_dir('train')
+
+        Args:
+            create_new: If true, then discard the existing archive members (and any previously batched updates)
+        """
+        updater:ZipUpdater = getattr(self, '_archive_updater', None)
+        if updater is not None:
+            if create_new:
+                updater.clear()
+                updater.create_new = True
+            yield updater
+            return
+
+        updater = ZipUpdater(self.archive_path, create_new=create_new)
+        self._archive_updater = updater
+        try:
+            yield updater
+            updater.commit()
+        finally:
+            self._archive_updater = None
+            clear_archive_cache(self.archive_path)
 
 
 
@@ -212,6 +284,74 @@ def extract_file(archive_path: str, name: str, dest_dir:str = None) -> str:
     return extracted_path
 
 
+def read_file(archive_path: str, name: str, cache:bool=True) -> bytes:
+    """Return the contents of a file in the given archive without extracting it to the filesystem
+
+    The returned data may be given directly to :py:class:`mltk.core.TfliteModel` or wrapped with ``memoryview()``
+    to access it without copying.
+
+    .. note:: Only the .tflite model is loaded from the in-memory data, see :py:func:`mltk.core.load_tflite_or_keras_model`.
+       Keras only loads models from a file path, so the Keras .h5 model is always extracted to the filesystem
+
+    The file contents are cached per-process. The cache is keyed by the archive's path,
+    modification time and size, so a cached file is automatically re-read after the archive is updated.
+    The least recently used files are discarded once the cache exceeds ``ARCHIVE_CACHE_MAX_SIZE`` bytes.
+
+    Args:
+        archive_path: Path to the archive
+        name: Name of the file in the archive
+        cache: If false then the file is always read from the archive and it is not added to the cache
+
+    Returns:
+        The file's contents
+    """
+    archive_path = fullpath(archive_path)
+
+    try:
+        st = os.stat(archive_path)
+    except FileNotFoundError:
+        raise ArchiveFileNotFoundError(f'Archive file not found: {archive_path}.\nHas the model been trained first?') # pylint: disable=raise-missing-from
+
+    key = (archive_path, name)
+    version = (st.st_mtime_ns, st.st_size)
+
+    if cache:
+        with _archive_cache_lock:
+            entry = _archive_cache.get(key)
+            if entry is not None and entry[0] == version:
+                _archive_cache.move_to_end(key)
+                return entry[1]
+
+    with zipfile.ZipFile(archive_path, 'r') as fp:
+        try:
+            fp.getinfo(name)
+        except KeyError:
+            raise ArchiveFileNotFoundError(f'No file named {name} in {archive_path}') # pylint: disable=raise-missing-from
+
+        get_mltk_logger().debug(f'Reading {name} from {archive_path}')
+        data = fp.read(name)
+
+    if cache:
+        _add_to_archive_cache(key, version, data)
+
+    return data
+
+
+def clear_archive_cache(archive_path: str=None):
+    """Discard the files cached by :py:func:`read_file`
+
+    Args:
+        archive_path: Only discard the files of the given archive, if omitted then discard all cached files
+    """
+    global _archive_cache_size # pylint: disable=global-statement
+
+    archive_path = fullpath(archive_path) if archive_path else None
+    with _archive_cache_lock:
+        for key in list(_archive_cache.keys()):
+            if archive_path is None or key[0] == archive_path:
+                _archive_cache_size -= len(_archive_cache.pop(key)[1])
+
+
 def extract_dir(archive_path: str, name: str, dest_dir: str=None) -> str:
     """Extract a directory from the give archive"""
 
@@ -235,3 +375,25 @@ def extract_dir(archive_path: str, name: str, dest_dir: str=None) -> str:
                 dst.write(fp.read(fn.filename))
 
     return f'{dest_dir}/{name}'
+
+
+
+def _add_to_archive_cache(key:Tuple[str,str], version:Tuple[int,int], data:bytes):
+    global _archive_cache_size # pylint: disable=global-statement
+
+    if len(data) > ARCHIVE_CACHE_MAX_SIZE:
+        return
+
+    with _archive_cache_lock:
+        # Discard the entry of the previous version of the archive (if any)
+        entry = _archive_cache.pop(key, None)
+        if entry is not None:
+            _archive_cache_size -= len(entry[1])
+
+        _archive_cache[key] = (version, data)
+        _archive_cache_size += len(data)
+
+        # Discard the least recently used entries
+        while _archive_cache_size > ARCHIVE_CACHE_MAX_SIZE:
+            _, (_, old_data) = _archive_cache.popitem(last=False)
+            _archive_cache_size -= len(old_data)
@@ -1,6 +1,8 @@
 
 from typing import Callable, List
 
+import numpy as np
+
 
 from .evaluate_classifier_mixin import EvaluateClassifierMixin
 from ..model_attributes import MltkModelAttributesDecorator, CallableType
@@ -31,6 +33,27 @@ class EvaluateAutoEncoderMixin(EvaluateClassifierMixin):
         self._attributes['eval_autoencoder.scoring_function'] = v
 
 
+    @property
+    def batch_scoring_function(self) -> Callable:
+        """The auto-encoder scoring function used to score a batch of samples at once
+
+        This function has the signature: ``scores = batch_scoring_function(batch_x, batch_decoded)``
+        and should return a 1D array with a score for each sample in the batch.
+
+        If this is given, or if ``batch_scoring=True`` is given to :py:func:`mltk.core.evaluate_autoencoder`,
+        then each batch is scored at once. Otherwise, each sample is scored with the `scoring_function`.
+
+        If `None`, then the `scoring_function` is invoked for each sample of the batch.
+        If both are `None`, then a vectorized version of the `mltk_model.loss` function is used.
+
+        Default: `None`
+        """
+        return self._attributes.get_value('eval_autoencoder.batch_scoring_function', default=None)
+    @batch_scoring_function.setter
+    def batch_scoring_function(self, v: Callable):
+        self._attributes['eval_autoencoder.batch_scoring_function'] = v
+
+
     @property
     def eval_classes(self) -> List[str]:
         """List if classes to use for evaluation.
@@ -75,6 +98,55 @@ class EvaluateAutoEncoderMixin(EvaluateClassifierMixin):
             )
 
 
+    def get_batch_scoring_function(self, batch_scoring:bool=True) -> Callable:
+        """Return the scoring function used to score a batch of samples during evaluation
+
+        The returned function has the signature: ``scores = func(batch_x, batch_decoded)``
+        and returns a 1D float32 array with a score for each sample in the batch.
+
+        Args:
+            batch_scoring: If true and the `scoring_function` is not given, then return a vectorized version of the `mltk_model.loss` function.
+                Otherwise, each sample is individually scored with :py:meth:`~get_scoring_function`.
+                The `batch_scoring_function` is always returned if it is given.
+        """
+        from mltk.core.keras.losses import (
+            Correlation,
+            MeanSquaredError,
+            MeanAbsoluteError,
+            mse_batch_score_func,
+            corr_batch_score_func,
+            mae_batch_score_func
+        )
+
+        if self.batch_scoring_function is not None:
+            return self.batch_scoring_function
+
+        if self.scoring_function is not None or not batch_scoring:
+            scoring_function = self.get_scoring_function()
+            def _score_each_sample(batch_x, batch_decoded):
+                scores = np.empty((len(batch_x),), dtype=np.float32)
+                for i, (x, decoded) in enumerate(zip(batch_x, batch_decoded)):
+                    scores[i] = scoring_function(x, decoded)
+                return scores
+            return _score_each_sample
+
+        loss = self.loss
+        if loss in ('mse', 'mean_squared_error') or isinstance(loss, MeanSquaredError):
+            return mse_batch_score_func
+        elif loss in ('mae', 'mean_absolute_error') or isinstance(loss, MeanAbsoluteError):
+            return mae_batch_score_func
+        elif loss in ('corr', 'correlation') or isinstance(loss, Correlation):
+            if not corr_batch_score_func:
+                raise RuntimeError('Failed to get correlation loss function, ensure the Tensorflow-Probability package is properly installed')
+            return corr_batch_score_func
+        else:
+            raise RuntimeError(
+                'Only model loss functions: "mse", "mae", "corr" are supported by default.\n'
+                'You must specify mltk_model.batch_scoring_function or mltk_model.scoring_function for your model'
+            )
+
+
     def _register_attributes(self):
         self._attributes.register('eval_autoencoder.scoring_function', dtype=CallableType)
+        self._attributes.register('eval_autoencoder.batch_scoring_function', dtype=CallableType)
         self._attributes.register('eval_autoencoder.classes', dtype=(list,tuple))
\ No newline at end of file
@@ -177,7 +177,7 @@ def evaluate_streaming_classifier(
     """Custom callback to evaluate the trained model
     """
     from mltk.core import MltkModel
-    from mltk.core.tflite_model import TfliteModel
+    from mltk.core.tflite_model import TfliteModel, TfliteStreamRunner
     from mltk.core.evaluate_classifier import (
         ClassifierEvaluationResults,
         get_progbar,
@@ -198,48 +198,46 @@ def evaluate_streaming_classifier(
 
     built_model:TfliteModel = built_model
     non_streaming_tflite_path = mltk_model.non_streaming_tflite_log_dir_path
-    non_stream_tflite_path = mltk_model.get_archive_file(os.path.basename(non_streaming_tflite_path))
-    non_stream_tflite = TfliteModel.load_flatbuffer_file(non_stream_tflite_path)
+    non_stream_tflite = TfliteModel(
+        flatbuffer_data=mltk_model.read_archive_file(os.path.basename(non_streaming_tflite_path))
+    )
+
+    # NOTE: The state outputs 1..N-1 of the streaming model are fed back into the state inputs 1..N-1
+    stream_runner = TfliteStreamRunner(
+        built_model,
+        state_mapping={i: i for i in range(1, built_model.n_outputs - 1)},
+        interpreter_kwargs=dict(
+            experimental_op_resolver_type=tf.lite.experimental.OpResolverType.BUILTIN_REF
+        )
+    )
 
     stream_y_pred = []
     non_stream_y_pred = []
     y_label = []
 
-    with get_progbar(mltk_model, verbose=True) as progbar:
-        for batch_x, batch_y in iterate_evaluation_data(mltk_model):
-            if batch_y.shape[-1] == 1 or len(batch_y.shape) == 1:
-                y_label.extend(batch_y)
-            else:
-                y_label.extend(np.argmax(batch_y, -1))
+    try:
+        with get_progbar(mltk_model, verbose=True) as progbar:
+            for batch_x, batch_y in iterate_evaluation_data(mltk_model):
+                if batch_y.shape[-1] == 1 or len(batch_y.shape) == 1:
+                    y_label.extend(batch_y)
+                else:
+                    y_label.extend(np.argmax(batch_y, -1))
 
-            non_stream_pred = non_stream_tflite.predict(batch_x, y_dtype=np.float32)
-            non_stream_y_pred.extend(non_stream_pred)
+                non_stream_pred = non_stream_tflite.predict(batch_x, y_dtype=np.float32)
+                non_stream_y_pred.extend(non_stream_pred)
 
-            interpreter_kwargs = dict(
-                experimental_op_resolver_type=tf.lite.experimental.OpResolverType.BUILTIN_REF
-            )
+                # Stream each sample of the batch, row-by-row, through the streaming model
+                stream_y_pred.extend(stream_runner.run(batch_x, y_dtype=np.float32))
 
-            for x in batch_x:
-                init_state = []
-                for inp in built_model.inputs[1:-1]:
-                    init_state.append(np.zeros(inp.shape[1:], dtype=inp.dtype))
-
-                for i, row_x in enumerate(x):
-                    # if i == 0:
-                    #     d = [np.expand_dims(row_x, axis=0), *init_state]
-                    # else:
-                    #     d = {0: np.expand_dims(row_x, axis=0)}
-                    d = [np.expand_dims(row_x, axis=0), *init_state]
-                    res = built_model.predict(d, interpreter_kwargs=interpreter_kwargs)
-                    init_state = res[1:-1]
-
-                # Convert the data type to float32
-                y_pred = res[0]
-                y_pred = built_model.dequantize_output_to_float32(y_pred, output_index=0)
-                stream_y_pred.append(y_pred)
-
-            progbar.update(len(non_stream_pred))
+                progbar.update(len(non_stream_pred))
+    finally:
+        stream_runner.close()
 
+    latency = stream_runner.get_latency_summary()
+    logger.info(
+        f'Streaming model latency per step: mean={latency["mean_ms"]:.3f}ms, p50={latency["p50_ms"]:.3f}ms, ' \
+        f'p95={latency["p95_ms"]:.3f}ms, max={latency["max_ms"]:.3f}ms ({latency["steps"]} steps)'
+    )
 
     y_label = np.asarray(y_label, dtype=np.int32)
     non_stream_y_pred = list_to_numpy_array(non_stream_y_pred)
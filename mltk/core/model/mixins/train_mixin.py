@@ -1,5 +1,5 @@
 
-from typing import Union, Callable, List
+from typing import Union, Callable, List, TYPE_CHECKING
 import re
 import os
 import logging
@@ -9,7 +9,9 @@ from mltk.utils.python import DefaultDict
 from mltk.core.training_results import TrainingResults
 from .base_mixin import BaseMixin
 from ..model_attributes import MltkModelAttributesDecorator, CallableType, DictType
-from ..model_utils import KerasModel
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model as KerasModel
 
 
 @MltkModelAttributesDecorator()
@@ -84,7 +86,7 @@ class TrainMixin(BaseMixin):
 
 
     @property
-    def on_save_keras_model(self) -> Callable[[object,KerasModel,logging.Logger],KerasModel]:
+    def on_save_keras_model(self) -> Callable[[object,'KerasModel',logging.Logger],'KerasModel']:
         """Callback to be invoked after the model has been trained to
         save the KerasModel.
 
@@ -104,7 +106,7 @@ class TrainMixin(BaseMixin):
         """
         return self._attributes.get_value('train.on_save_keras_model', default=None)
     @on_save_keras_model.setter
-    def on_save_keras_model(self, v: Callable[[object,KerasModel,logging.Logger],KerasModel]):
+    def on_save_keras_model(self, v: Callable[[object,'KerasModel',logging.Logger],'KerasModel']):
         self._attributes['train.on_save_keras_model'] = v
 
 
@@ -0,0 +1,337 @@
+"""Persistent index of the MLTK model specifications and archives found on the model search paths
+
+Refer to :py:class:`ModelIndex` for more details
+"""
+from typing import Dict, List, Tuple
+import os
+import re
+import json
+import time
+
+from mltk.utils.path import (fullpath, create_user_dir)
+from mltk.core.utils import get_mltk_logger
+from .mixins.archive_mixin import ARCHIVE_EXTENSION
+
+
+# The maximum number of search directories that are kept in the index file
+# (e.g. the CWD is a search directory, so a new search directory is added for each working directory)
+MAX_INDEXED_SEARCH_DIRS = 32
+
+# The maximum directory depth that is listed by list_mltk_models()
+LIST_MODELS_DEPTH = 5
+
+_INDEX_VERSION = 1
+_FLAG_MLTK_MODEL = 0x01
+_FLAG_UTEST_DISABLED = 0x02
+
+_mltk_model_re = re.compile(r'.*\s@mltk_model\s.*')
+_utest_disable_re = re.compile(r'.*\s@mltk_utest_disabled\s.*')
+
+
+
+class ModelIndex:
+    """Persistent index of the model specifications (.py) and model archives (.mltk.zip) in the model search directories
+
+    The index is saved to ``<user dir>/model_index.json`` (see :py:func:`mltk.utils.path.create_user_dir`).
+    For each directory, the index records the directory's modification time and inode, its sub-directories,
+    its model archives, and the modification time, size and ``@mltk_model`` tags of its Python files.
+
+    When the index is refreshed, each recorded directory is stat'ed and only the directories whose entries have changed are re-scanned.
+    Python files are only re-read if their modification time or size has changed.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        index = ModelIndex.load(search_dirs, cwd_depth=LIST_MODELS_DEPTH)
+        model_names = index.list_models()
+        py_path, archive_path = index.find_model('image_example1')
+
+    Args:
+        index_path: Path to the index file
+    """
+    def __init__(self, index_path:str):
+        self.index_path = index_path
+        # <search dir>: {last_used:float, dirs:{<abs dir>:{stat, depth, dirs, py, zip}}}
+        self._groups:Dict[str,dict] = {}
+        self._search_dirs:List[str] = []
+        self._cwd:str = None
+        self._cwd_depth = 0
+        self._is_modified = False
+
+
+    @staticmethod
+    def load(search_dirs:List[str], cwd:str=None, index_path:str=None, cwd_depth:int=0) -> 'ModelIndex':
+        """Load the index file and refresh the given search directories
+
+        Args:
+            search_dirs: List of model search directories, see ``mltk.core.model.model_utils._get_model_search_dirs()``
+            cwd: The current working directory. Only the top-level of the CWD is searched for model specifications
+            index_path: Path to the index file, default to ``<user dir>/model_index.json``
+            cwd_depth: The directory depth of the CWD that is refreshed.
+                Use ``LIST_MODELS_DEPTH`` if the models will be listed with :py:meth:`~list_models`
+        """
+        index_path = index_path or f'{create_user_dir()}/model_index.json'
+        cwd = fullpath(cwd or os.getcwd())
+
+        index = ModelIndex(index_path)
+        index._read()
+        index.refresh(search_dirs, cwd=cwd, cwd_depth=cwd_depth)
+        index.save()
+        return index
+
+
+    def refresh(self, search_dirs:List[str], cwd:str=None, cwd_depth:int=0):
+        """Update the index with the current contents of the given search directories
+
+        The CWD is only refreshed up to the given ``cwd_depth``, this way
+        finding a model does not walk the entire tree of the CWD (e.g. if the CWD is the user's home directory)
+        """
+        cwd = fullpath(cwd or os.getcwd())
+        self._cwd = cwd
+        self._cwd_depth = cwd_depth
+        self._search_dirs = []
+        for search_dir in search_dirs:
+            search_dir = fullpath(search_dir)
+            if search_dir in self._search_dirs:
+                continue
+            self._search_dirs.append(search_dir)
+
+            max_depth = cwd_depth if search_dir == cwd else None
+            group = self._groups.get(search_dir) or dict(dirs={})
+
+            new_dirs = _scan_search_dir(search_dir, max_depth=max_depth, dir_records=group['dirs'])
+            if max_depth is not None:
+                # Keep the records of the directories below the refreshed depth,
+                # this way they are incrementally re-validated the next time the models are listed
+                for dir_path, record in group['dirs'].items():
+                    if record['depth'] > max_depth and dir_path not in new_dirs:
+                        new_dirs[dir_path] = record
+
+            if new_dirs != group['dirs'] or search_dir not in self._groups:
+                self._is_modified = True
+            group['dirs'] = new_dirs
+            group['last_used'] = time.time()
+            self._groups[search_dir] = group
+
+
+    def save(self):
+        """Save the index file if it was modified"""
+        if not self._is_modified:
+            return
+
+        # Discard the least recently used search directories
+        groups = sorted(self._groups.items(), key=lambda x: x[1].get('last_used', 0), reverse=True)
+        self._groups = dict(groups[:MAX_INDEXED_SEARCH_DIRS])
+
+        tmp_path = f'{self.index_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(version=_INDEX_VERSION, search_dirs=self._groups), f)
+            # NOTE: The index is replaced atomically in case another process is reading it
+            os.replace(tmp_path, self.index_path)
+            self._is_modified = False
+        except Exception as e:
+            get_mltk_logger().debug(f'Failed to save model index: {self.index_path}, err: {e}')
+            try:
+                os.remove(tmp_path)
+            except:
+                pass
+
+
+    def list_models(self, test:bool=False, for_utests:bool=False) -> List[str]:
+        """Return a sorted list of the names of the models found in the search directories
+
+        .. note::
+            The CWD is only listed up to the ``cwd_depth`` given to :py:meth:`~load`
+
+        Args:
+            test: If true, then include the models with a test archive (-test.mltk.zip), otherwise include the models with a .mltk.zip archive
+            for_utests: If true, then exclude the model specifications tagged with ``@mltk_utest_disabled``
+        """
+        archive_ext = ARCHIVE_EXTENSION
+        test_archive_ext = '-test' + ARCHIVE_EXTENSION
+
+        found_models = set()
+        for _, record in self._iterate_dirs(max_depth=LIST_MODELS_DEPTH):
+            for fn, (_, _, flags) in record['py'].items():
+                if not flags & _FLAG_MLTK_MODEL:
+                    continue
+                if for_utests and flags & _FLAG_UTEST_DISABLED:
+                    continue
+                found_models.add(fn[:-len('.py')])
+
+            for fn in record['zip']:
+                if test:
+                    if fn.endswith(test_archive_ext):
+                        found_models.add(fn[:-len(test_archive_ext)])
+                elif not fn.endswith(test_archive_ext):
+                    found_models.add(fn[:-len(archive_ext)])
+
+        return sorted(found_models)
+
+
+    def find_model(self, model_name:str, model_subdir:str='', test:bool=False) -> Tuple[str,str]:
+        """Find the model specification and archive with the given name
+
+        The search directories are searched in order, the search stops at the first found model specification.
+
+        Args:
+            model_name: The name of the model (without an extension)
+            model_subdir: Optional sub-directory path (with a trailing forward slash) the model must be in
+            test: If true, then search for the model's test archive (-test.mltk.zip)
+
+        Returns:
+            (py_path, archive_path), either may be None if it was not found
+        """
+        archive_ext = ('-test' if test else '') + ARCHIVE_EXTENSION
+        model_path = f'/{model_subdir}{model_name}.py'
+        model_arc_path = f'/{model_subdir}{model_name}{archive_ext}'
+        py_fn = f'{model_name}.py'
+        arc_fn = f'{model_name}{archive_ext}'
+
+        py_path = None
+        archive_path = None
+        for search_dir in self._search_dirs:
+            # Do NOT recurse into the CWD
+            max_depth = 0 if search_dir == self._cwd else None
+            for dir_path, record in self._iterate_dirs(max_depth=max_depth, search_dirs=[search_dir]):
+                if py_fn in record['py'] and f'{dir_path}/{py_fn}'.endswith(model_path):
+                    py_path = f'{dir_path}/{py_fn}'
+                if arc_fn in record['zip'] and f'{dir_path}/{arc_fn}'.endswith(model_arc_path):
+                    archive_path = f'{dir_path}/{arc_fn}'
+                if py_path is not None:
+                    return py_path, archive_path
+
+        return py_path, archive_path
+
+
+    def _iterate_dirs(self, max_depth:int=None, search_dirs:List[str]=None):
+        for search_dir in search_dirs or self._search_dirs:
+            search_dir_depth = max_depth
+            if search_dir == self._cwd:
+                # Do NOT return the CWD's directories that were not refreshed
+                search_dir_depth = self._cwd_depth if max_depth is None else min(max_depth, self._cwd_depth)
+            for dir_path, record in self._groups[search_dir]['dirs'].items():
+                if search_dir_depth is None or record['depth'] <= search_dir_depth:
+                    yield dir_path, record
+
+
+    def _read(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == _INDEX_VERSION:
+                self._groups = data['search_dirs']
+        except Exception:
+            self._groups = {}
+
+
+
+def _scan_search_dir(
+    search_dir:str,
+    max_depth:int,
+    dir_records:Dict[str,dict]
+) -> Dict[str,dict]:
+    """Scan the directories in the given search directory that have changed since the given dir_records were recorded
+
+    Returns:
+        <abs dir path>: {stat, depth, dirs, py, zip} of each directory in the search directory, in os.walk() order
+    """
+    now_ns = time.time_ns()
+    new_records = {}
+    visited = set()
+    pending = [(search_dir, 0)]
+
+    while pending:
+        dir_path, depth = pending.pop()
+        try:
+            st = os.stat(dir_path)
+        except OSError:
+            continue
+
+        # Do not follow symlinks that loop back to a parent directory
+        if (st.st_dev, st.st_ino) in visited:
+            continue
+        visited.add((st.st_dev, st.st_ino))
+
+        stat_key = [st.st_mtime_ns, st.st_ino]
+        prev_record = dir_records.get(dir_path)
+        if prev_record is not None and prev_record['stat'] == stat_key:
+            # The directory's entries have not changed,
+            # so only the Python files need to be re-validated
+            record = dict(
+                stat=stat_key,
+                depth=depth,
+                dirs=prev_record['dirs'],
+                py={fn: _get_python_file_entry(f'{dir_path}/{fn}', prev_entry) for fn, prev_entry in prev_record['py'].items()},
+                zip=prev_record['zip'],
+            )
+            record['py'] = {fn: entry for fn, entry in record['py'].items() if entry is not None}
+
+        else:
+            prev_py = prev_record['py'] if prev_record is not None else {}
+            record = dict(stat=stat_key, depth=depth, dirs=[], py={}, zip=[])
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            record['dirs'].append(entry.name)
+                        elif entry.name.endswith('.py'):
+                            py_entry = _get_python_file_entry(f'{dir_path}/{entry.name}', prev_py.get(entry.name))
+                            if py_entry is not None:
+                                record['py'][entry.name] = py_entry
+                        elif entry.name.endswith(ARCHIVE_EXTENSION):
+                            record['zip'].append(entry.name)
+            except OSError:
+                continue
+
+            # NOTE: If the directory was modified very recently, then a subsequent modification
+            #       may have the same timestamp (depending on the file system's timestamp resolution).
+            #       In this case, do not record the stat so the directory is re-scanned the next time
+            if now_ns - st.st_mtime_ns < 2_000_000_000:
+                record['stat'] = [-1, st.st_ino]
+
+        new_records[dir_path] = record
+
+        if max_depth is None or depth < max_depth:
+            # NOTE: The sub-directories are pushed in reverse so that they are popped in os.walk() order
+            for name in reversed(record['dirs']):
+                pending.append((f'{dir_path}/{name}', depth + 1))
+
+    return new_records
+
+
+def _get_python_file_entry(py_path:str, prev_entry:list) -> list:
+    """Return [mtime_ns, size, flags] of the given Python file, the file is only read if it has changed
+
+    Returns None if the file no longer exists
+    """
+    try:
+        st = os.stat(py_path)
+    except OSError:
+        return None
+
+    if prev_entry is not None and prev_entry[0] == st.st_mtime_ns and prev_entry[1] == st.st_size:
+        return prev_entry
+
+    flags = 0
+    try:
+        with open(py_path, 'r') as f:
+            for line in f:
+                if _mltk_model_re.match(line):
+                    flags |= _FLAG_MLTK_MODEL
+                if _utest_disable_re.match(line):
+                    flags |= _FLAG_UTEST_DISABLED
+    except Exception as e:
+        get_mltk_logger().warning(f'Failed to process Python file: {py_path}, err: {e}')
+
+    mtime_ns = st.st_mtime_ns
+    # NOTE: If the file was modified very recently, then do not record its mtime so that it is re-read the next time
+    if time.time_ns() - mtime_ns < 2_000_000_000:
+        mtime_ns = -1
+    return [mtime_ns, st.st_size, flags]
@@ -1,18 +1,16 @@
-from typing import List, Union
+from typing import List, Union, TYPE_CHECKING
+import sys
 import os
 import logging
 import re
 import shutil
 import collections
 
-from tensorflow.keras.models import Model as KerasModel
-from tensorflow.keras.models import load_model as load_keras_model
-
 from mltk import __version__ as mltk_version_str
 from mltk import MLTK_ROOT_DIR
 from mltk import models as mltk_models
 from mltk.core.utils import get_mltk_logger
-from mltk.utils.path import (fullpath, walk_with_depth, create_tempdir, get_user_setting)
+from mltk.utils.path import (fullpath, create_tempdir, get_user_setting)
 from mltk.utils.python import as_list, import_module_at_path, prepend_exception_msg
 from mltk.utils import gpu
 
@@ -23,8 +21,12 @@ from .mixins.archive_mixin import (
     get_archive_extension,
     extract_file
 )
+from .model_index import ModelIndex, LIST_MODELS_DEPTH
 from ..tflite_model import TfliteModel
 
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model as KerasModel
+
 
 
 
@@ -169,7 +171,7 @@ def load_tflite_or_keras_model(
     model_type:str=None,
     weights: str=None,
     logger: logging.Logger=None
-) -> Union[TfliteModel, KerasModel]:
+) -> Union[TfliteModel, 'KerasModel']:
     """Instantiate a Keras or TfliteModel object
 
     IF model is an :py:class:`mltk.core.MltkModel` instance OR a model archive `.mltk.zip`,
@@ -208,7 +210,7 @@ def load_tflite_or_keras_model(
             built_model = model.build_model_function(model)
             if built_model is None:
                 raise RuntimeError('Your "my_model.build_model_function" must return the compiled Keras model (did you forget to add the "return keras_model" statement at the end?')
-            elif not isinstance(built_model, KerasModel):
+            elif not is_keras_model(built_model):
                 raise RuntimeError('Your "my_model.build_model_function" must return the compiled Keras model instance')
 
             on_save_model = getattr(model, 'on_save_keras_model', None)
@@ -227,9 +229,12 @@ def load_tflite_or_keras_model(
             model.attributes['test_mode_enabled'] = test_mode_enabled
 
         elif model_type in ('h5', '.h5', 'keras'):
+            # NOTE: Keras 3 only loads models from a file path,
+            #       so the .h5 is extracted from the model archive
             h5_path = model.h5_archive_path
 
             try:
+                from tensorflow.keras.models import load_model as load_keras_model
                 logger.debug(f'Loading Keras model from {model.archive_path}')
                 built_model = load_keras_model(h5_path, custom_objects=model.keras_custom_objects)
             except Exception as e:
@@ -237,11 +242,13 @@ def load_tflite_or_keras_model(
                 raise
 
         elif model_type in ('tflite', '.tflite'):
-            tflite_path = model.tflite_archive_path
+            # NOTE: The .tflite is loaded directly from the model archive,
+            #       it is not extracted to the filesystem
+            tflite_data = model.tflite_archive_data
 
             try:
                 logger.debug(f'Loading .tflite model from {model.archive_path}')
-                built_model = TfliteModel.load_flatbuffer_file(tflite_path)
+                built_model = TfliteModel(flatbuffer_data=tflite_data)
             except Exception as e:
                 prepend_exception_msg(e, 'Failed to load .tflite file')
                 raise
@@ -252,6 +259,7 @@ def load_tflite_or_keras_model(
     elif isinstance(model, str):
         if model.endswith('.h5'):
             try:
+                from tensorflow.keras.models import load_model as load_keras_model
                 logger.debug(f'Loading Keras model from {model}')
                 built_model = load_keras_model(model)
             except Exception as e:
@@ -274,7 +282,7 @@ def load_tflite_or_keras_model(
 
 
     if weights:
-        if isinstance(built_model, KerasModel):
+        if is_keras_model(built_model):
             weights_file = weights if isinstance(model, str) else model.get_weights_path(weights)
             logger.info(f'Loading weights: {weights_file}')
             built_model.load_weights(weights_file)
@@ -286,6 +294,19 @@ def load_tflite_or_keras_model(
     return built_model
 
 
+def is_keras_model(model) -> bool:
+    """Return if the given object is a :py:class:`mltk.core.KerasModel` instance
+
+    Tensorflow is not imported by this function.
+    If it has not already been imported, then the object cannot be a KerasModel.
+    """
+    if 'tensorflow' not in sys.modules and 'keras' not in sys.modules:
+        return False
+
+    from tensorflow.keras.models import Model as KerasModel
+    return isinstance(model, KerasModel)
+
+
 def load_tflite_model(
     model: Union[str, MltkModel, TfliteModel],
     build:bool=False,
@@ -425,57 +446,13 @@ def list_mltk_models(
     for_utests=False,
     logger:logging.Logger=None
 ) -> List[str]:
-    """Return a list of all found MLTK model names"""
-
-    logger = logger or get_mltk_logger()
-
-    found_models = []
-    search_dirs = _get_model_search_dirs()
-    archive_ext = get_archive_extension(test=False)
-    test_archive_ext = get_archive_extension(test=True)
-
-    mltk_model_re = re.compile(r'.*\s@mltk_model\s.*')
-    utest_disable_re = re.compile(r'.*\s@mltk_utest_disabled\s.*')
-
-    def _process_python_file(py_path):
-        retval = False
-        with open(py_path, 'r') as f:
-            for line in f:
-                if for_utests and utest_disable_re.match(line):
-                    return False
-
-                if mltk_model_re.match(line):
-                    retval = True
-                    if not for_utests:
-                        break
-
-        return retval
-
-
-    for search_dir in search_dirs:
-        for root, _, files in walk_with_depth(search_dir, depth=5, followlinks=True):
-            for fn in files:
-                if fn.endswith('.py'):
-                    try:
-                        p = f'{root}/{fn}'.replace('\\', '/')
-                        if _process_python_file(p):
-                            found_models.append(fn[:-len('.py')])
-                    except Exception as e:
-                        logger.warning(f'Failed to process Python file: {p}, err: {e}')
-
-                if test:
-                    if fn.endswith(test_archive_ext):
-                        found_models.append(fn.replace(test_archive_ext, ''))
-                else:
-                    if fn.endswith(archive_ext) and not fn.endswith(test_archive_ext):
-                        found_models.append(fn.replace(archive_ext, ''))
-
-            # Do NOT recurse into the CWD
-            if search_dir == os.curdir:
-                break
-
+    """Return a list of all found MLTK model names
 
-    return sorted(set(found_models))
+    The model search directories are listed using the persistent :py:class:`~mltk.core.model.model_index.ModelIndex`,
+    so only the directories that have changed since the previous call are re-scanned.
+    """
+    model_index = _load_model_index(list_models=True)
+    return model_index.list_models(test=test, for_utests=for_utests)
 
 
 def find_model_specification_file(
@@ -486,10 +463,11 @@ def find_model_specification_file(
 ) -> str:
     """Given the model name, attempt to find its corresponding python specification file.
     The specification file could be in a model archive.
+
+    The model search directories are searched using the persistent :py:class:`~mltk.core.model.model_index.ModelIndex`,
+    so only the directories that have changed since the previous call are re-scanned.
     """
     logger = logger or get_mltk_logger()
-    search_dirs = _get_model_search_dirs()
-    cwd = fullpath(os.getcwd())
 
     if model.endswith('-test'):
         test = True
@@ -500,35 +478,15 @@ def find_model_specification_file(
     model_subdir = os.path.dirname(model)
     model_name, _ = os.path.splitext(os.path.basename(model))
 
-    py_path = None
-    archive_path = None
     if model_subdir:
         model_subdir = f'{model_subdir}/'
 
-    archive_ext = get_archive_extension(test=test)
-    model_path = f'/{model_subdir}{model_name}.py'
-    model_arc_path = f'{model_subdir}/{model_name}{archive_ext}'
-
-    logger.debug(f'Model search path(s): {",".join(search_dirs)}')
-    for search_dir in search_dirs:
-        if py_path is not None:
-            break
-        for root, _, files in os.walk(search_dir, followlinks=True):
-            root = root.replace('\\', '/')
-            for fn in files:
-                file_path = f'{root}/{fn}'
-
-                if file_path.endswith(model_path):
-                    py_path = file_path
-                if file_path.endswith(model_arc_path):
-                    archive_path = file_path
-
-            # If the spec was found then break out of the loop
-            if py_path is not None:
-                break
-            # Do NOT recurse into the CWD
-            if search_dir == cwd:
-                break
+    model_index = _load_model_index(logger=logger)
+    py_path, archive_path = model_index.find_model(
+        model_name,
+        model_subdir=model_subdir,
+        test=test
+    )
 
     if py_path is None and archive_path is not None:
         logger.info(f'Extracting {model_name}.py from {archive_path}')
@@ -540,7 +498,7 @@ def find_model_specification_file(
 
     if not py_path and print_not_found_err:
         from mltk.cli import print_did_you_mean_error # pylint: disable=import-outside-toplevel
-        all_models = list_mltk_models(test=test)
+        all_models = _load_model_index(list_models=True).list_models(test=test)
         print_did_you_mean_error('Failed to find model', model, all_models, and_exit=True)
 
     return py_path
@@ -598,6 +556,23 @@ def _get_model_search_dirs() -> List[str]:
 
     return search_dirs
 
+
+def _load_model_index(logger:logging.Logger=None, list_models:bool=False) -> ModelIndex:
+    """Load the model index and refresh the model search directories
+
+    Only the top-level of the CWD is refreshed, unless the models will be listed
+    in which case the CWD is refreshed up to ``LIST_MODELS_DEPTH``
+    """
+    search_dirs = _get_model_search_dirs()
+    if logger is not None:
+        logger.debug(f'Model search path(s): {",".join(search_dirs)}')
+    return ModelIndex.load(
+        search_dirs=[x for x in search_dirs if os.path.isdir(x)],
+        cwd=os.getcwd(),
+        cwd_depth=LIST_MODELS_DEPTH if list_models else 0
+    )
+
+
 _Version = collections.namedtuple('_Version', ['major', 'minor', 'patch'])
 
 
@@ -606,4 +581,14 @@ def _parse_version(version):
     major = 0 if len(toks) < 1 else int(toks[0])
     minor = 0 if len(toks) < 2 else int(toks[1])
     patch = 0 if len(toks) < 3 else int(toks[2])
-    return _Version(major, minor, patch)
\ No newline at end of file
+    return _Version(major, minor, patch)
+
+
+
+def __getattr__(name:str):
+    # NOTE: The KerasModel is imported on first access
+    #       so that importing this module does not import Tensorflow
+    if name == 'KerasModel':
+        from tensorflow.keras.models import Model as KerasModel
+        return KerasModel
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
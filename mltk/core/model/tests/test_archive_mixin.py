@@ -0,0 +1,106 @@
+import os
+import zipfile
+import pytest
+
+from mltk.core.utils import ArchiveFileNotFoundError
+from mltk.core.model.mixins import archive_mixin
+from mltk.core.model.mixins.archive_mixin import read_file, clear_archive_cache
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def archive_dir():
+    d = create_tempdir('utests/archive_mixin')
+    remove_directory(d)
+    os.makedirs(d)
+    clear_archive_cache()
+    yield d
+    clear_archive_cache()
+    remove_directory(d)
+
+
+def _write_archive(path:str, files:dict, mtime_ns:int=None):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def _cached_keys() -> list:
+    return list(archive_mixin._archive_cache.keys()) # pylint: disable=protected-access
+
+
+def test_cache_hit(archive_dir):
+    archive_path = _write_archive(f'{archive_dir}/model.mltk.zip', {'model.tflite': b'tflite' * 100})
+
+    data = read_file(archive_path, 'model.tflite')
+    assert data == b'tflite' * 100
+    # The second read should return the cached data
+    assert read_file(archive_path, 'model.tflite') is data
+
+    # cache=False should always read the archive
+    uncached_data = read_file(archive_path, 'model.tflite', cache=False)
+    assert uncached_data == data
+    assert uncached_data is not data
+
+    with pytest.raises(ArchiveFileNotFoundError):
+        read_file(archive_path, 'missing.tflite')
+    with pytest.raises(ArchiveFileNotFoundError):
+        read_file(f'{archive_dir}/missing.mltk.zip', 'model.tflite')
+
+
+def test_cache_invalidated_when_archive_changes(archive_dir):
+    archive_path = f'{archive_dir}/model.mltk.zip'
+    st_mtime_ns = 1_600_000_000_000_000_000
+    _write_archive(archive_path, {'model.tflite': b'v1' * 100}, mtime_ns=st_mtime_ns)
+    assert read_file(archive_path, 'model.tflite') == b'v1' * 100
+
+    # Same size, different modification time
+    _write_archive(archive_path, {'model.tflite': b'v2' * 100}, mtime_ns=st_mtime_ns + 1_000_000_000)
+    assert read_file(archive_path, 'model.tflite') == b'v2' * 100
+
+    # Same modification time, different size
+    _write_archive(archive_path, {'model.tflite': b'v3' * 200}, mtime_ns=st_mtime_ns + 1_000_000_000)
+    assert read_file(archive_path, 'model.tflite') == b'v3' * 200
+
+    # Only the latest version of the file should be cached
+    assert len(_cached_keys()) == 1
+
+
+def test_clear_archive_cache(archive_dir):
+    archive1_path = _write_archive(f'{archive_dir}/model1.mltk.zip', {'a.bin': b'a', 'b.bin': b'b'})
+    archive2_path = _write_archive(f'{archive_dir}/model2.mltk.zip', {'a.bin': b'a'})
+    for archive_path, name in ((archive1_path, 'a.bin'), (archive1_path, 'b.bin'), (archive2_path, 'a.bin')):
+        read_file(archive_path, name)
+    assert len(_cached_keys()) == 3
+
+    clear_archive_cache(archive1_path)
+    assert [os.path.basename(k[0]) for k in _cached_keys()] == ['model2.mltk.zip']
+    assert archive_mixin._archive_cache_size == 1 # pylint: disable=protected-access
+
+    clear_archive_cache()
+    assert _cached_keys() == []
+    assert archive_mixin._archive_cache_size == 0 # pylint: disable=protected-access
+
+
+def test_lru_eviction(archive_dir, monkeypatch):
+    monkeypatch.setattr(archive_mixin, 'ARCHIVE_CACHE_MAX_SIZE', 250)
+    archive_path = _write_archive(
+        f'{archive_dir}/model.mltk.zip',
+        {'a.bin': b'a' * 100, 'b.bin': b'b' * 100, 'c.bin': b'c' * 100, 'big.bin': b'x' * 300}
+    )
+
+    read_file(archive_path, 'a.bin')
+    read_file(archive_path, 'b.bin')
+    # Using a.bin makes b.bin the least recently used file
+    read_file(archive_path, 'a.bin')
+    read_file(archive_path, 'c.bin')
+    assert [k[1] for k in _cached_keys()] == ['a.bin', 'c.bin']
+    assert archive_mixin._archive_cache_size == 200 # pylint: disable=protected-access
+
+    # Files larger than the cache are not cached
+    assert read_file(archive_path, 'big.bin') == b'x' * 300
+    assert [k[1] for k in _cached_keys()] == ['a.bin', 'c.bin']
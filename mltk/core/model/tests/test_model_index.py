@@ -0,0 +1,304 @@
+import os
+import re
+import time
+import shutil
+import pytest
+
+from mltk.core.model.model_index import ModelIndex, LIST_MODELS_DEPTH
+from mltk.utils.path import create_tempdir, remove_directory, walk_with_depth
+
+
+
+@pytest.fixture
+def search_root():
+    d = create_tempdir('utests/model_index')
+    remove_directory(d)
+    os.makedirs(d)
+    yield d
+    remove_directory(d)
+
+
+MODEL_SPEC = '# @mltk_model \nmy_model = None\n'
+UTEST_DISABLED_SPEC = '# @mltk_model \n# @mltk_utest_disabled \nmy_model = None\n'
+NOT_MODEL_SPEC = '# Not a model \nvalue = None\n'
+
+
+def _write(path:str, data:str='', age:bool=True):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(data)
+    if age:
+        _age_tree(os.path.dirname(path))
+        _age(path)
+
+
+def _age(path:str, seconds:float=100):
+    # NOTE: Entries modified in the last 2s are always re-scanned by the index,
+    #       so set the timestamps in the past to exercise the incremental refresh
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def _age_tree(path:str):
+    while os.path.exists(path):
+        _age(path)
+        parent = os.path.dirname(path)
+        if parent == path or not parent.startswith(create_tempdir('utests/model_index')):
+            break
+        path = parent
+
+
+def _create_tree(root:str):
+    _write(f'{root}/search1/model_a.py', MODEL_SPEC)
+    _write(f'{root}/search1/model_a.mltk.zip')
+    _write(f'{root}/search1/helper.py', NOT_MODEL_SPEC)
+    _write(f'{root}/search1/sub/model_b.py', UTEST_DISABLED_SPEC)
+    _write(f'{root}/search1/sub/model_b-test.mltk.zip')
+    _write(f'{root}/search1/sub/deep/d2/d3/d4/d5/model_deep.py', MODEL_SPEC)
+    _write(f'{root}/search2/model_a.py', MODEL_SPEC)
+    _write(f'{root}/search2/model_c.mltk.zip')
+    _write(f'{root}/search2/model_c-test.mltk.zip')
+    _write(f'{root}/cwd/model_cwd.py', MODEL_SPEC)
+    _write(f'{root}/cwd/nested/model_nested.py', MODEL_SPEC)
+    _write(f'{root}/cwd/nested/model_nested-test.mltk.zip')
+
+
+def _search_dirs(root:str) -> list:
+    return [f'{root}/search1', f'{root}/search2', f'{root}/cwd']
+
+
+MODEL_NAMES = ['model_a', 'model_b', 'model_c', 'model_deep', 'model_cwd', 'model_nested', 'model_new', 'helper', 'missing']
+
+
+def _scan_list_models(search_dirs:list, test:bool=False, for_utests:bool=False) -> list:
+    """The directory scan used before the model index"""
+    mltk_model_re = re.compile(r'.*\s@mltk_model\s.*')
+    utest_disable_re = re.compile(r'.*\s@mltk_utest_disabled\s.*')
+
+    def _is_model(py_path):
+        retval = False
+        with open(py_path, 'r') as f:
+            for line in f:
+                if for_utests and utest_disable_re.match(line):
+                    return False
+                if mltk_model_re.match(line):
+                    retval = True
+        return retval
+
+    found_models = []
+    for search_dir in search_dirs:
+        for root, _, files in walk_with_depth(search_dir, depth=5, followlinks=True):
+            for fn in files:
+                if fn.endswith('.py') and _is_model(f'{root}/{fn}'):
+                    found_models.append(fn[:-len('.py')])
+                if test:
+                    if fn.endswith('-test.mltk.zip'):
+                        found_models.append(fn[:-len('-test.mltk.zip')])
+                elif fn.endswith('.mltk.zip') and not fn.endswith('-test.mltk.zip'):
+                    found_models.append(fn[:-len('.mltk.zip')])
+
+    return sorted(set(found_models))
+
+
+def _scan_find_model(search_dirs:list, cwd:str, model_name:str, test:bool=False) -> tuple:
+    """The directory scan used before the model index"""
+    archive_ext = ('-test' if test else '') + '.mltk.zip'
+    py_path = None
+    archive_path = None
+    for search_dir in search_dirs:
+        if py_path is not None:
+            break
+        for root, _, files in os.walk(search_dir, followlinks=True):
+            for fn in files:
+                file_path = f'{root}/{fn}'
+                if file_path.endswith(f'/{model_name}.py'):
+                    py_path = file_path
+                if file_path.endswith(f'/{model_name}{archive_ext}'):
+                    archive_path = file_path
+            if py_path is not None:
+                break
+            if search_dir == cwd:
+                break
+
+    return py_path, archive_path
+
+
+def _assert_matches_scan(root:str, index_path:str) -> ModelIndex:
+    search_dirs = _search_dirs(root)
+    cwd = f'{root}/cwd'
+    # Only refresh the top-level of the CWD, as is done when finding a model
+    find_index = ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path)
+    index = ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path, cwd_depth=LIST_MODELS_DEPTH)
+
+    for test in (False, True):
+        for for_utests in (False, True):
+            assert index.list_models(test=test, for_utests=for_utests) == \
+                _scan_list_models(search_dirs, test=test, for_utests=for_utests)
+
+        for model_name in MODEL_NAMES:
+            expected = _scan_find_model(search_dirs, cwd, model_name, test=test)
+            assert index.find_model(model_name, test=test) == expected
+            assert find_index.find_model(model_name, test=test) == expected
+
+    return index
+
+
+def test_matches_directory_scan(search_root):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    index = _assert_matches_scan(search_root, index_path)
+    assert os.path.exists(index_path)
+
+    # Sanity check the reference scan
+    assert index.list_models() == ['model_a', 'model_b', 'model_c', 'model_cwd', 'model_nested']
+    assert index.list_models(for_utests=True) == ['model_a', 'model_c', 'model_cwd', 'model_nested']
+    assert index.list_models(test=True) == ['model_a', 'model_b', 'model_c', 'model_cwd', 'model_nested']
+    assert index.find_model('model_a') == (f'{search_root}/search1/model_a.py', f'{search_root}/search1/model_a.mltk.zip')
+    assert index.find_model('model_deep')[0] == f'{search_root}/search1/sub/deep/d2/d3/d4/d5/model_deep.py'
+    assert index.find_model('model_b', model_subdir='sub/')[0] == f'{search_root}/search1/sub/model_b.py'
+    assert index.find_model('model_b', model_subdir='other/') == (None, None)
+    # Only the top-level of the CWD is searched
+    assert index.find_model('model_nested') == (None, None)
+
+
+def test_unchanged_index_not_saved(search_root):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    _assert_matches_scan(search_root, index_path)
+    _age(index_path)
+    st = os.stat(index_path)
+
+    _assert_matches_scan(search_root, index_path)
+    assert os.stat(index_path).st_mtime_ns == st.st_mtime_ns
+
+
+def test_model_added(search_root):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    _assert_matches_scan(search_root, index_path)
+
+    _write(f'{search_root}/search1/sub/deep/model_new.py', MODEL_SPEC)
+    _write(f'{search_root}/search2/model_new-test.mltk.zip')
+    index = _assert_matches_scan(search_root, index_path)
+    assert 'model_new' in index.list_models()
+    # The search stops at the search directory with the model specification
+    assert index.find_model('model_new', test=True) == (f'{search_root}/search1/sub/deep/model_new.py', None)
+    assert 'model_new' in index.list_models(test=True)
+
+    # The same, but without aging the timestamps
+    _write(f'{search_root}/cwd/model_new2.py', MODEL_SPEC, age=False)
+    index = _assert_matches_scan(search_root, index_path)
+    assert index.find_model('model_new2')[0] == f'{search_root}/cwd/model_new2.py'
+
+
+@pytest.mark.parametrize('age', [True, False])
+def test_model_modified(search_root, age):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    _assert_matches_scan(search_root, index_path)
+
+    # Different size
+    _write(f'{search_root}/search1/helper.py', MODEL_SPEC, age=age)
+    # Same size, different mtime
+    spec = MODEL_SPEC.replace('@mltk_model ', '@mltk_mode_ ')
+    assert len(spec) == len(MODEL_SPEC)
+    _write(f'{search_root}/cwd/model_cwd.py', spec, age=False)
+    if age:
+        _age(f'{search_root}/cwd/model_cwd.py', seconds=50)
+
+    index = _assert_matches_scan(search_root, index_path)
+    assert 'helper' in index.list_models()
+    assert 'model_cwd' not in index.list_models()
+
+
+def test_model_deleted(search_root):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    _assert_matches_scan(search_root, index_path)
+
+    os.remove(f'{search_root}/search1/model_a.py')
+    os.remove(f'{search_root}/search2/model_c.mltk.zip')
+    shutil.rmtree(f'{search_root}/search1/sub/deep')
+    _age_tree(f'{search_root}/search1/sub')
+    _age_tree(f'{search_root}/search2')
+
+    index = _assert_matches_scan(search_root, index_path)
+    # model_a.py is now found in search2, but the archive in search1 is still found
+    assert index.find_model('model_a') == (f'{search_root}/search2/model_a.py', f'{search_root}/search1/model_a.mltk.zip')
+    assert index.find_model('model_deep') == (None, None)
+    assert 'model_c' not in index.list_models()
+
+
+@pytest.mark.parametrize('contents', ['', '{"version": 1, "search_dirs"', 'not json', '[1, 2, 3]', '{"version": 99, "search_dirs": {}}'])
+def test_corrupt_index(search_root, contents):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    with open(index_path, 'w') as f:
+        f.write(contents)
+
+    _assert_matches_scan(search_root, index_path)
+    # The index file was rebuilt
+    index = ModelIndex(index_path)
+    index._read() # pylint: disable=protected-access
+    assert len(index._groups) == 3 # pylint: disable=protected-access
+
+
+def test_stale_index(search_root):
+    _create_tree(search_root)
+    index_path = f'{search_root}/model_index.json'
+    _assert_matches_scan(search_root, index_path)
+    stale_path = f'{search_root}/stale_index.json'
+    shutil.copyfile(index_path, stale_path)
+
+    # Modify the tree using the same index
+    _write(f'{search_root}/search1/sub/model_new.py', MODEL_SPEC)
+    os.remove(f'{search_root}/search1/sub/model_b-test.mltk.zip')
+    _write(f'{search_root}/search1/model_a.py', NOT_MODEL_SPEC)
+    _age_tree(f'{search_root}/search1/sub')
+    _assert_matches_scan(search_root, index_path)
+
+    # Then restore the index recorded before the modifications
+    shutil.copyfile(stale_path, index_path)
+    index = _assert_matches_scan(search_root, index_path)
+    assert 'model_new' in index.list_models()
+    assert index.find_model('model_b', test=True) == (f'{search_root}/search1/sub/model_b.py', None)
+
+
+def test_find_model_only_scans_top_level_of_cwd(search_root, monkeypatch):
+    _create_tree(search_root)
+    _write(f'{search_root}/cwd/a/b/c/model_x.py', MODEL_SPEC)
+    index_path = f'{search_root}/model_index.json'
+    search_dirs = _search_dirs(search_root)
+    cwd = f'{search_root}/cwd'
+
+    scanned_dirs = []
+    scandir = os.scandir
+    def _scandir(path='.'):
+        # NOTE: shutil.rmtree() scans the directories using file descriptors
+        if isinstance(path, str):
+            scanned_dirs.append(os.path.abspath(path).replace('\\', '/'))
+        return scandir(path)
+    monkeypatch.setattr(os, 'scandir', _scandir)
+
+    index = ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path)
+    assert index.find_model('model_cwd')[0] == f'{cwd}/model_cwd.py'
+    assert [x for x in scanned_dirs if x.startswith(f'{cwd}/')] == []
+    # The CWD's sub-directories were not refreshed so they are not listed
+    assert 'model_x' not in index.list_models()
+    assert 'model_nested' not in index.list_models()
+
+    index = ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path, cwd_depth=LIST_MODELS_DEPTH)
+    assert f'{cwd}/a/b/c' in scanned_dirs
+    assert 'model_x' in index.list_models()
+    assert 'model_nested' in index.list_models()
+
+    # Finding a model keeps the records of the CWD's sub-directories,
+    # so they are not re-scanned the next time the models are listed
+    shutil.rmtree(f'{cwd}/nested')
+    _age_tree(cwd)
+    ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path)
+    scanned_dirs.clear()
+    index = ModelIndex.load(search_dirs, cwd=cwd, index_path=index_path, cwd_depth=LIST_MODELS_DEPTH)
+    assert [x for x in scanned_dirs if x.startswith(f'{cwd}/')] == []
+    assert 'model_x' in index.list_models()
+    assert 'model_nested' not in index.list_models()
@@ -0,0 +1,44 @@
+import os
+import zipfile
+import pytest
+import numpy as np
+
+from mltk.core import load_tflite_or_keras_model
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def model_dir():
+    d = create_tempdir('utests/model_utils')
+    remove_directory(d)
+    os.makedirs(d)
+    yield d
+    remove_directory(d)
+
+
+def test_load_h5_from_archive(model_dir):
+    import tensorflow as tf
+
+    keras_model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(4,)),
+        tf.keras.layers.Dense(3)
+    ])
+    h5_path = f'{model_dir}/h5_archive_model.h5'
+    keras_model.save(h5_path)
+
+    spec_path = f'{model_dir}/h5_archive_model.py'
+    with open(spec_path, 'w') as f:
+        f.write('from mltk.core import MltkModel\n')
+        f.write('my_model = MltkModel()\n')
+
+    archive_path = f'{model_dir}/h5_archive_model.mltk.zip'
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(spec_path, arcname='h5_archive_model.py')
+        archive.write(h5_path, arcname='h5_archive_model.h5')
+    os.remove(h5_path)
+
+    loaded_model = load_tflite_or_keras_model(archive_path, model_type='h5')
+
+    x = np.random.uniform(size=(2, 4)).astype(np.float32)
+    assert np.allclose(loaded_model.predict(x, verbose=0), keras_model.predict(x, verbose=0))
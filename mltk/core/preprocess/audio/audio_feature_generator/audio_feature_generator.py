@@ -1,4 +1,7 @@
+from __future__ import annotations
+from typing import Tuple
 import importlib
+import threading
 import numpy as np
 
 from .audio_feature_generator_settings import AudioFeatureGeneratorSettings
@@ -66,7 +69,7 @@ class AudioFeatureGenerator:
         #       sample = sample * 32768
         #       sample = sample.astype(np.int16)
         #       sample = np.squeeze(sample, axis=-1)
-        #       frontend = AudioFeatureGenerator(frontend_settings)
+        #       frontend = AudioFeatureGenerator.get_instance(frontend_settings)
         #       spectrogram = frontend.process_sample(sample, dtype=np.int8)
 
         spectrogram = audio_utils.apply_frontend(
@@ -94,11 +97,38 @@ class AudioFeatureGenerator:
                             'This likely means you need to re-build the AudioFeatureGenerator wrapper package\n\n') from e
 
         self._spectrogram_shape = settings.spectrogram_shape
+        self._sample_length = settings.sample_length
         self._wrapper = wrapper_module.AudioFeatureGeneratorWrapper(settings)
 
 
+    @staticmethod
+    def get_instance(settings: AudioFeatureGeneratorSettings) -> AudioFeatureGenerator:
+        """Return a cached AudioFeatureGenerator instance for the given settings
 
-    def process_sample(self, sample: np.ndarray, dtype=np.float32) -> np.ndarray:
+        Constructing an AudioFeatureGenerator is relatively expensive (it builds the C++ wrapper).
+        This returns an instance that is created once and re-used for all subsequent calls with the same settings.
+
+        .. note:: Instances are cached per thread as the AudioFeatureGenerator is stateful
+        """
+        cache = getattr(_instance_cache, 'instances', None)
+        if cache is None:
+            cache = _instance_cache.instances = {}
+
+        key = tuple(sorted(settings.items()))
+        instance = cache.get(key, None)
+        if instance is None:
+            instance = AudioFeatureGenerator(settings)
+            cache[key] = instance
+        return instance
+
+
+    @property
+    def spectrogram_shape(self) -> Tuple[int,int]:
+        """The shape of the generated spectrogram as (n_features, n_channels)"""
+        return self._spectrogram_shape
+
+
+    def process_sample(self, sample: np.ndarray, dtype=np.float32, out:np.ndarray=None) -> np.ndarray:
         """Convert the provided 1D audio sample to a 2D spectrogram using the AudioFeatureGenerator
 
         The generated 2D spectrogram dimensions are calculated as follows::
@@ -121,15 +151,56 @@ class AudioFeatureGenerator:
         Args:
             sample: [sample_length] int16 audio sample
             dtype: Output data type, must be int8, uint16, or float32
+            out: Optional [n_features, n_channels] array to populate with the spectrogram.
+                If given, then the ``dtype`` argument is ignored and ``out.dtype`` is used
 
         Returns:
             [n_features, n_channels] int8, uint16, or float32  spectrogram
         """
-        spectrogram = np.zeros(self._spectrogram_shape, dtype=dtype)
-        self._wrapper.process_sample(sample, spectrogram)
-        return spectrogram
+        if out is None:
+            out = np.empty(self._spectrogram_shape, dtype=dtype)
+        self._wrapper.process_sample(sample, out)
+        return out
+
+
+    def process_batch(self, samples: np.ndarray, dtype=np.float32, out:np.ndarray=None) -> np.ndarray:
+        """Convert the provided batch of 1D audio samples to a batch of 2D spectrograms
+
+        This is the same as :py:meth:`~process_sample` except it processes a batch of samples
+        and populates the spectrograms directly into the (optionally caller-supplied) output buffer.
+
+        Args:
+            samples: [n_samples, sample_length] int16 audio samples
+            dtype: Output data type, must be int8, uint16, or float32
+            out: Optional [n_samples, n_features, n_channels] array to populate with the spectrograms.
+                If given, then the ``dtype`` argument is ignored and ``out.dtype`` is used.
+                Re-using the same buffer for each batch avoids allocating new spectrograms.
+
+        Returns:
+            [n_samples, n_features, n_channels] int8, uint16, or float32 spectrograms
+        """
+        if samples.ndim != 2 or samples.shape[1] != self._sample_length:
+            raise ValueError(f'Samples must have the shape [n_samples, {self._sample_length}], got: {samples.shape}')
+
+        out_shape = (len(samples),) + tuple(self._spectrogram_shape)
+        if out is None:
+            out = np.empty(out_shape, dtype=dtype)
+        elif out.shape != out_shape:
+            raise ValueError(f'Output buffer must have the shape {out_shape}, got: {out.shape}')
+        elif not out.flags.c_contiguous:
+            raise ValueError('Output buffer must be C-contiguous')
+
+        samples = np.ascontiguousarray(samples, dtype=np.int16)
+        for i in range(len(samples)):
+            self._wrapper.process_sample(samples[i], out[i])
+
+        return out
 
 
     def activity_was_detected(self) -> bool:
         """Return if activity was detected in the previously processed sample"""
-        return self._wrapper.activity_was_detected()
\ No newline at end of file
+        return self._wrapper.activity_was_detected()
+
+
+
+_instance_cache = threading.local()
@@ -31,3 +31,29 @@ def test_no_samples():
 
     assert np.allclose(calculated, expected)
 
+
+
+def test_batch_samples():
+    settings = DEFAULT_SETTINGS
+    mfe = AudioFeatureGenerator(settings)
+    samples = np.stack([
+        np.asarray(YES_INPUT_AUDIO, dtype=np.int16),
+        np.asarray(NO_INPUT_AUDIO, dtype=np.int16)
+    ])
+    out = np.empty((2,) + settings.spectrogram_shape, dtype=np.int8)
+    calculated = mfe.process_batch(samples, out=out)
+
+    assert calculated is out
+    assert np.allclose(calculated[0], np.reshape(np.array(YES_OUTPUT_FEATURES_INT8, dtype=np.int8), settings.spectrogram_shape))
+    assert np.allclose(calculated[1], np.reshape(np.array(NO_OUTPUT_FEATURES_INT8, dtype=np.int8), settings.spectrogram_shape))
+
+
+def test_cached_instance():
+    settings = DEFAULT_SETTINGS
+    mfe = AudioFeatureGenerator.get_instance(settings)
+    assert AudioFeatureGenerator.get_instance(settings) is mfe
+
+    sample = np.asarray(YES_INPUT_AUDIO, dtype=np.int16)
+    calculated = mfe.process_sample(sample, dtype=np.int8)
+    expected = np.reshape(np.array(YES_OUTPUT_FEATURES_INT8, dtype=np.int8), settings.spectrogram_shape)
+    assert np.allclose(calculated, expected)
@@ -1,3 +1,3 @@
 
 from .parallel_generator import ParallelAudioDataGenerator
-from .iterator import ParallelProcessParams
\ No newline at end of file
+from .batch_processing import ParallelProcessParams
\ No newline at end of file
@@ -0,0 +1,335 @@
+"""Processing of the audio data generator's batches
+
+This is executed in the data generator's subprocesses.
+NOTE: This module does not import Tensorflow (directly or indirectly)
+so that it is not imported by each subprocess.
+"""
+import os
+import random
+import time
+import inspect
+import functools
+from typing import List, Tuple
+import numpy as np
+
+from mltk.core.preprocess.utils import audio as audio_utils
+
+
+class ParallelProcessParams():
+    """Adds methods related to getting batches from filenames
+
+    It includes the logic to transform image files to batches.
+    """
+
+    def __init__(
+        self,
+        audio_data_generator,
+        sample_rate,
+        sample_length_ms,
+        sample_shape,
+        save_to_dir,
+        save_prefix,
+        save_format,
+        subset,
+        class_indices,
+        dtype,
+        frontend_dtype,
+        directory,
+        class_mode,
+        get_batch_function,
+        noaug_preprocessing_function,
+        preprocessing_function,
+        postprocessing_function,
+        frontend_enabled,
+        add_channel_dimension
+    ):
+        self.class_indices = class_indices
+        self.dtype = dtype
+        self.frontend_dtype = frontend_dtype
+        self.directory = directory
+        self.class_mode = class_mode
+        self.audio_data_generator = audio_data_generator
+        self.get_batch_function = get_batch_function
+        self.noaug_preprocessing_function = noaug_preprocessing_function
+        self.preprocessing_function = preprocessing_function
+        self.postprocessing_function = postprocessing_function
+        self.frontend_enabled = frontend_enabled
+        self.add_channel_dimension = add_channel_dimension
+
+        self.sample_rate = sample_rate
+        self.sample_length_ms = sample_length_ms
+        self.sample_shape = sample_shape
+        if frontend_enabled and len(self.sample_shape) == 2 and add_channel_dimension:
+            self.sample_shape += (1,) # The 'depth' dimension to 1
+
+        self.save_to_dir = save_to_dir
+        self.save_prefix = save_prefix
+        self.save_format = save_format
+        self.validation_split = audio_data_generator.validation_split
+
+        if subset is not None:
+            validation_split = audio_data_generator.validation_split
+            if subset == 'validation':
+                split = (0, validation_split)
+            elif subset == 'training':
+                split = (validation_split, 1)
+            else:
+                raise ValueError(
+                    f'Invalid subset name: {subset}; '
+                    'expected "training" or "validation"'
+                )
+        else:
+            split = None
+        self.split = split
+        self.subset = subset
+
+
+
+def get_batches_of_transformed_samples(
+    batch_index:int, 
+    filenames:List[str], 
+    classes:List[int], 
+    params:ParallelProcessParams
+) -> Tuple[int, Tuple[np.ndarray, np.ndarray]]:
+    """Gets a batch of transformed samples.
+
+    The samples are processed in stages:
+
+    1. Each audio file is read, pre-processed with ``noaug_preprocessing_function``,
+       and cropped/padded (with the speed, pitch, VTLP augmentations) into a row of a ``[n_samples, sample_length]`` array
+    2. The loudness and noise augmentations are applied to the entire array with vectorized operations
+    3. ``preprocessing_function`` is applied to each sample
+    4. The entire array is sent through the AudioFeatureGenerator
+    5. ``postprocessing_function`` and the standardizations are applied
+
+    Arguments:
+        batch_index: Index of this batch
+        filenames: List of filenames for this batch
+        classes: List of class ids mapping to the filenames list
+        params: Generator parameters
+
+    # Returns
+        A batch of transformed samples: batch_index, (batch_x, batch_y)
+    """
+    n_samples = len(filenames)
+    batch_shape = (n_samples,) + params.sample_shape
+    batch_x = np.zeros(batch_shape, dtype=params.dtype)
+    # build batch of image data
+
+    # Ensure the RNG is unique for each batch
+    augmentation_enabled = params.subset != 'validation' or params.audio_data_generator.validation_augmentation_enabled
+    if augmentation_enabled:
+        random.seed(batch_index + int(time.time()))
+        np.random.seed(batch_index + int(time.time()))
+
+    # If a frontend dtype was specified use that,
+    # otherwise just use the output dtype
+    frontend_dtype = params.frontend_dtype or params.dtype
+    default_transform = params.audio_data_generator.default_transform
+
+    # The spectrogram may only be cached if generating it is deterministic
+    feature_cache = params.audio_data_generator.feature_cache
+    if not params.frontend_enabled or \
+        params.noaug_preprocessing_function is not None or \
+        params.preprocessing_function is not None:
+        feature_cache = None
+
+    if augmentation_enabled:
+        transforms = [params.audio_data_generator.get_random_transform() for _ in range(n_samples)]
+    else:
+        transforms = [default_transform] * n_samples
+
+    samples:List[np.ndarray] = [None] * n_samples
+    cache_keys:List[str] = [None] * n_samples
+    if feature_cache is not None:
+        for i, filename in enumerate(filenames):
+            if filename and transforms[i] == default_transform:
+                cache_keys[i] = params.audio_data_generator.get_feature_cache_key(
+                    os.path.join(params.directory, filename),
+                    transform_params=transforms[i],
+                    dtype=frontend_dtype
+                )
+                samples[i] = feature_cache.get(cache_keys[i])
+
+    pending = [i for i in range(n_samples) if samples[i] is None]
+    if pending:
+        generated = _generate_samples(
+            params,
+            indices=pending,
+            transforms=[transforms[i] for i in pending],
+            frontend_dtype=frontend_dtype,
+            batch_class_ids=classes,
+            batch_filenames=filenames
+        )
+        for i, x in zip(pending, generated):
+            samples[i] = x
+            if cache_keys[i] is not None:
+                feature_cache.put(cache_keys[i], x)
+
+    # Perform any post processing as necessary
+    if params.postprocessing_function is not None:
+        for i, x in enumerate(samples):
+            kwargs = _add_optional_callback_arguments( 
+                params.postprocessing_function,
+                batch_index=i,
+                class_id=classes[i],
+                filename=filenames[i],
+                batch_class_ids=classes,
+                batch_filenames=filenames
+            )
+            samples[i] = params.postprocessing_function(params, x, **kwargs)
+
+    if params.frontend_enabled:
+        generator = params.audio_data_generator
+        if generator.samplewise_center or generator.samplewise_std_normalization or generator.samplewise_normalize_range:
+            # Do any standardizations (which are done using float32 internally)
+            samples = [generator.standardize(x) for x in samples]
+            _stack_samples(samples, batch_x)
+        elif all(x.shape == samples[0].shape for x in samples):
+            # Only element-wise standardizations are enabled,
+            # so they can be applied to the entire batch at once
+            _stack_samples(generator.standardize(np.stack(samples)), batch_x)
+        else:
+            _stack_samples([generator.standardize(x) for x in samples], batch_x)
+    else:
+        _stack_samples(samples, batch_x)
+
+    # build batch of labels
+    if params.class_mode == 'input':
+        batch_y = batch_x.copy()
+    
+    elif params.class_mode in {'binary', 'sparse'}:
+        batch_y = np.asarray(classes, dtype=params.dtype)
+    
+    elif params.class_mode == 'categorical':
+        batch_y = np.zeros((n_samples, len(params.class_indices)), dtype=params.dtype)
+        batch_y[np.arange(n_samples), np.asarray(classes, dtype=np.int64)] = 1.
+        
+    else:
+        return batch_index, batch_x
+
+    return batch_index, (batch_x, batch_y)
+
+
+
+def _generate_samples(
+    params:ParallelProcessParams,
+    indices:List[int],
+    transforms:List[dict],
+    frontend_dtype,
+    batch_class_ids:List[int],
+    batch_filenames:List[str]
+) -> List[np.ndarray]:
+    """Read the audio files at the given batch indices, augment them, and (if enabled) pass them through the frontend"""
+    generator = params.audio_data_generator
+    batch_audio = np.empty((len(indices), generator.sample_length), dtype=np.float32)
+    original_sample_rates = []
+
+    for j, i in enumerate(indices):
+        filename = batch_filenames[i]
+        if filename:
+            filepath = os.path.join(params.directory, filename)
+            x, orignal_sr = audio_utils.read_audio_file(filepath, return_sample_rate=True, return_numpy=True)
+
+        else:
+            orignal_sr = 16000
+            x = np.zeros((orignal_sr,), dtype='float32')
+
+        # At this point, 
+        # x = [sample_length] dtype=float32
+
+        if params.noaug_preprocessing_function is not None:
+            kwargs = _add_optional_callback_arguments( 
+                params.noaug_preprocessing_function,
+                batch_index=i,
+                class_id=batch_class_ids[i],
+                filename=filename,
+                batch_class_ids=batch_class_ids,
+                batch_filenames=batch_filenames
+            )
+            x = params.noaug_preprocessing_function(params, x, **kwargs)
+
+        # Apply any augmentations that change the sample length
+        # NOTE: If transform_params =  default_transform
+        #       Then the audio sample is simply cropped/padded to fit the expected sample length
+        batch_audio[j] = generator.apply_sample_transform(x, orignal_sr, transforms[j])
+        original_sample_rates.append(orignal_sr)
+
+    # Apply the remaining audio augmentations to the entire batch
+    batch_audio = generator.apply_batch_transform(
+        batch_audio,
+        transform_params=transforms,
+        original_sample_rates=original_sample_rates,
+        inplace=True
+    )
+
+    if params.preprocessing_function is None:
+        samples = batch_audio
+    else:
+        samples = []
+        for j, i in enumerate(indices):
+            kwargs = _add_optional_callback_arguments( 
+                params.preprocessing_function,
+                batch_index=i,
+                class_id=batch_class_ids[i],
+                filename=batch_filenames[i],
+                batch_class_ids=batch_class_ids,
+                batch_filenames=batch_filenames
+            )
+            samples.append(params.preprocessing_function(params, batch_audio[j], **kwargs))
+
+        # If the pre-processing function did not change the sample shapes,
+        # then the frontend can process the entire batch
+        if all(x.shape == batch_audio.shape[1:] for x in samples):
+            samples = np.stack(samples)
+
+    if not params.frontend_enabled:
+        return list(samples)
+
+    # After point through the frontend, 
+    # x = [height, width] dtype=frontend_dtype
+    if isinstance(samples, np.ndarray):
+        return list(generator.apply_frontend(samples, dtype=frontend_dtype))
+
+    return [generator.apply_frontend(x, dtype=frontend_dtype) for x in samples]
+
+
+def _stack_samples(samples:List[np.ndarray], batch_x:np.ndarray):
+    """Copy the samples into the batch, adding the channel dimension if necessary"""
+    for i, x in enumerate(samples):
+        # NOTE: This also converts the sample's shape from [height, width]
+        #       to [height, width, 1] if necessary
+        batch_x[i] = x.reshape(batch_x.shape[1:]) if x.size == batch_x[i].size else x
+
+
+
+
+def _add_optional_callback_arguments(
+    func, 
+    batch_index, 
+    class_id, 
+    filename, 
+    batch_class_ids, 
+    batch_filenames
+) -> dict:
+    retval = {}
+    args = _get_callback_arg_names(func)
+    if 'batch_index' in args:
+        retval['batch_index'] = batch_index
+    if 'class_id' in args:
+        retval['class_id'] = class_id
+    if 'filename' in args:
+        retval['filename'] = filename
+    if 'batch_class_ids' in args:
+        retval['batch_class_ids'] = batch_class_ids
+    if 'batch_filenames' in args:
+        retval['batch_filenames'] = batch_filenames
+
+    return retval
+
+
+@functools.lru_cache(maxsize=32)
+def _get_callback_arg_names(func) -> frozenset:
+    # NOTE: The callbacks are given to each worker once (as part of its context),
+    #       so this is only done once per callback per worker
+    return frozenset(inspect.getfullargspec(func).args)
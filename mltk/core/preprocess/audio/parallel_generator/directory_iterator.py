@@ -8,7 +8,8 @@ from typing import Dict
 import copy
 import numpy as np
 from mltk.core.preprocess.utils import list_dataset_directory
-from .iterator import ParallelProcessParams, ParallelIterator
+from .iterator import ParallelIterator
+from .batch_processing import ParallelProcessParams
 
 
 
@@ -40,6 +41,7 @@ class ParallelDirectoryIterator(ParallelIterator):
         cores=0.25,
         debug=False,
         max_batches_pending=4,
+        max_pending_bytes:int=None,
         get_batch_function=None,
         noaug_preprocessing_function=None,
         preprocessing_function=None,
@@ -49,15 +51,18 @@ class ParallelDirectoryIterator(ParallelIterator):
         frontend_enabled=True,
         disable_gpu_in_subprocesses=True,
         add_channel_dimension=True,
-        class_counts:Dict[str,int]=None
+        class_counts:Dict[str,int]=None,
+        use_shared_memory=False
     ):
 
         self.directory = directory
         classes = copy.deepcopy(classes)
         self.max_batches_pending = max_batches_pending
+        self.max_pending_bytes = max_pending_bytes
         self.cores = cores
         self.debug = debug
         self.disable_gpu_in_subprocesses = disable_gpu_in_subprocesses
+        self.use_shared_memory = use_shared_memory
 
         
         if class_mode not in self.allowed_class_modes:
@@ -6,11 +6,12 @@ Refer to `ParallelAudioDataGenerator` for more details
 import warnings
 import os
 import copy
-from typing import Dict
+from typing import Dict, List
 
 import numpy as np
 
 from mltk.utils.python import append_exception_msg
+from mltk.utils import tar_index
 try:
     import librosa
 except Exception as e:
@@ -24,7 +25,7 @@ from mltk.core.preprocess.audio.audio_feature_generator import (
 )
 from mltk.core.preprocess import utils as data_utils
 from mltk.core.preprocess.utils import audio as audio_utils
-from .directory_iterator import ParallelDirectoryIterator
+from mltk.core.preprocess.utils.feature_cache import FeatureCache, file_fingerprint
 
 
 class ParallelAudioDataGenerator:
@@ -85,8 +86,12 @@ class ParallelAudioDataGenerator:
             A larger number can improving training times at the expense of 
             increased system memory usage.
 
+        max_pending_bytes: Optional, the maximum total size in bytes of the processed batches to queue.
+            If set, then fewer than ``max_batches_pending`` batches are queued when the batches are large.
+            This helps to bound the system memory usage regardless of the batch size.
+
         get_batch_function: function that should return the transformed batch.
-            If this is omitted, then iterator.get_batches_of_transformed_samples() is used
+            If this is omitted, then batch_processing.get_batches_of_transformed_samples() is used
             This function should have the following signature:
 
             .. highlight:: python
@@ -250,6 +255,22 @@ class ParallelAudioDataGenerator:
         add_channel_dimension: If true and ``frontend_enabled=True``, then automatically convert 
             generated sample shape from [height, width] to [height, width, 1]. 
             If false, then generated sample shape is [height, width].
+
+        use_shared_memory: If true, then the generated batches are returned from the subprocesses through shared memory
+            instead of being pickled through the subprocesses' pipes. This reduces the number of times each batch is copied.
+            Refer to :py:class:`mltk.utils.process_pool.ProcessPool` for more details.
+            This is ignored if ``debug=True``
+
+        feature_cache_dir: If given, then the spectrograms generated by the AudioFeatureGenerator are cached in this directory.
+            The cache is only used for samples whose processing is deterministic, i.e.
+            ``frontend_enabled=True``, no ``noaug_preprocessing_function`` or ``preprocessing_function`` is given, 
+            and the sample's transform is the :py:attr:`~default_transform` (e.g. validation samples with ``validation_augmentation_enabled=False``).
+            Cached entries are keyed on the audio file (path, size and modification time), the ``frontend_settings``,
+            the frontend dtype, the transform and ``trim_threshold_db``.
+            The ``postprocessing_function`` and normalizations are applied to the cached spectrograms.
+
+        feature_cache_max_size: The maximum size of the ``feature_cache_dir`` in bytes. 
+            The least recently used entries are deleted when this size is exceeded.
     
     '''
     def __init__(
@@ -257,6 +278,7 @@ class ParallelAudioDataGenerator:
         cores=0.25,
         debug=False,
         max_batches_pending=4, 
+        max_pending_bytes:int=None,
         get_batch_function=None,
         noaug_preprocessing_function=None, 
         preprocessing_function=None,
@@ -286,13 +308,17 @@ class ParallelAudioDataGenerator:
         frontend_enabled = True,
         sample_shape=None,
         disable_gpu_in_subprocesses=True,
-        add_channel_dimension=True
+        add_channel_dimension=True,
+        use_shared_memory=False,
+        feature_cache_dir:str=None,
+        feature_cache_max_size:int=2*1024*1024*1024
     ):
 
         self.cores = cores
         self.debug = debug
         self.disable_random_transforms = disable_random_transforms
         self.max_batches_pending = max_batches_pending
+        self.max_pending_bytes = max_pending_bytes
         self.get_batch_function = get_batch_function
         self.noaug_preprocessing_function = noaug_preprocessing_function
         self.preprocessing_function = preprocessing_function
@@ -325,6 +351,8 @@ class ParallelAudioDataGenerator:
         self._sample_shape = sample_shape
         self.disable_gpu_in_subprocesses = disable_gpu_in_subprocesses
         self.add_channel_dimension = add_channel_dimension
+        self.use_shared_memory = use_shared_memory
+        self.feature_cache = FeatureCache(feature_cache_dir, max_size=feature_cache_max_size) if feature_cache_dir else None
 
         
         self.NOISE_COLORS =  ('white', 'brown', 'blue', 'pink', 'violet')
@@ -470,20 +498,26 @@ class ParallelAudioDataGenerator:
         """
         
         if self.bg_noise_dir:
+            # NOTE: The bg_noise_dir may be a directory in a .tar archive dataset
             bg_noise_dir = self.bg_noise_dir
-            if not os.path.exists(bg_noise_dir):
+            if not tar_index.exists(bg_noise_dir):
                 bg_noise_dir = f'{directory}/{self.bg_noise_dir}'
-            if not os.path.exists(bg_noise_dir):
+            if not tar_index.exists(bg_noise_dir):
                 raise Exception(f'bg_noise_dir not found {self.bg_noise_dir}')
             
             self.bg_noises = {}
-            for fn in os.listdir(bg_noise_dir):
+            for fn in tar_index.listdir(bg_noise_dir):
                 if not fn.endswith('.wav'):
                     continue 
-                fp = os.path.join(bg_noise_dir, fn)
-                noise_audio, _ = librosa.load(fp, sr=self.sample_rate_hz, mono=True, dtype='float32')
+                fp = f'{bg_noise_dir}/{fn}'
+                with tar_index.open_file(fp) as f:
+                    noise_audio, _ = librosa.load(f, sr=self.sample_rate_hz, mono=True, dtype='float32')
                 self.bg_noises[fn[:-4]] = noise_audio
 
+        # NOTE: The iterator imports Tensorflow,
+        #       it is imported here so that the data generator's subprocesses do not import it
+        from .directory_iterator import ParallelDirectoryIterator
+
         return ParallelDirectoryIterator(
             directory,
             self,
@@ -505,6 +539,7 @@ class ParallelAudioDataGenerator:
             cores=self.cores,
             debug=self.debug,
             max_batches_pending=self.max_batches_pending,
+            max_pending_bytes=self.max_pending_bytes,
             get_batch_function=self.get_batch_function,
             noaug_preprocessing_function=self.noaug_preprocessing_function,
             preprocessing_function=self.preprocessing_function,
@@ -514,7 +549,8 @@ class ParallelAudioDataGenerator:
             frontend_enabled=self.frontend_enabled,
             disable_gpu_in_subprocesses=self.disable_gpu_in_subprocesses,
             add_channel_dimension=self.add_channel_dimension,
-            class_counts=class_counts
+            class_counts=class_counts,
+            use_shared_memory=self.use_shared_memory
         )
     
     
@@ -534,6 +570,17 @@ class ParallelAudioDataGenerator:
         })
     
     
+    def get_feature_cache_key(self, path:str, transform_params:dict, dtype) -> str:
+        """Return the key used to cache the spectrogram generated from the given audio file"""
+        return FeatureCache.make_key(
+            file_fingerprint(path),
+            sorted(self.frontend_settings.items()),
+            np.dtype(dtype).str,
+            sorted(transform_params.items()),
+            self.trim_threshold_db
+        )
+
+
     def get_random_transform(self) -> dict:
         """Generate random augmentation settings based on the configeration parameters"""
         xform_params = self.default_transform
@@ -618,37 +665,109 @@ class ParallelAudioDataGenerator:
 
     def apply_transform(self, sample, orignal_sr, params, whole_sample=False):
         """Apply the given transform parameters to the input audio sample"""
+        sample = self.apply_sample_transform(sample, orignal_sr, params, whole_sample=whole_sample)
+        return self.apply_batch_transform(
+            np.expand_dims(sample, axis=0),
+            transform_params=[params],
+            original_sample_rates=[orignal_sr]
+        )[0]
+
+
+    def apply_sample_transform(self, sample, orignal_sr, params, whole_sample=False):
+        """Apply the transforms that change the length of the given audio sample
+
+        This applies the speed, pitch and VTLP augmentations then crops/pads
+        the sample to the generator's sample length.
+        The remaining augmentations are applied to a batch of samples with :py:meth:`~apply_batch_transform`
+        """
         if params['speed_factor'] and params['speed_factor'] != 1.0:
             rate =  params['speed_factor']
             sample = librosa.effects.time_stretch(sample, rate=rate)
-            
+
         if params['pitch_factor'] and params['pitch_factor'] != 0:
             sample = librosa.effects.pitch_shift(sample, sr=orignal_sr, n_steps=params['pitch_factor'])
-        
+
         if params['vtlp_factor'] and params['vtlp_factor'] != 1.0:
             sample = self._apply_vtlp(sample, orignal_sr, params['vtlp_factor'])
-        
-        sample = self.adjust_length(sample, orignal_sr, offset=params['offset_percentage'], whole_sample=whole_sample)
 
-        if params['loudness_factor'] and params['loudness_factor'] != 1.0:
-            sample = sample * params['loudness_factor']
+        return self.adjust_length(sample, orignal_sr, offset=params['offset_percentage'], whole_sample=whole_sample)
 
 
-        if params['noise_color'] and params['noise_color_factor'] > 0:
-            color = params['noise_color'].lower()
-            if color != 'none':
-                noise = self._get_color_noise(sample, color)
-                sample = sample + (noise * (params['noise_color_factor'] * params['loudness_factor']))
-        
-        if not params['bg_noise'] is None and params['bg_noise_factor'] > 0:
-            bg_noise_offset = np.random.uniform(0.0, 1.0)
-            bg_noise = self.bg_noises[params['bg_noise']]
-            bg_noise = self.adjust_length(bg_noise, orignal_sr, offset=bg_noise_offset, out_length=len(sample))
-            # bg_noise = np.clip(bg_noise, sample.min(), sample.max())
+    def apply_batch_transform(
+        self,
+        samples:np.ndarray,
+        transform_params:List[dict],
+        original_sample_rates:List[int],
+        inplace=False
+    ) -> np.ndarray:
+        """Apply the loudness and noise augmentations to a batch of audio samples
+
+        The augmentations are applied with vectorized operations to the entire batch.
 
-            sample = sample + (bg_noise * (params['bg_noise_factor'] * params['loudness_factor']))
+        Args:
+            samples: Batch of audio samples with the shape [n_samples, sample_length],
+                typically the samples are first processed by :py:meth:`~apply_sample_transform`
+            transform_params: The transform parameters for each sample, see :py:meth:`~get_random_transform`
+            original_sample_rates: The original sample rate of each sample
+            inplace: If true, then the given samples array may be modified
 
-        return sample
+        Returns:
+            The augmented batch of samples
+        """
+        if len(samples) == 0:
+            return samples
+
+        loudness_factors = np.array(
+            [1.0 if p['loudness_factor'] is None else p['loudness_factor'] for p in transform_params],
+            dtype=np.float32
+        )
+        if np.any(loudness_factors != 1.0):
+            samples = samples * np.expand_dims(loudness_factors, axis=-1).astype(samples.dtype)
+            inplace = True
+
+        # Group the samples by noise color so that the noise for each group is generated with a single FFT
+        color_rows:Dict[str,List[int]] = {}
+        for i, p in enumerate(transform_params):
+            if p['noise_color'] and p['noise_color_factor'] > 0:
+                color = p['noise_color'].lower()
+                if color != 'none':
+                    color_rows.setdefault(color, []).append(i)
+
+        bg_noise_rows = [
+            i for i, p in enumerate(transform_params)
+            if not p['bg_noise'] is None and p['bg_noise_factor'] > 0
+        ]
+
+        if (color_rows or bg_noise_rows) and not (inplace and samples.flags.writeable):
+            samples = samples.copy()
+
+        for color, rows in color_rows.items():
+            noise = self._get_color_noise_batch(samples[rows], color)
+            noise_factors = np.array(
+                [transform_params[i]['noise_color_factor'] * loudness_factors[i] for i in rows],
+                dtype=samples.dtype
+            )
+            samples[rows] += noise * np.expand_dims(noise_factors, axis=-1)
+
+        if bg_noise_rows:
+            sample_length = samples.shape[-1]
+            bg_noise_offsets = np.random.uniform(0.0, 1.0, size=len(bg_noise_rows))
+            bg_noises = np.empty((len(bg_noise_rows), sample_length), dtype=samples.dtype)
+            for j, i in enumerate(bg_noise_rows):
+                bg_noise = self.bg_noises[transform_params[i]['bg_noise']]
+                bg_noises[j] = self.adjust_length(
+                    bg_noise,
+                    original_sample_rates[i],
+                    offset=bg_noise_offsets[j],
+                    out_length=sample_length
+                )
+            bg_noise_factors = np.array(
+                [transform_params[i]['bg_noise_factor'] * loudness_factors[i] for i in bg_noise_rows],
+                dtype=samples.dtype
+            )
+            samples[bg_noise_rows] += bg_noises * np.expand_dims(bg_noise_factors, axis=-1)
+
+        return samples
 
 
     def apply_frontend(self, sample, dtype=np.float32) -> np.ndarray:
@@ -731,28 +850,33 @@ class ParallelAudioDataGenerator:
 
 
     def _get_color_noise(self, sample, color):
+        return self._get_color_noise_batch(np.expand_dims(sample, axis=0), color)[0]
+
+
+    def _get_color_noise_batch(self, samples:np.ndarray, color:str) -> np.ndarray:
+        """Generate colored noise for each sample in the given batch of shape [n_samples, sample_length]"""
         # https://en.wikipedia.org/wiki/Colors_of_noise
-        sample_length = len(sample)
+        n_samples, sample_length = samples.shape
         uneven = sample_length % 2
         fft_size = sample_length // 2 + 1 + uneven
-        noise_fft = np.random.randn(fft_size)
+        noise_fft = np.random.randn(n_samples, fft_size)
         color_noise = np.linspace(1, fft_size, fft_size)
         scale_factor = 1.0
 
         if color == 'white':
             pass  # no color noise
-        
+
         elif color == 'pink':
             color_noise = color_noise ** (-1)  # 1/f
             scale_factor = 10
-            
+
         elif color in 'brown':
             color_noise = color_noise ** (-2)  # 1/f^2
             scale_factor = 10
-            
+
         elif color in 'blue':
             scale_factor = 0.01
-            
+
         elif color in 'violet':
             color_noise = color_noise ** 2  # f^2
             scale_factor = 0.01
@@ -764,16 +888,19 @@ class ParallelAudioDataGenerator:
             noise_fft = noise_fft * color_noise
 
         if uneven:
-            noise_fft = noise_fft[:-1]
+            noise_fft = noise_fft[:, :-1]
 
-        noise = np.fft.irfft(noise_fft)
-        
-        noise = np.clip(noise, sample.min(), sample.max()) * scale_factor
-        if len(noise) != sample_length:
-            old_noise = noise 
-            noise = np.zeros((sample_length,), dtype=np.float32)
-            noise[:len(old_noise)] = old_noise
+        noise = np.fft.irfft(noise_fft, axis=-1)
 
+        noise = np.clip(
+            noise,
+            np.min(samples, axis=-1, keepdims=True),
+            np.max(samples, axis=-1, keepdims=True)
+        ) * scale_factor
+        if noise.shape[-1] != sample_length:
+            old_noise = noise
+            noise = np.zeros((n_samples, sample_length), dtype=np.float32)
+            noise[:, :old_noise.shape[-1]] = old_noise
+
+        return noise.astype(samples.dtype)
 
-        return noise.astype(sample.dtype)
-    
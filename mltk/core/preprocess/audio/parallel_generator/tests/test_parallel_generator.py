@@ -0,0 +1,357 @@
+import os
+import sys
+import wave
+import tarfile
+import pytest
+import numpy as np
+
+from mltk.core.preprocess.audio.parallel_generator import ParallelAudioDataGenerator
+from mltk.core.preprocess.audio.audio_feature_generator import AudioFeatureGeneratorSettings, AudioFeatureGenerator
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+CLASSES = ('low', 'high')
+
+
+@pytest.fixture
+def dataset_dir():
+    d = create_tempdir('utests/parallel_audio_generator')
+    remove_directory(d)
+    for class_name, freq in zip(CLASSES, (200.0, 600.0)):
+        os.makedirs(f'{d}/{class_name}')
+        for i in range(4):
+            _write_tone(f'{d}/{class_name}/sample_{i}.wav', freq*(1 + i*0.1))
+    os.makedirs(f'{d}/_background_noise_')
+    _write_tone(f'{d}/_background_noise_/hum.wav', 60.0, duration=3.0)
+    yield d
+    remove_directory(d)
+
+
+@pytest.fixture
+def dataset_tar(dataset_dir):
+    tar_path = f'{dataset_dir}/dataset.tar'
+    with tarfile.open(tar_path, 'w') as tar_file:
+        for name in (*CLASSES, '_background_noise_'):
+            tar_file.add(f'{dataset_dir}/{name}', arcname=name)
+    yield tar_path
+
+
+def _write_tone(path:str, freq:float, duration:float=1.0):
+    t = np.arange(int(16000 * duration)) / 16000
+    samples = (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+    with wave.open(path, 'w') as wav:
+        # pylint: disable=no-member
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(samples.tobytes())
+
+
+def _create_generator(**kwargs) -> ParallelAudioDataGenerator:
+    frontend_settings = AudioFeatureGeneratorSettings()
+    frontend_settings.sample_rate_hz = 16000
+    frontend_settings.sample_length_ms = 1000
+    frontend_settings.window_size_ms = 30
+    frontend_settings.window_step_ms = 20
+    frontend_settings.filterbank_n_channels = 32
+
+    # NOTE: The frontend is disabled so that the raw audio is returned.
+    #       This way, the tests do not require the AudioFeatureGenerator C++ wrapper
+    kwargs.setdefault('frontend_enabled', False)
+    kwargs.setdefault('sample_shape', (16000,))
+    kwargs.setdefault('add_channel_dimension', False)
+
+    return ParallelAudioDataGenerator(
+        frontend_settings=frontend_settings,
+        cores=2,
+        **kwargs
+    )
+
+
+def _flow(gen:ParallelAudioDataGenerator, directory:str, **kwargs):
+    return gen.flow_from_directory(
+        directory,
+        classes=CLASSES,
+        batch_size=4,
+        shuffle=False,
+        **kwargs
+    )
+
+
+def _have_frontend() -> bool:
+    try:
+        AudioFeatureGenerator(_create_generator().frontend_settings)
+        return True
+    except ImportError:
+        return False
+
+
+def _read_all_batches(it) -> np.ndarray:
+    batches = []
+    for i in range(len(it)):
+        x, _ = it[i]
+        batches.append(x)
+    return np.concatenate(batches)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Requires /proc/<pid>/maps')
+def test_subprocesses_do_not_import_tensorflow(dataset_dir):
+    it = _flow(_create_generator(), dataset_dir)
+    try:
+        x, y = it[0]
+        assert x.shape == (4, 16000)
+        assert y.shape == (4, len(CLASSES))
+
+        n_checked = 0
+        for p in it.pool._processes: # pylint: disable=protected-access
+            pid = p._subprocess.pid # pylint: disable=protected-access
+            with open(f'/proc/{pid}/maps', 'r') as f:
+                maps = f.read()
+            # Importing Tensorflow loads its shared libraries into the process
+            assert 'tensorflow' not in maps
+            n_checked += 1
+        assert n_checked > 0
+    finally:
+        it.shutdown()
+
+
+def test_tar_dataset_bg_noise(dataset_dir, dataset_tar):
+    gen = _create_generator(
+        bg_noise_dir='_background_noise_',
+        bg_noise_range=(0.5, 0.5),
+        disable_random_transforms=True
+    )
+    it = _flow(gen, dataset_tar)
+    try:
+        assert list(gen.bg_noises.keys()) == ['hum']
+        assert len(gen.bg_noises['hum']) == 3*16000
+        x = _read_all_batches(it)
+        assert x.shape == (8, 16000)
+    finally:
+        it.shutdown()
+
+    # The bg noise should be the same as the one loaded from the extracted dataset
+    extracted_gen = _create_generator(bg_noise_dir=f'{dataset_dir}/_background_noise_')
+    _flow(extracted_gen, dataset_dir).shutdown()
+    assert np.array_equal(gen.bg_noises['hum'], extracted_gen.bg_noises['hum'])
+
+
+def test_tar_dataset_feature_cache_key(dataset_dir, dataset_tar):
+    gen = _create_generator()
+    path = f'{dataset_tar}/low/sample_0.wav'
+    key = gen.get_feature_cache_key(path, gen.default_transform, 'float32')
+    assert key == gen.get_feature_cache_key(path, gen.default_transform, 'float32')
+    assert key != gen.get_feature_cache_key(f'{dataset_tar}/low/sample_1.wav', gen.default_transform, 'float32')
+
+    # Updating the archive should invalidate the cached entries
+    st = os.stat(dataset_tar)
+    os.utime(dataset_tar, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert key != gen.get_feature_cache_key(path, gen.default_transform, 'float32')
+
+
+@pytest.mark.skipif(not _have_frontend(), reason='Requires the AudioFeatureGenerator C++ wrapper')
+def test_tar_dataset_feature_cache(dataset_dir, dataset_tar):
+    cache_dir = f'{dataset_dir}/feature_cache'
+    gen = _create_generator(
+        frontend_enabled=True,
+        add_channel_dimension=True,
+        disable_random_transforms=True,
+        feature_cache_dir=cache_dir
+    )
+    it = _flow(gen, dataset_tar)
+    try:
+        x1 = _read_all_batches(it)
+    finally:
+        it.shutdown()
+
+    n_entries = sum(len(files) for _, _, files in os.walk(cache_dir))
+    assert n_entries == 8
+
+    it = _flow(gen, dataset_tar)
+    try:
+        x2 = _read_all_batches(it)
+    finally:
+        it.shutdown()
+
+    assert np.array_equal(x1, x2)
+    assert sum(len(files) for _, _, files in os.walk(cache_dir)) == n_entries
+
+    # Changing the frontend settings should invalidate the cached entries
+    gen.frontend_settings.filterbank_n_channels = 40
+    it = _flow(gen, dataset_tar)
+    try:
+        x3 = _read_all_batches(it)
+    finally:
+        it.shutdown()
+
+    assert x3.shape[0] == x1.shape[0]
+    assert sum(len(files) for _, _, files in os.walk(cache_dir)) == 2*n_entries
+
+
+def test_feature_cache(dataset_dir):
+    gen = _create_generator(feature_cache_dir=f'{dataset_dir}/feature_cache')
+    path = f'{dataset_dir}/low/sample_0.wav'
+    transform = gen.default_transform
+    spectrogram = np.arange(49*32, dtype=np.float32).reshape(49, 32)
+
+    # Miss
+    key = gen.get_feature_cache_key(path, transform, 'float32')
+    assert gen.feature_cache.get(key) is None
+
+    # Hit
+    gen.feature_cache.put(key, spectrogram)
+    assert gen.get_feature_cache_key(path, transform, 'float32') == key
+    assert np.array_equal(gen.feature_cache.get(key), spectrogram)
+
+    # Changing the settings used to generate the spectrogram should invalidate the cached entry
+    gen.frontend_settings.filterbank_n_channels = 40
+    settings_key = gen.get_feature_cache_key(path, transform, 'float32')
+    assert settings_key != key
+    assert gen.feature_cache.get(settings_key) is None
+
+    assert gen.get_feature_cache_key(path, transform, 'int8') not in (key, settings_key)
+    transform['loudness_factor'] = 0.5
+    assert gen.get_feature_cache_key(path, transform, 'float32') not in (key, settings_key)
+
+    # Restoring the settings should hit the original entry
+    gen.frontend_settings.filterbank_n_channels = 32
+    assert np.array_equal(gen.feature_cache.get(gen.get_feature_cache_key(path, gen.default_transform, 'float32')), spectrogram)
+
+    # Modifying the audio file should invalidate the cached entry
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert gen.feature_cache.get(gen.get_feature_cache_key(path, gen.default_transform, 'float32')) is None
+
+
+def _reference_get_color_noise(sample:np.ndarray, color:str) -> np.ndarray:
+    """The original per-sample implementation of _get_color_noise_batch()"""
+    sample_length = len(sample)
+    uneven = sample_length % 2
+    fft_size = sample_length // 2 + 1 + uneven
+    noise_fft = np.random.randn(fft_size)
+    color_noise = np.linspace(1, fft_size, fft_size)
+    scale_factor = 1.0
+
+    if color == 'pink':
+        color_noise = color_noise ** (-1)
+        scale_factor = 10
+    elif color == 'brown':
+        color_noise = color_noise ** (-2)
+        scale_factor = 10
+    elif color == 'blue':
+        scale_factor = 0.01
+    elif color == 'violet':
+        color_noise = color_noise ** 2
+        scale_factor = 0.01
+
+    if color != 'white':
+        noise_fft = noise_fft * color_noise
+    if uneven:
+        noise_fft = noise_fft[:-1]
+
+    noise = np.fft.irfft(noise_fft)
+    noise = np.clip(noise, sample.min(), sample.max()) * scale_factor
+    if len(noise) != sample_length:
+        old_noise = noise
+        noise = np.zeros((sample_length,), dtype=np.float32)
+        noise[:len(old_noise)] = old_noise
+
+    return noise.astype(sample.dtype)
+
+
+def _reference_apply_transform(gen:ParallelAudioDataGenerator, sample:np.ndarray, sr:int, params:dict) -> np.ndarray:
+    """The original per-sample implementation of apply_batch_transform()"""
+    if params['loudness_factor'] and params['loudness_factor'] != 1.0:
+        sample = sample * params['loudness_factor']
+
+    if params['noise_color'] and params['noise_color_factor'] > 0:
+        color = params['noise_color'].lower()
+        if color != 'none':
+            noise = _reference_get_color_noise(sample, color)
+            sample = sample + (noise * (params['noise_color_factor'] * params['loudness_factor']))
+
+    if not params['bg_noise'] is None and params['bg_noise_factor'] > 0:
+        bg_noise_offset = np.random.uniform(0.0, 1.0)
+        bg_noise = gen.bg_noises[params['bg_noise']]
+        bg_noise = gen.adjust_length(bg_noise, sr, offset=bg_noise_offset, out_length=len(sample))
+        sample = sample + (bg_noise * (params['bg_noise_factor'] * params['loudness_factor']))
+
+    return sample
+
+
+def _random_batch(gen:ParallelAudioDataGenerator, n_samples:int, sample_length:int, **transform) -> tuple:
+    samples = np.random.uniform(-1.0, 1.0, size=(n_samples, sample_length)).astype(np.float32)
+    transform_params = []
+    for i in range(n_samples):
+        params = gen.default_transform
+        params['loudness_factor'] = 0.5 + 0.25*i
+        params.update(transform)
+        transform_params.append(params)
+    return samples, transform_params
+
+
+def _compare_batch_with_reference(gen:ParallelAudioDataGenerator, samples:np.ndarray, transform_params:list):
+    sample_rates = [16000] * len(samples)
+
+    np.random.seed(42)
+    expected = np.stack([
+        _reference_apply_transform(gen, sample, sr, params)
+        for sample, sr, params in zip(samples, sample_rates, transform_params)
+    ])
+
+    np.random.seed(42)
+    batch = gen.apply_batch_transform(samples.copy(), transform_params, sample_rates)
+    assert batch.dtype == samples.dtype
+    np.testing.assert_allclose(batch, expected, rtol=1e-5, atol=1e-6)
+
+    # The given samples should not be modified unless inplace=True
+    samples_copy = samples.copy()
+    gen.apply_batch_transform(samples, transform_params, sample_rates)
+    assert np.array_equal(samples, samples_copy)
+
+
+@pytest.mark.parametrize('sample_length', [1000, 1001])
+@pytest.mark.parametrize('color', ['white', 'brown', 'blue', 'pink', 'violet'])
+def test_batch_transform_color_noise(color, sample_length):
+    gen = _create_generator()
+    samples, transform_params = _random_batch(
+        gen,
+        n_samples=3,
+        sample_length=sample_length,
+        noise_color=color,
+        noise_color_factor=0.3
+    )
+    _compare_batch_with_reference(gen, samples, transform_params)
+
+
+def test_batch_transform_bg_noise():
+    gen = _create_generator()
+    gen.bg_noises = {'hum': np.random.uniform(-1.0, 1.0, size=3*16000).astype(np.float32)}
+    samples, transform_params = _random_batch(
+        gen,
+        n_samples=3,
+        sample_length=16000,
+        bg_noise='hum',
+        bg_noise_factor=0.4
+    )
+    _compare_batch_with_reference(gen, samples, transform_params)
+
+
+def test_batch_transform_loudness():
+    gen = _create_generator()
+    samples, transform_params = _random_batch(gen, n_samples=3, sample_length=1000)
+    transform_params[0]['loudness_factor'] = None
+    _compare_batch_with_reference(gen, samples, transform_params)
+
+
+def test_apply_transform():
+    gen = _create_generator()
+    sample = np.random.uniform(-1.0, 1.0, size=16000).astype(np.float32)
+    params = gen.default_transform
+    params.update(loudness_factor=0.8, noise_color='pink', noise_color_factor=0.2)
+
+    np.random.seed(42)
+    expected = _reference_apply_transform(gen, gen.adjust_length(sample, 16000, offset=params['offset_percentage']), 16000, params)
+    np.random.seed(42)
+    transformed = gen.apply_transform(sample, 16000, params)
+    np.testing.assert_allclose(transformed, expected, rtol=1e-5, atol=1e-6)
@@ -11,6 +11,7 @@ import numpy as np
 
 from mltk.core.utils import get_mltk_logger
 from mltk.core.preprocess.utils import list_dataset_directory
+from mltk.utils.tar_index import TarIndex, split_tar_path
 from .iterator import ParallelProcessParams, ParallelIterator
 
 
@@ -87,6 +88,7 @@ class ParallelDirectoryIterator(ParallelIterator):
         cores=0.25,
         debug=False,
         max_batches_pending=4,
+        max_pending_bytes:int=None,
         get_batch_function=None,
         preprocessing_function=None,
         noaug_preprocessing_function=None,
@@ -102,6 +104,7 @@ class ParallelDirectoryIterator(ParallelIterator):
         self.class_labels = copy.deepcopy(classes)
         self.debug = debug
         self.max_batches_pending = max_batches_pending
+        self.max_pending_bytes = max_pending_bytes
         self.disable_gpu_in_subprocesses = disable_gpu_in_subprocesses
 
         
@@ -117,9 +120,13 @@ class ParallelDirectoryIterator(ParallelIterator):
             if shuffle_index_dir:
                 raise Exception('Must specify classes if shuffle_index_dir is not None')
             classes = []
-            for subdir in sorted(os.listdir(directory)):
-                if os.path.isdir(os.path.join(directory, subdir)):
-                    classes.append(subdir)
+            tar_path, tar_dir = split_tar_path(directory)
+            if tar_path is not None:
+                classes = sorted(TarIndex.load(tar_path).listdir(tar_dir)[0])
+            else:
+                for subdir in sorted(os.listdir(directory)):
+                    if os.path.isdir(os.path.join(directory, subdir)):
+                        classes.append(subdir)
             self.class_labels = classes
         self.num_classes = len(classes)
         self.class_indices = dict(zip(classes, range(len(classes))))
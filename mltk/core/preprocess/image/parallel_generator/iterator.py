@@ -1,11 +1,11 @@
 """Utilities for real-time data augmentation on image data.
 """
 import os
+import io
 import sys
 import time
 import threading
 import inspect
-import queue
 from typing import List, Tuple
 import random
 import numpy as np
@@ -18,6 +18,8 @@ from mltk.core.keras import (
 from mltk.core import get_mltk_logger
 from mltk.core.keras import DataSequence
 from mltk.utils.process_pool import ProcessPool, calculate_n_jobs
+from mltk.utils.tar_index import is_tar_path, read_file
+from mltk.core.preprocess.utils.batch_data import BatchData
 
 
 class ParallelIterator(DataSequence):
@@ -55,7 +57,10 @@ class ParallelIterator(DataSequence):
             n_jobs=n_jobs,
             debug=self.debug,
             disable_gpu_in_subprocesses=self.disable_gpu_in_subprocesses,
-            logger=get_mltk_logger()
+            logger=get_mltk_logger(),
+            # The processing params are only sent once to each subprocess
+            # rather than being pickled with every batch
+            context=dict(params=self.process_params)
         )
 
         self.batch_generation_started = threading.Event()
@@ -65,9 +70,14 @@ class ParallelIterator(DataSequence):
         self.batch_data = BatchData(
             len(self), 
             shuffle,
-            pool=self.pool
+            pool=self.pool,
+            max_pending=self.max_batches_pending,
+            max_pending_bytes=self.max_pending_bytes
         )
        
+        # Wake the batch generation thread when the pool is shutdown so that it can exit
+        self.pool.add_shutdown_listener(self.batch_generation_started.set)
+
         self.batch_thread = threading.Thread(
             target=self._generate_batch_data_safe, 
             name=f'Batch data generator:{process_params.subset}',
@@ -158,6 +168,7 @@ class ParallelIterator(DataSequence):
             # Clear the started flag, but do NOT reset
             # This way we don't waste any processed batch data
             self.batch_generation_started.clear()
+            self.batch_data.notify()
             raise StopIteration()
         
         self.batch_generation_started.set()
@@ -184,8 +195,9 @@ class ParallelIterator(DataSequence):
     def _generate_batch_data(self):
         while self.is_running:
             # Wait for training to start
-            if not self.batch_generation_started.wait(timeout=0.1):
-                continue
+            self.batch_generation_started.wait()
+            if not self.is_running:
+                return
         
             if self.seed is not None:
                 np.random.seed(self.seed + self.total_batches_seen)
@@ -206,17 +218,13 @@ class ParallelIterator(DataSequence):
             self.batch_data.start_batch()
     
             while self.batch_data.have_more_indices:
-                while self.batch_data.request_count == 0 and self.batch_data.qsize() > self.max_batches_pending:
-                    if self.is_shutdown:
-                        return
-                    if not self.batch_generation_started.is_set():
-                        break
-                    self.batch_data.wait()
-                
-                if not self.batch_generation_started.is_set():
+                # Block until a batch is requested or there is room to buffer another batch
+                if not self.batch_data.wait_for_capacity(self.batch_generation_started):
                     break
-                
+
                 current_batch_index = self.batch_data.next_index()
+                if current_batch_index == -1:
+                    break
                 self.total_batches_seen += 1
                 offset = current_batch_index*self.batch_size
                 batch_index_chunk = index_array[offset:offset+self.batch_size]
@@ -242,7 +250,6 @@ class ParallelIterator(DataSequence):
                 batch_index, 
                 batch_filenames, 
                 batch_classes, 
-                params=self.process_params,
                 pool_callback=self._pool_callback
             )
         except Exception as e:
@@ -367,16 +374,18 @@ def get_batches_of_transformed_samples(
 
     def _process_image_file(class_id, filename) -> np.ndarray:
         filepath = f'{params.directory}/{filename}'
+        # NOTE: If the dataset is an uncompressed .tar archive, then the sample is read directly from the archive
+        src = io.BytesIO(read_file(filepath)) if is_tar_path(filepath) else filepath
         if filepath.endswith('npy'):
-            x = np.load(filepath)
+            x = np.load(src)
 
         else:
             # If set to 'None' don't rescale and let the user do it in preprocessing_func()
             if params.interpolation is None or params.interpolation.lower() == 'none':
-                img = load_img(filepath,
+                img = load_img(src,
                              color_mode=params.color_mode)
             else:
-                img = load_img(filepath,
+                img = load_img(src,
                              color_mode=params.color_mode,
                              target_size=params.target_size,
                              interpolation=params.interpolation)
@@ -463,159 +472,6 @@ def get_batches_of_transformed_samples(
 
 
 
-class BatchData:
-    
-    def __init__(
-        self, 
-        n:int, 
-        shuffle:bool, 
-        pool:ProcessPool
-    ):
-        self.n = n
-        self.shuffle = shuffle
-        self.pool = pool
-
-        self.batch_data = queue.Queue() if shuffle else {}
-        self.batch_data_lock = threading.Condition()
-        self.indices_lock = threading.Condition()
-        self.indices = []
-        self.batch_counts = []
-        self.saved_batch_zero = None
-        self.requests = []
-        self.data_event = threading.Event()
-        
-    
-    @property
-    def have_more_indices(self):
-        with self.indices_lock:
-            return (len(self.indices) + len(self.requests)) > 0
-    
-    @property
-    def request_count(self):
-        with self.indices_lock:
-            return len(self.requests)
-    
-    
-    def start_batch(self):
-        with self.indices_lock:
-            self.batch_counts.append(self.n)
-            self.indices = [i for i in range(self.n)]
-    
-    
-    def next_index(self):
-        with self.indices_lock:
-            if len(self.requests) > 0:
-                idx = self.requests.pop(0)
-                try:
-                    self.indices.remove(idx)
-                except:
-                    pass 
-                
-                return idx
-            
-            else:
-                return self.indices.pop(0)
-        
-    
-    def wait(self):
-        self.data_event.clear()
-        while self.pool.is_running:
-            if self.data_event.wait(timeout=.1):
-                return True 
-        return False
-        
-    
-    def reset(self):
-        if self.shuffle:
-            while not self.batch_data.empty():
-                self.batch_data.get()
-        else:
-            with self.batch_data_lock:
-                self.batch_data.clear()
-                
-        with self.indices_lock:
-            self.requests = []
-            self.indices = [i for i in range(self.n)]
-        
-    
-    def qsize(self):
-        if self.shuffle:
-            return self.batch_data.qsize()
-        else:
-            with self.batch_data_lock:
-                return len(self.batch_data)
-
-     
-    def put(self, index, value):
-        if self.shuffle:
-            self.batch_data.put(value)
-        else:
-            with self.batch_data_lock:
-                self.batch_data[index] = value
-                self.batch_data_lock.notify_all()
-    
-     
-    def get(self, index, save_batch_zero=False):
-        decrement_batch_count = True 
-
-        # If we're returning batch zero and we have a saved one,
-        # then just return that batch
-        if index == 0 and self.saved_batch_zero is not None:
-            retval = self.saved_batch_zero
-            self.saved_batch_zero = None
-
-        elif self.shuffle:
-            while True:
-                if not self.pool.is_running:
-                    raise StopIteration('The data generator has been stopped')
-
-                try:
-                    retval = self.batch_data.get(timeout=0.1)
-                    break
-                except queue.Empty:
-                    continue
-
-        else:
-            with self.batch_data_lock:
-                if index not in self.batch_data:
-                    with self.indices_lock:
-                        self.requests.append(index)
-                        self.data_event.set()
-                        
-                    while index not in self.batch_data:
-                        if not self.pool.is_running:
-                            raise StopIteration('The data generator has been stopped')
-                        self.batch_data_lock.wait(timeout=0.1)
-                    
-                retval = self.batch_data[index]
-                del self.batch_data[index]
-
-
-        # If this is batch0 and we should save it
-        # then saved a reference to it and do NOt decrement the batch count as it will be returned in a later call
-        if index == 0 and save_batch_zero:
-            self.saved_batch_zero = retval
-            decrement_batch_count = False
-
-        is_last_in_batch = self._decrement_current_batch_count() if decrement_batch_count else False
-        self.data_event.set()
-
-        return retval, is_last_in_batch
-
-
-    def _decrement_current_batch_count(self) -> bool:
-        is_last_in_batch = False
-        with self.indices_lock:
-            current_count = self.batch_counts[0]
-            if current_count == 1:
-                is_last_in_batch = True 
-                self.batch_counts.pop(0)
-            else:
-                self.batch_counts[0] = current_count - 1
-            
-        return is_last_in_batch
-
-
 
 def _add_optional_callback_arguments(
     func, 
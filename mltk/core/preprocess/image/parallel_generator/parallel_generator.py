@@ -46,6 +46,10 @@ class ParallelImageDataGenerator(ImageDataGenerator):
         max_batches_pending: This is the number of processed batches to queue.
             A larger number can improving training times at the expense of 
             increased system memory usage.
+
+        max_pending_bytes: Optional, the maximum total size in bytes of the processed batches to queue.
+            If set, then fewer than ``max_batches_pending`` batches are queued when the batches are large.
+            This helps to bound the system memory usage regardless of the batch size.
                   
         validation_augmentation_enabled: If True, then augmentations will be applied to
             validation data. If False, then no augmentations will be applied to validation data.
@@ -219,6 +223,7 @@ class ParallelImageDataGenerator(ImageDataGenerator):
         cores=0.25,
         debug=False,
         max_batches_pending=4, 
+        max_pending_bytes:int=None,
         get_batch_function=None,
         preprocessing_function=None,
         noaug_preprocessing_function=None, 
@@ -241,6 +246,7 @@ class ParallelImageDataGenerator(ImageDataGenerator):
         self.random_transforms_enabled = random_transforms_enabled
         self.validation_augmentation_enabled = validation_augmentation_enabled
         self.max_batches_pending = max_batches_pending
+        self.max_pending_bytes = max_pending_bytes
         self.get_batch_function = get_batch_function
         self.parallel_preprocessing_function = preprocessing_function
         self.parallel_noaug_preprocessing_function = noaug_preprocessing_function
@@ -396,6 +402,7 @@ class ParallelImageDataGenerator(ImageDataGenerator):
             cores=self.cores,
             debug = self.debug,
             max_batches_pending=self.max_batches_pending,
+            max_pending_bytes=self.max_pending_bytes,
             get_batch_function=self.get_batch_function,
             preprocessing_function=self.parallel_preprocessing_function,
             noaug_preprocessing_function=self.parallel_noaug_preprocessing_function,
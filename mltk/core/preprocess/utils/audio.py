@@ -1,16 +1,22 @@
 """Utilities for processing audio data"""
-
+from __future__ import annotations
 import os
-from typing import Union
+import struct
+from typing import Union, Tuple, TYPE_CHECKING
 import numpy as np
-import tensorflow as tf
 
 from mltk.utils.python import append_exception_msg
+from mltk.utils.tar_index import TarMemberFile, open_file, read_file, is_tar_path
 from mltk.core.preprocess.audio.audio_feature_generator import (
     AudioFeatureGeneratorSettings,
     AudioFeatureGenerator
 )
 
+if TYPE_CHECKING:
+    # NOTE: Tensorflow is imported inside the functions that use it
+    #       so that reading audio (e.g. in the data generator subprocesses) does not import it
+    import tensorflow as tf
+
 try:
     import librosa
 except Exception as e:
@@ -33,16 +39,37 @@ def read_audio_file(
     .. note::
         Only mono data is returned as a 1D array/tensor
 
+    If ``return_numpy=True`` and the path is a Python or numpy string, then 16-bit PCM .wav files
+    are decoded directly with :py:func:`~read_wav_file` (i.e. Tensorflow is not used).
+    Otherwise, the file is decoded with ``tf.audio.decode_wav``.
+
     Args:
-        path: Path to audio file as a python string, numpy string, or tensorflow string
+        path: Path to audio file as a python string, numpy string, or tensorflow string.
+            A python string may also be the path to a file in an uncompressed .tar archive, see :py:mod:`mltk.utils.tar_index`
         return_sample_rate: If true then a tuple is returned:  (audio data, audio sample rate)
         return_numpy: If true then return numpy array, else return TF tensor
+        kwargs: Additional arguments given to :py:func:`~read_wav_file`, e.g. ``offset``, ``length``, ``use_mmap``
 
     Returns:
         If return_sample_rate = False, Audio data as numpy array or TF tensor
         If return_sample_rate = True, (audio data, sample rate)
     """
-    raw = tf.io.read_file(path)
+    if return_numpy and isinstance(path, (str, bytes)):
+        try:
+            return read_wav_file(
+                path if isinstance(path, str) else path.decode('utf-8'),
+                return_sample_rate=return_sample_rate,
+                **{k: v for k, v in kwargs.items() if k in ('offset', 'length', 'use_mmap')}
+            )
+        except UnsupportedWavFormatError:
+            pass
+
+    import tensorflow as tf
+
+    if isinstance(path, str) and is_tar_path(path):
+        raw = read_file(path)
+    else:
+        raw = tf.io.read_file(path)
     sample, original_sample_rate = tf.audio.decode_wav(
         raw,
         desired_channels=1,
@@ -52,6 +79,10 @@ def read_audio_file(
 
     if return_numpy:
         sample = sample.numpy()
+        offset = kwargs.get('offset', 0)
+        length = kwargs.get('length', None)
+        if offset or length is not None:
+            sample = sample[offset:None if length is None else offset + length]
 
     if return_sample_rate:
         if return_numpy:
@@ -62,6 +93,136 @@ def read_audio_file(
     return sample
 
 
+class UnsupportedWavFormatError(ValueError):
+    """The given file is not a .wav file supported by :py:func:`~read_wav_file`"""
+
+
+def read_wav_file(
+    path:str,
+    offset:int=0,
+    length:int=None,
+    use_mmap:bool=None,
+    dtype:np.dtype=np.float32,
+    return_sample_rate=False,
+) -> Union[np.ndarray,Tuple[np.ndarray,int]]:
+    """Read a 16-bit PCM .wav file into a numpy array
+
+    This parses the .wav header and reads the samples directly with numpy.
+    Only the first channel is returned.
+
+    Args:
+        path: Path to .wav file, this may also be the path to a file in an uncompressed .tar archive, see :py:mod:`mltk.utils.tar_index`
+        offset: The number of samples to skip from the beginning of the audio
+        length: The maximum number of samples to return. If omitted, then return all samples after the offset
+        use_mmap: If true, then memory-map the file instead of reading it.
+            If None, then only memory-map the file if the requested audio is larger than 1MB
+        dtype: The returned data type:
+
+            * **float32**: The samples are scaled to the range [-1.0, 1.0), this is the same as ``tf.audio.decode_wav``
+            * **int16**: The raw samples are returned. If the file is memory-mapped, this is a read-only view of the file
+
+        return_sample_rate: If true then a tuple is returned:  (audio data, audio sample rate)
+
+    Raises:
+        UnsupportedWavFormatError: If the file is not a 16-bit PCM .wav file
+
+    Returns:
+        If return_sample_rate = False, Audio data as numpy array
+        If return_sample_rate = True, (audio data, sample rate)
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.int16):
+        raise ValueError('dtype must be float32 or int16')
+
+    with open_file(path) as f:
+        # NOTE: If the file is in a .tar archive, then the file's data is located at an offset in the archive
+        if isinstance(f, TarMemberFile):
+            mmap_src, base_offset, file_size = f.tar_path, f.offset, f.size
+        else:
+            mmap_src, base_offset, file_size = f, 0, os.fstat(f.fileno()).st_size
+        n_channels, sample_rate, data_offset, data_size = _parse_wav_header(f, path, file_size)
+
+        block_align = n_channels * 2
+        n_samples = data_size // block_align
+        offset = min(max(offset, 0), n_samples)
+        if length is None or length < 0 or offset + length > n_samples:
+            length = n_samples - offset
+
+        n_bytes = length * block_align
+        if use_mmap is None:
+            use_mmap = n_bytes > 1024*1024
+
+        if length == 0:
+            data = np.zeros((0, n_channels), dtype='<i2')
+        elif use_mmap:
+            data = np.memmap(
+                mmap_src,
+                dtype='<i2',
+                mode='r',
+                offset=base_offset + data_offset + offset * block_align,
+                shape=(length, n_channels)
+            )
+        else:
+            f.seek(data_offset + offset * block_align)
+            data = np.frombuffer(f.read(n_bytes), dtype='<i2').reshape(length, n_channels)
+
+    sample = data[:, 0]
+    if dtype == np.float32:
+        # NOTE: This is the same scaling as tf.audio.decode_wav
+        sample = sample.astype(np.float32)
+        sample *= 1.0 / 32768.0
+    elif sample.dtype != np.int16:
+        # Big-endian platforms
+        sample = sample.astype(np.int16)
+
+    if return_sample_rate:
+        return sample, sample_rate
+
+    return sample
+
+
+def _parse_wav_header(f, path:str, file_size:int) -> Tuple[int,int,int,int]:
+    """Return (n_channels, sample_rate, data offset, data size) of a 16-bit PCM .wav file"""
+    header = f.read(12)
+    if len(header) < 12 or header[0:4] != b'RIFF' or header[8:12] != b'WAVE':
+        raise UnsupportedWavFormatError(f'{path} is not a .wav file')
+
+    fmt = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            raise UnsupportedWavFormatError(f'{path} does not have a "data" chunk')
+        chunk_id = chunk_header[0:4]
+        chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            if len(fmt) < 16:
+                raise UnsupportedWavFormatError(f'{path} has an invalid "fmt " chunk')
+            audio_format, n_channels, sample_rate, _, _, bits_per_sample = struct.unpack('<HHIIHH', fmt[:16])
+            # WAVE_FORMAT_EXTENSIBLE, the actual format is the first 2 bytes of the sub-format GUID
+            if audio_format == 0xFFFE and len(fmt) >= 26:
+                audio_format = struct.unpack('<H', fmt[24:26])[0]
+            if audio_format != 1 or bits_per_sample != 16 or n_channels == 0:
+                raise UnsupportedWavFormatError(
+                    f'{path} has an unsupported format: {audio_format}, bits: {bits_per_sample}, channels: {n_channels}'
+                )
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise UnsupportedWavFormatError(f'{path} does not have a "fmt " chunk before the "data" chunk')
+            data_offset = f.tell()
+            # NOTE: Some streaming writers do not update the data chunk size
+            data_size = min(chunk_size, file_size - data_offset)
+            return n_channels, sample_rate, data_offset, data_size
+
+        else:
+            # Chunks are padded to an even number of bytes
+            f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
 def write_audio_file(
     path:str,
     sample:Union[np.ndarray,tf.Tensor],
@@ -81,6 +242,8 @@ def write_audio_file(
         then the path is a TF Tensor, otherwise it is a Python string
 
     """
+    import tensorflow as tf
+
     if isinstance(sample, np.ndarray):
         sample = tf.convert_to_tensor(sample)
 
@@ -186,12 +349,17 @@ def adjust_length(
 def apply_frontend(
     sample:np.ndarray,
     settings:AudioFeatureGeneratorSettings,
-    dtype=np.float32
+    dtype=np.float32,
+    out:np.ndarray=None
 ) -> np.ndarray:
-    """Send the audio sample through the AudioFeatureGenerator and return the generated spectrogram
+    """Send the audio sample(s) through the AudioFeatureGenerator and return the generated spectrogram(s)
+
+    .. note:: The AudioFeatureGenerator instance is cached and re-used for subsequent calls with the same settings
 
     Args:
-        sample: The audio sample to process in the AudioFeatureGenerator
+        sample: The audio sample to process in the AudioFeatureGenerator.
+            This may also be a batch of samples with the shape [n_samples, sample_length],
+            in which case a batch of spectrograms is returned
         settings: The settings to use in the AudioFeatureGenerator
         dtype: The expected audio output data type, support types are:
             
@@ -199,10 +367,12 @@ def apply_frontend(
             * **float32**: This is the uint16 value directly casted to a float32
             * **int8**: This is the int8 value generated by the TFLM "micro features" library.
                 Refer to the following for the magic that happens here: `micro_features_generator.cc#L84 <https://github.com/tensorflow/tflite-micro/blob/main/tensorflow/lite/micro/examples/micro_speech/micro_features/micro_features_generator.cc#L84>`_
+        out: Optional buffer to populate with the generated spectrogram(s), if given then ``dtype`` is ignored
 
     Returns:
         Generated spectrogram of audio
     """
+    frontend = AudioFeatureGenerator.get_instance(settings)
 
     if np.issubdtype(sample.dtype, np.floating):
         # Convert the floating point data to int16
@@ -211,8 +381,10 @@ def apply_frontend(
         sample = sample * 32768
         sample = sample.astype(np.int16)
 
-    if len(sample.shape) == 2:
+    if len(sample.shape) == 2 and sample.shape[-1] == 1:
         sample = np.squeeze(sample, axis=-1)
 
-    frontend = AudioFeatureGenerator(settings)
-    return frontend.process_sample(sample, dtype=dtype)
+    if len(sample.shape) == 2:
+        return frontend.process_batch(sample, dtype=dtype, out=out)
+
+    return frontend.process_sample(sample, dtype=dtype, out=out)
@@ -0,0 +1,274 @@
+"""Prefetch scheduler used by the parallel data generators
+
+Refer to :py:class:`BatchData` for more details
+"""
+import threading
+import collections
+import heapq
+from typing import Tuple
+
+import numpy as np
+
+from mltk.utils.process_pool import ProcessPool
+
+
+class BatchData:
+    """Schedules the batches processed by a data generator's :py:class:`~mltk.utils.process_pool.ProcessPool`
+    and buffers the processed batches until they are retrieved
+
+    - Batch indices are scheduled in order from a deque. A consumer waiting for a specific batch
+      that has not been scheduled yet may "request" it, in which case it is scheduled next.
+      Requests are kept in a min-heap so the earliest requested batch is always scheduled first.
+    - If ``shuffle=True`` then the processed batches are returned in the order they are completed,
+      otherwise each processed batch is returned for its specific index
+    - All waits are event-driven, the waiting threads are notified when a batch is added or retrieved,
+      when the scheduler is reset, and when the processing pool is shutdown
+    - The number of buffered batches is limited by count and (optionally) by the total size of the batches in bytes
+
+    Args:
+        n: The number of batches in an epoch
+        shuffle: If true then batches are returned in the order they are completed
+        pool: The processing pool that generates the batches
+        max_pending: The maximum number of processed batches to buffer
+        max_pending_bytes: The maximum total size in bytes of the processed batches to buffer.
+            If None, then only ``max_pending`` is used.
+            At least one batch is always buffered, regardless of its size
+    """
+
+    def __init__(
+        self,
+        n:int,
+        shuffle:bool,
+        pool:ProcessPool,
+        max_pending:int=4,
+        max_pending_bytes:int=None,
+    ):
+        self.n = n
+        self.shuffle = shuffle
+        self.pool = pool
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._indices = collections.deque()
+        self._requests = []
+        self._scheduled = bytearray(n)
+        self._n_unscheduled = 0
+        self._in_flight = collections.Counter()
+        self._batch_counts = collections.deque()
+        self._data = collections.deque() if shuffle else {}
+        self._pending_bytes = 0
+        self.saved_batch_zero = None
+
+        pool.add_shutdown_listener(self.close)
+        if not pool.is_running:
+            self._closed = True
+
+
+    @property
+    def have_more_indices(self) -> bool:
+        """Return true if there are more batches to schedule in the current epoch"""
+        with self._cond:
+            return self._n_unscheduled > 0
+
+
+    @property
+    def request_count(self) -> int:
+        """Return the number of requested batches that have not been scheduled"""
+        with self._cond:
+            return len(self._requests)
+
+
+    @property
+    def pending_bytes(self) -> int:
+        """Return the total size in bytes of the buffered batches"""
+        with self._cond:
+            return self._pending_bytes
+
+
+    def start_batch(self):
+        """Start scheduling the batches of a new epoch"""
+        with self._cond:
+            self._batch_counts.append(self.n)
+            self._reset_indices()
+
+
+    def next_index(self) -> int:
+        """Return the index of the next batch to process, return -1 if all of the batches have been scheduled"""
+        with self._cond:
+            while self._requests:
+                index = heapq.heappop(self._requests)
+                if not self._scheduled[index]:
+                    return self._schedule(index)
+
+            while self._indices:
+                index = self._indices.popleft()
+                if not self._scheduled[index]:
+                    return self._schedule(index)
+
+            return -1
+
+
+    def wait_for_capacity(self, started:threading.Event=None) -> bool:
+        """Block until a batch has been requested or there is room to buffer another batch
+
+        Args:
+            started: Optional event, this returns False when it is cleared.
+                :py:meth:`~notify` should be called after clearing the event
+
+        Returns:
+            True if another batch should be scheduled, False if the scheduler is closed or the given event was cleared
+        """
+        with self._cond:
+            while True:
+                if self._closed or (started is not None and not started.is_set()):
+                    return False
+                if self._requests or not self._is_full():
+                    return True
+                self._cond.wait()
+
+
+    def notify(self):
+        """Wake all threads that are waiting on this scheduler"""
+        with self._cond:
+            self._cond.notify_all()
+
+
+    def close(self):
+        """Close the scheduler, any threads waiting on :py:meth:`~get` raise StopIteration"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+    def reset(self):
+        """Discard all buffered batches and restart scheduling the current epoch"""
+        with self._cond:
+            self._data.clear()
+            self._pending_bytes = 0
+            self._reset_indices()
+            self._cond.notify_all()
+
+
+    def qsize(self) -> int:
+        """Return the number of buffered batches"""
+        with self._cond:
+            return len(self._data)
+
+
+    def put(self, index:int, value):
+        """Add a processed batch"""
+        nbytes = _get_nbytes(value)
+        with self._cond:
+            if self.shuffle:
+                self._data.append((value, nbytes))
+            else:
+                self._data[index] = (value, nbytes)
+            self._pending_bytes += nbytes
+            if self._in_flight[index] > 1:
+                self._in_flight[index] -= 1
+            else:
+                self._in_flight.pop(index, None)
+            self._cond.notify_all()
+
+
+    def get(self, index:int, save_batch_zero=False) -> Tuple[object, bool]:
+        """Return the processed batch for the given index
+
+        If ``shuffle=True`` then the next completed batch is returned regardless of the given index.
+
+        Returns:
+            (batch, is_last_in_batch), where is_last_in_batch is true if this is the last batch of the current epoch
+        """
+        decrement_batch_count = True
+
+        with self._cond:
+            # If we're returning batch zero and we have a saved one,
+            # then just return that batch
+            if index == 0 and self.saved_batch_zero is not None:
+                retval = self.saved_batch_zero
+                self.saved_batch_zero = None
+
+            else:
+                if not self.shuffle and index not in self._data and index not in self._in_flight and 0 <= index < self.n:
+                    # If the batch is not being processed then request that it be processed next.
+                    # If it was already processed (and retrieved) during this epoch then it is re-processed
+                    if self._scheduled[index]:
+                        self._scheduled[index] = 0
+                        self._n_unscheduled += 1
+                    heapq.heappush(self._requests, index)
+                    self._cond.notify_all()
+
+                while True:
+                    if self._closed:
+                        raise StopIteration('The data generator has been stopped')
+                    if self.shuffle:
+                        if self._data:
+                            retval, nbytes = self._data.popleft()
+                            break
+                    elif index in self._data:
+                        retval, nbytes = self._data.pop(index)
+                        break
+                    self._cond.wait()
+
+                self._pending_bytes -= nbytes
+
+            # If this is batch0 and we should save it
+            # then saved a reference to it and do NOt decrement the batch count as it will be returned in a later call
+            if index == 0 and save_batch_zero:
+                self.saved_batch_zero = retval
+                decrement_batch_count = False
+
+            is_last_in_batch = self._decrement_current_batch_count() if decrement_batch_count else False
+            self._cond.notify_all()
+
+        return retval, is_last_in_batch
+
+
+    def _schedule(self, index:int) -> int:
+        self._scheduled[index] = 1
+        self._n_unscheduled -= 1
+        self._in_flight[index] += 1
+        return index
+
+
+    def _reset_indices(self):
+        self._requests = []
+        self._indices = collections.deque(range(self.n))
+        self._scheduled = bytearray(self.n)
+        self._n_unscheduled = self.n
+
+
+    def _is_full(self) -> bool:
+        if len(self._data) > self.max_pending:
+            return True
+        if self.max_pending_bytes and self._data and self._pending_bytes >= self.max_pending_bytes:
+            return True
+        return False
+
+
+    def _decrement_current_batch_count(self) -> bool:
+        is_last_in_batch = False
+        if not self._batch_counts:
+            return is_last_in_batch
+        current_count = self._batch_counts[0]
+        if current_count == 1:
+            is_last_in_batch = True
+            self._batch_counts.popleft()
+        else:
+            self._batch_counts[0] = current_count - 1
+
+        return is_last_in_batch
+
+
+
+def _get_nbytes(value) -> int:
+    """Return the total size of the numpy arrays in the given (nested) batch"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_get_nbytes(x) for x in value)
+    if isinstance(value, dict):
+        return sum(_get_nbytes(x) for x in value.values())
+    return 0
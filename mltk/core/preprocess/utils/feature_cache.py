@@ -0,0 +1,78 @@
+"""Persistent cache of generated features (e.g. spectrograms)"""
+
+import os
+from typing import Union
+
+import numpy as np
+
+from mltk.utils.hasher import generate_hash
+from mltk.utils import tar_index
+from mltk.utils.file_cache import LruFileCache
+
+
+class FeatureCache(LruFileCache):
+    """Persistent, size-bounded cache of generated features
+
+    Each cached entry is a numpy array stored as a ``.npy`` file in the cache directory.
+    Entries are looked up by a key that should uniquely identify
+    the inputs used to generate the feature, see :py:meth:`~make_key`.
+    Cached entries are returned as (copy-on-write) memory-mapped numpy arrays.
+
+    When the total size of the cache exceeds ``max_size``, the least recently used entries are deleted,
+    see :py:class:`mltk.utils.file_cache.LruFileCache`.
+
+    This cache may be safely used by multiple processes at the same time.
+
+    Args:
+        directory: Directory where the cached features are stored
+        max_size: The maximum size of the cache in bytes
+    """
+    def __init__(
+        self,
+        directory:str,
+        max_size:int=2*1024*1024*1024
+    ):
+        super().__init__(directory, max_size=max_size)
+
+
+    @staticmethod
+    def make_key(*args) -> str:
+        """Generate a cache key from the given Python objects"""
+        return generate_hash(*args)
+
+
+    def get(self, key:str) -> Union[np.ndarray,None]:
+        """Return the cached array for the given key or None if it is not cached"""
+        path = self._get_path(key)
+        try:
+            x = np.load(path, mmap_mode='c', allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+        self.touch_entry(path)
+        return x
+
+
+    def put(self, key:str, x:np.ndarray):
+        """Add the given array to the cache"""
+        self.write_entry(
+            self._get_path(key),
+            lambda f: np.save(f, np.ascontiguousarray(x), allow_pickle=False)
+        )
+
+
+    def _get_path(self, key:str) -> str:
+        return f'{self.directory}/{key[:2]}/{key}.npy'
+
+
+
+def file_fingerprint(path:str) -> tuple:
+    """Return a tuple that identifies the contents of the given file
+
+    This uses the file's path, size and modification time
+    so that the file does not need to be read to determine if it has changed.
+    The path may also be the path to a file in an uncompressed .tar archive, see :py:mod:`mltk.utils.tar_index`
+    """
+    size, mtime_ns = tar_index.get_file_stat(path)
+    return (os.path.abspath(path).replace('\\', '/'), size, mtime_ns)
+
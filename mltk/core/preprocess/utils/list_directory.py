@@ -1,16 +1,21 @@
 """Utilities for listing dataset directories"""
 
 import os
+import time
+import json
+import posixpath
 from typing import Tuple, List, Dict, Callable
 import copy
 import random
 import math
 import multiprocessing
+import multiprocessing.pool
 import numpy as np
 from numpy.random import RandomState
 
 from mltk.core import get_mltk_logger
 from mltk.utils.python import prepend_exception_msg
+from mltk.utils.tar_index import TarIndex, split_tar_path
 
 
 
@@ -51,8 +56,12 @@ def list_dataset_directory(
 
     Where each <class> is found in the given ``classes`` argument.
 
+    The directory may also be an uncompressed .tar archive with the same structure (or a directory in the archive),
+    e.g. ``~/.mltk/datasets/speech_commands.tar``. In this case, the samples are read directly from the archive,
+    see :py:mod:`mltk.utils.tar_index`.
+
     Args:
-        directory: Directory path to audio dataset
+        directory: Directory path to audio dataset, or path to an uncompressed .tar archive
         classes: List of class labels to include in the returned dataset
 
             * If ``unknown_class_label`` is added as an entry to the ``classes``, then this API will automatically
@@ -301,6 +310,12 @@ def list_valid_filenames_in_directory(
         then randomly shuffle the files and save to the list file:
         <shuffle_index_directory>/.index/<search_class>.txt
 
+    The modification time and inode of each directory in the class's subtree are
+    also saved to the file: ``.index/<search_class>.dirs.json``.
+    When the index is loaded, only the directories whose modification time or inode has changed
+    are re-scanned. Files in the re-scanned directories that were previously indexed keep their
+    position in the index, new files are appended to the end of the index.
+
     Args:
         base_directory: Search directory for the current class
         search_class: Label of class to search
@@ -314,63 +329,95 @@ def list_valid_filenames_in_directory(
         (search_class, list(relative paths),
         a tuple of the given ``search_class`` and list of file paths relative to the ``base_directory``
     """
-    file_list = []
     base_directory = base_directory.replace('\\', '/')
 
     if shuffle_index_directory is None:
-        index_path = f'{base_directory}/.index/{search_class}.txt'
+        # NOTE: If the dataset is a .tar archive, then the index is saved next to the archive
+        tar_path, tar_dir = split_tar_path(base_directory)
+        if tar_path is not None:
+            index_path = posixpath.join(f'{tar_path}.index', tar_dir, f'{search_class}.txt')
+        else:
+            index_path = f'{base_directory}/.index/{search_class}.txt'
     else:
         index_path = f'{shuffle_index_directory}/.index/{search_class}.txt'
+    dir_stats_path = index_path[:-len('.txt')] + '.dirs.json'
 
     if isinstance(white_list_formats, list):
         white_list_formats = tuple(white_list_formats)
 
     # If the index file exists, then read it
+    file_list = None
     if os.path.exists(index_path):
         with open(index_path, 'r') as f:
-            for line in f:
-                filename = line.strip()
-                filepath = f'{base_directory}/{filename}'
-                if not os.path.exists(filepath):
-                    get_mltk_logger().warning(f'File {filepath} not found in existing index, re-generating index')
-                    file_list = []
-                    break
-                file_list.append(filename)
+            file_list = [line.strip() for line in f if line.strip()]
 
+    # Load the directory stats of the existing index (if available)
+    # If the index was generated by an older version of this API,
+    # then all of the directories are re-scanned
+    dir_stats = {}
+    if file_list:
+        try:
+            with open(dir_stats_path, 'r') as f:
+                dir_stats = json.load(f)
+        except (OSError, ValueError):
+            dir_stats = {}
+    else:
+        file_list = None
 
-    if len(file_list) == 0:
+    if file_list is None:
         get_mltk_logger().info(f'Generating index: {index_path} ...')
-        # Else find all files for the given class in the search directory
-        # NOTE: The dataset directory structure should be:
-        # <dataset base dir>/<class1>/
-        # <dataset base dir>/<class1>/sample1.jpg
-        # <dataset base dir>/<class1>/sample2.jpg
-        # <dataset base dir>/<class1>/subfolder1/sample3.jpg
-        # <dataset base dir>/<class1>/subfolder2/sample4.jpg
-        # <dataset base dir>/<class2>/...
-        # <dataset base dir>/<class3>/...
-        #
-        # This will recursively return all sample files under <dataset base dir>/<class x>
-        class_base_dir = f'{base_directory}/{search_class}/'
-        for root, _, files in os.walk(base_directory, followlinks=follow_links):
-            root = root.replace('\\', '/') + '/'
-            if not root.startswith(class_base_dir):
-                continue
-
-            for fname in files:
-                if white_list_formats and not fname.lower().endswith(white_list_formats):
-                    continue
-                abs_path = os.path.join(root, fname)
-                rel_path = os.path.relpath(abs_path, base_directory)
-                file_list.append(rel_path.replace('\\', '/'))
 
+    # Find all files for the given class in the search directory
+    # NOTE: The dataset directory structure should be:
+    # <dataset base dir>/<class1>/
+    # <dataset base dir>/<class1>/sample1.jpg
+    # <dataset base dir>/<class1>/sample2.jpg
+    # <dataset base dir>/<class1>/subfolder1/sample3.jpg
+    # <dataset base dir>/<class1>/subfolder2/sample4.jpg
+    # <dataset base dir>/<class2>/...
+    # <dataset base dir>/<class3>/...
+    #
+    # This will recursively return all sample files under <dataset base dir>/<class x>
+    # Only the directories that have changed since the index was generated are scanned
+    new_dir_stats, scanned_files = _scan_class_directory(
+        base_directory=base_directory,
+        search_class=search_class,
+        white_list_formats=white_list_formats,
+        follow_links=follow_links,
+        dir_stats=dir_stats,
+    )
+
+    if file_list is not None and new_dir_stats == dir_stats:
+        # No directories have changed, so the index is up-to-date
+        pass
+
+    else:
+        # Keep the previously indexed files that are in unchanged directories
+        # or still exist in the re-scanned directories
+        retained_files = []
+        if file_list is not None:
+            for fn in file_list:
+                dir_name = posixpath.dirname(fn)
+                if dir_name in scanned_files:
+                    if fn in scanned_files[dir_name]:
+                        retained_files.append(fn)
+                elif dir_name in new_dir_stats:
+                    retained_files.append(fn)
+            if len(retained_files) != len(file_list):
+                get_mltk_logger().warning(f'{len(file_list) - len(retained_files)} file(s) in {index_path} not found, updating index')
+
+        retained_set = set(retained_files)
+        new_files = []
+        for filenames in scanned_files.values():
+            new_files.extend(fn for fn in filenames if fn not in retained_set)
 
         # Randomly shuffle the list if necessary
         if shuffle_index_directory is not None:
-            random.shuffle(file_list)
+            random.shuffle(new_files)
+            file_list = retained_files + new_files
         else:
             # Otherwise sort it alphabetically
-            file_list = sorted(file_list)
+            file_list = sorted(retained_files + new_files)
 
         # Write the file list file
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
@@ -378,6 +425,10 @@ def list_valid_filenames_in_directory(
             for p in file_list:
                 f.write(p + '\n')
 
+    if new_dir_stats != dir_stats:
+        os.makedirs(os.path.dirname(dir_stats_path), exist_ok=True)
+        with open(dir_stats_path, 'w') as f:
+            json.dump(new_dir_stats, f)
 
     filenames = split_file_list(
         paths=file_list,
@@ -458,6 +509,123 @@ def shuffle_file_list_by_group(
     return file_list
 
 
+def _scan_class_directory(
+    base_directory:str,
+    search_class:str,
+    white_list_formats:Tuple[str],
+    follow_links:bool,
+    dir_stats:Dict[str,list],
+) -> Tuple[Dict[str,list], Dict[str,set]]:
+    """Scan the directories of the given class that have changed since the given dir_stats were recorded
+
+    Returns:
+        (new_dir_stats, scanned_files)
+        new_dir_stats: <dir path relative to base_directory>: [mtime_ns, inode] of all directories in the class's subtree
+        scanned_files: <dir path relative to base_directory>: {file paths relative to base_directory} of the re-scanned directories
+    """
+    if split_tar_path(base_directory)[0] is not None:
+        return _scan_tar_class_directory(
+            base_directory=base_directory,
+            search_class=search_class,
+            white_list_formats=white_list_formats,
+            dir_stats=dir_stats,
+        )
+
+    # Map each previously indexed directory to its sub-directories
+    children = {}
+    for rel_dir in dir_stats:
+        parent = posixpath.dirname(rel_dir)
+        if parent != rel_dir:
+            children.setdefault(parent, []).append(rel_dir)
+
+    now_ns = time.time_ns()
+    new_dir_stats = {}
+    scanned_files = {}
+    pending = [search_class]
+    while pending:
+        rel_dir = pending.pop()
+        abs_dir = f'{base_directory}/{rel_dir}'
+        try:
+            st = os.stat(abs_dir)
+        except OSError:
+            continue
+
+        stat_key = [st.st_mtime_ns, st.st_ino]
+        if dir_stats.get(rel_dir) == stat_key:
+            # The directory's entries have not changed,
+            # so its files and sub-directories are the same as the previous index
+            new_dir_stats[rel_dir] = stat_key
+            pending.extend(children.get(rel_dir, []))
+            continue
+
+        files = set()
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if follow_links or not entry.is_symlink():
+                            pending.append(f'{rel_dir}/{entry.name}')
+                        continue
+                    if white_list_formats and not entry.name.lower().endswith(white_list_formats):
+                        continue
+                    files.add(f'{rel_dir}/{entry.name}')
+        except OSError:
+            continue
+
+        scanned_files[rel_dir] = files
+        # NOTE: If the directory was modified very recently, then a subsequent modification
+        #       may have the same timestamp (depending on the file system's timestamp resolution).
+        #       In this case, do not record the stat so the directory is re-scanned the next time
+        if now_ns - st.st_mtime_ns < 2_000_000_000:
+            stat_key = [-1, st.st_ino]
+        new_dir_stats[rel_dir] = stat_key
+
+    return new_dir_stats, scanned_files
+
+
+def _scan_tar_class_directory(
+    base_directory:str,
+    search_class:str,
+    white_list_formats:Tuple[str],
+    dir_stats:Dict[str,list],
+) -> Tuple[Dict[str,list], Dict[str,set]]:
+    """Scan the directories of the given class in a .tar archive, see :py:func:`_scan_class_directory`
+
+    The archive's [mtime_ns, size] is recorded as the stats of each directory,
+    so the directories are only re-scanned if the archive has changed
+    """
+    tar_path, tar_dir = split_tar_path(base_directory)
+    st = os.stat(tar_path)
+    stat_key = [st.st_mtime_ns, st.st_size]
+    tar_index = TarIndex.load(tar_path)
+
+    new_dir_stats = {}
+    scanned_files = {}
+    pending = [search_class]
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            subdirs, filenames = tar_index.listdir(posixpath.join(tar_dir, rel_dir))
+        except FileNotFoundError:
+            continue
+
+        new_dir_stats[rel_dir] = stat_key
+        pending.extend(f'{rel_dir}/{name}' for name in subdirs)
+        if dir_stats.get(rel_dir) == stat_key:
+            continue
+
+        scanned_files[rel_dir] = set(
+            f'{rel_dir}/{fn}' for fn in filenames
+            if not white_list_formats or fn.lower().endswith(white_list_formats)
+        )
+
+    return new_dir_stats, scanned_files
+
+
 def _find_unknown_classes(
     known_classes:List[str],
     base_directory:str
@@ -465,9 +633,13 @@ def _find_unknown_classes(
     """Return a list of dataset class names not in the given known_classes"""
     unknown_classes = []
 
-    for class_name in os.listdir(base_directory):
-        if not os.path.isdir(os.path.join(base_directory, class_name)):
-            continue
+    tar_path, tar_dir = split_tar_path(base_directory)
+    if tar_path is not None:
+        class_names = TarIndex.load(tar_path).listdir(tar_dir)[0]
+    else:
+        class_names = [x for x in os.listdir(base_directory) if os.path.isdir(os.path.join(base_directory, x))]
+
+    for class_name in class_names:
         if class_name in known_classes or class_name.startswith(('_', '~', '.')):
             continue
         unknown_classes.append(class_name)
@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+
+from mltk.core.preprocess.utils.batch_data import BatchData
+
+
+
+class _Pool:
+    """Minimal stand-in for the ProcessPool used by the BatchData scheduler"""
+    is_running = True
+    def add_shutdown_listener(self, _):
+        pass
+
+
+def _wait_for_capacity_async(batch_data:BatchData) -> threading.Event:
+    """Call wait_for_capacity() in a thread, the returned event is set once it returns True"""
+    done = threading.Event()
+    def _run():
+        if batch_data.wait_for_capacity():
+            done.set()
+    threading.Thread(target=_run, daemon=True).start()
+    return done
+
+
+def _schedule_and_put(batch_data:BatchData, nbytes:int=8):
+    index = batch_data.next_index()
+    batch_data.put(index, np.zeros((nbytes,), dtype=np.uint8))
+    return index
+
+
+def test_max_pending():
+    batch_data = BatchData(n=10, shuffle=False, pool=_Pool(), max_pending=2)
+    batch_data.start_batch()
+
+    # The scheduler blocks once more than max_pending batches are buffered
+    for _ in range(3):
+        assert batch_data.wait_for_capacity()
+        _schedule_and_put(batch_data)
+    assert batch_data.qsize() == 3
+
+    done = _wait_for_capacity_async(batch_data)
+    assert not done.wait(0.2)
+
+    # Retrieving a batch wakes the scheduler
+    batch, is_last = batch_data.get(0)
+    assert batch.shape == (8,)
+    assert not is_last
+    assert done.wait(5)
+
+
+def test_max_pending_bytes():
+    batch_data = BatchData(n=10, shuffle=False, pool=_Pool(), max_pending=100, max_pending_bytes=100)
+    batch_data.start_batch()
+
+    # At least one batch is always buffered, regardless of its size
+    assert batch_data.wait_for_capacity()
+    _schedule_and_put(batch_data, nbytes=1000)
+    assert batch_data.pending_bytes == 1000
+
+    done = _wait_for_capacity_async(batch_data)
+    assert not done.wait(0.2)
+
+    batch_data.get(0)
+    assert batch_data.pending_bytes == 0
+    assert done.wait(5)
+
+    # Smaller batches are buffered until their total size reaches the limit
+    for _ in range(4):
+        assert batch_data.wait_for_capacity()
+        _schedule_and_put(batch_data, nbytes=25)
+    assert batch_data.pending_bytes == 100
+    assert batch_data.qsize() == 4
+
+    done = _wait_for_capacity_async(batch_data)
+    assert not done.wait(0.2)
+    batch_data.get(1)
+    assert batch_data.pending_bytes == 75
+    assert done.wait(5)
+
+
+def test_request_overrides_limits():
+    batch_data = BatchData(n=10, shuffle=False, pool=_Pool(), max_pending=0)
+    batch_data.start_batch()
+
+    _schedule_and_put(batch_data)
+    _schedule_and_put(batch_data)
+    done = _wait_for_capacity_async(batch_data)
+    assert not done.wait(0.2)
+
+    # A consumer waiting for an unscheduled batch requests it,
+    # which wakes the scheduler even though the buffer is full
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(batch_data.get(7)), daemon=True)
+    consumer.start()
+    assert done.wait(5)
+    assert batch_data.request_count == 1
+    assert batch_data.wait_for_capacity()
+
+    # The requested batch is scheduled next
+    assert _schedule_and_put(batch_data) == 7
+    consumer.join(5)
+    assert len(result) == 1
+    assert batch_data.request_count == 0
+    assert batch_data.qsize() == 2
+
+
+def test_close():
+    batch_data = BatchData(n=10, shuffle=True, pool=_Pool(), max_pending=0)
+    batch_data.start_batch()
+    _schedule_and_put(batch_data)
+    _schedule_and_put(batch_data)
+
+    result = []
+    t = threading.Thread(target=lambda: result.append(batch_data.wait_for_capacity()), daemon=True)
+    t.start()
+    batch_data.close()
+    t.join(5)
+    assert result == [False]
+    assert not batch_data.wait_for_capacity()
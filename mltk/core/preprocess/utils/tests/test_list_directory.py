@@ -0,0 +1,76 @@
+import os
+import time
+import pytest
+
+from mltk.core.preprocess.utils.list_directory import list_valid_filenames_in_directory
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def dataset_dir():
+    d = create_tempdir('utests/list_directory')
+    remove_directory(d)
+    for sub_dir in ('a', 'b'):
+        os.makedirs(f'{d}/yes/{sub_dir}')
+        for i in range(3):
+            _touch(f'{d}/yes/{sub_dir}/{i}.wav')
+    _touch(f'{d}/yes/root.wav')
+    _touch(f'{d}/yes/readme.txt')
+    _set_past_mtime(f'{d}/yes')
+    yield d
+    remove_directory(d)
+
+
+def _touch(path:str):
+    with open(path, 'wb'):
+        pass
+
+
+def _set_past_mtime(path:str, offset_s:int=60):
+    """Set the modification time of the directory tree to the past,
+    directories modified in the last couple of seconds are always re-scanned"""
+    mtime_ns = time.time_ns() - offset_s*1_000_000_000
+    for root, dirs, _ in os.walk(path):
+        for d in [root] + [os.path.join(root, x) for x in dirs]:
+            os.utime(d, ns=(mtime_ns, mtime_ns))
+
+
+def _list(dataset_dir:str):
+    _, filenames = list_valid_filenames_in_directory(dataset_dir, 'yes', white_list_formats=['.wav'])
+    return filenames
+
+
+def _spy_scandir(monkeypatch) -> list:
+    scanned = []
+    scandir = os.scandir
+    def _scandir(path):
+        scanned.append(os.path.relpath(path).replace('\\', '/'))
+        return scandir(path)
+    monkeypatch.setattr(os, 'scandir', _scandir)
+    return scanned
+
+
+def test_incremental_revalidation(dataset_dir, monkeypatch):
+    expected = sorted([f'yes/{d}/{i}.wav' for d in ('a', 'b') for i in range(3)] + ['yes/root.wav'])
+    assert _list(dataset_dir) == expected
+    assert os.path.exists(f'{dataset_dir}/.index/yes.dirs.json')
+
+    # Nothing changed, so no directories should be scanned
+    scanned = _spy_scandir(monkeypatch)
+    assert _list(dataset_dir) == expected
+    assert scanned == []
+
+    # Add a file to one directory, only that directory should be re-scanned
+    _touch(f'{dataset_dir}/yes/b/3.wav')
+    _set_past_mtime(f'{dataset_dir}/yes/b', offset_s=30)
+    scanned.clear()
+    assert _list(dataset_dir) == sorted(expected + ['yes/b/3.wav'])
+    assert [os.path.basename(p) for p in scanned] == ['b']
+
+    # Remove a file from another directory
+    os.remove(f'{dataset_dir}/yes/a/0.wav')
+    _set_past_mtime(f'{dataset_dir}/yes/a', offset_s=30)
+    scanned.clear()
+    assert _list(dataset_dir) == sorted([x for x in expected if x != 'yes/a/0.wav'] + ['yes/b/3.wav'])
+    assert [os.path.basename(p) for p in scanned] == ['a']
@@ -295,19 +295,20 @@ def quantize_model(
 
     if update_archive:
         logger.info(f'Updating {mltk_model.archive_path}')
-        try:
-            summary_path = f'{mltk_model.log_dir}/{mltk_model.name}.tflite.summary.txt'
-            with open(summary_path, 'w') as fp:
-                fp.write(summarize_model(tflite_model))
-            mltk_model.add_archive_file(summary_path)
-        except:
-            pass
-        mltk_model.add_archive_file('__mltk_model_spec__')
-        mltk_model.add_archive_file(retval)
-        if float32_tflite_path:
-            mltk_model.add_archive_file(float32_tflite_path)
-        if quantization_report_path:
-            mltk_model.add_archive_file(quantization_report_path)
+        with mltk_model.batch_archive_updates():
+            try:
+                summary_path = f'{mltk_model.log_dir}/{mltk_model.name}.tflite.summary.txt'
+                with open(summary_path, 'w') as fp:
+                    fp.write(summarize_model(tflite_model))
+                mltk_model.add_archive_file(summary_path)
+            except:
+                pass
+            mltk_model.add_archive_file('__mltk_model_spec__')
+            mltk_model.add_archive_file(retval)
+            if float32_tflite_path:
+                mltk_model.add_archive_file(float32_tflite_path)
+            if quantization_report_path:
+                mltk_model.add_archive_file(quantization_report_path)
 
 
     mltk_model.trigger_event(
@@ -2,7 +2,7 @@
 import os
 import io
 import logging
-from typing import Union
+from typing import Union, TYPE_CHECKING
 
 
 
@@ -13,9 +13,9 @@ from mltk.utils.python import append_exception_msg
 from .model import (
     MltkModel,
     MltkModelEvent,
-    KerasModel,
     load_mltk_model,
-    load_tflite_or_keras_model
+    load_tflite_or_keras_model,
+    is_keras_model
 )
 
 
@@ -23,12 +23,15 @@ from .utils import ArchiveFileNotFoundError, get_mltk_logger
 from .model.metrics import calculate_model_metrics
 from .tflite_model import TfliteModel
 
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model as KerasModel
+
 def summarize_model(
-    model: Union[str, MltkModel, KerasModel, TfliteModel],
+    model: Union[str, MltkModel, 'KerasModel', TfliteModel],
     tflite:bool=False,
     build:bool=False,
     test:bool=False,
-    built_model:Union[KerasModel, TfliteModel]=None
+    built_model:Union['KerasModel', TfliteModel]=None
 ) -> str:
     """Generate a summary of the given model
     and return the summary as a string
@@ -94,7 +97,7 @@ def summarize_model(
     model_metrics = calculate_model_metrics(built_model, logger=logger)
 
     summary = ''
-    if isinstance(built_model, KerasModel):
+    if is_keras_model(built_model):
         string_buffer = io.StringIO()
         def _writeln(s):
             string_buffer.write(s + '\n')
@@ -131,8 +134,8 @@ def summarize_model(
 
 
 def _load_or_build_model(
-    model:Union[str, MltkModel, KerasModel, TfliteModel],
-    built_model:Union[KerasModel, TfliteModel],
+    model:Union[str, MltkModel, 'KerasModel', TfliteModel],
+    built_model:Union['KerasModel', TfliteModel],
     test:bool,
     tflite:bool,
     build:bool,
@@ -147,7 +150,7 @@ def _load_or_build_model(
         mltk_model = model
 
     # Elif if a KerasModel instance was given
-    elif isinstance(model, KerasModel):
+    elif is_keras_model(model):
         built_model = model
 
      # Elif if a KerasModel instance was given
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from mltk.core.model import (
+    MltkModel,
+    TrainMixin,
+    EvaluateAutoEncoderMixin
+)
+from mltk.core.keras.losses import mse_loss_func, mae_loss_func
+
+
+
+class _AutoEncoderModel(MltkModel, TrainMixin, EvaluateAutoEncoderMixin):
+    pass
+
+
+def _create_model(**kwargs) -> _AutoEncoderModel:
+    model = _AutoEncoderModel()
+    model.loss = 'mean_squared_error'
+    for key, value in kwargs.items():
+        setattr(model, key, value)
+    return model
+
+
+def _generate_data(n_samples=37, shape=(5,128,1)):
+    rng = np.random.default_rng(42)
+    x = rng.uniform(low=-1, high=1, size=(n_samples,) + shape).astype(np.float32)
+    decoded = (x + rng.normal(scale=0.1, size=x.shape)).astype(np.float32)
+    return x, decoded
+
+
+def _score_each_sample(scoring_function, x, decoded) -> np.ndarray:
+    """This is how the samples were scored before the batch scoring was added"""
+    scores = np.empty((len(x),), dtype=np.float32)
+    for i, (orig, dec) in enumerate(zip(x, decoded)):
+        scores[i] = scoring_function(orig, dec)
+    return scores
+
+
+
+def test_default_scoring_is_per_sample():
+    x, decoded = _generate_data()
+    scoring_function = _create_model().get_batch_scoring_function(batch_scoring=False)
+
+    expected = _score_each_sample(mse_loss_func, x, decoded)
+    assert np.array_equal(scoring_function(x, decoded), expected)
+
+    # Streaming the samples in batches should not change the scores
+    batch_scores = np.concatenate([scoring_function(x[i:i+8], decoded[i:i+8]) for i in range(0, len(x), 8)])
+    assert np.array_equal(batch_scores, expected)
+
+
+def test_custom_scoring_function():
+    x, decoded = _generate_data()
+    custom_scoring_function = lambda orig, dec: np.max(np.abs(orig - dec))
+    model = _create_model(scoring_function=custom_scoring_function)
+
+    expected = _score_each_sample(custom_scoring_function, x, decoded)
+    for batch_scoring in (False, True):
+        scoring_function = model.get_batch_scoring_function(batch_scoring=batch_scoring)
+        assert np.array_equal(scoring_function(x, decoded), expected)
+
+
+@pytest.mark.parametrize('n_samples', [1, 37])
+def test_batch_scoring_matches_per_sample(n_samples):
+    x, decoded = _generate_data(n_samples=n_samples)
+    scoring_function = _create_model().get_batch_scoring_function(batch_scoring=True)
+
+    scores = np.asarray(scoring_function(x, decoded), dtype=np.float32)
+    assert scores.shape == (n_samples,)
+    assert np.allclose(scores, _score_each_sample(mse_loss_func, x, decoded), rtol=1e-5, atol=1e-7)
+
+
+def test_model_batch_scoring_function():
+    x, decoded = _generate_data()
+    batch_scoring_function = lambda batch_x, batch_decoded: np.zeros((len(batch_x),), dtype=np.float32)
+    model = _create_model(batch_scoring_function=batch_scoring_function)
+
+    # The model's batch_scoring_function is always used if it is given
+    assert model.get_batch_scoring_function(batch_scoring=False) is batch_scoring_function
+
+
+def test_mae_batch_scoring_matches_per_sample():
+    model = _create_model(loss='mean_absolute_error')
+    batch_scoring_function = model.get_batch_scoring_function(batch_scoring=True)
+
+    # 2D input, i.e. each sample is a 1D array
+    x, decoded = _generate_data(shape=(128,))
+    expected = model.get_batch_scoring_function(batch_scoring=False)(x, decoded)
+    assert np.array_equal(expected, _score_each_sample(mae_loss_func, x, decoded))
+    scores = np.asarray(batch_scoring_function(x, decoded), dtype=np.float32)
+    assert scores.shape == (len(x),)
+    assert np.array_equal(scores, expected)
+
+    # Multi-dimensional samples: mae_loss_func() reduces the last axis of each sample,
+    # and the remaining axes are then averaged
+    x, decoded = _generate_data(shape=(5,128))
+    expected = _score_each_sample(lambda orig, dec: np.mean(mae_loss_func(orig, dec)), x, decoded)
+    scores = np.asarray(batch_scoring_function(x, decoded), dtype=np.float32)
+    assert scores.shape == (len(x),)
+    assert np.array_equal(scores, expected)
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from mltk.core.evaluate_classifier import ClassifierEvaluationResults
+
+
+
+def _reference_per_class_accuracies(y_pred:np.ndarray, y_label:np.ndarray):
+    """The original per-sample loop implementation"""
+    n_samples, n_classes = y_pred.shape
+    accuracies = np.zeros(n_classes)
+    for class_id in range(n_classes):
+        true_positives = 0
+        for i in range(n_samples):
+            if y_label[i] == class_id:
+                if np.argmax(y_pred[i,:]) == class_id:
+                    true_positives += 1
+        n_positives = np.sum(y_label == class_id)
+        accuracies[class_id] = true_positives / n_positives if n_positives else 0.0
+    return accuracies.tolist()
+
+
+def _reference_auc(y_pred:np.ndarray, y_label:np.ndarray, threshold=.01):
+    """The original per-sample, per-threshold loop implementation"""
+    n_samples, n_classes = y_pred.shape
+    thresholds = np.arange(0.0, 1.01, threshold)
+    n_thresholds = len(thresholds)
+    fpr = np.zeros((n_classes, n_thresholds))
+    tpr = np.zeros((n_classes, n_thresholds))
+    roc_auc = np.zeros(n_classes)
+
+    def _safe_divide(num, dem):
+        return num / dem if dem else 0.0
+
+    for class_item in range(n_classes):
+        all_positives = sum(y_label == class_item)
+        all_negatives = len(y_label) - all_positives
+        for threshold_item in range(1, n_thresholds):
+            threshold = thresholds[threshold_item]
+            false_positives = 0
+            true_positives = 0
+            for i in range(n_samples):
+                if y_pred[i, class_item] > threshold:
+                    if y_label[i] == class_item:
+                        true_positives += 1
+                    else:
+                        false_positives += 1
+            fpr[class_item, threshold_item] = _safe_divide(false_positives, float(all_negatives))
+            tpr[class_item, threshold_item] = _safe_divide(true_positives, float(all_positives))
+            fpr[class_item,0] = 1
+            tpr[class_item,0] = 1
+        for threshold_item in range(len(thresholds)-1):
+            roc_auc[class_item] += .5*(tpr[class_item,threshold_item]+tpr[class_item,threshold_item+1])*(fpr[class_item,threshold_item]-fpr[class_item,threshold_item+1])
+    return fpr.tolist(), tpr.tolist(), roc_auc.tolist(), thresholds.tolist()
+
+
+def _reference_binary_to_categorical(y_pred:np.ndarray) -> np.ndarray:
+    y_pred_categorical = np.zeros((len(y_pred), 2), dtype=np.float32)
+    for i, pred in enumerate(y_pred):
+        class_id = 0 if pred < 0.5 else 1
+        y_pred_categorical[i][class_id] = pred
+    return y_pred_categorical
+
+
+def _check_results(results:ClassifierEvaluationResults, y_pred:np.ndarray, y:np.ndarray):
+    fpr, tpr, roc_auc, thresholds = _reference_auc(y_pred, y)
+    assert results['fpr'] == fpr
+    assert results['tpr'] == tpr
+    assert results['roc_auc'] == roc_auc
+    assert results['roc_thresholds'] == thresholds
+    assert results['class_accuracies'] == _reference_per_class_accuracies(y_pred, y)
+
+
+@pytest.mark.parametrize('n_classes', [3, 10])
+def test_categorical_matches_reference(n_classes):
+    rng = np.random.default_rng(42)
+    n_samples = 500
+    y = rng.integers(0, n_classes, size=n_samples)
+    logits = rng.normal(size=(n_samples, n_classes)) + 2.0 * np.eye(n_classes)[y]
+    y_pred = np.exp(logits) / np.sum(np.exp(logits), axis=1, keepdims=True)
+    y_pred = y_pred.astype(np.float32)
+    # Include predictions that are exactly at the thresholds
+    y_pred[:10, 0] = np.round(y_pred[:10, 0], 2)
+
+    results = ClassifierEvaluationResults(name='test', classifier_type='categorical')
+    results.calculate(y, y_pred)
+    _check_results(results, y_pred, y)
+
+
+def test_binary_matches_reference():
+    rng = np.random.default_rng(7)
+    n_samples = 300
+    y = rng.integers(0, 2, size=n_samples)
+    y_pred = np.clip(rng.normal(loc=0.25 + 0.5*y, scale=0.2), 0, 1).astype(np.float32)
+    y_pred[:5] = 0.5
+
+    results = ClassifierEvaluationResults(name='test', classifier_type='binary')
+    results.calculate(y, y_pred)
+    _check_results(results, _reference_binary_to_categorical(y_pred), y)
+
+    # The [n_samples, 1] shape should give the same results
+    results = ClassifierEvaluationResults(name='test', classifier_type='binary')
+    results.calculate(y.reshape(-1, 1), y_pred.reshape(-1, 1))
+    _check_results(results, _reference_binary_to_categorical(y_pred), y)
+
+
+def test_missing_class_matches_reference():
+    rng = np.random.default_rng(3)
+    n_samples = 100
+    # Class 1 has no samples
+    y = rng.choice([0, 2, 3], size=n_samples)
+    y_pred = rng.dirichlet(np.ones(4), size=n_samples).astype(np.float32)
+
+    results = ClassifierEvaluationResults(name='test', classifier_type='categorical')
+    results.calculate(y, y_pred)
+    _check_results(results, y_pred, y)
@@ -0,0 +1,20 @@
+import types
+import mltk.core
+from mltk.core import model as mltk_core_model
+
+
+
+def test_model_apis_are_exported():
+    # All of the public APIs of mltk.core.model should also be accessible from mltk.core
+    names = ['KerasModel']
+    for name in dir(mltk_core_model):
+        value = getattr(mltk_core_model, name)
+        if name.startswith('_') or isinstance(value, types.ModuleType) or not callable(value):
+            continue
+        if getattr(value, '__module__', '').startswith('mltk.core.model'):
+            names.append(name)
+
+    assert 'is_keras_model' in names
+    for name in names:
+        assert name in mltk.core._LAZY_ATTRIBUTES, f'{name} is not in mltk.core._LAZY_ATTRIBUTES'
+        assert getattr(mltk.core, name) is getattr(mltk_core_model, name)
@@ -4,4 +4,5 @@ from .tflite_micro_model import (
     TfliteMicroLayerError, 
     TfliteMicroModelDetails,
     TfliteMicroProfiledLayerResult,
-)
\ No newline at end of file
+)
+from .tflite_micro_profiling_pool import TfliteMicroProfilingPool
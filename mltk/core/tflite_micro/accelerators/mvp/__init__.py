@@ -1,7 +1,8 @@
+import os
 import importlib
+from typing import List, Union
 from mltk.core.profiling_results import ProfilingModelResults
 from mltk.core.tflite_micro.tflite_micro_accelerator import TfliteMicroAccelerator
-from mltk.core.utils import get_mltk_logger
 
 
 class MVPTfliteMicroAccelerator(TfliteMicroAccelerator):
@@ -27,26 +28,26 @@ class MVPTfliteMicroAccelerator(TfliteMicroAccelerator):
         self._accelerator_wrapper.set_calculate_accelerator_cycles_only_enabled(enabled)
 
 
+    @property
+    def estimator_version(self) -> str:
+        """The SHA1 of the MVP estimators archive"""
+        import yaml
+        curdir = os.path.dirname(os.path.abspath(__file__))
+        with open(f'{curdir}/estimator/estimators_url.yaml', 'r') as fp:
+            estimators_url_obj = yaml.load(fp, Loader=yaml.SafeLoader)
+        return estimators_url_obj['sha1']
+
     def estimate_profiling_results(
         self, 
-        results:ProfilingModelResults,
+        results:Union[ProfilingModelResults,List[ProfilingModelResults]],
         **kwargs
     ):
-        """Update the given ProfilingModelResults with estimated model metrics"""
-        from .estimator import get_estimates
-
-        # If not clock rate was given, then just default to 78MHz
-        # as that's the max rate that can be used with the radio
-        if results.cpu_clock_rate == 0:
-            # pylint: disable=protected-access
-            results._cpu_clock_rate = int(78e6)
-
-        for layer in results.layers:
-            try:
-                get_estimates(
-                    layer=layer, 
-                    accelerator=results.accelerator,
-                    cpu_clock_rate=results.cpu_clock_rate,
-                )
-            except Exception as e:
-                get_mltk_logger().warning(f'Failed to get profiling estimates for layer: {layer.name}, err: {e}')
+        """Update the given ProfilingModelResults with estimated model metrics
+
+        A list of ProfilingModelResults may also be given,
+        in this case the layers of all the models are estimated together
+        """
+        from .estimator import estimate_profiling_results
+
+        # NOTE: The layers are estimated with one batched inference per estimator and metric
+        estimate_profiling_results(results)
@@ -1 +1 @@
-from .get_estimates import get_estimates
\ No newline at end of file
+from .get_estimates import (get_estimates, get_estimates_batch, estimate_profiling_results)
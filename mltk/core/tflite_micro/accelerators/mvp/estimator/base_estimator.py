@@ -1,6 +1,7 @@
 import abc
 
-from typing import Union
+from typing import Union, List, Tuple
+import numpy as np
 
 from mltk.utils.python import prepend_exception_msg
 from mltk.core.tflite_model import TfliteLayer
@@ -70,6 +71,77 @@ class BaseEstimator(abc.ABC):
         )
 
 
+    def predict_batch(
+        self,
+        layers: List[ProfilingLayerResult],
+        cpu_clock_rates: List[int]
+    ) -> List[Exception]:
+        """Update the given layers with the estimators' predictions
+
+        This is the same as calling :py:meth:`~predict` for each layer,
+        except the predictions of each metric are generated with a single, batched inference.
+
+        Returns:
+            List with the exception raised while extracting the features of each layer,
+            None if the layer's estimates were successfully predicted
+        """
+        self.load_models()
+        errors:List[Exception] = [None] * len(layers)
+
+        if self.cpu_cycles_model is not None:
+            X, indices = self._extract_features(self.cpu_cycles_model, layers, errors, use_cpu_cycles=False)
+            for i, y in zip(indices, self.cpu_cycles_model.predict_batch(X)):
+                layers[i]['cpu_cycles'] = float(y)
+
+        if self.energy_model is not None:
+            X, indices = self._extract_features(self.energy_model, layers, errors, use_cpu_cycles=True)
+            for i, y in zip(indices, self.energy_model.predict_batch(X)):
+                layers[i]['energy'] = float(y)
+
+        for layer, cpu_clock_rate, err in zip(layers, cpu_clock_rates, errors):
+            if err is None:
+                layer['time'] = self.predict_time(
+                    accelerator_cycles=layer.accelerator_cycles,
+                    cpu_cycles=layer.cpu_cycles,
+                    cpu_clock_rate=cpu_clock_rate
+                )
+
+        return errors
+
+
+    def _extract_features(
+        self,
+        model,
+        layers: List[ProfilingLayerResult],
+        errors: List[Exception],
+        use_cpu_cycles:bool
+    ) -> Tuple[np.ndarray, List[int]]:
+        """Return the feature matrix of the given layers and the index of the layer of each row
+
+        Layers that previously failed are skipped, and layers that fail are recorded in the errors list
+        """
+        rows = []
+        indices = []
+        for i, layer in enumerate(layers):
+            if errors[i] is not None:
+                continue
+            try:
+                params = extract_model_parameters(
+                    model,
+                    layer,
+                    accelerator_cycles=layer.accelerator_cycles,
+                    cpu_cycles=layer.cpu_cycles if use_cpu_cycles else None
+                )
+            except Exception as e:
+                errors[i] = e
+                continue
+            rows.append([params[name] for name in model.feature_columns])
+            indices.append(i)
+
+        X = np.asarray(rows, dtype=np.int64).reshape((len(rows), len(model.feature_columns)))
+        return X, indices
+
+
     def predict_time(
         self,
         accelerator_cycles:int,
@@ -1,10 +1,17 @@
 
+from typing import Dict, List, Tuple, Union
 from mltk.core.tflite_model import TfliteOpCode
-from mltk.core.profiling_results import ProfilingLayerResult
+from mltk.core.profiling_results import ProfilingLayerResult, ProfilingModelResults
+from mltk.core.utils import get_mltk_logger
 
 
 from .base_estimator import BaseEstimator
 
+
+# If no clock rate was given, then default to 78MHz
+# as that's the max rate that can be used with the radio
+DEFAULT_CPU_CLOCK_RATE = int(78e6)
+
 _estimators = {
     'mvp': {
         TfliteOpCode.ADD: BaseEstimator('add', 'mvp'),
@@ -78,3 +85,93 @@ def get_estimates(
             layer=layer,
             cpu_clock_rate=cpu_clock_rate
         )
+
+
+def get_estimates_batch(
+    layers:List[ProfilingLayerResult],
+    accelerators:List[str],
+    cpu_clock_rates:List[int],
+    **kwargs
+) -> List[Exception]:
+    """Update the given layers with the estimators' predictions
+
+    The layers are grouped by estimator, and the predictions of each estimator's metric
+    are generated with a single, batched inference.
+    The layers may be from multiple models.
+
+    Args:
+        layers: The profiled layers
+        accelerators: The accelerator used to profile each layer
+        cpu_clock_rates: The CPU clock rate of each layer
+
+    Returns:
+        List with the exception raised while estimating each layer, None if the layer was successfully estimated
+    """
+    errors:List[Exception] = [None] * len(layers)
+
+    # <id(estimator)>: (estimator, [(layer index, cpu clock rate)])
+    groups:Dict[int,Tuple[BaseEstimator,List[Tuple[int,int]]]] = {}
+    for i, (layer, accelerator, cpu_clock_rate) in enumerate(zip(layers, accelerators, cpu_clock_rates)):
+        try:
+            estimator = get_estimator(
+                accelerator=accelerator,
+                layer=layer,
+                **kwargs
+            )
+        except Exception as e:
+            errors[i] = e
+            continue
+        if estimator is None:
+            continue
+        groups.setdefault(id(estimator), (estimator, []))[1].append((i, cpu_clock_rate))
+
+    for estimator, entries in groups.values():
+        group_layers = [layers[i] for i, _ in entries]
+        group_clock_rates = [cpu_clock_rate for _, cpu_clock_rate in entries]
+        try:
+            group_errors = estimator.predict_batch(
+                layers=group_layers,
+                cpu_clock_rates=group_clock_rates
+            )
+        except Exception as e:
+            group_errors = [e] * len(entries)
+        for (i, _), err in zip(entries, group_errors):
+            errors[i] = err
+
+    return errors
+
+
+def estimate_profiling_results(
+    results:Union[ProfilingModelResults,List[ProfilingModelResults]],
+    **kwargs
+):
+    """Update the layers of the given profiling results with the estimated CPU cycles, energy, and time
+
+    The layers of all the given models are estimated together,
+    see :py:func:`~get_estimates_batch`
+    """
+    if isinstance(results, ProfilingModelResults):
+        results = [results]
+
+    layers = []
+    accelerators = []
+    cpu_clock_rates = []
+    for model_results in results:
+        if model_results.cpu_clock_rate == 0:
+            # pylint: disable=protected-access
+            model_results._cpu_clock_rate = DEFAULT_CPU_CLOCK_RATE
+
+        for layer in model_results.layers:
+            layers.append(layer)
+            accelerators.append(model_results.accelerator)
+            cpu_clock_rates.append(model_results.cpu_clock_rate)
+
+    errors = get_estimates_batch(
+        layers=layers,
+        accelerators=accelerators,
+        cpu_clock_rates=cpu_clock_rates,
+        **kwargs
+    )
+    for layer, err in zip(layers, errors):
+        if err is not None:
+            get_mltk_logger().warning(f'Failed to get profiling estimates for layer: {layer.name}, err: {err}')
@@ -1,7 +1,9 @@
 
+from typing import Dict
 import gzip
 import os
 import io
+import threading
 import numpy as np
 from urllib.parse import urlparse
 import yaml
@@ -16,6 +18,13 @@ from mltk.utils.archive_downloader import download_verify_extract
 onnxruntime.set_default_logger_severity(3)
 
 
+# The ONNX models are loaded once per process and shared by all of the estimators
+# <name>.<accelerator>.<metric>: MetricBaseEstimator (or None if the estimator failed to load)
+_loaded_models:Dict[str,'MetricBaseEstimator'] = {}
+_loaded_models_lock = threading.Lock()
+_estimators_dir:str = None
+
+
 
 
 class _DataList(list):
@@ -40,16 +49,60 @@ class MetricBaseEstimator(object):
         self.onnx_model_backend = backend.prepare(onnx_model, 'CPU')
         meta = onnx_model.metadata_props[0]
         self.feature_names = meta.value.split(',')
+        # The columns of the model's input feature matrix, see _DataList
+        self.feature_columns = sorted(self.feature_names)
+        # Cleared if the model does not support a batch dimension greater than 1
+        self._supports_batch = True
+        self._lock = threading.Lock()
 
 
     def predict(self, **kwargs):
         X = _DataList(kwargs)
-        y = self.onnx_model_backend.run(X.tonumpy())
+        y = self._run(X.tonumpy())
         return float(y[0])
 
 
+    def predict_batch(self, X:np.ndarray) -> np.ndarray:
+        """Return the predictions of the given feature matrix
+
+        Args:
+            X: Feature matrix with shape (n_samples, n_features), the columns are ordered by ``feature_columns``
+
+        Returns:
+            Float64 array with shape (n_samples,)
+        """
+        X = np.asarray(X, dtype=np.int64)
+        if len(X) == 0:
+            return np.zeros((0,), dtype=np.float64)
+
+        if self._supports_batch:
+            try:
+                return self._run(X)
+            except Exception:
+                if len(X) == 1:
+                    raise
+                # Some of the exported models have a fixed batch size of 1,
+                # in this case, run one sample at a time
+                self._supports_batch = False
+
+        return np.concatenate([self._run(X[i:i+1]) for i in range(len(X))])
+
+
+    def _run(self, X:np.ndarray) -> np.ndarray:
+        # NOTE: The ONNX backend is shared by all threads that use this estimator
+        with self._lock:
+            y = self.onnx_model_backend.run(X)
+        return np.asarray(y[0], dtype=np.float64).reshape(-1)
+
+
 
 def download_estimators() -> str:
+    global _estimators_dir
+
+    # NOTE: The estimators are only downloaded/verified once per process
+    if _estimators_dir is not None:
+        return _estimators_dir
+
     curdir = os.path.dirname(os.path.abspath(__file__))
     logger = get_mltk_logger()
 
@@ -75,10 +128,20 @@ def download_estimators() -> str:
         logger=logger
     )
 
+    _estimators_dir = dest_dir
     return dest_dir
 
 
 def load_model(name:str, accelerator:str, metric:str) -> MetricBaseEstimator:
+    """Load the given estimator model, the model is loaded once per process"""
+    with _loaded_models_lock:
+        key = f'{name}.{accelerator}.{metric}'
+        if key not in _loaded_models:
+            _loaded_models[key] = _load_model(name=name, accelerator=accelerator, metric=metric)
+        return _loaded_models[key]
+
+
+def _load_model(name:str, accelerator:str, metric:str) -> MetricBaseEstimator:
     logger = get_mltk_logger()
 
     estimator_name = f'{name}.{accelerator}.{metric}.onnx.gz'
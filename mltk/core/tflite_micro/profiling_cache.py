@@ -0,0 +1,212 @@
+"""Persistent cache of the model profiling results generated by the TF-Lite Micro simulator
+
+Refer to :py:class:`ProfilingResultsCache` for more details
+"""
+from typing import Dict, List
+import pickle
+import shutil
+import hashlib
+
+from mltk.utils.path import (create_user_dir, get_user_setting)
+from mltk.utils.file_cache import LruFileCache, scandir_recursive
+from ..tflite_model import TfliteModel
+from ..profiling_results import ProfilingModelResults, ProfilingLayerResult
+
+
+# The default maximum size of the cache in bytes,
+# this may be overridden with the "profiling_cache.max_size" user setting
+DEFAULT_MAX_SIZE = 64*1024*1024
+
+_CACHE_VERSION = 1
+_default_cache:'ProfilingResultsCache' = None
+
+
+
+class ProfilingResultsCache(LruFileCache):
+    """Persistent, size-bounded cache of :py:class:`mltk.core.ProfilingModelResults`
+
+    Profiling a model in the simulator is deterministic for a given model flatbuffer and profiling arguments.
+    This caches the results so that profiling the same model again (e.g. ``mltk profile`` after ``mltk train``)
+    does not need to re-run the simulator.
+
+    Each entry is keyed by a hash of the model's flatbuffer (see :py:meth:`~get_model_hash`)
+    plus a hash of the profiling arguments, the TF-Lite Micro wrapper version, and the accelerator and estimator versions
+    (see :py:meth:`~make_key`). The entries are stored in the cache directory as:
+    ``<directory>/<model hash>/<arguments hash>.pkl``
+
+    When the total size of the cache exceeds ``max_size``, the least recently used entries are deleted,
+    see :py:class:`mltk.utils.file_cache.LruFileCache`.
+
+    This cache may be safely used by multiple processes at the same time.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        cache = get_profiling_results_cache()
+
+        # Remove the cached results of a specific model
+        cache.invalidate(my_model)
+
+        # Remove all cached results
+        cache.clear()
+
+    Args:
+        directory: Directory where the cached results are stored
+        max_size: The maximum size of the cache in bytes
+    """
+    def __init__(
+        self,
+        directory:str,
+        max_size:int=DEFAULT_MAX_SIZE
+    ):
+        # NOTE: The model's directory is removed once all of its entries are evicted
+        super().__init__(directory, max_size=max_size, remove_empty_dirs=True)
+
+
+    @staticmethod
+    def get_model_hash(model:TfliteModel) -> str:
+        """Return the hash of the given model's flatbuffer"""
+        # NOTE: The flatbuffer may be a memory-mapped buffer, so hash it directly
+        return hashlib.md5(model.flatbuffer_data).hexdigest().lower()
+
+
+    @staticmethod
+    def make_key(model:TfliteModel, **kwargs) -> str:
+        """Generate a cache key from the given model and profiling arguments
+
+        The keyword arguments should include everything that affects the profiling results,
+        e.g. the accelerator name, runtime buffer size, wrapper and estimator versions, etc.
+        """
+        args_hash = hashlib.md5()
+        for key in sorted(kwargs.keys()):
+            args_hash.update(f'{key}={kwargs[key]!r};'.encode('utf-8'))
+        return f'{ProfilingResultsCache.get_model_hash(model)}/{args_hash.hexdigest().lower()}'
+
+
+    def get(self, key:str, model:TfliteModel) -> ProfilingModelResults:
+        """Return the cached results for the given key or None if they are not cached
+
+        Args:
+            key: The cache key returned by :py:meth:`~make_key`
+            model: The profiled model, the returned results reference the layers of this model
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != _CACHE_VERSION or data.get('key') != key:
+            return None
+
+        try:
+            results = deserialize_profiling_results(model, data['results'])
+        except Exception:
+            return None
+
+        self.touch_entry(path)
+        return results
+
+
+    def put(self, key:str, results:ProfilingModelResults):
+        """Add the given results to the cache"""
+        data = pickle.dumps(
+            dict(version=_CACHE_VERSION, key=key, results=serialize_profiling_results(results)),
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+        self.write_entry(self._get_path(key), lambda f: f.write(data))
+
+
+    def invalidate(self, model:TfliteModel) -> int:
+        """Delete all of the cached results of the given model
+
+        Returns:
+            The number of deleted entries
+        """
+        model_dir = f'{self.directory}/{ProfilingResultsCache.get_model_hash(model)}'
+        n_entries = sum(1 for entry in scandir_recursive(model_dir) if entry.name.endswith('.pkl'))
+        shutil.rmtree(model_dir, ignore_errors=True)
+        return n_entries
+
+
+    def clear(self):
+        """Delete all cached entries"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+    def _get_path(self, key:str) -> str:
+        return f'{self.directory}/{key}.pkl'
+
+
+
+def get_profiling_results_cache() -> ProfilingResultsCache:
+    """Return the default profiling results cache
+
+    The cache is stored in ``<user dir>/profiling_cache`` (see :py:func:`mltk.utils.path.create_user_dir`).
+    It is configured with the ``profiling_cache`` user setting, see the `settings_file <https://siliconlabs.github.io/mltk/docs/other/settings_file.html>`_
+
+    Returns:
+        The cache, or None if it is disabled
+    """
+    global _default_cache
+
+    settings = get_user_setting('profiling_cache') or {}
+    if not settings.get('enabled', True):
+        return None
+
+    max_size = int(settings.get('max_size', DEFAULT_MAX_SIZE))
+    if _default_cache is None or _default_cache.max_size != max_size:
+        _default_cache = ProfilingResultsCache(create_user_dir('profiling_cache'), max_size=max_size)
+    return _default_cache
+
+
+
+def serialize_profiling_results(results:ProfilingModelResults) -> Dict[str,object]:
+    """Return a picklable dictionary of the given profiling results
+
+    The layer results do not include the TfliteLayer, see :py:func:`deserialize_profiling_results`
+    """
+    layers:List[dict] = []
+    for layer_result in results.layers:
+        layer_dict = dict(layer_result)
+        del layer_dict['tflite_layer']
+        layers.append(layer_dict)
+
+    return dict(
+        accelerator=results.accelerator,
+        platform=results.platform,
+        cpu_clock_rate=results.cpu_clock_rate,
+        runtime_memory_bytes=results.runtime_memory_bytes,
+        is_simulated=results.is_simulated,
+        layers=layers
+    )
+
+
+def deserialize_profiling_results(model:TfliteModel, data:Dict[str,object]) -> ProfilingModelResults:
+    """Create profiling results from the dictionary returned by :py:func:`serialize_profiling_results`
+
+    The layer results reference the layers of the given model
+    """
+    model_layers = model.layers
+    if len(model_layers) != len(data['layers']):
+        raise ValueError('The number of model layers does not match the number of profiled layers')
+
+    layers = []
+    for tflite_layer, layer_result in zip(model_layers, data['layers']):
+        layers.append(ProfilingLayerResult(
+            tflite_layer=tflite_layer,
+            **layer_result
+        ))
+
+    return ProfilingModelResults(
+        model=model,
+        accelerator=data['accelerator'],
+        platform=data['platform'],
+        cpu_clock_rate=data['cpu_clock_rate'],
+        runtime_memory_bytes=data['runtime_memory_bytes'],
+        layers=layers,
+        is_simulated=data['is_simulated']
+    )
+
+
@@ -0,0 +1,104 @@
+import os
+import pytest
+
+from mltk.core import TfliteModel
+from mltk.core.profiling_results import ProfilingModelResults, ProfilingLayerResult
+from mltk.core.tflite_micro.profiling_cache import ProfilingResultsCache
+from mltk.utils.path import create_tempdir, remove_directory
+from mltk.utils.test_helper.data import (TFLITE_MICRO_SPEECH_TFLITE_PATH, IMAGE_EXAMPLE1_TFLITE_PATH)
+
+
+
+@pytest.fixture
+def cache_dir():
+    d = create_tempdir('utests/profiling_cache')
+    remove_directory(d)
+    yield d
+    remove_directory(d)
+
+
+def _create_results(tflite_model:TfliteModel, accelerator:str=None) -> ProfilingModelResults:
+    layers = []
+    for i, layer in enumerate(tflite_model.layers):
+        layers.append(ProfilingLayerResult(
+            tflite_layer=layer,
+            ops=i*100,
+            macs=i*50,
+            accelerator_cycles=i*10,
+            error_msg='Not supported' if i == 1 else None,
+            extra_stat=i
+        ))
+    return ProfilingModelResults(
+        model=tflite_model,
+        accelerator=accelerator,
+        runtime_memory_bytes=1234,
+        layers=layers
+    )
+
+
+def test_get_put(cache_dir):
+    cache = ProfilingResultsCache(cache_dir)
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+
+    key = cache.make_key(tflite_model, accelerator='MVP', runtime_buffer_size=-1)
+    assert key == cache.make_key(tflite_model, runtime_buffer_size=-1, accelerator='MVP')
+    assert key != cache.make_key(tflite_model, accelerator=None, runtime_buffer_size=-1)
+    assert cache.get(key, tflite_model) is None
+
+    cache.put(key, _create_results(tflite_model, accelerator='MVP'))
+
+    # The cached results reference the layers of the given model
+    other_model = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+    results = cache.get(key, other_model)
+    assert isinstance(results, ProfilingModelResults)
+    assert results.tflite_model is other_model
+    assert results.accelerator == 'MVP'
+    assert results.runtime_memory_bytes == 1234
+    assert results.n_layers == len(other_model.layers)
+    assert results.layers[2].tflite_layer is other_model.layers[2]
+    assert results.layers[2].ops == 200
+    assert results.layers[2]['extra_stat'] == 2
+    assert results.n_unsupported_layers == 1
+
+
+def test_invalidate(cache_dir):
+    cache = ProfilingResultsCache(cache_dir)
+    model1 = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+    model2 = TfliteModel.load_flatbuffer_file(TFLITE_MICRO_SPEECH_TFLITE_PATH)
+
+    key1a = cache.make_key(model1, accelerator=None)
+    key1b = cache.make_key(model1, accelerator='MVP')
+    key2 = cache.make_key(model2, accelerator=None)
+    cache.put(key1a, _create_results(model1))
+    cache.put(key1b, _create_results(model1, accelerator='MVP'))
+    cache.put(key2, _create_results(model2))
+
+    assert cache.invalidate(model1) == 2
+    assert cache.get(key1a, model1) is None
+    assert cache.get(key1b, model1) is None
+    assert cache.get(key2, model2) is not None
+
+    cache.clear()
+    assert cache.get(key2, model2) is None
+
+
+def test_evict(cache_dir):
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+    cache = ProfilingResultsCache(cache_dir)
+    key = cache.make_key(tflite_model, index=0)
+    cache.put(key, _create_results(tflite_model))
+    entry_size = os.path.getsize(f'{cache_dir}/{key}.pkl')
+
+    cache = ProfilingResultsCache(cache_dir, max_size=entry_size*4)
+    keys = [cache.make_key(tflite_model, index=i) for i in range(10)]
+    for i, key in enumerate(keys):
+        if i > 0:
+            cache.put(key, _create_results(tflite_model))
+        # Make the first entries the least recently used
+        os.utime(f'{cache_dir}/{key}.pkl', (i, i))
+    cache.evict()
+
+    assert cache.get(keys[0], tflite_model) is None
+    assert cache.get(keys[-1], tflite_model) is not None
+    total_size = sum(os.path.getsize(f'{cache_dir}/{k}.pkl') for k in keys if os.path.exists(f'{cache_dir}/{k}.pkl'))
+    assert total_size <= cache.max_size
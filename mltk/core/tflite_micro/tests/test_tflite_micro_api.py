@@ -1,11 +1,25 @@
 
+import pytest
 import numpy as np
 from mltk.core import TfliteModel
-from mltk.core.tflite_micro import TfliteMicro, TfliteMicroModel
+from mltk.core.tflite_micro import TfliteMicro, TfliteMicroModel, TfliteMicroProfilingPool
 from mltk.core.tflite_micro.tflite_micro_accelerator import TfliteMicroAccelerator
+from mltk.core.tflite_micro.profiling_cache import ProfilingResultsCache
+from mltk.utils.path import create_tempdir, remove_directory
 from mltk.utils.test_helper.data import (TFLITE_MICRO_SPEECH_TFLITE_PATH, IMAGE_EXAMPLE1_TFLITE_PATH)
 
 
+@pytest.fixture(autouse=True)
+def profiling_cache(monkeypatch):
+    # Use a temporary profiling results cache so that the tests do not modify the user's cache
+    d = create_tempdir('utests/tflite_micro_profiling_cache')
+    remove_directory(d)
+    cache = ProfilingResultsCache(d)
+    monkeypatch.setattr('mltk.core.tflite_micro.tflite_micro.get_profiling_results_cache', lambda: cache)
+    yield cache
+    remove_directory(d)
+
+
 
 def test_git_hash():
     v = TfliteMicro.git_hash()
@@ -92,6 +106,78 @@ def test_profile_model_mvp_unsupported_layer():
     assert results.macs > 0
 
 
+def test_estimate_profiling_results_batch():
+    from mltk.core.tflite_micro.accelerators.mvp.estimator import estimate_profiling_results
+
+    expected_results = [
+        TfliteMicro.profile_model(IMAGE_EXAMPLE1_TFLITE_PATH, accelerator='mvp', return_estimates=True, use_cache=False),
+        TfliteMicro.profile_model(IMAGE_EXAMPLE1_TFLITE_PATH, return_estimates=True, use_cache=False),
+    ]
+    results = [
+        TfliteMicro.profile_model(IMAGE_EXAMPLE1_TFLITE_PATH, accelerator='mvp', use_cache=False),
+        TfliteMicro.profile_model(IMAGE_EXAMPLE1_TFLITE_PATH, use_cache=False),
+    ]
+    # Estimate the layers of both models together
+    estimate_profiling_results(results)
+
+    for r, expected_r in zip(results, expected_results):
+        assert r.cpu_clock_rate == expected_r.cpu_clock_rate
+        for layer, expected_layer in zip(r.layers, expected_r.layers):
+            assert np.isclose(layer.cpu_cycles, expected_layer.cpu_cycles)
+            assert np.isclose(layer.energy, expected_layer.energy)
+            assert np.isclose(layer.time, expected_layer.time)
+
+
+def test_profile_model_cache(profiling_cache):
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+    cache = profiling_cache
+    assert cache.invalidate(tflite_model) == 0
+
+    TfliteMicro.profile_model(tflite_model, accelerator='mvp', use_cache=False)
+    assert cache.invalidate(tflite_model) == 0
+
+    results = TfliteMicro.profile_model(tflite_model, accelerator='mvp')
+    cached_results = TfliteMicro.profile_model(tflite_model, accelerator='mvp')
+    assert cached_results is not results
+    assert cached_results.n_layers == results.n_layers
+    assert cached_results.accelerator_cycles == results.accelerator_cycles
+    assert cached_results.macs == results.macs
+    assert cached_results.runtime_memory_bytes == results.runtime_memory_bytes
+
+    # The estimates are cached separately
+    TfliteMicro.profile_model(tflite_model, accelerator='mvp', return_estimates=True)
+    assert cache.invalidate(tflite_model) == 2
+
+
+def test_profiling_pool():
+    expected_results = TfliteMicro.profile_model(IMAGE_EXAMPLE1_TFLITE_PATH, accelerator='mvp')
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_EXAMPLE1_TFLITE_PATH)
+    progress = []
+
+    with TfliteMicroProfilingPool(n_jobs=2) as pool:
+        results = pool.profile_models(
+            [IMAGE_EXAMPLE1_TFLITE_PATH, tflite_model, TFLITE_MICRO_SPEECH_TFLITE_PATH, IMAGE_EXAMPLE1_TFLITE_PATH],
+            accelerator=['mvp', 'mvp', 'mvp', None],
+            progress_callback=lambda n, total, _: progress.append((n, total)),
+            # NOTE: The subprocesses do not use the temporary profiling results cache
+            use_cache=False
+        )
+        assert progress == [(1,4), (2,4), (3,4), (4,4)]
+
+        for r in results[:2]:
+            assert r.n_layers == 8
+            assert r.accelerator_cycles == expected_results.accelerator_cycles
+            assert r.macs == expected_results.macs
+            assert r.runtime_memory_bytes == expected_results.runtime_memory_bytes
+        assert results[1].tflite_model is tflite_model
+        assert results[2].n_layers == 4
+        assert results[2].n_unsupported_layers == 1
+        assert results[3].accelerator_cycles == 0
+
+        results = pool.profile_models([IMAGE_EXAMPLE1_TFLITE_PATH], accelerator='bogus', return_exceptions=True, use_cache=False)
+        assert isinstance(results[0], RuntimeError)
+
+
 def test_record_model():
     input_data = np.random.uniform(low=-127, high=128, size=(96,96,1)).astype(np.int8)
     layers = TfliteMicro.record_model(IMAGE_EXAMPLE1_TFLITE_PATH, input_data)
@@ -16,6 +16,7 @@ from mltk.utils.path import (fullpath, get_user_setting)
 from ..profiling_results import ProfilingModelResults, ProfilingLayerResult
 from .tflite_micro_accelerator import (TfliteMicroAccelerator, PlaceholderTfliteMicroAccelerator)
 from .tflite_micro_model import TfliteMicroModel, TfliteMicroModelDetails
+from .profiling_cache import ProfilingResultsCache, get_profiling_results_cache
 
 
 
@@ -185,12 +186,35 @@ class TfliteMicro:
         disable_simulator_backend=False,
         runtime_buffer_size=-1, # If runtime_buffer_size not given, determine the optimal memory size
         input_data: Union[np.ndarray,List[np.ndarray]]=None,
+        use_cache=True,
         **kwargs
     ) -> ProfilingModelResults:
         """Profile the given model in the simulator and optionally determine metric estimates
 
+        If ``use_cache=True`` and no ``input_data`` is given, then the results are cached in the
+        :py:class:`~mltk.core.tflite_micro.profiling_cache.ProfilingResultsCache`
+        and re-used the next time the same model is profiled with the same arguments.
         """
         tflite_model = _load_tflite_model(model)
+
+        cache = None
+        cache_key = None
+        if use_cache and input_data is None:
+            cache, cache_key = TfliteMicro._get_profiling_cache_key(
+                tflite_model,
+                accelerator=accelerator,
+                return_estimates=return_estimates,
+                disable_simulator_backend=disable_simulator_backend,
+                runtime_buffer_size=runtime_buffer_size,
+                **kwargs
+            )
+            if cache_key is not None:
+                results = cache.get(cache_key, tflite_model)
+                if results is not None:
+                    # Return the accelerator name exactly as given (the cache key uses the normalized name)
+                    results._accelerator = accelerator # pylint: disable=protected-access
+                    return results
+
         tflm_model = TfliteMicro.load_tflite_model(
             model=tflite_model,
             accelerator=accelerator,
@@ -276,6 +300,12 @@ class TfliteMicro:
                     **kwargs
                 )
 
+        if cache_key is not None:
+            try:
+                cache.put(cache_key, results)
+            except Exception as e:
+                TfliteMicro.get_logger().debug(f'Failed to cache profiling results, err: {e}')
+
         return results
 
 
@@ -430,6 +460,49 @@ class TfliteMicro:
         return TfliteMicro._accelerators[norm_accelerator]
 
 
+    @staticmethod
+    def _get_profiling_cache_key(
+        tflite_model:TfliteModel,
+        accelerator:str,
+        return_estimates:bool,
+        **kwargs
+    ) -> Tuple[ProfilingResultsCache,str]:
+        """Return the profiling results cache and the cache key of the given profiling arguments
+
+        Returns (None, None) if the cache is disabled or the results should not be cached
+        """
+        cache = get_profiling_results_cache()
+        if cache is None:
+            return None, None
+
+        tflm_accelerator = None
+        if accelerator is not None:
+            norm_accelerator = TfliteMicro.normalize_accelerator_name(accelerator)
+            if norm_accelerator is None:
+                # Let profile_model() report the unknown accelerator
+                return None, None
+            accelerator = norm_accelerator
+            tflm_accelerator = TfliteMicro._accelerators[norm_accelerator]
+
+        estimator_version = None
+        if return_estimates:
+            # NOTE: If accelerator=none then the MVP accelerator's estimators are used, see profile_model()
+            estimator_accelerator = tflm_accelerator or TfliteMicro._accelerators.get('MVP')
+            if estimator_accelerator is not None:
+                estimator_version = estimator_accelerator.estimator_version
+
+        cache_key = cache.make_key(
+            tflite_model,
+            accelerator=accelerator,
+            return_estimates=return_estimates,
+            tflm_git_hash=TfliteMicro.git_hash(),
+            accelerator_git_hash=None if tflm_accelerator is None else tflm_accelerator.git_hash,
+            estimator_version=estimator_version,
+            **kwargs
+        )
+        return cache, cache_key
+
+
     @staticmethod
     def _load_wrapper():
         """Load the TFLM C++ wrapper and return a refernce to the loaded module"""
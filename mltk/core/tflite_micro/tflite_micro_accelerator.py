@@ -66,6 +66,15 @@ class TfliteMicroAccelerator:
         else:
             return None
 
+    @property
+    def estimator_version(self) -> str:
+        """Identifies the version of the models used by :py:meth:`~estimate_profiling_results`
+
+        This is used to invalidate cached profiling results when the estimators change.
+        Returns None if this accelerator does not estimate profiling results
+        """
+        return None
+
     @property
     def accelerator_wrapper(self) -> object:
         """Return the TfliteMicroAcceleratorWrapper instance
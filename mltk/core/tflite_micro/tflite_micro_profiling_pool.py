@@ -0,0 +1,326 @@
+"""Profile .tflite models in parallel subprocesses
+
+Refer to :py:class:`TfliteMicroProfilingPool` for more details
+"""
+from typing import Callable, Dict, List, Union
+import threading
+import traceback
+import logging
+from concurrent.futures import Future, as_completed
+
+import numpy as np
+
+from mltk.utils.process_pool import ProcessPool
+from ..tflite_model import TfliteModel
+from ..profiling_results import ProfilingModelResults
+from .tflite_micro import TfliteMicro, _load_tflite_model
+from .profiling_cache import serialize_profiling_results, deserialize_profiling_results
+
+
+class TfliteMicroProfilingPool:
+    """Profile .tflite models across a pool of subprocesses
+
+    :py:meth:`TfliteMicro.profile_model` only loads one model at a time per process
+    (the TF-Lite Micro wrapper is guarded by a class-wide lock).
+    This pool spreads the profiling jobs across multiple subprocesses so that
+    a sweep of many models (e.g. different model widths or accelerators) uses all of the CPU cores.
+
+    Each subprocess is started once and processes many jobs,
+    so the TF-Lite Micro wrapper and accelerators are only loaded once per subprocess.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from mltk.core.tflite_micro import TfliteMicroProfilingPool
+
+        with TfliteMicroProfilingPool(n_jobs=-1) as pool:
+            # Profile the models, the results are returned in the same order as the given models
+            results = pool.profile_models(
+                ['model_a.tflite', 'model_b.tflite', 'model_c.tflite'],
+                accelerator='mvp',
+                show_progress=True
+            )
+
+            # Or, submit individual profiling jobs
+            future = pool.submit('model_a.tflite', accelerator='mvp', return_estimates=True)
+            model_a_results = future.result()
+
+    .. note:: The ``input_data`` argument of :py:meth:`TfliteMicro.profile_model` is pickled and sent to the subprocess with each job
+
+    Args:
+        n_jobs: The number of subprocesses to use for profiling, see :py:class:`mltk.utils.process_pool.ProcessPool`
+        logger: Optional Python logger
+        debug: If true then the models are profiled in a single thread of the current process (instead of subprocesses).
+            This is useful for debugging
+        start: Automatically start the subprocesses. If false, then :py:meth:`~start` must be called before profiling
+    """
+    def __init__(
+        self,
+        n_jobs:Union[int,float]=-1,
+        logger:logging.Logger=None,
+        debug:bool=False,
+        start:bool=True
+    ):
+        self.logger = logger or TfliteMicro.get_logger()
+        self._lock = threading.Lock()
+        self._pending:Dict[int,Future] = {}
+        self._next_job_id = 0
+        self._pool = ProcessPool(
+            entry_point=_profile_model_in_subprocess,
+            n_jobs=n_jobs,
+            name='TfliteMicroProfilingPool',
+            debug=debug,
+            logger=self.logger,
+            start=False,
+            # The accelerator search paths are sent once to each subprocess
+            context=dict(accelerator_paths=list(TfliteMicro._accelerator_paths)) # pylint: disable=protected-access
+        )
+        self._pool.add_shutdown_listener(self._on_pool_shutdown)
+        if start:
+            self.start()
+
+
+    @property
+    def n_jobs(self) -> int:
+        """The number of subprocesses used for profiling"""
+        return self._pool.n_jobs
+
+    @property
+    def is_running(self) -> bool:
+        """Returns true if the profiling subprocesses are running"""
+        return self._pool.is_running
+
+
+    def start(self):
+        """Start the profiling subprocesses"""
+        self._pool.start()
+
+
+    def shutdown(self):
+        """Shutdown the profiling subprocesses
+
+        Any pending jobs are cancelled
+        """
+        self._pool.shutdown()
+
+
+    def submit(
+        self,
+        model:Union[str,TfliteModel],
+        accelerator:str=None,
+        return_estimates:bool=False,
+        disable_simulator_backend:bool=False,
+        runtime_buffer_size:int=-1,
+        input_data:Union[np.ndarray,List[np.ndarray]]=None,
+        **kwargs
+    ) -> Future:
+        """Submit a job to profile the given model in the next available subprocess
+
+        The arguments are the same as :py:meth:`TfliteMicro.profile_model`.
+
+        .. note:: This blocks until a subprocess is available
+
+        Returns:
+            A future whose result is the model's :py:class:`mltk.core.ProfilingModelResults`.
+            If profiling fails, then the future's exception is a ``RuntimeError`` with the subprocess's traceback
+        """
+        if not self.is_running:
+            raise RuntimeError('TfliteMicroProfilingPool not started')
+
+        tflite_model = _load_tflite_model(model)
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            self._pending[job_id] = future
+
+        def _on_result(result:dict):
+            with self._lock:
+                if self._pending.pop(job_id, None) is None:
+                    return
+            try:
+                future.set_result(_create_results(tflite_model, result))
+            except Exception as e:
+                future.set_exception(e)
+
+        job_kwargs = dict(
+            accelerator=accelerator,
+            return_estimates=return_estimates,
+            disable_simulator_backend=disable_simulator_backend,
+            runtime_buffer_size=runtime_buffer_size,
+            input_data=input_data,
+            estimate_kwargs=kwargs,
+        )
+        # If a model path was given, then the subprocess loads the model from the file,
+        # otherwise the model's flatbuffer is sent to the subprocess
+        if isinstance(model, str):
+            job_kwargs['model_path'] = model
+        else:
+            job_kwargs['flatbuffer_data'] = tflite_model.flatbuffer_data
+
+        try:
+            self._pool.process(pool_callback=_on_result, **job_kwargs)
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            future.set_exception(e)
+
+        return future
+
+
+    def profile_models(
+        self,
+        models:List[Union[str,TfliteModel]],
+        accelerator:Union[str,List[str]]=None,
+        progress_callback:Callable[[int,int,Union[ProfilingModelResults,Exception]],None]=None,
+        show_progress:bool=False,
+        return_exceptions:bool=False,
+        **kwargs
+    ) -> List[Union[ProfilingModelResults,Exception]]:
+        """Profile the given models across the subprocesses
+
+        Args:
+            models: List of .tflite model file paths or :py:class:`mltk.core.TfliteModel` instances
+            accelerator: The accelerator used to profile each model.
+                Either a single accelerator name (or None) for all models, or a list with an accelerator name for each model
+            progress_callback: Optional callback invoked in the calling thread as each job completes.
+                The callback is given: (number of completed jobs, total number of jobs, the job's results or exception)
+            show_progress: If true, then display a progress bar
+            return_exceptions: If true, then the exception of a failed job is returned in the job's list entry.
+                Otherwise, the first exception is raised once all of the jobs complete
+            kwargs: Additional arguments given to each job, see :py:meth:`~submit`
+
+        Returns:
+            A list of :py:class:`mltk.core.ProfilingModelResults`, in the same order as the given models
+        """
+        if isinstance(accelerator, (list,tuple)):
+            if len(accelerator) != len(models):
+                raise ValueError('The number of accelerators must match the number of models')
+            accelerators = list(accelerator)
+        else:
+            accelerators = [accelerator] * len(models)
+
+        n_models = len(models)
+        futures:List[Future] = [Future() for _ in range(n_models)]
+        future_indices = {id(f): i for i, f in enumerate(futures)}
+
+        # Submit the jobs in a separate thread.
+        # This way, this thread reports the progress while waiting for a subprocess to become available
+        def _submit_jobs():
+            for model, acc, proxy in zip(models, accelerators, futures):
+                proxy.set_running_or_notify_cancel()
+                if not self.is_running:
+                    proxy.set_exception(RuntimeError('TfliteMicroProfilingPool shutdown'))
+                    continue
+                try:
+                    job = self.submit(model, accelerator=acc, **kwargs)
+                except Exception as e:
+                    proxy.set_exception(e)
+                    continue
+                job.add_done_callback(lambda f, proxy=proxy: _copy_future_state(f, proxy))
+
+        submit_thread = threading.Thread(
+            name='TfliteMicroProfilingPool-submit',
+            target=_submit_jobs,
+            daemon=True
+        )
+        submit_thread.start()
+
+        progbar = None
+        if show_progress:
+            import tqdm
+            progbar = tqdm.tqdm(unit='model', desc='Profiling', total=n_models)
+
+        results:List[Union[ProfilingModelResults,Exception]] = [None] * n_models
+        first_exception = None
+        try:
+            for n_completed, future in enumerate(as_completed(futures), start=1):
+                index = future_indices[id(future)]
+                err = future.exception()
+                results[index] = future.result() if err is None else err
+                if err is not None and first_exception is None:
+                    first_exception = err
+                if progbar is not None:
+                    progbar.update(1)
+                if progress_callback is not None:
+                    progress_callback(n_completed, n_models, results[index])
+        finally:
+            if progbar is not None:
+                progbar.close()
+            submit_thread.join()
+
+        if first_exception is not None and not return_exceptions:
+            raise first_exception
+
+        return results
+
+
+    def _on_pool_shutdown(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(RuntimeError('TfliteMicroProfilingPool shutdown before the job completed'))
+
+
+    def __enter__(self):
+        if not self.is_running:
+            self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+
+def _copy_future_state(src:Future, dst:Future):
+    err = src.exception()
+    if err is not None:
+        dst.set_exception(err)
+    else:
+        dst.set_result(src.result())
+
+
+def _create_results(tflite_model:TfliteModel, result:dict) -> ProfilingModelResults:
+    """Create the ProfilingModelResults from the serialized results returned by the subprocess"""
+    if result is None:
+        raise RuntimeError('Profiling subprocess did not return results')
+    if 'error' in result:
+        raise RuntimeError(f'Failed to profile model in subprocess, err:\n{result["error"]}')
+
+    # NOTE: The results reference the layers of the TfliteModel in this process
+    #       (the subprocess's TfliteModel is not pickled)
+    return deserialize_profiling_results(tflite_model, result)
+
+
+def _profile_model_in_subprocess(
+    accelerator_paths:List[str],
+    estimate_kwargs:dict,
+    model_path:str=None,
+    flatbuffer_data:bytes=None,
+    **kwargs
+) -> dict:
+    """Profile a model in the subprocess and return the results as a picklable dictionary
+
+    NOTE: This executes in the subprocess.
+    The TfliteMicro wrapper and accelerators are loaded by the first job and re-used by the subsequent jobs.
+    """
+    try:
+        # The accelerator paths must be added before the TfliteMicro wrapper is loaded
+        for p in accelerator_paths:
+            if p not in TfliteMicro._accelerator_paths: # pylint: disable=protected-access
+                TfliteMicro.add_accelerator_path(p)
+
+        if model_path is not None:
+            tflite_model = TfliteModel.load_flatbuffer_file(model_path)
+        else:
+            tflite_model = TfliteModel(flatbuffer_data)
+
+        results = TfliteMicro.profile_model(tflite_model, **kwargs, **estimate_kwargs)
+        return serialize_profiling_results(results)
+
+    except Exception:
+        return dict(error=traceback.format_exc())
@@ -3,6 +3,7 @@ from .tflite_model import (
     TfliteModel,
     TfliteOpCode
 )
+from .tflite_stream_runner import TfliteStreamRunner
 from .tflite_layer import (
     TfliteLayer,
     TfliteLayerOptions,
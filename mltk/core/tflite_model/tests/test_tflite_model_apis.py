@@ -1,5 +1,6 @@
 
 import os
+import shutil
 import pytest
 import numpy as np
 
@@ -12,7 +13,8 @@ from mltk.core import (
     TfliteConv2dLayer,
     TfliteDepthwiseConv2dLayer,
     TfliteFullyConnectedLayer,
-    TflitePooling2dLayer
+    TflitePooling2dLayer,
+    TfliteStreamRunner
 )
 from mltk.core.tflite_model.tflite_layer import TfliteConv2DLayerOptions
 from mltk.utils.test_helper.data import IMAGE_CLASSIFICATION_TFLITE_PATH
@@ -66,6 +68,90 @@ def test_flatbuffer_data_api():
 
     assert tflite_model.flatbuffer_data == tflite_bytes
 
+def test_lazy_load_api():
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH)
+    lazy_tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH, lazy=True)
+    assert lazy_tflite_model.is_lazy
+    assert lazy_tflite_model.flatbuffer_size == tflite_model.flatbuffer_size
+    assert lazy_tflite_model.summary() == tflite_model.summary()
+    for lazy_tensor, tensor in zip(lazy_tflite_model.tensors, tflite_model.tensors):
+        assert np.array_equal(lazy_tensor.data, tensor.data)
+    assert lazy_tflite_model.get_all_metadata() == tflite_model.get_all_metadata()
+    assert lazy_tflite_model.is_lazy
+
+    # Modifying the model should fully unpack it
+    lazy_tflite_model.add_metadata('test', b'value')
+    assert not lazy_tflite_model.is_lazy
+    assert lazy_tflite_model.get_metadata('test') == b'value'
+
+def test_lazy_load_close():
+    with TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH, lazy=True) as tflite_model:
+        flatbuffer_data = tflite_model._flatbuffer_data # pylint: disable=protected-access
+        summary = tflite_model.summary()
+    assert summary
+    assert not tflite_model.is_lazy
+    assert flatbuffer_data.closed
+
+    # The memory-mapped file should be closed once the tensor data is no longer referenced
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH, lazy=True)
+    flatbuffer_data = tflite_model._flatbuffer_data # pylint: disable=protected-access
+    tensor_data = tflite_model.tensors[1].data
+    tflite_model.close()
+    assert not flatbuffer_data.closed
+    assert np.array_equal(tensor_data, TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH).tensors[1].data)
+
+def test_lazy_load_save_in_place():
+    tmp_tflite_path = f'{create_tempdir()}/lazy_save_in_place.tflite'
+    shutil.copy(IMAGE_CLASSIFICATION_TFLITE_PATH, tmp_tflite_path)
+    try:
+        tflite_model = TfliteModel.load_flatbuffer_file(tmp_tflite_path, lazy=True)
+        tensor_data = np.array(tflite_model.tensors[1].data)
+        # Saving to the model's own memory-mapped file should overwrite it with the same contents
+        tflite_model.save()
+        assert not tflite_model.is_lazy
+        assert np.array_equal(tflite_model.tensors[1].data, tensor_data)
+
+        with open(IMAGE_CLASSIFICATION_TFLITE_PATH, 'rb') as fp:
+            expected_bytes = fp.read()
+        with open(tmp_tflite_path, 'rb') as fp:
+            saved_bytes = fp.read()
+        assert len(saved_bytes) > 0
+        assert TfliteModel(saved_bytes).summary() == TfliteModel(expected_bytes).summary()
+    finally:
+        os.remove(tmp_tflite_path)
+
+def test_lazy_load_set_tensor_data():
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH, lazy=True)
+    layer = tflite_model.layers[0]
+    tensor = tflite_model.get_tensor(1)
+    new_data = np.zeros_like(tensor.data)
+    tensor.data = new_data
+    assert not tflite_model.is_lazy
+
+    # The previously returned tensor and layer objects should still be attached to the model
+    assert tflite_model.get_tensor(1) is tensor
+    assert tflite_model.layers[0] is layer
+    assert np.array_equal(tflite_model.get_tensor(1).data, new_data)
+    assert np.array_equal(tflite_model.get_buffer_data(tensor.buffer), new_data.view(np.uint8).flatten())
+
+def test_buffer_data_read_only():
+    for lazy in (False, True):
+        tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH, lazy=lazy)
+        for tensor in tflite_model.tensors:
+            if tflite_model.get_buffer_data(tensor.buffer) is not None:
+                assert not tensor.data.flags.writeable
+                with pytest.raises(ValueError):
+                    tensor.data.flat[0] = 1
+
+    # Setting a tensor's data should not make the model's buffer writable through the returned array
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH)
+    tensor = tflite_model.tensors[1]
+    tensor.data = np.zeros_like(tensor.data)
+    buffer_data = tflite_model.get_buffer_data(tensor.buffer)
+    assert not buffer_data.flags.writeable
+    with pytest.raises(ValueError):
+        buffer_data[0] = 1
+
 def test_flatbuffer_size_api():
     tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH)
     assert tflite_model.flatbuffer_size == os.path.getsize(IMAGE_CLASSIFICATION_TFLITE_PATH)
@@ -498,6 +584,67 @@ def test_predict_different_batch_sizes():
     assert y2.shape[1] == 10
 
 
+def test_predict_multi_threaded():
+    tflite_model = TfliteModel.load_flatbuffer_file(IMAGE_CLASSIFICATION_TFLITE_PATH)
+
+    x = np.random.randint(-128, 127, size=(37,32,32,3), dtype=np.int8)
+    try:
+        y1 = tflite_model.predict(x, max_threads=1)
+        y2 = tflite_model.predict(x, max_threads=4)
+    except ModuleNotFoundError as e:
+        print(f'WARN: Failed to import tensorflow, err: {e}')
+        return
+
+    assert y2.shape == (37, 10)
+    assert np.array_equal(y1, y2)
+
+
+def test_stream_runner():
+    try:
+        import tensorflow as tf
+    except ModuleNotFoundError as e:
+        print(f'WARN: Failed to import tensorflow, err: {e}')
+        return
+
+    # Simple stateful model: state = x + 0.5*state, y = dense(state)
+    x_in = tf.keras.Input(shape=(4,), batch_size=1)
+    state_in = tf.keras.Input(shape=(4,), batch_size=1)
+    state_out = tf.keras.layers.Add()([x_in, tf.keras.layers.Rescaling(0.5)(state_in)])
+    y_out = tf.keras.layers.Dense(3)(state_out)
+    keras_model = tf.keras.Model([x_in, state_in], [y_out, state_out])
+    tflite_model = TfliteModel(tf.lite.TFLiteConverter.from_keras_model(keras_model).convert())
+
+    state_output_index = [i for i, t in enumerate(tflite_model.outputs) if tuple(t.shape) == (1,4)][0]
+    y_output_index = 1 - state_output_index
+
+    x = np.random.uniform(size=(9,7,4)).astype(np.float32)
+    expected = []
+    for seq in x:
+        state = np.zeros((4,), dtype=np.float32)
+        for row in seq:
+            res = tflite_model.predict([row, state])
+            state = res[state_output_index]
+        expected.append(res[y_output_index])
+
+    runner = TfliteStreamRunner(
+        tflite_model,
+        state_mapping={state_output_index: 1},
+        output_index=y_output_index,
+        max_threads=3
+    )
+    try:
+        y = runner.run(x)
+        assert y.shape == (9, 3)
+        assert np.allclose(y, np.asarray(expected))
+        assert np.allclose(runner.run(list(x[:2])), np.asarray(expected[:2]))
+    finally:
+        runner.close()
+
+    latency = runner.get_latency_summary()
+    assert latency['steps'] == 11*7
+    assert latency['max_ms'] >= latency['p50_ms']
+
+
 def test_load_corrupt_tflite():
     bogus_tflite = b'\x12\x34\x56\x78'
 
@@ -684,4 +831,22 @@ def test_max_pool_params():
         assert calc_params.stride_width == expected_params['stride_width']
         assert calc_params.stride_height == expected_params['stride_height']
         assert calc_params.quantized_activation_min == expected_params['quantized_activation_min']
-        assert calc_params.quantized_activation_max == expected_params['quantized_activation_max']
\ No newline at end of file
+        assert calc_params.quantized_activation_max == expected_params['quantized_activation_max']
+
+def test_load_without_tensorflow():
+    import sys
+    import subprocess
+
+    # Loading a .tflite model should not import Tensorflow
+    # (e.g. through the tflite_support package's __init__.py)
+    script = 'import sys\n' \
+        'from mltk.core import TfliteModel\n' \
+        f'tflite_model = TfliteModel.load_flatbuffer_file("{IMAGE_CLASSIFICATION_TFLITE_PATH}")\n' \
+        'print("n_layers:", len(tflite_model.layers))\n' \
+        'print("tensorflow imported:", "tensorflow" in sys.modules)\n'
+    retmsg = subprocess.check_output(
+        [sys.executable, '-c', script],
+        stderr=subprocess.STDOUT
+    ).decode('utf-8')
+    assert 'n_layers:' in retmsg
+    assert 'tensorflow imported: False' in retmsg
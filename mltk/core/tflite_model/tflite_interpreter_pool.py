@@ -0,0 +1,197 @@
+"""Pool of TF-Lite interpreters used by :py:meth:`mltk.core.TfliteModel.predict`"""
+from __future__ import annotations
+import os
+import math
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, TypeVar
+
+import numpy as np
+
+
+TfliteModel = TypeVar('TfliteModel')
+
+
+class TfliteInterpreterPool:
+    """Pool of pre-allocated TF-Lite interpreters, keyed by batch size
+
+    Each interpreter is created once for a given batch size and then re-used for every subsequent
+    invocation with that batch size.
+
+    Large batches are split into smaller chunks and each chunk is processed by a different
+    interpreter in a separate thread. The TF-Lite interpreter releases the GIL while it executes,
+    so this allows for using multiple CPU cores.
+
+    Input samples are copied directly into the interpreter's input tensor buffers
+    and the output tensor buffers are copied directly into the returned arrays,
+    so no intermediate arrays are allocated per invocation.
+
+    This class is thread-safe.
+
+    Args:
+        model: The :py:class:`~mltk.core.TfliteModel` to run
+        max_threads: The maximum number of threads (and interpreters per batch size) used to process a batch.
+            If None, then use the number of CPU cores
+        min_samples_per_thread: A batch is only split across threads if each thread processes at least this many samples
+        max_batch_sizes: The maximum number of distinct batch sizes for which interpreters are kept
+        interpreter_kwargs: Additional keyword arguments given to ``tf.lite.Interpreter()``
+    """
+    def __init__(
+        self,
+        model:TfliteModel,
+        max_threads:int=None,
+        min_samples_per_thread:int=4,
+        max_batch_sizes:int=4,
+        interpreter_kwargs:dict=None,
+    ):
+        self.max_threads = max(max_threads or os.cpu_count() or 1, 1)
+        self.min_samples_per_thread = max(min_samples_per_thread, 1)
+        self.max_batch_sizes = max(max_batch_sizes, 1)
+        self.interpreter_kwargs = interpreter_kwargs or {}
+        self._flatbuffer_data = model.flatbuffer_data
+        self._input_shapes = {x.index: tuple(x.shape) for x in model.inputs}
+        self._output_shapes = {x.index: tuple(x.shape) for x in model.outputs}
+        self._lock = threading.Lock()
+        self._idle:Dict[int,List[_PooledInterpreter]] = collections.OrderedDict()
+        self._executor:ThreadPoolExecutor = None
+
+
+    def invoke(self, inputs:Dict[int,np.ndarray]) -> List[np.ndarray]:
+        """Run inference on the given batch of inputs
+
+        Args:
+            inputs: Dictionary of <input tensor index>:<input batch data>.
+                All input batches must have the same number of samples and their dtype must match the model input's
+
+        Returns:
+            A list of the batched model outputs, one entry per model output
+        """
+        batch_size = next(iter(inputs.values())).shape[0]
+        chunks = self._split_batch(batch_size)
+        interpreters = [self._acquire(end - start) for start, end in chunks]
+        try:
+            outputs = [
+                np.empty((batch_size, *shape[1:]), dtype=dtype)
+                for shape, dtype in interpreters[0].output_specs
+            ]
+
+            def _invoke_chunk(chunk_index:int):
+                start, end = chunks[chunk_index]
+                interpreters[chunk_index].invoke(
+                    {index: x[start:end] for index, x in inputs.items()},
+                    [y[start:end] for y in outputs]
+                )
+
+            if len(chunks) == 1:
+                _invoke_chunk(0)
+            else:
+                # NOTE: list() is required to propagate any exceptions raised by the threads
+                list(self._get_executor().map(_invoke_chunk, range(len(chunks))))
+        finally:
+            for interpreter in interpreters:
+                self._release(interpreter)
+
+        return outputs
+
+
+    def close(self):
+        """Release all interpreters and threads"""
+        with self._lock:
+            self._idle.clear()
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+    def _split_batch(self, batch_size:int) -> List[Tuple[int,int]]:
+        n_threads = min(self.max_threads, batch_size // self.min_samples_per_thread)
+        if n_threads <= 1:
+            return [(0, batch_size)]
+        chunk_size = math.ceil(batch_size / n_threads)
+        return [(start, min(start + chunk_size, batch_size)) for start in range(0, batch_size, chunk_size)]
+
+
+    def _acquire(self, batch_size:int) -> _PooledInterpreter:
+        with self._lock:
+            idle = self._idle.get(batch_size)
+            if idle:
+                return idle.pop()
+        # NOTE: The interpreter is created outside of the lock
+        #       so that other threads are not blocked while it is allocated
+        return _PooledInterpreter(
+            batch_size=batch_size,
+            flatbuffer_data=self._flatbuffer_data,
+            input_shapes=self._input_shapes,
+            output_shapes=self._output_shapes,
+            interpreter_kwargs=self.interpreter_kwargs
+        )
+
+
+    def _release(self, interpreter:_PooledInterpreter):
+        with self._lock:
+            idle = self._idle.setdefault(interpreter.batch_size, [])
+            self._idle.move_to_end(interpreter.batch_size)
+            if len(idle) < self.max_threads:
+                idle.append(interpreter)
+            # Discard the interpreters of the least recently used batch sizes
+            while len(self._idle) > self.max_batch_sizes:
+                self._idle.popitem(last=False)
+
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_threads,
+                    thread_name_prefix='TfliteInterpreterPool'
+                )
+            return self._executor
+
+
+
+class _PooledInterpreter:
+    """TF-Lite interpreter allocated for a specific batch size"""
+    def __init__(
+        self,
+        batch_size:int,
+        flatbuffer_data:bytes,
+        input_shapes:Dict[int,tuple],
+        output_shapes:Dict[int,tuple],
+        interpreter_kwargs:dict
+    ):
+        try:
+            import tensorflow as tf
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(f'You must first install the "tensorflow" Python package to run inference, err: {e}') # pylint: disable=raise-missing-from
+
+        self.batch_size = batch_size
+        self.interpreter = tf.lite.Interpreter(
+            model_content=flatbuffer_data,
+            **interpreter_kwargs
+        )
+
+        for index, shape in input_shapes.items():
+            self.interpreter.resize_tensor_input(index, (batch_size, *shape[1:]))
+        for index, shape in output_shapes.items():
+            if index in input_shapes:
+                continue
+            self.interpreter.resize_tensor_input(index, (batch_size, *shape[1:]))
+
+        self.interpreter.allocate_tensors()
+
+        # NOTE: interpreter.tensor() returns a function that returns a numpy view of the tensor's buffer.
+        #       The views must NOT be held while the interpreter is invoked
+        self._input_tensors = {index: self.interpreter.tensor(index) for index in input_shapes}
+        self._output_tensors = [self.interpreter.tensor(index) for index in output_shapes]
+        self.output_specs = [(x().shape, x().dtype) for x in self._output_tensors]
+
+
+    def invoke(self, inputs:Dict[int,np.ndarray], outputs:List[np.ndarray]):
+        """Copy the inputs into the interpreter, invoke it, then copy its outputs into the given arrays"""
+        for index, x in inputs.items():
+            np.copyto(self._input_tensors[index](), x, casting='safe')
+        self.interpreter.invoke()
+        for output_tensor, y in zip(self._output_tensors, outputs):
+            np.copyto(y, output_tensor())
@@ -30,7 +30,7 @@ class TfliteLayer:
         fb_operation:_tflite_schema_fb.OperatorT
     ) -> TfliteLayer:
         """Instantiate a TfliteLayer from then given TfliteModel flatbuffer operation"""
-        fb_opcode = model.flatbuffer_model.operatorCodes[fb_operation.opcodeIndex]
+        fb_opcode = model.get_operator_code(fb_operation.opcodeIndex)
         # See: https://github.com/tensorflow/community/pull/285/files
         # for why we return the max(DeprecatedBuiltinCode, BuiltinCode)
         opcode = max(getattr(fb_opcode, 'deprecatedBuiltinCode', -1), fb_opcode.builtinCode)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 import os
+import mmap
 import warnings
 
-from typing import List, Dict, Union, Iterator
+from typing import List, Dict, Union, Iterator, Callable, Tuple
 from prettytable import PrettyTable
 
 import numpy as np
@@ -15,6 +16,7 @@ from .tflite_schema import BuiltinOperator as TfliteOpCode # pylint: disable=unu
 from .tflite_schema import flatbuffers
 
 from .tflite_tensor import TfliteTensor
+from .tflite_interpreter_pool import TfliteInterpreterPool
 from .tflite_layer import TfliteLayer
 
 
@@ -76,27 +78,62 @@ class TfliteModel:
         # - a numpy array of 1 or more samples
         # - A Python generator that returns (batch_x, batch_y)
         # inference_results = tflite_model.predict(..)
+
+
+    **Lazy Loading**
+
+    By default, the entire .tflite flatbuffer is unpacked into Python objects when the model is loaded.
+    For large models, this can be slow. If ``lazy=True``, then the model is loaded in a read-only mode:
+
+    - :py:meth:`~load_flatbuffer_file` memory-maps the .tflite file instead of reading it into memory
+    - Tensors and layers are only unpacked when they are accessed
+    - Tensor data is a zero-copy, read-only numpy view of the flatbuffer
+
+    The model is automatically (and transparently) fully unpacked the first time it is modified
+    (e.g. :py:meth:`~add_metadata`, setting :py:attr:`~description`, setting a tensor's data) or :py:attr:`~flatbuffer_model` is accessed.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        tflite_model = TfliteModel.load_flatbuffer_file('some/path/my_model.tflite', lazy=True)
+        print(tflite_model.summary())
     """
 
     @staticmethod
-    def load_flatbuffer_file(path: str, cwd=None) -> TfliteModel:
-        """Load a .tflite flatbuffer file"""
+    def load_flatbuffer_file(path: str, cwd=None, lazy=False) -> TfliteModel:
+        """Load a .tflite flatbuffer file
+
+        Args:
+            path: Path to .tflite model file
+            cwd: Optional directory to search for the given path
+            lazy: If true, then memory-map the file and lazily load the model, see the "Lazy Loading" section of this class's docs
+        """
         found_path = _existing_path(path, cwd=cwd)
         if found_path is None:
             raise FileNotFoundError(f'.tflite model file not found: {path}')
 
         with open(found_path, 'rb') as f:
-            flatbuffer_data = f.read()
+            if lazy and os.path.getsize(found_path) > 0:
+                flatbuffer_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                flatbuffer_data = f.read()
 
-        return TfliteModel(flatbuffer_data=flatbuffer_data, path=found_path)
+        return TfliteModel(flatbuffer_data=flatbuffer_data, path=found_path, lazy=lazy)
 
 
-    def __init__(self, flatbuffer_data: bytes, path: str=None):
+    def __init__(self, flatbuffer_data: bytes, path: str=None, lazy=False):
+        """
+        Args:
+            flatbuffer_data: The .tflite flatbuffer binary data
+            path: Optional path to the .tflite model file
+            lazy: If true, then lazily load the model, see the "Lazy Loading" section of this class's docs
+        """
         self.path = path
-        self._interpreter = None
-        self._interpreter_batch_size = -1
+        self._interpreter_pool:TfliteInterpreterPool = None
         self._flatbuffer_data : bytes = flatbuffer_data
         self._model:_tflite_schema_fb.ModelT = None
+        self._fb_model:_tflite_schema_fb.Model = None
+        self._lazy = lazy
         self._selected_model_subgraph_index = -1
         self._subgraphs: List[_TfliteSubgraph] = []
         self._load_model()
@@ -135,19 +172,29 @@ class TfliteModel:
         else:
             return 'my_model'
 
+    @property
+    def is_lazy(self) -> bool:
+        """Returns true if the model is lazily loaded and has not been fully unpacked"""
+        return self._fb_model is not None
+
     @property
     def description(self) -> str:
         """Get/set model description
 
         .. note:: :py:func:`~save` must be called for changes to persist
         """
-        return '' if self._model is None or not self._model.description else self._model.description.decode('utf-8')
+        if self._fb_model is not None:
+            desc = self._fb_model.Description()
+        else:
+            desc = None if self._model is None else self._model.description
+        return desc.decode('utf-8') if desc else ''
     @description.setter
     def description(self, desc: str):
-        if self._model is None:
+        model = self.flatbuffer_model
+        if model is None:
             raise RuntimeError('Model not loaded')
         desc = desc or ''
-        self._model.description = desc.encode('utf-8')
+        model.description = desc.encode('utf-8')
         self.regenerate_flatbuffer()
 
     @property
@@ -160,24 +207,30 @@ class TfliteModel:
     @property
     def flatbuffer_size(self) -> int:
         """Size of the model flatbuffer in bytes"""
-        if self.flatbuffer_data is None:
+        if self._flatbuffer_data is None:
             return 0
-        return len(self.flatbuffer_data)
+        return len(self._flatbuffer_data)
 
     def __len__(self) -> int:
         return self.flatbuffer_size
 
     @property
     def flatbuffer_model(self) -> _tflite_schema_fb.ModelT:
-        """Flatbuffer schema Model object"""
+        """Flatbuffer schema Model object
+
+        .. note:: If the model was lazily loaded, then accessing this fully unpacks the model
+        """
+        if self._fb_model is not None:
+            self._unpack_lazy_model()
         return self._model
 
     @property
     def flatbuffer_subgraph(self) -> _tflite_schema_fb.SubGraphT:
         """Flatbuffer schema model subgraph"""
-        if self._model is None:
+        model = self.flatbuffer_model
+        if model is None:
             return None
-        return self._model.subgraphs[self._selected_model_subgraph_index]
+        return model.subgraphs[self._selected_model_subgraph_index]
 
     @property
     def selected_model_subgraph(self) -> int:
@@ -187,7 +240,7 @@ class TfliteModel:
         return self._selected_model_subgraph_index
     @selected_model_subgraph.setter
     def selected_model_subgraph(self, v: int):
-        if self._model is None:
+        if not self._subgraphs:
             return -1
         if v < 0 or v >= self.n_subgraphs:
             raise ValueError('Invalid model subgraph index')
@@ -196,24 +249,22 @@ class TfliteModel:
     @property
     def n_subgraphs(self) -> int:
         """Return the number of model subgraphs"""
-        if self._model is None:
-            return 0
-        return len(self._model.subgraphs)
+        return len(self._subgraphs)
 
     @property
     def n_inputs(self) -> int:
         """Return the number of model inputs"""
-        if self.flatbuffer_subgraph is None:
+        if self._selected_model_subgraph_index == -1:
             return 0
-        return len(self.flatbuffer_subgraph.inputs)
+        return len(self._subgraphs[self._selected_model_subgraph_index].inputs)
 
     @property
     def inputs(self) -> List[TfliteTensor]:
         """List of all input tensors"""
-        if self.flatbuffer_subgraph is None:
+        if self._selected_model_subgraph_index == -1:
             return None
         retval = []
-        for index in self.flatbuffer_subgraph.inputs:
+        for index in self._subgraphs[self._selected_model_subgraph_index].inputs:
             retval.append(self.get_tensor(index))
 
         return retval
@@ -221,17 +272,17 @@ class TfliteModel:
     @property
     def n_outputs(self) -> int:
         """Return the number of model outputs"""
-        if self.flatbuffer_subgraph is None:
+        if self._selected_model_subgraph_index == -1:
             return 0
-        return len(self.flatbuffer_subgraph.outputs)
+        return len(self._subgraphs[self._selected_model_subgraph_index].outputs)
 
     @property
     def outputs(self) -> List[TfliteTensor]:
         """List of all output tensors"""
-        if self.flatbuffer_subgraph is None:
+        if self._selected_model_subgraph_index == -1:
             return None
         retval = []
-        for index in self.flatbuffer_subgraph.outputs:
+        for index in self._subgraphs[self._selected_model_subgraph_index].outputs:
             retval.append(self.get_tensor(index))
 
         return retval
@@ -285,15 +336,16 @@ class TfliteModel:
 
         If no index is given, then use the selected_model_subgraph
         """
-        if self._model is None:
+        model = self.flatbuffer_model
+        if model is None:
             raise RuntimeError('Model not loaded')
         index = index or self._selected_model_subgraph_index
-        return self._model.subgraphs[index]
+        return model.subgraphs[index]
 
 
     def get_tensor(self, index : int) -> TfliteTensor:
         """Return a specific model tensor as a TfliteTensor """
-        if self._model is None:
+        if not self._subgraphs:
             raise RuntimeError('Model not loaded')
         subgraph = self._subgraphs[self._selected_model_subgraph_index]
         if index >= len(subgraph.tensors):
@@ -313,7 +365,7 @@ class TfliteModel:
         """Return a model input tensor as a TfliteTensor"""
         if index >= self.n_inputs:
             raise IndexError(f'Index overflow ({index} >= {self.n_inputs})')
-        tensor_index = self.flatbuffer_subgraph.inputs[index]
+        tensor_index = self._subgraphs[self._selected_model_subgraph_index].inputs[index]
         return self.get_tensor(tensor_index)
 
 
@@ -321,7 +373,7 @@ class TfliteModel:
         """Return a model input as a np.ndarray"""
         if index >= self.n_inputs:
             raise IndexError(f'Index overflow ({index} >= {self.n_inputs})')
-        tensor_index = self.flatbuffer_subgraph.inputs[index]
+        tensor_index = self._subgraphs[self._selected_model_subgraph_index].inputs[index]
         return self.get_tensor_data(tensor_index)
 
 
@@ -329,7 +381,7 @@ class TfliteModel:
         """Return a model output tensor as a TfliteTensor"""
         if index >= self.n_outputs:
             raise IndexError(f'Index overflow ({index} >= {self.n_outputs})')
-        tensor_index = self.flatbuffer_subgraph.outputs[index]
+        tensor_index = self._subgraphs[self._selected_model_subgraph_index].outputs[index]
         return self.get_tensor(tensor_index)
 
 
@@ -337,37 +389,73 @@ class TfliteModel:
         """Return a model output tensor as a np.ndarray"""
         if index >= self.n_outputs:
             raise IndexError(f'Index overflow ({index} >= {self.n_outputs})')
-        tensor_index = self.flatbuffer_subgraph.outputs[index]
+        tensor_index = self._subgraphs[self._selected_model_subgraph_index].outputs[index]
         return self.get_tensor_data(tensor_index)
 
 
     def get_all_metadata(self) -> Dict[str,bytes]:
         """Return all model metadata as a dictionary"""
-        if self._model is None:
+        if not self._subgraphs:
             raise RuntimeError('Model not loaded')
         retval = {}
-        for metadata in self._model.metadata:
-            name = metadata.name.decode("utf-8")
-            buffer_index = metadata.buffer
-            retval[name] = self._model.buffers[buffer_index].data.tobytes()
+        for name, buffer_index in self._iterate_metadata():
+            retval[name] = self.get_buffer_data(buffer_index).tobytes()
 
         return retval
 
 
     def get_metadata(self, tag : str) -> bytes:
         """Return model metadata with specified tag"""
-        if self._model is None:
+        if not self._subgraphs:
             raise RuntimeError('Model not loaded')
         metadata_value = None
-        for metadata in self._model.metadata:
-            if metadata.name.decode("utf-8") == tag:
-                buffer_index = metadata.buffer
-                metadata_value = self._model.buffers[buffer_index].data.tobytes()
+        for name, buffer_index in self._iterate_metadata():
+            if name == tag:
+                metadata_value = self.get_buffer_data(buffer_index).tobytes()
                 break
 
         return metadata_value
 
 
+    def get_buffer_data(self, index:int) -> np.ndarray:
+        """Return the data of the flatbuffer buffer at the given index as a uint8 numpy array
+
+        This is a read-only view of the buffer's data, if the model was lazily loaded, then this is a zero-copy view of the flatbuffer.
+        Returns None if the buffer is empty.
+        """
+        if self._fb_model is not None:
+            fb_buffer = self._fb_model.Buffers(index)
+            # Newer schemas support storing large buffers outside of the flatbuffer
+            offset = fb_buffer.Offset() if hasattr(fb_buffer, 'Offset') else 0
+            if offset > 1:
+                data = np.frombuffer(self._flatbuffer_data, dtype=np.uint8, count=fb_buffer.Size(), offset=offset)
+            elif fb_buffer.DataIsNone():
+                return None
+            else:
+                data = fb_buffer.DataAsNumpy()
+        else:
+            data = self._model.buffers[index].data
+            if data is None:
+                return None
+            if not isinstance(data, np.ndarray):
+                data = np.frombuffer(bytes(data), dtype=np.uint8)
+
+        # NOTE: The returned array is a view so that the buffer's array is still writable
+        data = data.view()
+        data.setflags(write=False)
+        return data
+
+
+    def get_operator_code(self, index:int) -> _tflite_schema_fb.OperatorCodeT:
+        """Return the flatbuffer operator code at the given index"""
+        if self._fb_model is not None:
+            opcodes = self._lazy_opcodes
+            if index not in opcodes:
+                opcodes[index] = _tflite_schema_fb.OperatorCodeT.InitFromObj(self._fb_model.OperatorCodes(index))
+            return opcodes[index]
+        return self._model.operatorCodes[index]
+
+
     def add_metadata(self, tag :str, value: bytes):
         """Set or add metadata to model
 
@@ -378,7 +466,7 @@ class TfliteModel:
             tag (str): The key to use to lookup the metadata
             value (bytes): The metadata value as a binary blob to add to the .tflite
         """
-        if self._model is None:
+        if self.flatbuffer_model is None:
             raise RuntimeError('Model not loaded')
         if not tag or not value:
             raise ValueError('Must provide valid tag and value arguments')
@@ -423,7 +511,7 @@ class TfliteModel:
             True if the metadata was found and removed, False else
 
         """
-        if self._model is None:
+        if self.flatbuffer_model is None:
             raise RuntimeError('Model not loaded')
 
         if not self._model.metadata:
@@ -451,8 +539,16 @@ class TfliteModel:
         if not output_path:
             raise RuntimeError('No output path specified')
 
-       # Re-generate the underlying flatbuffer
-        self.regenerate_flatbuffer()
+        # Re-generate the underlying flatbuffer
+        # NOTE: A lazily loaded model has not been modified (otherwise it would have been unpacked)
+        #       so the flatbuffer is written as-is.
+        #       However, if the model is saved to its own memory-mapped file,
+        #       then the model is first unpacked so that the file is no longer mapped when it is overwritten
+        if self._fb_model is not None and isinstance(self._flatbuffer_data, mmap.mmap) and \
+            self.path and os.path.exists(output_path) and os.path.samefile(output_path, self.path):
+            self._unpack_lazy_model()
+        if self._fb_model is None:
+            self.regenerate_flatbuffer()
 
         # Create the model's output directory if necessary
         out_dir = os.path.dirname(output_path)
@@ -469,11 +565,14 @@ class TfliteModel:
         .. Note::
             :func:`~tflite_model.TfliteModel.save` must be called for changes to persist
         """
-        if self._model is None:
+        model = self.flatbuffer_model
+        if model is None:
             raise RuntimeError('Model not loaded')
         b = flatbuffers.Builder(0)
-        b.Finish(self._model.Pack(b), TFLITE_FILE_IDENTIFIER)
+        b.Finish(model.Pack(b), TFLITE_FILE_IDENTIFIER)
         self._flatbuffer_data = b.Output()
+        # The interpreters must be re-created with the new flatbuffer
+        self._close_interpreter_pool()
 
 
     def predict(
@@ -515,6 +614,12 @@ class TfliteModel:
             y_dtype: The return value's data type. By default, data type is None in which case the model output is directly returned.
                 If y_dtype=np.float32 then the model output is de-quantized to float32 using the model's output
                 quantization scaler/zeropoint (if necessary)
+            kwargs: Optional keyword arguments:
+
+                - interpreter_kwargs: Additional keyword arguments given to ``tf.lite.Interpreter()``
+                - max_threads: The maximum number of threads used to process a batch, by default the number of CPU cores is used.
+                  Batches are split into chunks, and each chunk is processed by a different interpreter in parallel.
+                  The interpreters are allocated once per batch size and re-used by subsequent calls
 
         Returns:
             Output of model inference, y. If x was a single sample, then y is a single result. Otherwise
@@ -546,23 +651,12 @@ class TfliteModel:
                     dictionary of numpy arrays with the keys corresponding to the model input index
                 ''')
 
+            # Check if the input sample has the batch dimension
+            has_batch_dim = 0 not in x or len(x[0].shape) != len(input0_shape[1:])
+
             # Set the input tensors
-            has_batch_dim = True
+            inputs = {}
             for input_index, x_i in x.items():
-                if input_index == 0:
-                    # Check if the input sample has the batch dimension
-                    if len(x_i.shape) == len(input0_shape[1:]):
-                        has_batch_dim = False
-                        self._allocate_tflite_interpreter(
-                            batch_size=1,
-                            interpreter_kwargs=kwargs.get('interpreter_kwargs', None)
-                        )
-                    else:
-                        self._allocate_tflite_interpreter(
-                            batch_size=x_i.shape[0],
-                            interpreter_kwargs=kwargs.get('interpreter_kwargs', None)
-                        )
-
                 # Add the batch_size=1 if the input sample doesn't have a batch dim
                 if not has_batch_dim:
                     x_i = np.expand_dims(x_i, axis=0)
@@ -572,15 +666,14 @@ class TfliteModel:
                 # NOTE: If the model input type is float32 then
                 #       quantization is done automatically inside the model
                 x_i = self.quantize_to_input_dtype(x_i, input_index=input_index)
-                self._interpreter.set_tensor(self.get_input_tensor(input_index).index, x_i)
+                inputs[self.get_input_tensor(input_index).index] = x_i
 
             # Execute the model
-            self._interpreter.invoke()
+            outputs = self._get_interpreter_pool(**kwargs).invoke(inputs)
 
             # Get the model results
             y = []
-            for i, outp in enumerate(self.outputs):
-                y_i = self._interpreter.get_tensor(outp.index)
+            for i, y_i in enumerate(outputs):
 
                 # If the input doesn't have a batch dim
                 # then remove the dim from the output
@@ -606,15 +699,6 @@ class TfliteModel:
                 is_single_sample = True
                 # Add the batch dimension if we were only given a single sample
                 x = np.expand_dims(x, axis=0)
-                self._allocate_tflite_interpreter(
-                    batch_size=1,
-                    interpreter_kwargs=kwargs.get('interpreter_kwargs', None)
-                )
-            else:
-                self._allocate_tflite_interpreter(
-                    batch_size=x.shape[0],
-                    interpreter_kwargs=kwargs.get('interpreter_kwargs', None)
-                )
 
             # If the input sample isn't the same as the model input dtype,
             # then we need to manually convert it first
@@ -628,13 +712,9 @@ class TfliteModel:
             if len(input0_shape) != len(x.shape) and input0_shape[-1] == 1:
                 x = np.expand_dims(x, axis=-1)
 
-            # Then set model input tensor
-            self._interpreter.set_tensor(input0.index, x)
-            # Execute the model
-            self._interpreter.invoke()
-
-            # Get the model results
-            y = self._interpreter.get_tensor(self.get_output_tensor(0).index)
+            # Execute the model with the model input tensor
+            # and get the model results
+            y = self._get_interpreter_pool(**kwargs).invoke({input0.index: x})[0]
 
             # Convert the output data type to float32 if necessary
             # NOTE: If the model output type is float32 then
@@ -653,11 +733,10 @@ class TfliteModel:
         else:
             n_samples = 0
             batch_results = []
+            interpreter_pool = self._get_interpreter_pool(**kwargs)
             for batch in x:
                 batch_x = batch if not isinstance(batch, tuple) else batch[0]
 
-                self._allocate_tflite_interpreter(batch_size=batch_x.shape[0])
-
                 # If the input sample isn't the same as the model input dtype,
                 # then we need to manually convert it first
                 batch_x = self.quantize_to_input_dtype(batch_x)
@@ -668,13 +747,9 @@ class TfliteModel:
                 if len(input0_shape) != len(batch_x.shape) and input0_shape[-1] == 1:
                     batch_x = np.expand_dims(batch_x, axis=-1)
 
-                # The set model input tensor
-                self._interpreter.set_tensor(input0.index, batch_x)
-                # Execute the model
-                self._interpreter.invoke()
-
-                # Get the model results
-                batch_y = self._interpreter.get_tensor(self.get_output_tensor(0).index)
+                # Execute the model with the model input tensor
+                # and get the model results
+                batch_y = interpreter_pool.invoke({input0.index: batch_x})[0]
 
                 if y_dtype == np.float32:
                     # Convert the output data type to float32 if necessary
@@ -741,36 +816,73 @@ class TfliteModel:
 
 
 
-    def _allocate_tflite_interpreter(self, batch_size=1, interpreter_kwargs=None):
-        if self._interpreter is None or self._interpreter_batch_size != batch_size:
-            try:
-                import tensorflow as tf
-            except ModuleNotFoundError as e:
-                raise ModuleNotFoundError(f'You must first install the "tensorflow" Python package to run inference, err: {e}') # pylint: disable=raise-missing-from
-
-            interpreter_kwargs = interpreter_kwargs or {}
-            self._interpreter_batch_size = batch_size
-            self._interpreter = tf.lite.Interpreter(
-                model_path=self._path,
-                **interpreter_kwargs
+    def _get_interpreter_pool(
+        self,
+        interpreter_kwargs:dict=None,
+        max_threads:int=None,
+        **kwargs
+    ) -> TfliteInterpreterPool:
+        """Return the pool of TF-Lite interpreters used by predict(),
+        the pool is re-created if the given settings differ from the current pool's"""
+        interpreter_kwargs = interpreter_kwargs or {}
+        pool = self._interpreter_pool
+        if pool is None or \
+            pool.interpreter_kwargs != interpreter_kwargs or \
+            (max_threads is not None and pool.max_threads != max_threads):
+            self._close_interpreter_pool()
+            pool = TfliteInterpreterPool(
+                self,
+                max_threads=max_threads,
+                interpreter_kwargs=interpreter_kwargs
             )
+            self._interpreter_pool = pool
+        return pool
+
+
+    def close(self):
+        """Release the model's resources
+
+        This closes the interpreter pool used by :py:meth:`~predict`
+        and the memory-mapped file of a lazily loaded model (see the "Lazy Loading" section of this class's docs).
+        A lazily loaded model should not be used after it is closed.
+
+        This is automatically called when the model is used as a context manager, e.g.:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            with TfliteModel.load_flatbuffer_file('some/path/my_model.tflite', lazy=True) as tflite_model:
+                print(tflite_model.summary())
+        """
+        self._close_interpreter_pool()
+        if isinstance(self._flatbuffer_data, mmap.mmap):
+            flatbuffer_data = self._flatbuffer_data
+            self._flatbuffer_data = None
+            self._fb_model = None
+            self._lazy_opcodes = {}
+            self._subgraphs = []
+            _close_mmap(flatbuffer_data)
 
-            input_indices = []
-            for inp in self.inputs:
-                input_indices.append(inp.index)
-                new_input_shape = (batch_size, *inp.shape[1:])
-                self._interpreter.resize_tensor_input(inp.index, new_input_shape)
 
-            for outp in self.outputs:
-                if outp.index in input_indices:
-                    continue
-                new_output_shape = (batch_size, *outp.shape[1:])
-                self._interpreter.resize_tensor_input(outp.index, new_output_shape)
+    def __enter__(self):
+        return self
 
-            self._interpreter.allocate_tensors()
 
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+    def _close_interpreter_pool(self):
+        if self._interpreter_pool is not None:
+            self._interpreter_pool.close()
+            self._interpreter_pool = None
+
+
+    def _load_model(self, previous_subgraphs:List[_TfliteSubgraph]=None):
+        if self._lazy:
+            self._load_lazy_model()
+            return
 
-    def _load_model(self):
         try:
             self._model = _tflite_schema_fb.ModelT.InitFromObj(_tflite_schema_fb.Model.GetRootAsModel(self._flatbuffer_data, 0))
             subgraph_count = len(self._model.subgraphs)
@@ -789,17 +901,112 @@ class TfliteModel:
             self._selected_model_subgraph_index = 0
 
         self._subgraphs = []
-        for fb_subgraph in self._model.subgraphs:
+        for subgraph_index, fb_subgraph in enumerate(self._model.subgraphs):
+            # NOTE: When a lazily loaded model is unpacked,
+            #       the tensors and layers that were previously returned to the caller are re-used
+            #       so that they remain attached to this model
+            previous = previous_subgraphs[subgraph_index] if previous_subgraphs else None
             subgraph = _TfliteSubgraph()
             self._subgraphs.append(subgraph)
+            subgraph.inputs = fb_subgraph.inputs if fb_subgraph.inputs is not None else []
+            subgraph.outputs = fb_subgraph.outputs if fb_subgraph.outputs is not None else []
             for i, fb_tensor in enumerate(fb_subgraph.tensors):
                 tensor = TfliteTensor(i, self, fb_tensor)
+                previous_tensor = _get_loaded_item(previous.tensors, i) if previous is not None else None
+                if previous_tensor is not None:
+                    # The previous tensor's data is a view of the memory-mapped file,
+                    # so point it to the unpacked model's data instead
+                    previous_tensor._data = tensor._data # pylint: disable=protected-access
+                    tensor = previous_tensor
                 subgraph.tensors.append(tensor)
             for i, operator in enumerate(fb_subgraph.operators):
-                layer = TfliteLayer.from_flatbuffer(i, self, operator)
+                layer = _get_loaded_item(previous.layers, i) if previous is not None else None
+                if layer is None:
+                    layer = TfliteLayer.from_flatbuffer(i, self, operator)
                 subgraph.layers.append(layer)
 
 
+    def _load_lazy_model(self):
+        try:
+            self._fb_model = _tflite_schema_fb.Model.GetRootAsModel(self._flatbuffer_data, 0)
+            subgraph_count = self._fb_model.SubgraphsLength()
+            schema_version = self._fb_model.Version()
+        except Exception as e:
+            raise RuntimeError( # pylint: disable=raise-missing-from
+                'Failed to load .tflite model flatbuffer.\n'
+                'Ensure you have provided a valid .tflite model (i.e. ensure the binary data has not been corrupted)\n'
+                f'Error details: {e}'
+            )
+
+        if schema_version != 3:
+            raise RuntimeError('TF-Lite schema v3 is only supported')
+
+        if self._selected_model_subgraph_index == -1 or self._selected_model_subgraph_index >= subgraph_count:
+            self._selected_model_subgraph_index = 0
+
+        self._lazy_opcodes:Dict[int,_tflite_schema_fb.OperatorCodeT] = {}
+        self._subgraphs = []
+        for subgraph_index in range(subgraph_count):
+            fb_subgraph = self._fb_model.Subgraphs(subgraph_index)
+            subgraph = _TfliteSubgraph()
+            self._subgraphs.append(subgraph)
+            subgraph.inputs = [] if fb_subgraph.InputsIsNone() else fb_subgraph.InputsAsNumpy().tolist()
+            subgraph.outputs = [] if fb_subgraph.OutputsIsNone() else fb_subgraph.OutputsAsNumpy().tolist()
+            subgraph.tensors = _LazyList(
+                fb_subgraph.TensorsLength(),
+                lambda i, fb_subgraph=fb_subgraph: TfliteTensor(
+                    i, self, _tflite_schema_fb.TensorT.InitFromObj(fb_subgraph.Tensors(i))
+                )
+            )
+            subgraph.layers = _LazyList(
+                fb_subgraph.OperatorsLength(),
+                lambda i, fb_subgraph=fb_subgraph: TfliteLayer.from_flatbuffer(
+                    i, self, _tflite_schema_fb.OperatorT.InitFromObj(fb_subgraph.Operators(i))
+                )
+            )
+
+
+    def _unpack_lazy_model(self):
+        """Fully unpack a lazily loaded model into a ModelT so that it may be modified"""
+        self._fb_model = None
+        self._lazy = False
+        self._lazy_opcodes = {}
+        # NOTE: The flatbuffer data is copied into memory
+        #       so the ModelT does not reference the memory-mapped file
+        flatbuffer_data = self._flatbuffer_data
+        self._flatbuffer_data = bytes(flatbuffer_data)
+        self._load_model(previous_subgraphs=self._subgraphs)
+        if isinstance(flatbuffer_data, mmap.mmap):
+            _close_mmap(flatbuffer_data)
+
+
+    def _iterate_metadata(self) -> Iterator[Tuple[str,int]]:
+        if self._fb_model is not None:
+            for i in range(self._fb_model.MetadataLength()):
+                metadata = self._fb_model.Metadata(i)
+                yield metadata.Name().decode('utf-8'), metadata.Buffer()
+        elif self._model.metadata:
+            for metadata in self._model.metadata:
+                yield metadata.name.decode('utf-8'), metadata.buffer
+
+
+
+def _get_loaded_item(items:list, index:int):
+    """Return the item at the given index of a lazy list without creating it,
+    None is returned if the item has not been loaded"""
+    if isinstance(items, _LazyList):
+        return list.__getitem__(items, index)
+    return items[index]
+
+
+def _close_mmap(data:mmap.mmap):
+    try:
+        data.close()
+    except BufferError:
+        # Previously returned tensor data are views of the memory-mapped file,
+        # in this case, the file is closed once they are no longer referenced
+        pass
+
 
 def _existing_path(path: str, cwd=None):
     if path is None:
@@ -819,4 +1026,26 @@ class _TfliteSubgraph:
     def __init__(self):
         self.layers: List[TfliteLayer] = []
         self.tensors: List[TfliteTensor] = []
+        self.inputs: List[int] = []
+        self.outputs: List[int] = []
+
+
+class _LazyList(list):
+    """List whose elements are only created when first accessed"""
+    def __init__(self, length:int, factory:Callable[[int],object]):
+        super().__init__([None] * length)
+        self._factory = factory
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = super().__getitem__(index)
+        if value is None:
+            value = self._factory(index if index >= 0 else len(self) + index)
+            super().__setitem__(index, value)
+        return value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
 
@@ -1,7 +1,12 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+
 try:
     # This works around the error: module 'tensorflow' has no attribute 'io'
     # when importing tensorflow_lite_support.metadata.schema_py_generated
-    import os
     import tensorflow_lite_support
 
     tensorflow_lite_support_dir = os.path.dirname(tensorflow_lite_support.__file__)
@@ -22,9 +27,37 @@ except:
     pass
 
 
-try:
+def _load_schema_module():
+    """Load the generated .tflite flatbuffer schema module
+
+    NOTE: Importing tflite_support.schema_py_generated runs tflite_support/__init__.py
+    which imports Tensorflow (through tensorflow_lite_support.metadata).
+    So the generated module is loaded directly from its file, this way
+    the .tflite APIs (e.g. mltk summarize my_model.tflite) do not import Tensorflow
+    """
+    module_name = 'tflite_support.schema_py_generated'
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
     # Newer versions use the package at: tflite_support
-    from tflite_support.schema_py_generated import *
-except ModuleNotFoundError:
+    # NOTE: find_spec() does not execute the top-level package's __init__.py
+    spec = importlib.util.find_spec('tflite_support')
+    if spec is not None and spec.origin:
+        module_path = os.path.join(os.path.dirname(spec.origin), 'schema_py_generated.py')
+        if os.path.exists(module_path):
+            module_spec = importlib.util.spec_from_file_location(module_name, module_path)
+            module = importlib.util.module_from_spec(module_spec)
+            sys.modules[module_name] = module
+            try:
+                module_spec.loader.exec_module(module)
+            except:
+                del sys.modules[module_name]
+                raise
+            return module
+
     # Older versions use the package at: tensorflow_lite_support
-    from tensorflow_lite_support.metadata.schema_py_generated import *
+    return importlib.import_module('tensorflow_lite_support.metadata.schema_py_generated')
+
+
+# This is equivalent to: from <schema module> import *
+globals().update({k: v for k, v in vars(_load_schema_module()).items() if not k.startswith('_')})
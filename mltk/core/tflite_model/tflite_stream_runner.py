@@ -0,0 +1,277 @@
+"""Stateful streaming inference of TF-Lite models, see :py:class:`TfliteStreamRunner`"""
+from __future__ import annotations
+import os
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, TypeVar, Union
+
+import numpy as np
+
+
+TfliteModel = TypeVar('TfliteModel')
+
+
+class TfliteStreamRunner:
+    """Run a streaming (i.e. stateful) TF-Lite model over complete input sequences
+
+    A streaming model processes one step (e.g. one spectrogram row) per invocation.
+    Besides the step data, the model has additional "state" inputs that must be set to the "state" outputs
+    of the previous invocation.
+
+    This runner keeps the state inside the interpreter: after each invocation, the state output tensor buffers are
+    copied directly into the state input tensor buffers, the state is never converted or copied into Python arrays.
+    Each input sequence is quantized once (rather than once per step).
+
+    Input sequences are processed in parallel: the sequences are split into chunks and each chunk
+    is processed by a different interpreter in a separate thread. The TF-Lite interpreter releases the GIL
+    while it executes, so this allows for using multiple CPU cores.
+    The interpreters are allocated once and re-used by subsequent calls to :py:meth:`~run`.
+
+    The execution time of each step is recorded, see :py:meth:`~get_latency_summary`.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        runner = TfliteStreamRunner(tflite_model)
+        # x has the shape: <n_sequences, n_steps, step shape ...>
+        y_pred = runner.run(x, y_dtype=np.float32)
+        print(runner.get_latency_summary())
+
+    Args:
+        model: The streaming :py:class:`~mltk.core.TfliteModel` to run. Input 0 must be the step data
+        state_mapping: Dictionary of <state output index>:<state input index>.
+            If omitted, then outputs 1..N are fed back into inputs 1..N
+        output_index: The index of the model output that is returned by :py:meth:`~run`
+        max_threads: The maximum number of threads (and interpreters) used to process the input sequences.
+            If None, then use the number of CPU cores
+        interpreter_kwargs: Additional keyword arguments given to ``tf.lite.Interpreter()``
+    """
+    def __init__(
+        self,
+        model:TfliteModel,
+        state_mapping:Dict[int,int]=None,
+        output_index:int=0,
+        max_threads:int=None,
+        interpreter_kwargs:dict=None,
+    ):
+        if state_mapping is None:
+            n_states = min(model.n_inputs, model.n_outputs) - 1
+            state_mapping = {i: i for i in range(1, n_states + 1)}
+
+        for output_i, input_i in state_mapping.items():
+            input_tensor = model.get_input_tensor(input_i)
+            output_tensor = model.get_output_tensor(output_i)
+            if input_i == 0:
+                raise ValueError('Input 0 must be the step data, it cannot be a state input')
+            if tuple(input_tensor.shape) != tuple(output_tensor.shape) or input_tensor.dtype != output_tensor.dtype:
+                raise ValueError(
+                    f'State output {output_i} {output_tensor.shape_dtype_str()} does not match '
+                    f'state input {input_i} {input_tensor.shape_dtype_str()}'
+                )
+
+        self.model = model
+        self.state_mapping = dict(state_mapping)
+        self.output_index = output_index
+        self.max_threads = max(max_threads or os.cpu_count() or 1, 1)
+        self.interpreter_kwargs = interpreter_kwargs or {}
+        self._lock = threading.Lock()
+        self._idle:List[_StreamInterpreter] = []
+        self._executor:ThreadPoolExecutor = None
+        self._step_latencies:List[np.ndarray] = []
+
+
+    @property
+    def step_latencies(self) -> np.ndarray:
+        """The execution time in seconds of each step processed since the last call to :py:meth:`~reset_latencies`"""
+        with self._lock:
+            if not self._step_latencies:
+                return np.zeros((0,), dtype=np.float64)
+            return np.concatenate(self._step_latencies)
+
+
+    def reset_latencies(self):
+        """Discard the recorded step execution times"""
+        with self._lock:
+            self._step_latencies = []
+
+
+    def get_latency_summary(self) -> Dict[str,float]:
+        """Return statistics about the recorded step execution times, in milliseconds
+
+        Returns:
+            Dictionary with the keys: steps, mean_ms, p50_ms, p95_ms, p99_ms, max_ms
+        """
+        latencies = self.step_latencies * 1e3
+        if len(latencies) == 0:
+            return dict(steps=0, mean_ms=0., p50_ms=0., p95_ms=0., p99_ms=0., max_ms=0.)
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+        return dict(
+            steps=len(latencies),
+            mean_ms=float(np.mean(latencies)),
+            p50_ms=float(p50),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            max_ms=float(np.max(latencies)),
+        )
+
+
+    def run(
+        self,
+        x:Union[np.ndarray,List[np.ndarray]],
+        y_dtype=None
+    ) -> np.ndarray:
+        """Stream each of the given input sequences through the model
+
+        The model state is reset to zeros at the start of each sequence.
+
+        Args:
+            x: The input sequences, either a numpy array with the shape <n_sequences, n_steps, step shape ...>
+                or a list of numpy arrays with the shape <n_steps, step shape ...>, in which case the number of steps may vary.
+                The step shape may omit the model input's batch (and trailing 1) dimensions.
+                The data type must either be the same as the model input's OR it must be a float32,
+                in which case the sequences are automatically quantized
+            y_dtype: If y_dtype=np.float32 then the model output is de-quantized to float32 (if necessary)
+
+        Returns:
+            The model output of the last step of each sequence, with the shape <n_sequences, output shape ...>
+        """
+        n_sequences = len(x)
+        output_tensor = self.model.get_output_tensor(self.output_index)
+        y = np.empty((n_sequences, *output_tensor.shape[1:]), dtype=output_tensor.dtype)
+        if n_sequences == 0:
+            return y if y_dtype != np.float32 else y.astype(np.float32)
+
+        chunks = self._split_sequences(n_sequences)
+
+        def _run_chunk(chunk:Tuple[int,int]) -> np.ndarray:
+            start, end = chunk
+            interpreter = self._acquire()
+            try:
+                latencies = []
+                for i in range(start, end):
+                    seq = self.model.quantize_to_input_dtype(np.asarray(x[i]), input_index=0)
+                    latencies.append(interpreter.run_sequence(seq, y[i]))
+            finally:
+                self._release(interpreter)
+            return np.concatenate(latencies)
+
+        if len(chunks) == 1:
+            latencies = [_run_chunk(chunks[0])]
+        else:
+            latencies = list(self._get_executor().map(_run_chunk, chunks))
+
+        with self._lock:
+            self._step_latencies.extend(latencies)
+
+        if y_dtype == np.float32:
+            y = self.model.dequantize_output_to_float32(y, output_index=self.output_index)
+
+        return y
+
+
+    def close(self):
+        """Release all interpreters and threads"""
+        with self._lock:
+            self._idle.clear()
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+    def _split_sequences(self, n_sequences:int) -> List[Tuple[int,int]]:
+        n_threads = min(self.max_threads, n_sequences)
+        chunk_size = math.ceil(n_sequences / n_threads)
+        return [(start, min(start + chunk_size, n_sequences)) for start in range(0, n_sequences, chunk_size)]
+
+
+    def _acquire(self) -> _StreamInterpreter:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # NOTE: The interpreter is created outside of the lock
+        #       so that other threads are not blocked while it is allocated
+        return _StreamInterpreter(
+            model=self.model,
+            state_mapping=self.state_mapping,
+            output_index=self.output_index,
+            interpreter_kwargs=self.interpreter_kwargs
+        )
+
+
+    def _release(self, interpreter:_StreamInterpreter):
+        with self._lock:
+            if len(self._idle) < self.max_threads:
+                self._idle.append(interpreter)
+
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_threads,
+                    thread_name_prefix='TfliteStreamRunner'
+                )
+            return self._executor
+
+
+
+class _StreamInterpreter:
+    """TF-Lite interpreter that streams a sequence through the model"""
+    def __init__(
+        self,
+        model:TfliteModel,
+        state_mapping:Dict[int,int],
+        output_index:int,
+        interpreter_kwargs:dict
+    ):
+        try:
+            import tensorflow as tf
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(f'You must first install the "tensorflow" Python package to run inference, err: {e}') # pylint: disable=raise-missing-from
+
+        self.interpreter = tf.lite.Interpreter(
+            model_content=model.flatbuffer_data,
+            **interpreter_kwargs
+        )
+        self.interpreter.allocate_tensors()
+
+        # NOTE: interpreter.tensor() returns a function that returns a numpy view of the tensor's buffer.
+        #       The views must NOT be held while the interpreter is invoked
+        self._data_input = self.interpreter.tensor(model.get_input_tensor(0).index)
+        self._data_shape = tuple(model.get_input_tensor(0).shape)
+        self._inputs = [self.interpreter.tensor(model.get_input_tensor(i).index) for i in range(1, model.n_inputs)]
+        self._states = [
+            (self.interpreter.tensor(model.get_output_tensor(output_i).index), self.interpreter.tensor(model.get_input_tensor(input_i).index))
+            for output_i, input_i in state_mapping.items()
+        ]
+        self._output = self.interpreter.tensor(model.get_output_tensor(output_index).index)
+
+
+    def run_sequence(self, seq:np.ndarray, y:np.ndarray) -> np.ndarray:
+        """Stream the given sequence through the model, copy the last step's output into y,
+        and return the execution time of each step in seconds"""
+        n_steps = len(seq)
+        seq = seq.reshape((n_steps, *self._data_shape))
+        latencies = np.empty((n_steps,), dtype=np.float64)
+
+        # Reset the model state
+        for tensor in self._inputs:
+            tensor().fill(0)
+
+        for i in range(n_steps):
+            np.copyto(self._data_input(), seq[i], casting='safe')
+            t0 = time.perf_counter()
+            self.interpreter.invoke()
+            latencies[i] = time.perf_counter() - t0
+            # Feed the state outputs back into the state inputs
+            for output_tensor, input_tensor in self._states:
+                np.copyto(input_tensor(), output_tensor())
+
+        if n_steps > 0:
+            np.copyto(y, self._output()[0])
+        else:
+            y.fill(0)
+        return latencies
@@ -33,14 +33,15 @@ class TfliteTensor(_tflite_schema_fb.TensorT):
         self.name =  '' if not self.name else self.name.decode("utf-8")
 
         if model is not None and fb_tensor is not None:
-            buffer = model.flatbuffer_model.buffers[fb_tensor.buffer]
-            if buffer.data is not None:
-                data_bytes = buffer.data.tobytes() if isinstance(buffer.data, np.ndarray) else bytes(buffer.data)
+            # NOTE: This is a read-only view of the model's buffer (a zero-copy view of the flatbuffer if the model was lazily loaded)
+            data_bytes = model.get_buffer_data(fb_tensor.buffer)
+            if data_bytes is not None:
 
                 if  hasattr(_tflite_schema_fb.TensorType, 'INT4') and self.type == _tflite_schema_fb.TensorType.INT4:
                     # NumPy does not support int4 so we have to expand to int8
                     # See https://github.com/tensorflow/tensorflow/blob/master/tensorflow/lite/kernels/internal/portable_tensor_utils.cc
                     # UnpackDenseInt4IntoInt8()
+                    data_bytes = data_bytes.tobytes()
                     n_elements = self.shape.flat_size
                     raw_data_array = np.empty((n_elements,), dtype=np.int8)
 
@@ -126,6 +127,12 @@ class TfliteTensor(_tflite_schema_fb.TensorT):
     @data.setter
     def data(self, v:Union[np.ndarray,bytes]):
         """Tensor data"""
+        model = getattr(self, '_model', None)
+        if model is not None:
+            # NOTE: This fully unpacks a lazily loaded model (which refreshes this tensor's data)
+            #       so it must be done before the new data is assigned
+            _ = model.flatbuffer_model
+
         if isinstance(v, np.ndarray):
             if v.dtype != self.dtype:
                 raise ValueError(f'Data type must be {self.dtype}')
@@ -654,10 +654,11 @@ def _create_model_archive(
     )
 
     try:
-        mltk_model.add_archive_dir('.', create_new=True)
-        mltk_model.add_archive_file('__mltk_model_spec__')
-        mltk_model.add_archive_dir('train')
-        mltk_model.add_archive_dir('dataset', recursive=True)
+        with mltk_model.batch_archive_updates(create_new=True):
+            mltk_model.add_archive_dir('.')
+            mltk_model.add_archive_file('__mltk_model_spec__')
+            mltk_model.add_archive_dir('train')
+            mltk_model.add_archive_dir('dataset', recursive=True)
     except Exception as e:
         logger.warning(f'Failed to generate model archive, err: {e}', exc_info=e)
 
@@ -1,15 +1,17 @@
-from typing import Tuple, List
-from .model.model_utils import KerasModel 
+from typing import Tuple, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model as KerasModel
 
 
 
 class TrainingResults:
     """Container for the model training results"""
-    def __init__(self, mltk_model, keras_model:KerasModel, training_history):
+    def __init__(self, mltk_model, keras_model:'KerasModel', training_history):
         self.mltk_model = mltk_model
         """The MltkModel uses for training"""
         
-        self.keras_model:KerasModel = keras_model
+        self.keras_model:'KerasModel' = keras_model
         """The trained KerasModel"""
 
         self.epochs:List[int] = training_history.epoch 
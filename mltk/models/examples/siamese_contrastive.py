@@ -398,7 +398,7 @@ def my_model_evaluator(
             x2 = x2[:3]
             y = y[:3]
             batch_size = 3
-        tflite_interpreter = tf.lite.Interpreter(model_path=built_model.path)
+        tflite_interpreter = tf.lite.Interpreter(model_content=built_model.flatbuffer_data)
 
         input_tensors = tflite_interpreter.get_input_details()
         output_tensor = tflite_interpreter.get_output_details()[0]
@@ -4,37 +4,90 @@ See the source code on Github: `mltk/utils/archive.py <https://github.com/silico
 """
 import os
 import re
+import io
+import math
+import stat
+import time
+import queue
 import tarfile
 import gzip
 import struct
 import shutil
-from typing import Callable, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Union, List, Tuple
 from patoolib.programs import tar # pylint: disable=unused-import
 import patoolib
 
 from .python import append_exception_msg, prepend_exception_msg
 # We use a custom zipfile class which allows
 # for extracting large zipfiles on Windows
-from .zipfile_win32 import ZipFile
+from .zipfile_win32 import ZipFile, winapi_path
+from .hasher import create_hasher, get_hash_algorithms
 from . import path
 
 
+# The number of bytes read from an archive at a time
+EXTRACT_BUFFER_SIZE = 1024*1024
+
+# Archive members up to this size are read into memory and written to the destination by the worker threads.
+# Larger members are written directly by the thread that reads the archive
+MAX_QUEUED_MEMBER_SIZE = 1024*1024
+
+# Archives with these extensions are extracted by the multi-threaded extractor
+TAR_ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ZIP_ARCHIVE_EXTENSIONS = ('.zip',)
+
+# Archive members with these extensions are considered nested archives (see extract_archive(extract_nested=True))
+NESTED_ARCHIVE_EXTENSIONS = patoolib.ArchiveFormats + ('gz', 'bz', 'bz2')
+
+
+
+class ArchiveHashError(ValueError):
+    """The hash of an archive does not match the expected hash"""
+
+
 
 def extract_archive(
     archive_path:str,
     dest_dir:str,
     extract_nested:bool=False,
     remove_root_dir:bool=False,
-    clean_dest_dir:Union[bool,Callable]=True
+    clean_dest_dir:Union[bool,Callable]=True,
+    file_hash:str=None,
+    file_hash_algorithm:str='auto',
+    max_workers:int=None,
+    skip_unchanged:bool=True,
 ):
     """Extract the given archive file to the specified directory
 
+    .zip and .tar (.tar.gz, .tar.bz2, .tar.xz, etc.) archives are extracted using multiple threads:
+
+    - .tar archives are read sequentially with large buffers, the member files are written by worker threads
+    - The members of .zip archives are decompressed and written by the worker threads in parallel
+
+    Nested archives, and archives with a root directory, are extracted directly to the destination directory.
+    Other archive formats are extracted with `patool <https://pypi.org/project/patool>`_.
+
     Args:
         archive_path: Path to archive file
         dest_dir: Path to directory where archive will be extracted
-        extract_nested: If true and the give archive contains nested archive, then extract those as well
+        extract_nested: If true and the give archive contains nested archive, then extract those as well.
+            In this case, only the nested archive's contents are extracted, starting at the nested archive's common directory of all files
         remove_root_dir: If the archive has a root directory, then remove it from the extracted path
         clean_dest_dir: Clean the destination directory before extracting
+        file_hash: Optional md5, sha1, or sha256 hash of the archive.
+            If given and ``clean_dest_dir`` is enabled, then the archive is hashed while it is extracted. If the hash does not match,
+            then the extracted files are removed and :py:class:`ArchiveHashError` is raised.
+            If ``clean_dest_dir=False``, then the archive is verified before it is extracted so that the existing files
+            in the destination directory are not modified if the hash does not match
+        file_hash_algorithm: The algorithm used to generate ``file_hash``, if ``auto`` then determine automatically
+        max_workers: The maximum number of threads used to extract the archive. If omitted, then determine based on the CPU count
+        skip_unchanged: If true and a file already exists in the destination directory with the same size and modification time
+            as the archive member, then the member is not extracted. This is only applicable if ``clean_dest_dir=False``
+
+    Raises:
+        ArchiveHashError: If ``file_hash`` is given and it does not match the archive's hash
     """
     if clean_dest_dir:
         if callable(clean_dest_dir):
@@ -42,30 +95,66 @@ def extract_archive(
         else:
             path.remove_directory(dest_dir)
 
+    hashers = None
+    if file_hash:
+        hashers = [create_hasher(algorithm) for algorithm in get_hash_algorithms(file_hash, file_hash_algorithm)]
+
+    extractor = None
     try:
-        if extract_nested or remove_root_dir:
-            _extractnested_archive(
-                archive_path,
+        # The extracted files are removed if the hash does not match.
+        # If the destination directory was not cleaned, then these may overwrite existing files,
+        # so verify the archive before extracting it
+        if hashers and not clean_dest_dir:
+            _hash_file(archive_path, hashers)
+            if not _is_hash_match(hashers, file_hash):
+                raise ArchiveHashError(f'Hash of {archive_path} does not match the expected hash: {file_hash}')
+            hashers = None
+
+        if _is_native_archive(archive_path):
+            extractor = _ArchiveExtractor(
                 dest_dir,
+                max_workers=max_workers,
+                skip_unchanged=skip_unchanged
+            )
+            extractor.extract(
+                archive_path,
                 extract_nested=extract_nested,
-                remove_root_dir=remove_root_dir
+                remove_root_dir=remove_root_dir,
+                hashers=hashers
             )
 
-        elif archive_path.endswith('.zip'):
-            _extractall_zipfile(archive_path, dest_dir)
-
-        elif archive_path.endswith('.tar.gz'):
-            _extractall_tarfile(archive_path, dest_dir)
-
-        elif archive_path.endswith('.gz'):
-            _extractall_gzfile(archive_path, dest_dir)
-
         else:
-            _extractall_patool(archive_path, dest_dir)
+            # The other formats are extracted by external programs,
+            # so verify the archive before extracting it
+            if hashers:
+                _hash_file(archive_path, hashers)
+                if not _is_hash_match(hashers, file_hash):
+                    raise ArchiveHashError(f'Hash of {archive_path} does not match the expected hash: {file_hash}')
+                hashers = None
+
+            if extract_nested or remove_root_dir:
+                _extractnested_archive(
+                    archive_path,
+                    dest_dir,
+                    extract_nested=extract_nested,
+                    remove_root_dir=remove_root_dir
+                )
+
+            elif archive_path.endswith('.gz'):
+                _extractall_gzfile(archive_path, dest_dir)
+
+            else:
+                _extractall_patool(archive_path, dest_dir)
+    except ArchiveHashError:
+        raise
     except Exception as e:
         prepend_exception_msg(e, f'Failed to extract {archive_path} to {dest_dir}')
         raise
 
+    if hashers and not _is_hash_match(hashers, file_hash):
+        extractor.remove_extracted_files()
+        raise ArchiveHashError(f'Hash of {archive_path} does not match the expected hash: {file_hash}')
+
 
 
 def gzip_file(src_path : str, dst_path: str=None) -> str:
@@ -182,13 +271,6 @@ def _extractall_patool(archive_path, output_dir, patool_path=None):
         raise
 
 
-def _extractall_zipfile(archive_path, output_dir):
-    archive_path = path.fullpath(archive_path)
-    output_dir = path.fullpath(output_dir)
-    os.makedirs(output_dir, exist_ok=True)
-    ZipFile(archive_path).extractall(output_dir)
-
-
 def _extractall_gzfile(archive_path, output_dir):
     archive_path = path.fullpath(archive_path)
     output_dir = path.fullpath(output_dir)
@@ -201,36 +283,6 @@ def _extractall_gzfile(archive_path, output_dir):
             shutil.copyfileobj(f_in, f_out)
 
 
-def _extractall_tarfile(archive_path, output_dir):
-    with tarfile.open(archive_path) as tar_file:
-        def _is_within_directory(directory:str, target:str):
-            abs_directory = os.path.abspath(directory)
-            abs_target = os.path.abspath(target)
-
-            prefix = os.path.commonprefix([abs_directory, abs_target])
-
-            return prefix == abs_directory
-
-        def _safe_extract():
-            # This fixes CVE-2007-4559: https://github.com/advisories/GHSA-gw9q-c7gh-j9vm,
-            # which is a 15 year old bug in the Python tarfile package. By using extract() or extractall()
-            # on a tarfile object without sanitizing input, a maliciously crafted .tar file could perform a directory path traversal attack.
-            # We (Advanced Research Center at Trellix: https://www.trellix.com/) found at least one unsantized extractall() in your codebase and are providing a patch for you via pull request.
-            # The patch essentially checks to see if all tarfile members will be extracted safely and throws an exception otherwise.
-            # We encourage you to use this patch or your own solution to secure against CVE-2007-4559.
-            # Further technical information about the vulnerability can be found in this blog:
-            # https://www.trellix.com/en-us/about/newsroom/stories/research/tarfile-exploiting-the-world.html.
-            for member in tar_file.getmembers():
-                member_path = os.path.join(output_dir, member.name)
-                if not _is_within_directory(output_dir, member_path):
-                    raise RuntimeWarning(f"Attempted path traversal in TAR file: {archive_path}, archive path {member_path} not within {output_dir}")
-
-            tar_file.extractall(output_dir)
-
-        _safe_extract()
-
-
-
 def _extractnested_archive(
     archive_path:str,
     output_dir:str,
@@ -251,7 +303,7 @@ def _extractnested_archive(
             if nested_archive_path is not None:
                 break
             for fn in files:
-                if fn.endswith(patoolib.ArchiveFormats + ('gz', 'bz', 'bz2')):
+                if fn.endswith(NESTED_ARCHIVE_EXTENSIONS):
                     nested_archive_path = os.path.join(root, fn)
                     break
 
@@ -338,3 +390,487 @@ def _read_gzip_info(gzipfile: gzip.GzipFile) -> tuple:
     gf.seek(pos)
     fname = fname_bytes.decode('utf-8')
     return fname, size
+
+
+
+class _ArchiveExtractor:
+    """Extract .zip and .tar archives using multiple threads"""
+    def __init__(
+        self,
+        dest_dir:str,
+        max_workers:int=None,
+        skip_unchanged:bool=True
+    ):
+        self.dest_dir = path.fullpath(dest_dir)
+        self.max_workers = max(max_workers or min(16, (os.cpu_count() or 1) + 4), 1)
+        self.skip_unchanged = skip_unchanged
+        self.extracted_paths:List[str] = []
+        self.n_skipped = 0
+        self._executor:ThreadPoolExecutor = None
+        self._cond = threading.Condition()
+        self._n_pending = 0
+        self._error:BaseException = None
+        self._created_dirs = set()
+
+
+    def extract(
+        self,
+        archive_path:str,
+        extract_nested:bool,
+        remove_root_dir:bool,
+        hashers:list=None
+    ):
+        """Extract the given archive, if hashers are given then they are updated with the archive's contents"""
+        os.makedirs(self.dest_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ArchiveExtractor') as executor:
+            self._executor = executor
+            try:
+                if extract_nested:
+                    nested_path = self._extract_archive(archive_path, name_map=None, hashers=hashers, find_nested=True)
+                    if nested_path is None:
+                        raise RuntimeError(f'No nested archive found in {archive_path}')
+                    try:
+                        self._extract_nested_archive(nested_path)
+                        self._wait()
+                    finally:
+                        # NOTE: The worker threads may be still reading the nested archive if an error occurred
+                        with self._cond:
+                            while self._n_pending > 0:
+                                self._cond.wait()
+                        os.remove(nested_path)
+                else:
+                    name_map = _RootDirRemover() if remove_root_dir else _keep_member_name
+                    self._extract_archive(archive_path, name_map=name_map, hashers=hashers)
+
+                self._wait()
+            finally:
+                # Do not return until all of the worker threads have finished
+                with self._cond:
+                    while self._n_pending > 0:
+                        self._cond.wait()
+                self._executor = None
+
+
+    def remove_extracted_files(self):
+        """Remove the files written by this extractor"""
+        for p in self.extracted_paths:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        self.extracted_paths = []
+
+
+    def _extract_archive(
+        self,
+        archive_path:str,
+        name_map:Callable[[str,bool],str],
+        hashers:list=None,
+        find_nested:bool=False
+    ) -> str:
+        if archive_path.endswith(ZIP_ARCHIVE_EXTENSIONS):
+            return self._extract_zip(archive_path, name_map=name_map, hashers=hashers, find_nested=find_nested)
+        return self._extract_tar(archive_path, name_map=name_map, hashers=hashers, find_nested=find_nested)
+
+
+    def _extract_tar(
+        self,
+        archive_path:str,
+        name_map:Callable[[str,bool],str],
+        hashers:list,
+        find_nested:bool
+    ) -> str:
+        nested_path = None
+        with open(archive_path, 'rb', buffering=0) as raw:
+            fileobj = _HashingReader(raw, hashers) if hashers else raw
+            try:
+                # NOTE: The archive is read as a stream, so it is read sequentially exactly once
+                with tarfile.open(fileobj=fileobj, mode='r|*', bufsize=EXTRACT_BUFFER_SIZE) as tar_file:
+                    for member in tar_file:
+                        if find_nested:
+                            if nested_path is None and member.isreg() and member.name.endswith(NESTED_ARCHIVE_EXTENSIONS):
+                                nested_path = self._spool_nested_archive(tar_file.extractfile(member), member.name)
+                            continue
+                        self._extract_tar_member(tar_file, member, name_map)
+                if hashers:
+                    fileobj.finish()
+            finally:
+                if hashers:
+                    fileobj.close()
+
+        return nested_path
+
+
+    def _extract_tar_member(
+        self,
+        tar_file:tarfile.TarFile,
+        member:tarfile.TarInfo,
+        name_map:Callable[[str,bool],str]
+    ):
+        name = name_map(member.name, member.isdir())
+        dest_path = self._get_dest_path(name)
+        if dest_path is None:
+            return
+
+        if member.isdir():
+            self._makedirs(dest_path)
+
+        elif member.isreg():
+            if self._is_unchanged(dest_path, member.size, member.mtime):
+                return
+            mode = member.mode if os.name != 'nt' else None
+            src = tar_file.extractfile(member)
+            self._makedirs(os.path.dirname(dest_path))
+            if member.size <= MAX_QUEUED_MEMBER_SIZE:
+                self._submit(self._write_data, dest_path, src.read(), member.mtime, mode)
+            else:
+                self._write_stream(dest_path, src, member.mtime, mode)
+
+        elif member.issym() or member.islnk():
+            if member.issym():
+                target_path = os.path.normpath(os.path.join(os.path.dirname(dest_path), member.linkname))
+            else:
+                target_path = self._get_dest_path(name_map(member.linkname, False))
+            if target_path is None or not _is_within_directory(self.dest_dir, target_path):
+                raise RuntimeWarning(f'Attempted path traversal in archive link: {member.name} -> {member.linkname}, not within {self.dest_dir}')
+
+            if member.issym() and self.skip_unchanged and os.path.islink(dest_path) and os.readlink(dest_path) == member.linkname:
+                self.n_skipped += 1
+                return
+
+            self._makedirs(os.path.dirname(dest_path))
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            if member.issym() and os.name != 'nt':
+                os.symlink(member.linkname, dest_path)
+                self._add_extracted_path(dest_path)
+            else:
+                # The link target may still be queued
+                self._wait()
+                if os.path.isfile(target_path):
+                    shutil.copy2(target_path, dest_path)
+                    self._add_extracted_path(dest_path)
+
+        # Other member types (e.g. devices, FIFOs) are not extracted
+
+
+    def _extract_zip(
+        self,
+        archive_path:str,
+        name_map:Callable[[str,bool],str],
+        hashers:list,
+        find_nested:bool
+    ) -> str:
+        # NOTE: The members of a .zip archive are read in parallel (i.e. not sequentially),
+        #       so the archive is hashed by a separate thread while it is extracted
+        hash_future = None
+        if hashers:
+            hash_future = self._executor.submit(_hash_file, archive_path, hashers)
+
+        nested_path = None
+        with ZipFile(archive_path) as zip_file:
+            tasks = []
+            for info in zip_file.infolist():
+                if find_nested:
+                    if not info.is_dir() and info.filename.endswith(NESTED_ARCHIVE_EXTENSIONS):
+                        with zip_file.open(info) as src:
+                            nested_path = self._spool_nested_archive(src, info.filename)
+                        break
+                    continue
+
+                dest_path = self._get_dest_path(name_map(info.filename, info.is_dir()))
+                if dest_path is None:
+                    continue
+                if info.is_dir():
+                    self._makedirs(dest_path)
+                    continue
+
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                if self._is_unchanged(dest_path, info.file_size, mtime):
+                    continue
+                self._makedirs(os.path.dirname(dest_path))
+                tasks.append((info, dest_path, mtime))
+
+        # Each worker thread opens the archive and extracts a chunk of the members
+        chunk_size = max(math.ceil(len(tasks) / (self.max_workers * 4)), 1)
+        for i in range(0, len(tasks), chunk_size):
+            self._submit(self._extract_zip_members, archive_path, tasks[i:i+chunk_size])
+
+        if hash_future is not None:
+            self._wait()
+            hash_future.result()
+
+        return nested_path
+
+
+    def _extract_zip_members(self, archive_path:str, tasks:List[Tuple[object,str,float]]):
+        with ZipFile(archive_path) as zip_file:
+            for info, dest_path, mtime in tasks:
+                with zip_file.open(info) as src:
+                    self._write_stream(dest_path, src, mtime, None)
+
+
+    def _extract_nested_archive(self, nested_path:str):
+        if not _is_native_archive(nested_path):
+            # Other formats are extracted by external programs,
+            # so extract to a temp directory and copy the files to the destination
+            tmp_dir = path.create_tempdir(f'tmp_archives/{os.path.basename(nested_path)}-extracted')
+            try:
+                extract_archive(nested_path, tmp_dir, clean_dest_dir=True)
+                for root, _, files in os.walk(tmp_dir):
+                    if len(files) > 0:
+                        path.copy_directory(root, self.dest_dir)
+                        break
+            finally:
+                path.remove_directory(tmp_dir)
+            return
+
+        common_dir = _get_common_directory(nested_path)
+        self._extract_archive(nested_path, name_map=_PrefixRemover(common_dir))
+
+
+    def _spool_nested_archive(self, src:io.IOBase, name:str) -> str:
+        """Write the nested archive to a temp file (the nested archive is not extracted in the destination directory)"""
+        tmp_dir = path.create_tempdir('tmp_archives')
+        nested_path = f'{tmp_dir}/{os.getpid()}-{threading.get_ident()}-{os.path.basename(name)}'
+        with open(nested_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, EXTRACT_BUFFER_SIZE)
+        return nested_path
+
+
+    def _get_dest_path(self, name:str) -> str:
+        """Return the destination path of the given member name, None if the member should not be extracted"""
+        if name is None:
+            return None
+        norm_name = name.replace('\\', '/')
+        parts = [x for x in norm_name.split('/') if x not in ('', '.')]
+        if not parts:
+            return None
+        # This fixes CVE-2007-4559: https://github.com/advisories/GHSA-gw9q-c7gh-j9vm
+        # i.e. a maliciously crafted archive could perform a directory path traversal attack
+        if '..' in parts or norm_name.startswith('/') or ':' in parts[0]:
+            raise RuntimeWarning(f'Attempted path traversal in archive, archive path {name} not within {self.dest_dir}')
+        return os.path.join(self.dest_dir, *parts)
+
+
+    def _makedirs(self, dir_path:str):
+        if dir_path in self._created_dirs:
+            return
+        os.makedirs(dir_path, exist_ok=True)
+        self._created_dirs.add(dir_path)
+
+
+    def _is_unchanged(self, dest_path:str, size:int, mtime:float) -> bool:
+        if not self.skip_unchanged:
+            return False
+        try:
+            st = os.lstat(dest_path)
+        except OSError:
+            return False
+        if stat.S_ISREG(st.st_mode) and st.st_size == size and int(st.st_mtime) == int(mtime):
+            self.n_skipped += 1
+            return True
+        return False
+
+
+    def _add_extracted_path(self, dest_path:str):
+        with self._cond:
+            self.extracted_paths.append(dest_path)
+
+
+    def _open_dest_file(self, dest_path:str) -> io.IOBase:
+        self._add_extracted_path(dest_path)
+        if os.path.islink(dest_path):
+            os.remove(dest_path)
+        return open(winapi_path(dest_path) if os.name == 'nt' else dest_path, 'wb')
+
+
+    def _write_data(self, dest_path:str, data:bytes, mtime:float, mode:int):
+        with self._open_dest_file(dest_path) as dst:
+            dst.write(data)
+        _set_file_attributes(dest_path, mtime, mode)
+
+
+    def _write_stream(self, dest_path:str, src:io.IOBase, mtime:float, mode:int):
+        with self._open_dest_file(dest_path) as dst:
+            shutil.copyfileobj(src, dst, EXTRACT_BUFFER_SIZE)
+        _set_file_attributes(dest_path, mtime, mode)
+
+
+    def _submit(self, func:Callable, *args):
+        """Execute the given function in a worker thread
+
+        This blocks if too many functions are pending (which limits the memory used by the queued archive members)
+        """
+        with self._cond:
+            while self._n_pending >= self.max_workers * 4 and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            self._n_pending += 1
+        self._executor.submit(self._run_task, func, args)
+
+
+    def _run_task(self, func:Callable, args:tuple):
+        try:
+            func(*args)
+        except BaseException as e: # pylint: disable=broad-except
+            with self._cond:
+                if self._error is None:
+                    self._error = e
+        finally:
+            with self._cond:
+                self._n_pending -= 1
+                self._cond.notify_all()
+
+
+    def _wait(self):
+        """Wait for the pending functions to complete and raise the first error, if any"""
+        with self._cond:
+            while self._n_pending > 0:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+
+
+
+class _HashingReader(io.RawIOBase):
+    """Wraps a file object and hashes the data as it is read
+
+    The data is hashed by a separate thread so that hashing the archive
+    does not delay decompressing the archive.
+    """
+    def __init__(self, f:io.RawIOBase, hashers:list):
+        super().__init__()
+        self._f = f
+        self._queue = queue.Queue(maxsize=16)
+        self._thread = threading.Thread(target=self._hash_data, args=(hashers,), name='ArchiveHasher', daemon=True)
+        self._thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size:int=-1) -> bytes:
+        data = self._f.read(size)
+        if data:
+            self._queue.put(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def finish(self):
+        """Hash the remainder of the file and wait for the hashing thread to complete"""
+        while self.read(EXTRACT_BUFFER_SIZE):
+            pass
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self._queue.put(None)
+            self._thread.join()
+        super().close()
+
+    def _hash_data(self, hashers:list):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            for hasher in hashers:
+                hasher.update(data)
+
+
+
+class _RootDirRemover:
+    """Remove the archive's root directory from the member names
+
+    Raises an exception if the archive does not have a single root directory
+    """
+    def __init__(self):
+        self.root_dir = None
+
+    def __call__(self, name:str, is_dir:bool) -> str:
+        parts = [x for x in name.replace('\\', '/').split('/') if x not in ('', '.')]
+        if not parts:
+            return None
+        if (len(parts) == 1 and not is_dir) or (self.root_dir is not None and parts[0] != self.root_dir):
+            raise RuntimeError('Archive does not contain a single root directory')
+        self.root_dir = parts[0]
+        return '/'.join(parts[1:])
+
+
+
+class _PrefixRemover:
+    """Remove the given directory from the member names, members not in the directory are not extracted"""
+    def __init__(self, prefix:str):
+        self.prefix = prefix + '/' if prefix else ''
+
+    def __call__(self, name:str, is_dir:bool) -> str: # pylint: disable=unused-argument
+        name = '/'.join(x for x in name.replace('\\', '/').split('/') if x not in ('', '.'))
+        if not name.startswith(self.prefix):
+            return None
+        return name[len(self.prefix):]
+
+
+
+def _keep_member_name(name:str, is_dir:bool) -> str: # pylint: disable=unused-argument
+    return name
+
+
+def _is_native_archive(archive_path:str) -> bool:
+    return archive_path.endswith(TAR_ARCHIVE_EXTENSIONS + ZIP_ARCHIVE_EXTENSIONS)
+
+
+def _is_within_directory(directory:str, target:str) -> bool:
+    abs_directory = os.path.abspath(directory)
+    abs_target = os.path.abspath(target)
+    return os.path.commonpath([abs_directory, abs_target]) == abs_directory
+
+
+def _get_common_directory(archive_path:str) -> str:
+    """Return the common directory of all the files in the given archive"""
+    if archive_path.endswith(ZIP_ARCHIVE_EXTENSIONS):
+        with ZipFile(archive_path) as zip_file:
+            names = [x.filename for x in zip_file.infolist() if not x.is_dir()]
+    else:
+        # NOTE: For compressed archives, this requires decompressing the archive
+        with tarfile.open(archive_path, mode='r|*', bufsize=EXTRACT_BUFFER_SIZE) as tar_file:
+            names = [x.name for x in tar_file if x.isreg()]
+
+    common_dir = None
+    for name in names:
+        dir_parts = [x for x in name.replace('\\', '/').split('/') if x not in ('', '.')][:-1]
+        if common_dir is None:
+            common_dir = dir_parts
+            continue
+        n = 0
+        while n < min(len(common_dir), len(dir_parts)) and common_dir[n] == dir_parts[n]:
+            n += 1
+        common_dir = common_dir[:n]
+
+    return '/'.join(common_dir or [])
+
+
+def _set_file_attributes(file_path:str, mtime:float, mode:int):
+    # NOTE: The modification time is used to skip unchanged files the next time the archive is extracted
+    os.utime(file_path, (mtime, mtime))
+    if mode is not None:
+        # Only the permission bits are retained, the file is always readable and writable by the owner
+        os.chmod(file_path, (mode & 0o755) | 0o600)
+
+
+def _hash_file(file_path:str, hashers:list):
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            data = f.read(EXTRACT_BUFFER_SIZE)
+            if not data:
+                break
+            for hasher in hashers:
+                hasher.update(data)
+
+
+def _is_hash_match(hashers:list, file_hash:str) -> bool:
+    file_hash = file_hash.lower()
+    return any(hasher.hexdigest().lower() == file_hash for hasher in hashers)
@@ -4,15 +4,19 @@ See the source code on Github: `mltk/utils/archive_downloader.py <https://github
 """
 
 
-from typing import Union, Tuple
+from typing import Union, Tuple, List, Callable
 import sys
 import os
-import hashlib
 import json
+import time
 import shutil
 import logging
+import threading
+import http.client
+import urllib.error
 import urllib.request
 from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, Future, wait as wait_futures
 
 try:
     from tqdm import tqdm
@@ -21,7 +25,8 @@ except:
     have_tqdm = False
 
 
-from .archive import extract_archive
+from .archive import extract_archive, ArchiveHashError
+from .hasher import hash_file, create_hasher, get_hash_algorithms
 from .logger import get_logger
 from .path import create_user_dir, fullpath
 from .python import prepend_exception_msg
@@ -29,6 +34,19 @@ from .python import prepend_exception_msg
 
 MLTK_CHUNK_DELIMITER = '?mltk_chunk_count='
 
+# The maximum number of concurrent HTTP connections used to download a file
+DOWNLOAD_MAX_CONNECTIONS = 8
+# The maximum number of files downloaded concurrently by DownloadQueue
+DOWNLOAD_MAX_CONCURRENT = 4
+# Files are downloaded in segments of this size, the download state is tracked per segment
+DOWNLOAD_SEGMENT_SIZE = 16*1024*1024
+# The number of bytes read from a connection at a time
+DOWNLOAD_READ_SIZE = 1024*1024
+# The number of times a failed segment request is retried
+DOWNLOAD_RETRIES = 3
+# The connection timeout in seconds
+DOWNLOAD_TIMEOUT = 60
+
 
 def download_verify_extract(
     url: str,
@@ -125,25 +143,47 @@ def download_verify_extract(
                 return retval
 
     for i in range(2):
-        # Download the archive or use the cached version in the download_dir
-        download_url(
-            url,
-            dst_path=archive_path,
-            show_progress=show_progress,
-            logger=logger
-        )
-
+        # NOTE: If the archive is downloaded, then it is verified while it is downloaded.
+        #       Otherwise, the cached archive is verified while it is extracted
+        is_cached = os.path.exists(archive_path)
         try:
-            if file_hash and not verify_file_hash(
+            # Download the archive or use the cached version in the download_dir
+            download_url(
+                url,
+                dst_path=archive_path,
+                show_progress=show_progress,
+                logger=logger,
+                file_hash=file_hash,
+                file_hash_algorithm=file_hash_algorithm
+            )
+            cached_file_hash = file_hash if is_cached else None
+
+            if extract:
+                logger.warning(f"Extracting: {archive_path}\nto: {retval}\n(This may take awhile, please be patient ...)")
+                extract_archive(
+                    archive_path=archive_path,
+                    dest_dir=retval,
+                    extract_nested=extract_nested,
+                    clean_dest_dir=clean_dest_dir,
+                    remove_root_dir=remove_root_dir,
+                    file_hash=cached_file_hash,
+                    file_hash_algorithm=file_hash_algorithm
+                )
+
+            elif cached_file_hash and not verify_file_hash(
                     file_path=archive_path,
-                    file_hash=file_hash,
+                    file_hash=cached_file_hash,
                     file_hash_algorithm=file_hash_algorithm
                 ):
-                raise ValueError('File hash invalid')
+                raise ArchiveHashError('File hash invalid')
 
-            # The downloaded version was valid, so continue to extraction
+            # The downloaded version was valid
             break
         except Exception as e:
+            # NOTE: download_url() retries and resumes failed downloads itself,
+            #       so only retry if the archive is invalid or could not be extracted
+            if not (isinstance(e, ArchiveHashError) or os.path.exists(archive_path)):
+                raise
             # Remove the cached version
             try:
                 os.remove(archive_path)
@@ -159,16 +199,6 @@ def download_verify_extract(
             # Otherwise just through the exception
             raise e
 
-    if extract:
-        logger.warning(f"Extracting: {archive_path}\nto: {retval}\n(This may take awhile, please be patient ...)")
-        extract_archive(
-            archive_path=archive_path,
-            dest_dir=retval,
-            extract_nested=extract_nested,
-            clean_dest_dir=clean_dest_dir,
-            remove_root_dir=remove_root_dir
-        )
-
 
     if update_onchange_only:
         with open(downloads_details_path, 'w') as f:
@@ -254,22 +284,16 @@ def verify_extract(
             return dest_dir
 
 
-    if file_hash and not verify_file_hash(
-            file_path=archive_path,
-            file_hash=file_hash,
-            file_hash_algorithm=file_hash_algorithm
-        ):
-        raise Exception('File hash invalid')
-
-
-
+    # NOTE: The archive is verified while it is extracted
     logger.warning(f"Extracting: {archive_path}\nto: {dest_dir}\n(This may take awhile, please be patient ...)")
     extract_archive(
         archive_path=archive_path,
         dest_dir=dest_dir,
         extract_nested=extract_nested,
         clean_dest_dir=clean_dest_dir,
-        remove_root_dir=remove_root_dir
+        remove_root_dir=remove_root_dir,
+        file_hash=file_hash,
+        file_hash_algorithm=file_hash_algorithm
     )
 
     if update_onchange_only:
@@ -283,16 +307,29 @@ def download_url(
     url:str,
     dst_path:str,
     show_progress=False,
-    logger=None
+    logger=None,
+    file_hash:str=None,
+    file_hash_algorithm:str='auto',
+    max_connections:int=None,
 ) -> str:
     """Downloads the tarball or zip file from url into dst_path.
+
+    If the server supports HTTP range requests, then the file is downloaded in segments
+    using multiple concurrent connections. The progress of the download is saved to ``<dst_path>.tmp.json``
+    so that an interrupted download is resumed the next time this API is called.
+
     Args:
       url: The URL of a tarball or zip file.
       dst_path: The path where the file is download
       show_progress: Show a progress bar while downloading
+      file_hash: Optional md5, sha1, or sha256 hash of the file.
+        The downloaded segments are hashed while the file is downloaded,
+        if the hash does not match then the downloaded file is removed and :py:class:`mltk.utils.archive.ArchiveHashError` is raised
+      file_hash_algorithm: The algorithm used to generate ``file_hash``, if ``auto`` then determine automatically
+      max_connections: The maximum number of concurrent connections used to download the file, default: ``DOWNLOAD_MAX_CONNECTIONS``
 
     If the file at ``dst_path`` is already found,
-    then just return the local version without downloading
+    then just return the local version without downloading (the file hash is NOT verified in this case)
     """
     logger = logger or get_logger()
 
@@ -302,88 +339,146 @@ def download_url(
     # then just return that
     if os.path.exists(dst_path):
         logger.debug(f'Using cached: {url}\nat: {dst_path}')
-        return
-
-    if MLTK_CHUNK_DELIMITER in url:
-        _download_chunks(
-            url,
-            dst_path=dst_path,
-            logger=logger,
-            show_progress=show_progress
-        )
         return dst_path
 
-
-
+    hashers = None
+    if file_hash:
+        hashers = [create_hasher(algorithm) for algorithm in get_hash_algorithms(file_hash, file_hash_algorithm)]
 
     tmp_filepath = dst_path + '.tmp'
-    try:
-        os.remove(tmp_filepath)
-    except:
-        pass
-
     os.makedirs(os.path.dirname(tmp_filepath), exist_ok=True)
 
     logger.warning(f'Downloading {url}\nto {dst_path}\n(This may take awhile, please be patient ...)')
     try:
-        if show_progress and have_tqdm:
-            with _ProgressBar(unit='B', unit_scale=True, unit_divisor=1024, miniters=1, desc=url, leave=False) as t:
-                tmp_filepath, _ = urllib.request.urlretrieve(url, tmp_filepath, t.update_chunk)
+        if MLTK_CHUNK_DELIMITER in url:
+            _download_chunks(
+                url,
+                dst_path=tmp_filepath,
+                logger=logger,
+                show_progress=show_progress,
+                max_connections=max_connections,
+                hashers=hashers
+            )
         else:
-            tmp_filepath, _ = urllib.request.urlretrieve(url, tmp_filepath)
+            download = _SegmentedDownload(
+                url,
+                tmp_path=tmp_filepath,
+                max_connections=max_connections or DOWNLOAD_MAX_CONNECTIONS,
+                logger=logger
+            )
+            if show_progress and have_tqdm:
+                with _ProgressBar(unit='B', unit_scale=True, unit_divisor=1024, miniters=1, desc=url, leave=False) as t:
+                    download.run(hashers=hashers, progress_callback=t.update_total)
+            else:
+                download.run(hashers=hashers)
+
+        if hashers and not any(hasher.hexdigest().lower() == file_hash.lower() for hasher in hashers):
+            _remove_download(tmp_filepath)
+            raise ArchiveHashError(f'Hash of {url} does not match the expected hash: {file_hash}')
 
         shutil.move(tmp_filepath, dst_path)
 
+    except ArchiveHashError:
+        raise
     except Exception as e:
-        try:
-            os.remove(tmp_filepath)
-        except:
-            pass
+        # NOTE: If the server supports range requests,
+        #       then the partially downloaded file is kept so that the download can be resumed
+        if not os.path.exists(tmp_filepath + '.json'):
+            _remove_download(tmp_filepath)
         prepend_exception_msg(e, f'Failed to download: {url}')
         raise
 
     return dst_path
 
 
+
+class DownloadQueue:
+    """Download (and extract) multiple archives concurrently
+
+    Each archive is downloaded by :py:func:`~download_verify_extract` in a separate thread.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        with DownloadQueue() as download_queue:
+            download_queue.add('https://example.com/dataset1.tar.gz', dest_subdir='datasets/dataset1', file_hash='...')
+            download_queue.add('https://example.com/dataset2.zip', dest_subdir='datasets/dataset2', remove_root_dir=True)
+
+        dataset1_dir, dataset2_dir = download_queue.results
+
+    Args:
+        max_concurrent: The maximum number of archives downloaded at the same time
+        logger: Optional logger given to :py:func:`~download_verify_extract`
+    """
+    def __init__(self, max_concurrent:int=DOWNLOAD_MAX_CONCURRENT, logger:logging.Logger=None):
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=max(max_concurrent, 1), thread_name_prefix='DownloadQueue')
+        self._futures:List[Future] = []
+
+    @property
+    def results(self) -> list:
+        """The return values of :py:func:`~download_verify_extract` in the order the downloads were added,
+        this waits for all of the downloads to complete"""
+        return self.wait()
+
+    def add(self, url:str, **kwargs) -> Future:
+        """Add a download to the queue
+
+        Args:
+            url: Download URL
+            kwargs: Additional arguments given to :py:func:`~download_verify_extract`
+
+        Returns:
+            A ``concurrent.futures.Future`` of the return value of :py:func:`~download_verify_extract`
+        """
+        kwargs.setdefault('logger', self.logger)
+        future = self._executor.submit(download_verify_extract, url, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def wait(self) -> list:
+        """Wait for all of the downloads to complete and return their results
+
+        Raises:
+            The first exception raised by a download (after all of the other downloads complete)
+        """
+        wait_futures(self._futures)
+        return [future.result() for future in self._futures]
+
+    def close(self):
+        """Wait for the downloads to complete and release the download threads"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self.close()
+
+
 def verify_file_hash(
     file_path:str,
     file_hash:str,
     file_hash_algorithm:str
 ):
-    """Return True if the calculated hash of the file matches the given hash, false else"""
-
-    md5_hasher = hashlib.md5()
-    sha1_hasher = hashlib.sha1()
-    sha256_hasher = hashlib.sha256()
-
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5_hasher.update(chunk)
-            sha1_hasher.update(chunk)
-            sha256_hasher.update(chunk)
-
-    calc_md5_hash = md5_hasher.hexdigest().lower()
-    calc_sha1_hash = sha1_hasher.hexdigest().lower()
-    calc_sha256_hash = sha256_hasher.hexdigest().lower()
+    """Return True if the calculated hash of the file matches the given hash, false else
 
+    If ``file_hash_algorithm=auto``, then the algorithm is determined from the length of the given hash
+    """
     file_hash = file_hash.lower()
-
-    if file_hash_algorithm in ('auto', 'md5') and calc_md5_hash == file_hash:
-        return True
-    if file_hash_algorithm in ('auto', 'sha1') and calc_sha1_hash == file_hash:
-        return True
-    if file_hash_algorithm in ('auto', 'sha256') and calc_sha256_hash == file_hash:
-        return True
+    for algorithm in get_hash_algorithms(file_hash, file_hash_algorithm):
+        if hash_file(file_path, algorithm=algorithm) == file_hash:
+            return True
 
     return False
 
 
 def verify_sha1(file_path, expected_sha1):
-    with open(file_path, 'rb') as f:
-        hasher = hashlib.sha1()
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
-    calc_hash = hasher.hexdigest().lower()
+    calc_hash = hash_file(file_path, algorithm='sha1')
 
     if callable(expected_sha1):
         expected_sha1(calc_hash)
@@ -395,11 +490,7 @@ def verify_sha1(file_path, expected_sha1):
 
 
 def verify_sha256(file_path, expected_sha256):
-    with open(file_path, 'rb') as f:
-        hasher = hashlib.sha256()
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
-    calc_hash = hasher.hexdigest().lower()
+    calc_hash = hash_file(file_path, algorithm='sha256')
 
     if callable(expected_sha256):
         expected_sha256(calc_hash)
@@ -429,53 +520,306 @@ def _download_chunks(
     url:str,
     dst_path:str,
     show_progress=False,
-    logger=None
+    logger=None,
+    max_connections:int=None,
+    hashers:list=None
 ):
     delimiter_index = url.find(MLTK_CHUNK_DELIMITER)
     chunk_count = int(url[delimiter_index + len(MLTK_CHUNK_DELIMITER):])
     url = url[:delimiter_index]
 
-    tmp_filepath = dst_path + '.tmp'
-    try:
-        os.remove(tmp_filepath)
-    except:
-        pass
-
-
-    logger.warning(f'Downloading {url}\nto {dst_path}\n(This may take awhile, please be patient ...)')
-    chunk_paths = []
+    chunk_paths = [f'{dst_path}.chunk{chunkno}.bin' for chunkno in range(chunk_count)]
 
     try:
-        if show_progress and have_tqdm:
-            for chunkno in range(chunk_count):
-                chunk_url = f'{url}.chunk{chunkno}.bin'
-                chunk_path = f'{dst_path}.chunk{chunkno}.bin'
-                chunk_paths.append(chunk_path)
-                with _ProgressBar(unit='B', unit_scale=True, unit_divisor=1024, miniters=1, desc=chunk_url, leave=False) as t:
-                    t.set_chunkno(chunkno, chunk_count)
-                    urllib.request.urlretrieve(chunk_url, chunk_path, t.update_chunk)
-        else:
-            for chunkno in range(chunk_count):
-                chunk_url = f'{url}.chunk{chunkno}.bin'
-                chunk_path = f'{dst_path}.chunk{chunkno}.bin'
-                chunk_paths.append(chunk_path)
-                urllib.request.urlretrieve(chunk_url, chunk_path)
-
-        with open(tmp_filepath, 'wb') as dst:
+        # Download the chunks concurrently,
+        # the previously downloaded chunks are kept in case the download is interrupted
+        with ThreadPoolExecutor(max_workers=min(chunk_count, DOWNLOAD_MAX_CONCURRENT) or 1) as executor:
+            futures = [
+                executor.submit(
+                    download_url,
+                    f'{url}.chunk{chunkno}.bin',
+                    dst_path=chunk_path,
+                    show_progress=show_progress,
+                    logger=logger,
+                    max_connections=max_connections
+                )
+                for chunkno, chunk_path in enumerate(chunk_paths)
+            ]
+            wait_futures(futures)
+            for future in futures:
+                future.result()
+
+        # Combine the chunks and hash the combined file at the same time
+        with open(dst_path, 'wb') as dst:
             for chunk_path in chunk_paths:
                 with open(chunk_path, 'rb') as src:
-                    shutil.copyfileobj(src, dst)
+                    for data in iter(lambda: src.read(DOWNLOAD_READ_SIZE), b''):
+                        dst.write(data)
+                        for hasher in hashers or []:
+                            hasher.update(data)
 
-        shutil.move(tmp_filepath, dst_path)
     except Exception as e:
         prepend_exception_msg(e, f'Failed to download chunks: {url}')
         raise
-    finally:
-        for chunk_path in chunk_paths:
+
+    for chunk_path in chunk_paths:
+        try:
+            os.remove(chunk_path)
+        except:
+            pass
+
+
+
+class _SegmentedDownload:
+    """Download a file with concurrent HTTP range requests
+
+    The file is split into segments of ``DOWNLOAD_SEGMENT_SIZE`` bytes which are downloaded by
+    up to ``max_connections`` threads. The number of downloaded bytes of each segment is saved to ``<tmp_path>.json``,
+    if the download is interrupted then only the remaining bytes of each segment are downloaded the next time.
+
+    While the segments are downloaded, the calling thread hashes each segment (in order) as soon as it is complete.
+    This way, the hash is available as soon as the download completes (without reading the file a second time).
+
+    If the server does not support range requests, then the file is downloaded with a single connection.
+    """
+    def __init__(
+        self,
+        url:str,
+        tmp_path:str,
+        max_connections:int=DOWNLOAD_MAX_CONNECTIONS,
+        segment_size:int=None,
+        logger:logging.Logger=None
+    ):
+        self.url = url
+        self.tmp_path = tmp_path
+        self.state_path = tmp_path + '.json'
+        self.max_connections = max(max_connections, 1)
+        self.segment_size = segment_size or DOWNLOAD_SEGMENT_SIZE
+        self.logger = logger or get_logger()
+        self._cond = threading.Condition()
+        self._segments:List[List[int]] = []
+        self._next_segment = 0
+        self._error:BaseException = None
+        self._cancelled = False
+
+
+    def run(
+        self,
+        hashers:list=None,
+        progress_callback:Callable[[int,int],None]=None
+    ):
+        """Download the file
+
+        Args:
+            hashers: Optional list of hashlib hashers that are updated with the file's contents
+            progress_callback: Optional callback that is periodically called with: (downloaded bytes, file size)
+        """
+        response, size, validator = self._request_file_info()
+        if response is not None:
+            # The server does not support range requests
+            with response:
+                self._download_response(response, size, hashers, progress_callback)
+            return
+
+        state = self._load_state(size, validator)
+        if state is None:
+            _remove_download(self.tmp_path)
+            with open(self.tmp_path, 'wb') as f:
+                f.truncate(size)
+            state = dict(url=self.url, size=size, validator=validator, segment_size=self.segment_size, segments=[])
+            for start in range(0, size, self.segment_size):
+                state['segments'].append([start, min(start + self.segment_size, size), 0])
+            self._save_state(state)
+        else:
+            downloaded = sum(x[2] for x in state['segments'])
+            self.logger.info(f'Resuming download of {self.url} at {downloaded} of {size} bytes')
+
+        self._segments = state['segments']
+        n_workers = min(self.max_connections, len(self._segments)) or 1
+        executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='SegmentedDownload')
+        try:
+            for _ in range(n_workers):
+                executor.submit(self._download_segments)
+            self._hash_segments(state, hashers, progress_callback)
+        finally:
+            with self._cond:
+                self._cancelled = True
+            executor.shutdown(wait=True)
+            if self._error is None and all(x[0] + x[2] >= x[1] for x in self._segments):
+                try:
+                    os.remove(self.state_path)
+                except OSError:
+                    pass
+            else:
+                self._save_state(state)
+
+        if self._error is not None:
+            raise self._error
+
+
+    def _request_file_info(self) -> Tuple[object,int,str]:
+        """Request the first byte of the file to determine if the server supports range requests
+
+        Returns:
+            (response, size, validator)
+            If the server does not support range requests, then response is the response of the entire file,
+            otherwise response is None.
+        """
+        request = urllib.request.Request(self.url, headers={'Range': 'bytes=0-0'})
+        response = urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) # pylint: disable=consider-using-with
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        content_range = response.headers.get('Content-Range') or ''
+        if response.status == 206 and '/' in content_range and not content_range.endswith('/*'):
+            response.close()
+            return None, int(content_range.rsplit('/', maxsplit=1)[1]), validator
+
+        content_length = response.headers.get('Content-Length')
+        return response, int(content_length) if content_length else None, validator
+
+
+    def _download_response(self, response, size:int, hashers:list, progress_callback):
+        _remove_download(self.tmp_path)
+        downloaded = 0
+        with open(self.tmp_path, 'wb') as f:
+            for data in iter(lambda: response.read(DOWNLOAD_READ_SIZE), b''):
+                f.write(data)
+                for hasher in hashers or []:
+                    hasher.update(data)
+                downloaded += len(data)
+                if progress_callback is not None:
+                    progress_callback(downloaded, size)
+
+        if size is not None and downloaded != size:
+            raise IOError(f'Connection closed after {downloaded} of {size} bytes')
+
+
+    def _download_segments(self):
+        """Download segments until all of the segments have been downloaded (executed by each worker thread)"""
+        try:
+            while True:
+                with self._cond:
+                    while self._next_segment < len(self._segments) and \
+                        self._segments[self._next_segment][0] + self._segments[self._next_segment][2] >= self._segments[self._next_segment][1]:
+                        self._next_segment += 1
+                    if self._next_segment >= len(self._segments) or self._cancelled or self._error is not None:
+                        return
+                    segment = self._segments[self._next_segment]
+                    self._next_segment += 1
+                self._download_segment(segment)
+        except BaseException as e: # pylint: disable=broad-except
+            with self._cond:
+                if self._error is None:
+                    self._error = e
+                self._cond.notify_all()
+
+
+    def _download_segment(self, segment:List[int]):
+        seg_start, seg_end, _ = segment
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            start = seg_start + segment[2]
+            if start >= seg_end:
+                return
             try:
-                os.remove(chunk_path)
-            except:
-                pass
+                request = urllib.request.Request(self.url, headers={'Range': f'bytes={start}-{seg_end-1}'})
+                with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+                    if response.status != 206:
+                        raise IOError(f'Server did not return the requested range: bytes={start}-{seg_end-1}, status: {response.status}')
+
+                    # NOTE: The file is unbuffered, so the saved download state never includes unwritten data
+                    with open(self.tmp_path, 'r+b', buffering=0) as f:
+                        f.seek(start)
+                        while start < seg_end:
+                            data = response.read(min(DOWNLOAD_READ_SIZE, seg_end - start))
+                            if not data:
+                                break
+                            f.write(data)
+                            start += len(data)
+                            with self._cond:
+                                segment[2] += len(data)
+                                self._cond.notify_all()
+                                if self._cancelled:
+                                    return
+
+                if start < seg_end:
+                    raise IOError(f'Connection closed before bytes={start}-{seg_end-1} were downloaded')
+                return
+
+            except (OSError, http.client.HTTPException) as e:
+                if attempt == DOWNLOAD_RETRIES or (isinstance(e, urllib.error.HTTPError) and e.code < 500 and e.code != 429):
+                    raise
+                self.logger.debug(f'Failed to download bytes={start}-{seg_end-1} of {self.url}, retrying, err: {e}')
+                time.sleep(min(2**attempt, 10))
+
+
+    def _hash_segments(self, state:dict, hashers:list, progress_callback):
+        """Hash each segment once it is complete and periodically save the download state"""
+        size = state['size']
+        last_save_time = time.time()
+        with open(self.tmp_path, 'rb') as f:
+            for segment in self._segments:
+                while True:
+                    with self._cond:
+                        if self._error is None and segment[0] + segment[2] < segment[1]:
+                            self._cond.wait(timeout=0.5)
+                        if self._error is not None:
+                            return
+                        complete = segment[0] + segment[2] >= segment[1]
+                        downloaded = sum(x[2] for x in self._segments)
+
+                    if progress_callback is not None:
+                        progress_callback(downloaded, size)
+                    if time.time() - last_save_time > 1.0:
+                        self._save_state(state)
+                        last_save_time = time.time()
+                    if complete:
+                        break
+
+                if hashers:
+                    f.seek(segment[0])
+                    remaining = segment[1] - segment[0]
+                    while remaining > 0:
+                        data = f.read(min(DOWNLOAD_READ_SIZE, remaining))
+                        if not data:
+                            raise IOError(f'Failed to read {self.tmp_path}')
+                        remaining -= len(data)
+                        for hasher in hashers:
+                            hasher.update(data)
+
+
+    def _load_state(self, size:int, validator:str) -> dict:
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if state.get('url') != self.url or state.get('size') != size or state.get('validator') != validator \
+            or not os.path.exists(self.tmp_path) or os.path.getsize(self.tmp_path) != size:
+            self.logger.debug(f'Discarding previous partial download of {self.url}')
+            return None
+
+        return state
+
+
+    def _save_state(self, state:dict):
+        with self._cond:
+            data = json.dumps(state)
+        tmp_state_path = f'{self.state_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_state_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_state_path, self.state_path)
+        except OSError as e:
+            self.logger.debug(f'Failed to save download state to {self.state_path}, err: {e}')
+
+
+
+def _remove_download(tmp_path:str):
+    for p in (tmp_path, tmp_path + '.json'):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
 
 
 
@@ -500,3 +844,9 @@ if have_tqdm:
 
         def set_chunkno(self, chunkno:int, total:int):
             self.set_postfix_str(f'Chunk {chunkno+1} of {total}')
+
+        def update_total(self, n:int, total:int=None):
+            """Set the progress to the given number of bytes"""
+            if total is not None:
+                self.total = total
+            self.update(n - self.n)
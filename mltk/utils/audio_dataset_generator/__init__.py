@@ -5,5 +5,6 @@ from .generator_types import (
     VoiceRate,
     Keyword,
     Augmentation,
-    GenerationConfig
+    GenerationConfig,
+    GenerationStats
 )
\ No newline at end of file
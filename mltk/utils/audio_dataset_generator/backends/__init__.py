@@ -3,6 +3,7 @@
 from .aws_backend import AwsBackend
 from .gcp_backend import GcpBackend
 from .azure_backend import AzureBackend
+from .fake_backend import FakeBackend
 
 
 BACKENDS = dict()
@@ -10,3 +11,4 @@ BACKENDS = dict()
 BACKENDS['aws'] = AwsBackend
 BACKENDS['gcp'] = GcpBackend
 BACKENDS['azure'] = AzureBackend
+BACKENDS['fake'] = FakeBackend
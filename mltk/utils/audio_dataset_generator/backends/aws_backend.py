@@ -149,8 +149,6 @@ class AwsBackend(BackendBase):
 
         out_path = f'{out_dir}/{self.generate_filename(config)}'
         if os.path.exists(out_path):
-            import time
-            time.sleep(.250)
             return out_path
 
 
@@ -143,8 +143,6 @@ class AzureBackend(BackendBase):
 
         out_path = f'{out_dir}/{self.generate_filename(config)}'
         if os.path.exists(out_path):
-            import time
-            time.sleep(.250)
             return out_path
 
         ssml_msg = self._generate_msg(config)
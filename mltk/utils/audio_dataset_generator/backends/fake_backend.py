@@ -0,0 +1,167 @@
+"""
+Local "fake" Text-to-Speech Backend
+
+This backend does not use a cloud service, it generates a short tone for each keyword.
+It is intended for testing and benchmarking the AudioDatasetGenerator without any credentials or costs.
+"""
+from __future__ import annotations
+from typing import List
+from dataclasses import dataclass
+import os
+import time
+import wave
+import random
+import threading
+
+import numpy as np
+
+from ..generator_types import (
+    BackendBase,
+    Augmentation,
+    Voice,
+    GenerationConfig,
+    VoicePitch,
+    VoiceRate,
+)
+
+
+class FakeBackend(BackendBase):
+    """Local backend for testing
+
+    The following kwargs may be given to :py:func:`AudioDatasetGenerator.load_backend`:
+
+    - ``transactions_per_second``: The simulated quota of requests per second (default: 100)
+    - ``max_concurrent_requests``: The simulated quota of concurrent requests (default: None)
+    - ``latency``: The simulated duration of each request in seconds (default: 0.05)
+    - ``failure_rate``: The probability that a request fails (default: 0.0)
+    - ``seed``: The seed of the random number generator used for the failures
+    """
+    def __init__(self):
+        super().__init__(
+            transactions_per_second=100
+        )
+        self.latency = 0.05
+        self.failure_rate = 0.0
+        self.request_timestamps:List[float] = []
+        self.max_active_requests = 0
+        self._n_active_requests = 0
+        self._random = random.Random()
+        self._stats_lock = threading.Lock()
+
+
+    @property
+    def name(self) -> str:
+        return 'fake'
+
+
+    def load(self, install_python_package=False, **kwargs):
+        self.transactions_per_second = kwargs.pop('transactions_per_second', self.transactions_per_second)
+        self.max_concurrent_requests = kwargs.pop('max_concurrent_requests', self.max_concurrent_requests)
+        self.latency = kwargs.pop('latency', self.latency)
+        self.failure_rate = kwargs.pop('failure_rate', self.failure_rate)
+        self._random.seed(kwargs.pop('seed', None))
+        if kwargs:
+            raise ValueError(f'Unknown {self.name} backend arguments: {", ".join(kwargs.keys())}')
+
+
+    def list_languages(self) -> List[str]:
+        return ['en-US', 'en-GB']
+
+
+    def list_voices(self, language_code:str=None) -> List[FakeVoice]:
+        retval:List[FakeVoice] = []
+        for lang in self.list_languages():
+            if language_code and lang != language_code:
+                continue
+            for name in ('low', 'high'):
+                retval.append(FakeVoice(
+                    backend=self.name,
+                    name=f'{lang}-{name}',
+                    language_code=lang,
+                ))
+
+        return retval
+
+
+    def list_configurations(
+        self,
+        augmentations:List[Augmentation],
+        voice:FakeVoice,
+    ) -> List[GenerationConfig]:
+        assert isinstance(voice,FakeVoice)
+
+        retval:List[GenerationConfig] = []
+
+        for aug in augmentations:
+            retval.append(GenerationConfig(
+                voice=voice,
+                rate=aug.rate,
+                pitch=aug.pitch,
+                keyword=None
+            ))
+
+        return retval
+
+
+    def count_characters(self, config:GenerationConfig) -> int:
+        assert config.voice.backend == self.name
+        return len(config.keyword)
+
+
+    def generate_filename(self, config:GenerationConfig) -> str:
+        assert config.voice.backend == self.name
+        return f'{self.name}_{config.voice.language_code}+{config.voice.name}+{config.keyword}+{config.rate}+{config.pitch}+{config.voice.hex_hash}.wav'
+
+
+    def generate(self, config:GenerationConfig, out_dir:str) -> str:
+        assert config.voice.backend == self.name
+        out_path = f'{out_dir}/{self.generate_filename(config)}'
+        if os.path.exists(out_path):
+            return out_path
+
+        with self._stats_lock:
+            self.request_timestamps.append(time.time())
+            self._n_active_requests += 1
+            self.max_active_requests = max(self.max_active_requests, self._n_active_requests)
+            failed = self._random.random() < self.failure_rate
+
+        try:
+            self.update_generate_timestamp()
+            time.sleep(self.latency)
+            if failed:
+                raise RuntimeError('Simulated failure')
+
+            with wave.open(out_path, 'w') as wav:
+                # pylint: disable=no-member
+                wav.setnchannels(1) # mono
+                wav.setsampwidth(2) # 16-bit
+                wav.setframerate(16000)
+                wav.writeframes(_generate_tone(config).tobytes())
+
+        except Exception as e: # pylint:disable=redefined-outer-name
+            try:
+                os.remove(out_path)
+            except:
+                pass
+            raise RuntimeError(f'{self.name} backend: Failed to generate: {out_path}, err: {e}')
+
+        finally:
+            with self._stats_lock:
+                self._n_active_requests -= 1
+
+        return out_path
+
+
+
+def _generate_tone(config:GenerationConfig) -> np.ndarray:
+    pitch = {VoicePitch.low: 200.0, VoicePitch.high: 600.0}.get(config.pitch, 400.0)
+    duration = {VoiceRate.xslow: 1.0, VoiceRate.xfast: 0.25}.get(config.rate, 0.5)
+    t = np.arange(int(16000 * duration)) / 16000
+    return (np.sin(2 * np.pi * pitch * t) * 8000).astype(np.int16)
+
+
+
+@dataclass
+class FakeVoice(Voice):
+    def __hash__(self): # pylint:disable=useless-parent-delegation
+        return super().__hash__()
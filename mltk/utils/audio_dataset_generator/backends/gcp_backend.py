@@ -125,8 +125,6 @@ class GcpBackend(BackendBase):
         assert config.voice.backend == self.name
         out_path = f'{out_dir}/{self.generate_filename(config)}'
         if os.path.exists(out_path):
-            import time
-            time.sleep(.250)
             return out_path
 
 
@@ -1,10 +1,12 @@
-from typing import List, Callable, Dict, Union, Tuple
+from __future__ import annotations
+from typing import List, Callable, Dict, Union, Set
 import random
 import threading
-import functools
+import collections
 import os
 import time
-from multiprocessing.pool import ThreadPool
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -14,38 +16,64 @@ from .generator_types import (
     BackendBase,
     Voice,
     GenerationConfig,
+    GenerationStats,
     Keyword,
     Augmentation,
+    RATE_LIMIT_MARGIN,
     logger
 )
 from .backends import BACKENDS
 
 
+# The default number of times a failed request is retried
+MAX_RETRIES = 5
+# The delay before the first retry, the delay doubles with each subsequent retry
+RETRY_BASE_DELAY = 0.5
+# The maximum delay between retries
+RETRY_MAX_DELAY = 30.0
+
+
 class AudioDatasetGenerator:
     """Utility for generating synthetic keyword datasets
 
     See the `Synthetic Audio Dataset Generation <https://siliconlabs.github.io/mltk/mltk/tutorials/synthetic_audio_dataset_generation.html>`_ tutorial for more details.
 
+    The samples are generated by an asyncio scheduler that executes in a background thread.
+    Each backend has a token bucket that limits its requests to the backend's quota of transactions per second,
+    and up to the backend's quota of concurrent requests are executed at the same time.
+    Failed requests are retried with exponential backoff.
+
+    Samples that already exist in the :py:attr:`~out_dir` are skipped,
+    so an interrupted generation may be resumed by generating the same configurations again.
+
     .. note:: The generated audio files are 16kHz, 16-bit PCM ``.wav`` files.
 
     Args:
         out_dir: Directory where dataset will be generated
-        n_jobs: Number of parallel processing jobs
+        n_jobs: The maximum number of requests executed at the same time (across all backends)
+        max_retries: The maximum number of times a failed request is retried
     """
-    def __init__(self, out_dir:str, n_jobs:int=4):
+    def __init__(self, out_dir:str, n_jobs:int=4, max_retries:int=MAX_RETRIES):
         self._backends:Dict[str, BackendBase] = {}
         self._out_dir = out_dir
-        self._pool = _ProcessingPool(n_jobs=n_jobs)
+        self._max_retries = max_retries
         self._lock = threading.RLock()
         self._condition = threading.Condition(lock=self._lock)
-        self._pending_configs:Dict[BackendBase,List[Tuple[GenerationConfig,Callable]]] = {}
-        self._n_config_processing = 0
-        t = threading.Thread(
-            target=self._generation_loop,
+        self._schedulers:Dict[str,_BackendScheduler] = {}
+        self._n_pending = 0
+        self._start_time:float = None
+        self._finish_time:float = None
+        self._shutdown_event = threading.Event()
+        # The backend SDKs are blocking, so the requests are executed in a thread pool
+        self._executor = ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix='AudioDatasetGenerator')
+        self._n_jobs = n_jobs
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
             name='AudioDatasetGenerator',
             daemon=True
         )
-        t.start()
+        self._loop_thread.start()
 
 
     @staticmethod
@@ -56,7 +84,7 @@ class AudioDatasetGenerator:
     @property
     def is_running(self) -> bool:
         """Return if the processing pool is active"""
-        return self._pool.is_running
+        return not self._shutdown_event.is_set()
 
     @property
     def out_dir(self) -> bool:
@@ -110,7 +138,7 @@ class AudioDatasetGenerator:
         backend = BACKENDS[name]()
         backend.load(install_python_package=install_python_package, **kwargs)
         self._backends[name] = backend
-        self._pending_configs[backend] = []
+        self._schedulers[name] = _BackendScheduler(self, backend)
 
 
     def list_languages(self, backend:str=None) -> List[str]:
@@ -326,6 +354,9 @@ class AudioDatasetGenerator:
         The ``on_finished`` will be invoked when processing is complete.
         Alternatively, call :py:func:`~join` to wait for all processing to complete.
 
+        If the keyword's audio file already exists, then it is not generated again
+        (but ``on_finished`` is still invoked).
+
         Args:
             config: The configuration to use for keyword generation
             on_finished: Optional callback to be invoked when generation completes
@@ -335,10 +366,14 @@ class AudioDatasetGenerator:
             raise RuntimeError('Not running')
 
         with self._lock:
-            backend = self._backends[config.voice.backend]
-            self._pending_configs[backend].append((config, on_finished))
-            self._condition.notify_all()
+            scheduler = self._schedulers[config.voice.backend]
+            scheduler.stats.pending += 1
+            self._n_pending += 1
+            if self._start_time is None:
+                self._start_time = time.time()
+            self._finish_time = None
 
+        self._loop.call_soon_threadsafe(scheduler.submit, config, on_finished)
 
 
     def join(self, timeout:float=None) -> bool:
@@ -351,27 +386,62 @@ class AudioDatasetGenerator:
         Returns:
             True if processing has completed, false else
         """
-        is_processing = True
-        start_time = time.time()
         with self._lock:
-            while is_processing and self.is_running:
-                is_processing = False
-                for configs in self._pending_configs.values():
-                    if self._n_config_processing > 0 or len(configs) > 0:
-                        is_processing = True
-                        break
-
-                if not is_processing or (timeout and (time.time() - start_time) > timeout):
-                    break
+            return self._condition.wait_for(
+                lambda: self._n_pending == 0 or not self.is_running,
+                timeout=timeout or None
+            ) and self._n_pending == 0
+
 
-                self._condition.wait(0.100)
+    def get_stats(self, backend:str=None) -> GenerationStats:
+        """Return the generation statistics
 
-        return not is_processing
+        Args:
+            backend: If provided, then only return the statistics of the given backend,
+                else return the statistics of all loaded backends
+
+        Returns:
+            The generation statistics, e.g. the number of samples generated per second
+        """
+        with self._lock:
+            retval = GenerationStats()
+            for backend_name in self._get_backend_list(backend):
+                stats = self._schedulers[backend_name].stats
+                retval.pending += stats.pending
+                retval.active += stats.active
+                retval.generated += stats.generated
+                retval.skipped += stats.skipped
+                retval.failed += stats.failed
+                retval.retries += stats.retries
+
+            if self._start_time is not None:
+                retval.elapsed = (self._finish_time or time.time()) - self._start_time
+
+        return retval
 
 
     def shutdown(self):
-        """Shutdown the underlying thread pool"""
-        self._pool.shutdown()
+        """Shutdown the scheduler and underlying thread pool
+
+        Any pending samples are not generated
+        """
+        if self._shutdown_event.is_set():
+            return
+
+        self._shutdown_event.set()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+
+        # Cancel the scheduler's tasks so that they are not destroyed while pending
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._condition.notify_all()
 
 
     def _get_backend_list(self, backend:str=None) -> List[str]:
@@ -385,50 +455,24 @@ class AudioDatasetGenerator:
 
 
 
-    def _generation_loop(self):
-        while self.is_running:
-            with self._lock:
-                try:
-                    self._condition.wait(timeout=0.010)
-                except:
-                    pass
-                self._process_once()
-
-
-    def _process_once(self):
-        if not self.is_running:
-            return
-
-        for backend, configs in self._pending_configs.items():
-            if len(configs) == 0 or backend.is_rate_limited:
-                continue
-            self._n_config_processing += 1
-            config, callback = configs.pop(0)
-            out_dir = f'{self._out_dir}/{config.keyword_group}'
-            os.makedirs(out_dir, exist_ok=True)
-            self._pool(
-                backend.generate,
-                config=config,
-                out_dir=out_dir,
-                _on_finished=functools.partial(self._on_finished, callback=callback),
-                _on_error=self._on_error
-            )
-
-    def _on_finished(self, sample_path:str, callback:Callable=None):
+    def _on_finished(
+        self,
+        scheduler:_BackendScheduler,
+        sample_path:str,
+        callback:Callable[[str],None],
+    ):
         with self._lock:
-            self._n_config_processing -= 1
+            self._n_pending -= 1
+            if self._n_pending == 0:
+                self._finish_time = time.time()
             self._condition.notify_all()
-        if callback is not None:
+
+        if sample_path is not None and callback is not None:
             try:
                 callback(sample_path)
-            except:
-                pass
+            except Exception as e:
+                logger.debug(f'{scheduler.backend.name} on_finished callback failed, err: {e}', exc_info=e)
 
-    def _on_error(self, e:Exception):
-        with self._lock:
-            logger.exception(f'{e}', exc_info=e)
-            self._n_config_processing -= 1
-            self._condition.notify_all()
 
     def __enter__(self):
         return self
@@ -439,40 +483,138 @@ class AudioDatasetGenerator:
 
 
 
-class _ProcessingPool():
+class _BackendScheduler:
+    """Schedules the generation requests of a backend
+
+    NOTE: Except for the constructor, this executes in the generator's event loop
+    """
+    def __init__(self, generator:AudioDatasetGenerator, backend:BackendBase):
+        self.generator = generator
+        self.backend = backend
+        self.stats = GenerationStats()
+        self._pending = collections.deque()
+        self._wakeup:asyncio.Event = None
+        self._concurrency:asyncio.Semaphore = None
+        self._bucket = _TokenBucket(rate=backend.transactions_per_second * RATE_LIMIT_MARGIN)
+        self._created_dirs:Set[str] = set()
+        self._dispatch_task:asyncio.Task = None
+        # NOTE: The event loop only keeps weak references to its tasks,
+        #       so the in-flight generation tasks are referenced here until they complete
+        self._generate_tasks:Set[asyncio.Task] = set()
+
+
+    def submit(self, config:GenerationConfig, callback:Callable[[str],None]):
+        if self._dispatch_task is None:
+            max_concurrent = self.backend.max_concurrent_requests or self.generator._n_jobs # pylint: disable=protected-access
+            self._wakeup = asyncio.Event()
+            self._concurrency = asyncio.Semaphore(max_concurrent)
+            self._dispatch_task = asyncio.get_running_loop().create_task(self._dispatch_loop())
+
+        self._pending.append((config, callback))
+        self._wakeup.set()
+
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
 
-    def __init__(self, n_jobs:int):
-        self.pool = ThreadPool(processes=n_jobs)
-        self._running_event = threading.Event()
+            config, callback = self._pending.popleft()
+            out_dir = f'{self.generator.out_dir}/{config.keyword_group}'
+            out_path = f'{out_dir}/{self.backend.generate_filename(config)}'
 
-    @property
-    def is_running(self) -> bool:
-        return not self._running_event.is_set()
+            # Skip samples that were previously generated, this allows for resuming an interrupted generation.
+            # NOTE: A valid .wav file has at least a 44 byte header
+            if _get_file_size(out_path) > 44:
+                self._update_stats(pending=-1, skipped=1)
+                self.generator._on_finished(self, out_path, callback) # pylint: disable=protected-access
+                continue
 
+            if out_dir not in self._created_dirs:
+                os.makedirs(out_dir, exist_ok=True)
+                self._created_dirs.add(out_dir)
 
-    def shutdown(self):
-        self._running_event.set()
-        self.pool.close()
-
-    def __call__(self, func, *, _on_finished, _on_error, **kwargs):
-        self.pool.apply_async(
-            _process_with_retries,
-            args=(func,),
-            kwds=kwargs,
-            callback=_on_finished,
-            error_callback=_on_error
-        )
+            await self._concurrency.acquire()
+            await self._bucket.acquire()
+            self._update_stats(pending=-1, active=1)
+            task = asyncio.get_running_loop().create_task(self._generate(config, out_dir, callback))
+            self._generate_tasks.add(task)
+            task.add_done_callback(self._generate_tasks.discard)
 
 
-def _process_with_retries(_func, **kwargs):
-    for i in range(3):
+    async def _generate(self, config:GenerationConfig, out_dir:str, callback:Callable[[str],None]):
+        loop = asyncio.get_running_loop()
+        sample_path = None
         try:
-            _func(**kwargs)
-            return
-        except KeyboardInterrupt:
-            return
+            for retry in range(self.generator._max_retries + 1): # pylint: disable=protected-access
+                try:
+                    sample_path = await loop.run_in_executor(
+                        self.generator._executor, # pylint: disable=protected-access
+                        self.backend.generate,
+                        config,
+                        out_dir
+                    )
+                    break
+                except Exception as e:
+                    if retry == self.generator._max_retries: # pylint: disable=protected-access
+                        raise
+
+                    # Exponential backoff with jitter so that the retries of concurrent requests are spread out
+                    delay = min(RETRY_BASE_DELAY * 2**retry, RETRY_MAX_DELAY) * random.uniform(0.5, 1.0)
+                    logger.debug(f'{self.backend.name}: Retrying in {delay:.1f}s, err: {e}')
+                    self._update_stats(retries=1)
+                    await asyncio.sleep(delay)
+                    await self._bucket.acquire()
+
+            self._update_stats(active=-1, generated=1)
+
         except Exception as e:
-            if i == 2:
-                raise e
-            time.sleep(0.100)
+            logger.exception(f'{e}', exc_info=e)
+            self._update_stats(active=-1, failed=1)
+
+        finally:
+            self._concurrency.release()
+
+        self.generator._on_finished(self, sample_path, callback) # pylint: disable=protected-access
 
+
+    def _update_stats(self, **kwargs):
+        with self.generator._lock: # pylint: disable=protected-access
+            for key, value in kwargs.items():
+                setattr(self.stats, key, getattr(self.stats, key) + value)
+
+
+
+class _TokenBucket:
+    """Token bucket rate limiter
+
+    Tokens are added at the given rate, up to the given capacity.
+    Each request consumes one token.
+
+    NOTE: This executes in the generator's event loop
+    """
+    def __init__(self, rate:float, capacity:float=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._timestamp = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._timestamp) * self.rate)
+            self._timestamp = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+
+def _get_file_size(path:str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -129,12 +129,53 @@ class GenerationConfig:
 
 
 
+@dataclass
+class GenerationStats:
+    """Audio sample generation statistics, see :py:func:`AudioDatasetGenerator.get_stats`"""
+    pending:int = 0
+    """The number of samples waiting to be generated"""
+    active:int = 0
+    """The number of samples currently being generated"""
+    generated:int = 0
+    """The number of generated samples"""
+    skipped:int = 0
+    """The number of samples that were skipped because they were previously generated"""
+    failed:int = 0
+    """The number of samples that failed to generate after all retries"""
+    retries:int = 0
+    """The number of failed requests that were retried"""
+    elapsed:float = 0.0
+    """The number of seconds from when the first sample was submitted until the last sample completed (or now if samples are still pending)"""
+
+    @property
+    def samples_per_second(self) -> float:
+        """The number of samples generated per second"""
+        return self.generated / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f'generated={self.generated} ({self.samples_per_second:.1f}/s) skipped={self.skipped} failed={self.failed} ' \
+               f'retries={self.retries} pending={self.pending} active={self.active}'
+
+
+
+# The fraction of a backend's quota that is used,
+# this ensures the backend's rate limit is not exceeded due to timing jitter
+RATE_LIMIT_MARGIN = 0.85
+
+
 class BackendBase(abc.ABC):
-    """Base class for a cloud backend"""
-    def __init__(self, transactions_per_second:float):
+    """Base class for a cloud backend
+
+    Args:
+        transactions_per_second: The backend's quota of requests per second
+        max_concurrent_requests: The backend's quota of concurrent requests,
+            if None then the concurrency is only limited by the generator's ``n_jobs``
+    """
+    def __init__(self, transactions_per_second:float, max_concurrent_requests:int=None):
         super().__init__()
+        self.transactions_per_second = transactions_per_second
+        self.max_concurrent_requests = max_concurrent_requests
         self._generate_timestamp:float = 0.0
-        self._min_seconds_per_transaction = 1/(transactions_per_second * 0.85)
         self._lock = threading.Lock()
 
 
@@ -143,7 +184,7 @@ class BackendBase(abc.ABC):
         with self._lock:
             now = time.time()
             elapsed = now - self._generate_timestamp
-            return elapsed < self._min_seconds_per_transaction
+            return elapsed < 1/(self.transactions_per_second * RATE_LIMIT_MARGIN)
 
     def update_generate_timestamp(self):
         with self._lock:
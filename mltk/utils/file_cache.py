@@ -0,0 +1,141 @@
+"""Persistent, size-bounded cache of files in a directory
+
+See the source code on Github: `mltk/utils/file_cache.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/file_cache.py>`_
+"""
+from typing import Callable, BinaryIO, Iterator
+import os
+import time
+import tempfile
+
+
+class LruFileCache:
+    """Base class of a persistent cache whose entries are files in a directory
+
+    When the total size of the cache exceeds ``max_size``, the least recently used entries are deleted.
+    The modification time of an entry's file is used as its "last used" timestamp,
+    see :py:meth:`~touch_entry`.
+
+    This cache may be safely used by multiple processes at the same time.
+
+    Args:
+        directory: Directory where the cached entries are stored
+        max_size: The maximum size of the cache in bytes
+        remove_empty_dirs: If true, then remove an entry's directory if it is empty after the entry is evicted
+    """
+    def __init__(
+        self,
+        directory:str,
+        max_size:int,
+        remove_empty_dirs:bool=False
+    ):
+        self.directory = directory.replace('\\', '/')
+        self.max_size = max_size
+        self.remove_empty_dirs = remove_empty_dirs
+        # Evict stale entries after this many bytes have been written by this process
+        self._evict_threshold = max(max_size // 20, 1)
+        self._bytes_written = 0
+
+
+    def write_entry(self, path:str, write_func:Callable[[BinaryIO],None]):
+        """Write an entry to the cache
+
+        The entry is written to a temp file which is then renamed,
+        this way other processes never see a partially written entry.
+        Stale entries are evicted once enough data has been written by this process.
+
+        Args:
+            path: The path of the entry's file in the cache directory
+            write_func: Function that writes the entry's data to the given file object
+        """
+        entry_dir = os.path.dirname(path)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_func(f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except:
+            remove_file(tmp_path)
+            raise
+
+        self._bytes_written += size
+        if self._bytes_written >= self._evict_threshold:
+            self._bytes_written = 0
+            self.evict()
+
+
+    def touch_entry(self, path:str):
+        """Update the entry's timestamp which is used for the LRU eviction"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+    def evict(self):
+        """Delete the least recently used entries until the cache is less than ``max_size``"""
+        entries = []
+        total_size = 0
+        now = time.time()
+        for entry in scandir_recursive(self.directory):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            # Remove temp files left behind by crashed processes
+            if entry.name.endswith('.tmp'):
+                if now - st.st_mtime > 3600:
+                    remove_file(entry.path)
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total_size += st.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        # Evict down to 90% of the max size so that we don't evict on every write
+        target_size = int(self.max_size * 0.9)
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= target_size:
+                break
+            remove_file(path)
+            total_size -= size
+            if self.remove_empty_dirs:
+                try:
+                    os.rmdir(os.path.dirname(path))
+                except OSError:
+                    pass
+
+
+    def clear(self):
+        """Delete all cached entries"""
+        for entry in scandir_recursive(self.directory):
+            remove_file(entry.path)
+
+
+
+def scandir_recursive(directory:str) -> Iterator[os.DirEntry]:
+    """Return the files in the given directory and its sub-directories
+
+    An empty iterator is returned if the directory does not exist
+    """
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from scandir_recursive(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except OSError:
+        return
+
+
+def remove_file(path:str):
+    """Remove the given file, ignoring any errors"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -2,11 +2,18 @@
 
 See the source code on Github: `mltk/utils/hasher.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/hasher.py>`_
 """
-from typing import Union
+from typing import Union, List
 import os
 import hashlib
 
 
+# The number of bytes read from a file per hasher update
+HASH_BUFFER_SIZE = 1024*1024
+
+# <hex digest length>: <algorithm>
+_HASH_LENGTHS = {32: 'md5', 40: 'sha1', 64: 'sha256'}
+
+
 def generate_hash(*args) -> str:
     """Generate an MD5 hash of the given Python objects"""
     md5 = hashlib.md5()
@@ -24,30 +31,54 @@ def hash_file(
         return None
 
     if isinstance(algorithm, str):
-        algorithm = algorithm.lower()
-        if algorithm in ('sha256', 'sha2'):
-            hasher = hashlib.sha256()
-        elif algorithm in ('sha128', 'sha1'):
-            hasher = hashlib.sha1()
-        elif algorithm == 'md5':
-            hasher = hashlib.md5()
-        else:
-            raise ValueError('Hash algorithm must be md5, sha1, or sha256')
+        hasher = create_hasher(algorithm)
     elif hasattr(algorithm, 'update') and hasattr(algorithm, 'hexdigest'):
         hasher = algorithm
     else:
         raise ValueError('"algorithm argument must be the name of a hash algorithm or a hashlib._Hash instance')
 
-    with open(path, 'rb') as f:
+    with open(path, 'rb', buffering=0) as f:
         if include_filename:
             hasher.update(path.encode('utf-8'))
 
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
+        # NOTE: The file is read into a re-used buffer to avoid allocating a new bytes object for each chunk
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
 
     return hasher.hexdigest().lower()
 
 
+def create_hasher(algorithm:str) -> 'hashlib._Hash':
+    """Return a hashlib hasher for the given algorithm name: md5, sha1, or sha256"""
+    algorithm = algorithm.lower()
+    if algorithm in ('sha256', 'sha2'):
+        return hashlib.sha256()
+    if algorithm in ('sha128', 'sha1'):
+        return hashlib.sha1()
+    if algorithm == 'md5':
+        return hashlib.md5()
+    raise ValueError('Hash algorithm must be md5, sha1, or sha256')
+
+
+def get_hash_algorithms(file_hash:str, algorithm:str='auto') -> List[str]:
+    """Return the name of the hash algorithm(s) that may have generated the given hash
+
+    If ``algorithm=auto``, then the algorithm is determined from the length of the given hash.
+    If the length does not match a known algorithm, then md5, sha1, and sha256 are returned.
+    """
+    if algorithm and algorithm != 'auto':
+        return [algorithm]
+    algorithm = _HASH_LENGTHS.get(len(file_hash or ''))
+    if algorithm is not None:
+        return [algorithm]
+    return list(_HASH_LENGTHS.values())
+
+
 
 def hash_object(*objects, hasher=None):
     """Hash the given object(s) and return the hashlib hasher instance
@@ -0,0 +1,164 @@
+"""Measure the time required to import each Python module
+
+This is enabled by setting the environment variable ``MLTK_IMPORT_PROFILE=1`` before the ``mltk`` package is imported.
+If the environment variable ``MLTK_IMPORT_PROFILE_PATH`` is also defined, then the import time of every module
+is written to the given file instead of printing the slowest imports, e.g.:
+
+.. highlight:: shell
+.. code-block:: shell
+
+    # Print the 30 slowest imports to the console when the command exits
+    MLTK_IMPORT_PROFILE=1 mltk summarize my_model.tflite
+
+    # Write the import time of every module to a file when the command exits
+    MLTK_IMPORT_PROFILE=1 MLTK_IMPORT_PROFILE_PATH=~/import_profile.txt mltk summarize my_model.tflite
+
+See the source code on Github: `mltk/utils/import_profiler.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/import_profiler.py>`_
+"""
+from typing import Dict, List, Tuple
+import os
+import sys
+import time
+import atexit
+import threading
+import importlib.abc
+
+
+# The number of modules printed to the console
+MAX_PRINTED_MODULES = 30
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Meta path finder that records the time required to execute each imported module
+
+    For each module, both the "self" time (excluding the nested imports)
+    and the "cumulative" time (including the nested imports) are recorded.
+    """
+    def __init__(self):
+        # module name -> [self time, cumulative time]
+        self.times:Dict[str,List[float]] = {}
+        self._local = threading.local()
+        self._finding = threading.local()
+
+
+    def find_spec(self, fullname, path, target=None):
+        # Use the other finders to find the module's spec,
+        # then wrap its loader so that the module's execution is timed
+        if getattr(self._finding, 'active', False):
+            return None
+        self._finding.active = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.active = False
+
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+
+    def get_summary(self, max_modules:int=None) -> str:
+        """Return a summary of the import times, sorted by cumulative time"""
+        rows = sorted(self.times.items(), key=lambda x: x[1][1], reverse=True)
+        if max_modules:
+            rows = rows[:max_modules]
+        lines = [f'{"self (ms)":>10} {"cumulative (ms)":>16}  module']
+        for name, (self_time, cumulative_time) in rows:
+            lines.append(f'{self_time*1e3:10.1f} {cumulative_time*1e3:16.1f}  {name}')
+        return '\n'.join(lines)
+
+
+    def _exec_module(self, loader, module):
+        stack:List[List[float]] = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        # [start time, time spent in nested imports]
+        frame = [time.perf_counter(), 0.]
+        stack.append(frame)
+        try:
+            loader.exec_module(module)
+        finally:
+            stack.pop()
+            cumulative_time = time.perf_counter() - frame[0]
+            self.times[module.__name__] = [cumulative_time - frame[1], cumulative_time]
+            if stack:
+                stack[-1][1] += cumulative_time
+
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module loader and times the module's execution"""
+    def __init__(self, loader, profiler:ImportProfiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Restore the original loader, so the module's loader is not the wrapper
+        module.__loader__ = self._loader
+        if getattr(module, '__spec__', None) is not None:
+            module.__spec__.loader = self._loader
+        self._profiler._exec_module(self._loader, module) # pylint: disable=protected-access
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+
+def enable_import_profiler(output_path:str=None) -> ImportProfiler:
+    """Start recording the import time of each module
+
+    The results are reported when the Python interpreter exits.
+
+    Args:
+        output_path: Optional path to a file where the import time of every module is written,
+            if omitted then the slowest imports are printed to stderr
+    """
+    profiler = get_import_profiler()
+    if profiler is not None:
+        return profiler
+
+    profiler = ImportProfiler()
+    sys.meta_path.insert(0, profiler)
+    globals()['_import_profiler'] = profiler
+    start_time = time.perf_counter()
+
+    def _report():
+        total_time = time.perf_counter() - start_time
+        if not output_path:
+            # NOTE: The CLI redirects sys.stderr to its logger, so write to the original stream
+            sys.__stderr__.write(f'\nSlowest imports (of {len(profiler.times)} modules, {total_time:.2f}s since profiling started):\n')
+            sys.__stderr__.write(profiler.get_summary(max_modules=MAX_PRINTED_MODULES) + '\n')
+        else:
+            path = os.path.abspath(os.path.expanduser(output_path))
+            with open(path, 'w') as f:
+                f.write(f'{len(profiler.times)} modules, {total_time:.2f}s since profiling started\n')
+                f.write(profiler.get_summary() + '\n')
+            sys.__stderr__.write(f'Import profile written to {path}\n')
+
+    atexit.register(_report)
+    return profiler
+
+
+def get_import_profiler() -> ImportProfiler:
+    """Return the active import profiler, None if it is not enabled"""
+    return globals().get('_import_profiler', None)
+
+
+def get_import_times() -> List[Tuple[str,float,float]]:
+    """Return a list of (module name, self time, cumulative time) in seconds, sorted by cumulative time"""
+    profiler = get_import_profiler()
+    if profiler is None:
+        return []
+    return sorted(((k, v[0], v[1]) for k, v in profiler.times.items()), key=lambda x: x[2], reverse=True)
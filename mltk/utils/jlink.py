@@ -172,13 +172,7 @@ class JLink(object):
 
     def read_mem8(self, address:int, length:int) -> bytes:
         buf, _ = self.dll_read_mem(address, length)
-        a = ctypes.cast(buf, ctypes.POINTER(ctypes.c_uint8))
-        retval = bytearray()
-
-        for i in range(length):
-            retval.append(a[i])
-        
-        return bytes(retval)
+        return buf.raw[:length]
     
     
     def write_mem8(self, address:int, values: bytes):
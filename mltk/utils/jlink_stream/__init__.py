@@ -1,4 +1,5 @@
 from .jlink_stream import JlinkStream, JlinkStreamOptions
 from .data_stream import JLinkDataStream
 from .jlink_command_stream import JlinkCommandStream
+from .mock_device_interface import MockDeviceInterface
 from .device_interface import MAX_BUFFER_SIZE as JLINK_STREAM_MAX_BUFFER_SIZE
\ No newline at end of file
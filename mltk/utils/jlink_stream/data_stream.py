@@ -1,8 +1,10 @@
 
+from typing import Callable, Iterator
 import time
 from threading import Event, RLock
 
 from mltk.utils import hexdump
+from mltk.utils.ring_buffer import RingBuffer
 
 from .device_interface import DeviceInterface, MAX_BUFFER_SIZE
 
@@ -11,7 +13,12 @@ WAIT_FOREVER = 4294967.0
 
 
 class JLinkDataStream(object):
-    """JLink data stream"""
+    """JLink data stream
+
+    The data is buffered in a fixed-size ring buffer.
+    Received data may be read with :py:meth:`~read`, read directly into a pre-allocated buffer with :py:meth:`~readinto`,
+    or received as fixed-size frames with :py:meth:`~read_frames` or :py:meth:`~set_frame_callback`.
+    """
 
     def __init__(
         self, 
@@ -27,7 +34,7 @@ class JLinkDataStream(object):
         self._context = stream_context
         
         self._is_opened = Event()
-        self._buffer = bytearray()
+        self._buffer = RingBuffer(MAX_BUFFER_SIZE)
         self._buffer_lock = RLock()
         self._buffer_event = Event()
         self._notify_event = None
@@ -36,6 +43,9 @@ class JLinkDataStream(object):
         self._end_time = -1
         self._requires_processing = False
         self._id_mask = (1 << stream_context['id'])
+        self._frame_callback:Callable[[bytearray],None] = None
+        self._frame:bytearray = None
+        self._frame_length = 0
         
         self._is_opened.set()
         
@@ -124,7 +134,7 @@ class JLinkDataStream(object):
     def buffer_unused(self) -> int:
         """The amount of the device data buffer that is available"""
         with self._buffer_lock:
-            retval = MAX_BUFFER_SIZE - len(self._buffer)
+            retval = self._buffer.free
 
         return retval
 
@@ -141,8 +151,9 @@ class JLinkDataStream(object):
     @property
     def buffer_hexdump(self, length=64) -> str:
         """Return a hexdump string"""
-        length = min(length, self.buffer_used)
-        return hexdump.hexdump(self._buffer[:length], result='return')
+        with self._buffer_lock:
+            data = bytes(self._buffer.peek(length))
+        return hexdump.hexdump(data, result='return')
 
 
     def close(self):
@@ -175,25 +186,57 @@ class JLinkDataStream(object):
             if max_size == 0:
                 return None
             
-            bufsize = min(self.read_data_available, max_size)
-            
-            if bufsize > 0:
-                retval = self._consume_buffer(bufsize)
+            with self._buffer_lock:
+                retval = self._buffer.read(max_size)
+                self._on_buffer_consumed(len(retval))
+
+            if len(retval) > 0:
                 self._notify_event.set()
-                return bytes(retval)
-            
-            elapsed = (time.time() - start_time)
-            if elapsed >= timeout:
+                return retval
+
+            if not self._wait_buffer_event(start_time, timeout):
                 return None
-            
-            if self._end_time > 0:
-                time_remaining = self._end_time - time.time()
-                if time_remaining <= 0:
-                    return None
-            else:
-                time_remaining = WAIT_FOREVER
-            
-            self._buffer_event.wait(min(min(timeout - elapsed, time_remaining), 0.100))
+
+
+    def readinto(self, buffer, timeout:float=None) -> int:
+        """Read data from data stream opened for reading directly into the given buffer
+
+        NOTE: The only reads the data that is immediately available.
+        The amount of data read may be less than the length of the buffer.
+
+        Args:
+            buffer: Writable buffer, e.g. bytearray, memoryview, numpy array
+            timeout: The maximum amount of time to wait for data
+
+        Returns:
+            The number of bytes read, 0 if the timeout expired
+        """
+        if self.mode != 'r':
+            raise Exception(f'Stream: {self.name} not opened for reading')
+
+        timeout = self._get_timeout(timeout)
+        view = memoryview(buffer).cast('B')
+        max_size = min(self._get_max_size(None), len(view))
+
+        start_time = time.time()
+        while True:
+            self._buffer_event.clear()
+
+            if not self.is_opened:
+                raise Exception(f'Stream: {self.name} closed')
+            if max_size == 0:
+                return 0
+
+            with self._buffer_lock:
+                length = self._buffer.readinto(view[:max_size])
+                self._on_buffer_consumed(length)
+
+            if length > 0:
+                self._notify_event.set()
+                return length
+
+            if not self._wait_buffer_event(start_time, timeout):
+                return 0
 
 
     def read_all(self, amount:int, timeout:float=None, initial_timeout:float=None, throw_exception=True) -> bytes:
@@ -201,20 +244,91 @@ class JLinkDataStream(object):
 
         if initial_timeout is None:
             initial_timeout = timeout
-        retval = bytearray()
-        remaining = amount
-        while remaining > 0:
-            chunk_timeout = initial_timeout if len(retval) == 0 else timeout
-            chunk = self.read(max_size=remaining, timeout=chunk_timeout)
-            if chunk is None:
-                break 
-            remaining -= len(chunk)
-            retval.extend(chunk)
-
-        if len(retval) != amount and throw_exception:
-            raise Exception('Failed to read all data')
+        retval = bytearray(amount)
+        view = memoryview(retval)
+        length = 0
+        while length < amount:
+            chunk_timeout = initial_timeout if length == 0 else timeout
+            chunk_length = self.readinto(view[length:], timeout=chunk_timeout)
+            if chunk_length == 0:
+                break
+            length += chunk_length
+        view.release()
+
+        if length != amount:
+            if throw_exception:
+                raise Exception('Failed to read all data')
+            del retval[length:]
 
         return bytes(retval)
+
+
+    def read_frames(self, frame_size:int, timeout:float=None) -> Iterator[bytearray]:
+        """Return an iterator of fixed-size frames of the data received from the device
+
+        Each frame is a new bytearray of ``frame_size`` bytes (e.g. one audio chunk or one spectrogram)
+        which is populated directly from the stream's buffer.
+
+        The iterator stops when the stream is closed or a frame is not received within the given timeout.
+        In this case, any partially received frame is dropped.
+
+        Args:
+            frame_size: The size of each frame in bytes
+            timeout: The maximum amount of time to wait for each frame
+        """
+        if self.mode != 'r':
+            raise Exception(f'Stream: {self.name} not opened for reading')
+
+        timeout = self._get_timeout(timeout)
+        while self.is_opened:
+            frame = bytearray(frame_size)
+            view = memoryview(frame)
+            length = 0
+            start_time = time.time()
+            while length < frame_size:
+                self._buffer_event.clear()
+                if not self.is_opened:
+                    return
+
+                with self._buffer_lock:
+                    chunk_length = self._buffer.readinto(view[length:])
+                if chunk_length > 0:
+                    length += chunk_length
+                    self._notify_event.set()
+                    continue
+
+                if not self._wait_buffer_event(start_time, timeout):
+                    return
+
+            view.release()
+            yield frame
+
+
+    def set_frame_callback(self, callback:Callable[[bytearray],None], frame_size:int=None):
+        """Invoke the given callback with each fixed-size frame of data received from the device
+
+        The callback is invoked in the :py:class:`JlinkStream` processing thread as soon as a complete frame is received,
+        so the device's buffer is drained without waiting for the application to read the data.
+        The callback should return quickly, e.g. by adding the frame to a ``queue.Queue``.
+
+        While a callback is set, the received data is not available to the read APIs.
+
+        Args:
+            callback: Callback given a new bytearray of ``frame_size`` bytes. Set to None to disable the callback
+            frame_size: The size of each frame in bytes
+        """
+        if self.mode != 'r':
+            raise Exception(f'Stream: {self.name} not opened for reading')
+        if callback is not None and not frame_size:
+            raise ValueError('Must specify the frame_size')
+
+        with self._buffer_lock:
+            self._frame_callback = callback
+            self._frame = bytearray(frame_size) if callback is not None else None
+            self._frame_length = 0
+
+        # Process any data that has already been received
+        self._dispatch_frames()
         
         
     
@@ -227,6 +341,9 @@ class JLinkDataStream(object):
         timeout = self._get_timeout(timeout)
         total_write_len = 0
         start_time = time.time()
+        if isinstance(data, str):
+            data = data.encode()
+        data = memoryview(data).cast('B')
         
         while len(data) > 0:
             self._buffer_event.clear()
@@ -244,19 +361,9 @@ class JLinkDataStream(object):
                 self._notify_event.set()
                 if len(data) == 0:
                     break
-                
-            elapsed = (time.time() - start_time)
-            if elapsed >= timeout:
+
+            if not self._wait_buffer_event(start_time, timeout):
                 break
-            
-            if self._end_time > 0:
-                time_remaining = self._end_time - time.time()
-                if time_remaining <= 0:
-                    break
-            else:
-                time_remaining = WAIT_FOREVER
-                
-            self._buffer_event.wait(min(min(timeout - elapsed, time_remaining), 0.100))
         
         
         if flush: 
@@ -292,6 +399,26 @@ class JLinkDataStream(object):
             
     
 
+    def _wait_buffer_event(self, start_time:float, timeout:float) -> bool:
+        """Wait for the buffer to be updated by the processing thread
+
+        Return false if the timeout or end time has expired
+        """
+        elapsed = (time.time() - start_time)
+        if elapsed >= timeout:
+            return False
+
+        if self._end_time > 0:
+            time_remaining = self._end_time - time.time()
+            if time_remaining <= 0:
+                return False
+        else:
+            time_remaining = WAIT_FOREVER
+
+        self._buffer_event.wait(min(timeout - elapsed, time_remaining, 0.100))
+        return True
+
+
     def _set_notify_event(self, event):
         self._notify_event = event 
      
@@ -313,9 +440,15 @@ class JLinkDataStream(object):
                 self._requires_processing = True
             
         elif self.mode == 'w':
-            write_len = self._ifc.write(self._context, self._buffer)
+            # NOTE: Only this thread consumes the buffer, so the view remains valid while it's written to the device
+            with self._buffer_lock:
+                data = self._buffer.peek()
+            write_len = self._ifc.write(self._context, data)
+            data.release()
             if write_len:
-                self._consume_buffer(write_len)
+                with self._buffer_lock:
+                    self._buffer.consume(write_len)
+                self._buffer_event.set()
             
             if self.buffer_used > 0:
                 self._requires_processing = True
@@ -323,33 +456,44 @@ class JLinkDataStream(object):
     
     
     
-    def _consume_buffer(self, size) -> bytes:
-        with self._buffer_lock:
-            retval = self._buffer[:size]
-            self._buffer = self._buffer[size:]
-            
-            if self._max_read_size != -1:
-                if size <= self._max_read_size:
-                    self._max_read_size -= size 
-                else:
-                    self._max_read_size = 0
-            
-        if self.mode == 'w':
-            self._buffer_event.set()
-        
-        return retval
-    
-    
+    def _on_buffer_consumed(self, size:int):
+        if self._max_read_size != -1:
+            if size <= self._max_read_size:
+                self._max_read_size -= size
+            else:
+                self._max_read_size = 0
+
+
     def _populate_buffer(self, data):
         with self._buffer_lock:
             if isinstance(data, str):
                 data = data.encode()
-            self._buffer.extend(data)
+            self._buffer.write(data)
 
         if self.mode == 'r':
+            self._dispatch_frames()
             self._buffer_event.set()
 
 
+    def _dispatch_frames(self):
+        """Invoke the frame callback with each complete frame in the buffer"""
+        while True:
+            with self._buffer_lock:
+                callback = self._frame_callback
+                if callback is None:
+                    return
+
+                frame = self._frame
+                self._frame_length += self._buffer.readinto(memoryview(frame)[self._frame_length:])
+                if self._frame_length < len(frame):
+                    return
+
+                self._frame = bytearray(len(frame))
+                self._frame_length = 0
+
+            callback(frame)
+
+
     def _get_timeout(self, timeout:float) -> float:
         if timeout is None:
             timeout = self._timeout
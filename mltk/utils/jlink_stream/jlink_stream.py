@@ -23,15 +23,23 @@ class JlinkStreamOptions:
 class JlinkStream:
     """This allows for transferring binary data between a Python script and a JLink-enabled embedded device via the debug interface
 
+    Args:
+        options: The J-Link configuration options
+        device_interface: Optional interface to the device, by default a J-Link connection is used.
+            Use :py:class:`MockDeviceInterface` to simulate a device
+
     See the source code on Github: `mltk/utils/jlink_stream <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/jlink_stream>`_
     """
-    def __init__(self, options:JlinkStreamOptions = None):
-        # import here to avoid circular import
-        from .device_interface import DeviceInterface # #pylint: disable=import-outside-toplevel
+    def __init__(self, options:JlinkStreamOptions = None, device_interface=None):
         if options is None:
             options = self.default_options
 
-        self._ifc = DeviceInterface(options)
+        if device_interface is None:
+            # import here to avoid circular import
+            from .device_interface import DeviceInterface # #pylint: disable=import-outside-toplevel
+            device_interface = DeviceInterface(options)
+
+        self._ifc = device_interface
         self._is_connected = Event()
         self._data_available = Event()
         self._stream_lock = RLock()
@@ -0,0 +1,235 @@
+import time
+import collections
+from typing import Dict, List
+from threading import RLock
+
+from .data_stream import JLinkDataStream
+from .device_interface import MAX_BUFFER_SIZE
+
+
+class MockDeviceInterface:
+    """Simulates an embedded device running the jlink_stream C++ library
+
+    This allows for testing and benchmarking :py:class:`JlinkStream` without a J-Link debugger or embedded device.
+
+    Each stream written by the device (i.e. opened with mode='r' by the Python script)
+    generates data at a constant rate into a device-side buffer of ``buffer_size`` bytes.
+    If the Python script does not read the data fast enough, then the device's buffer overflows and
+    the newly generated data is dropped, see :py:meth:`~get_stats`.
+
+    The generated data is a repeating byte pattern: 0, 1, 2, ..., 255, 0, 1, ...
+    so dropped data may also be detected by verifying the received data.
+
+    The data written by the Python script (i.e. streams opened with mode='w') is returned by :py:meth:`~get_written_data`.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from mltk.utils.jlink_stream import JlinkStream, MockDeviceInterface
+
+        # Simulate a device that generates 16kHz, 16-bit audio
+        device = MockDeviceInterface(read_streams={'audio': 16000*2})
+
+        with JlinkStream(device_interface=device) as jlink_stream:
+            audio_stream = jlink_stream.open('audio', mode='r')
+            for i, frame in enumerate(audio_stream.read_frames(4096, timeout=1.0)):
+                if i == 100:
+                    break
+
+        print(device.get_stats('audio'))
+
+    Args:
+        read_streams: Dictionary of <stream name>: <number of bytes per second generated by the device>
+        max_length: Optional maximum number of bytes generated by each stream
+        command_latency: The simulated amount of time in seconds to issue a command to the device.
+            A J-Link memory access typically takes a few milliseconds
+        buffer_size: The size of each device-side stream buffer in bytes
+
+    See the source code on Github: `mltk/utils/jlink_stream <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/jlink_stream>`_
+    """
+    def __init__(
+        self,
+        read_streams:Dict[str,float]=None,
+        max_length:int=None,
+        command_latency:float=0.001,
+        buffer_size:int=MAX_BUFFER_SIZE
+    ):
+        self.read_streams = dict(read_streams or {})
+        self.max_length = max_length
+        self.command_latency = command_latency
+        self.buffer_size = buffer_size
+        self._lock = RLock()
+        self._is_connected = False
+        self._streams:Dict[str,_MockStream] = {}
+        self._stream_ids:List[_MockStream] = []
+        self._pattern = bytes(range(256)) * (buffer_size // 256 + 2)
+
+
+    @property
+    def buffer_status_mask(self) -> int:
+        self._execute_command()
+        mask = 0
+        with self._lock:
+            for stream in self._streams.values():
+                if stream.mode == 'r':
+                    self._generate_data(stream)
+                    if stream.buffer_length > 0:
+                        mask |= (1 << stream.id)
+        return mask
+
+
+    @property
+    def is_connected(self) -> bool:
+        return self._is_connected
+
+
+    def connect(self, reset_device=False): # pylint: disable=unused-argument
+        self._is_connected = True
+
+
+    def disconnect(self):
+        self._is_connected = False
+
+
+    def open(self, name:str, mode:str) -> JLinkDataStream:
+        if not self.is_connected:
+            raise Exception('Not connected')
+        if mode not in ('r', 'w'):
+            raise Exception(f'Unsupported mode: {mode}')
+        if mode == 'r' and name not in self.read_streams:
+            raise Exception('Command failed (3 - NOT_FOUND)')
+
+        self._execute_command()
+        with self._lock:
+            stream = self._streams.get(name)
+            if stream is None:
+                stream = _MockStream(name=name, mode=mode, id=len(self._stream_ids))
+                self._stream_ids.append(stream)
+                self._streams[name] = stream
+            stream.reset(mode=mode, rate=self.read_streams.get(name, 0))
+
+        return JLinkDataStream(
+            name=name,
+            mode=mode,
+            ifc=self,
+            stream_context=dict(id=stream.id, base_address=0)
+        )
+
+
+    def close(self, name:str):
+        if not self.is_connected:
+            raise Exception('Not connected')
+        self._execute_command()
+
+
+    def read(self, context:dict, length:int) -> bytes:
+        if length == 0:
+            return None
+        if not self.is_connected:
+            raise Exception('Not connected')
+
+        self._execute_command()
+        with self._lock:
+            stream = self._stream_ids[context['id']]
+            self._generate_data(stream)
+
+            # The data is generated from the pattern,
+            # so only the offsets of the buffered data need to be tracked
+            retval = bytearray()
+            while len(retval) < length and stream.segments:
+                offset, segment_length = stream.segments[0]
+                n = min(segment_length, length - len(retval))
+                start = offset % 256
+                retval.extend(self._pattern[start:start+n])
+                if n == segment_length:
+                    stream.segments.popleft()
+                else:
+                    stream.segments[0] = (offset + n, segment_length - n)
+                stream.buffer_length -= n
+                stream.read_length += n
+
+        return bytes(retval) if retval else None
+
+
+    def write(self, context:dict, data:bytes) -> int:
+        if data is None or len(data) == 0:
+            return None
+        if not self.is_connected:
+            raise Exception('Not connected')
+
+        self._execute_command()
+        with self._lock:
+            stream = self._stream_ids[context['id']]
+            write_length = min(len(data), self.buffer_size)
+            stream.written_data.extend(data[:write_length])
+
+        return write_length
+
+
+    def get_stats(self, name:str) -> dict:
+        """Return the statistics of the given stream
+
+        The returned dictionary contains:
+
+        - generated: The number of bytes generated by the device
+        - dropped: The number of generated bytes that were dropped because the device's buffer was full
+        - read: The number of bytes read by the Python script
+        - written: The number of bytes written by the Python script
+        """
+        with self._lock:
+            stream = self._streams[name]
+            if stream.mode == 'r':
+                self._generate_data(stream)
+            return dict(
+                generated=stream.generated_length,
+                dropped=stream.dropped_length,
+                read=stream.read_length,
+                written=len(stream.written_data),
+            )
+
+
+    def get_written_data(self, name:str) -> bytes:
+        """Return the data written to the given stream by the Python script"""
+        with self._lock:
+            return bytes(self._streams[name].written_data)
+
+
+    def _generate_data(self, stream:'_MockStream'):
+        length = int((time.time() - stream.start_time) * stream.rate)
+        if self.max_length is not None:
+            length = min(length, self.max_length)
+        length -= stream.generated_length
+        if length <= 0:
+            return
+
+        buffered_length = min(length, self.buffer_size - stream.buffer_length)
+        if buffered_length > 0:
+            stream.segments.append((stream.generated_length, buffered_length))
+            stream.buffer_length += buffered_length
+        stream.dropped_length += length - buffered_length
+        stream.generated_length += length
+
+
+    def _execute_command(self):
+        if self.command_latency > 0:
+            time.sleep(self.command_latency)
+
+
+
+class _MockStream:
+    def __init__(self, name:str, mode:str, id:int): # pylint: disable=redefined-builtin
+        self.name = name
+        self.id = id
+        self.reset(mode=mode, rate=0)
+
+    def reset(self, mode:str, rate:float):
+        self.mode = mode
+        self.rate = rate
+        self.start_time = time.time()
+        # (generated offset, length) of the data in the device's buffer
+        self.segments = collections.deque()
+        self.buffer_length = 0
+        self.generated_length = 0
+        self.dropped_length = 0
+        self.read_length = 0
+        self.written_data = bytearray()
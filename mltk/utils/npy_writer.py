@@ -0,0 +1,106 @@
+"""Append numpy arrays to a .npy file
+
+See the source code on Github: `mltk/utils/npy_writer.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/npy_writer.py>`_
+"""
+import os
+import struct
+
+import numpy as np
+
+
+# The size of the reserved .npy header in bytes (must be a multiple of 64)
+# This allows for re-writing the header with the final shape once all the arrays have been appended
+_HEADER_SIZE = 256
+_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+class NpyStreamWriter:
+    """Append batches of samples to a ``.npy`` file
+
+    This allows for writing a large array to a ``.npy`` file without first allocating the entire array in RAM.
+    The number of samples does not need to be known in advance, the ``.npy`` header is updated with the
+    final shape when the writer is closed.
+
+    The written file can then be loaded with ``np.load(path, mmap_mode='r')``, see :py:meth:`~load`.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        with NpyStreamWriter('predictions.npy') as writer:
+            for batch in batches:
+                writer.write(batch)
+
+        predictions = writer.load()
+
+    Args:
+        path: Path to the output ``.npy`` file
+        dtype: The data type of the array, if omitted then the dtype of the first written batch is used
+    """
+    def __init__(self, path:str, dtype:np.dtype=None):
+        self.path = path
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.sample_shape:tuple = None
+        self.n_samples = 0
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self._fp = open(path, 'wb')
+        self._fp.write(b'\x00' * _HEADER_SIZE)
+
+
+    def write(self, batch:np.ndarray):
+        """Append the given batch of samples, the first dimension is the batch dimension"""
+        batch = np.asarray(batch)
+        if self.dtype is None:
+            self.dtype = batch.dtype
+        if self.sample_shape is None:
+            self.sample_shape = tuple(batch.shape[1:])
+        elif tuple(batch.shape[1:]) != self.sample_shape:
+            raise ValueError(f'Expected batch with sample shape {self.sample_shape}, got {tuple(batch.shape[1:])}')
+
+        self._fp.write(np.ascontiguousarray(batch, dtype=self.dtype).tobytes())
+        self.n_samples += batch.shape[0]
+
+
+    def close(self):
+        """Write the final .npy header and close the file"""
+        if self._fp is None:
+            return
+        try:
+            self._fp.seek(0)
+            self._fp.write(_generate_header(
+                dtype=self.dtype if self.dtype is not None else np.dtype(np.float32),
+                shape=(self.n_samples,) + (self.sample_shape or ())
+            ))
+        finally:
+            self._fp.close()
+            self._fp = None
+
+
+    def load(self, mmap_mode='r') -> np.ndarray:
+        """Close the writer and return the written array as a memory-mapped numpy array"""
+        self.close()
+        return np.load(self.path, mmap_mode=mmap_mode, allow_pickle=False)
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+
+
+def _generate_header(dtype:np.dtype, shape:tuple) -> bytes:
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': tuple(shape),
+    }).encode('latin1')
+
+    # Pad the header with spaces so that it fills the reserved space (it must end with a newline)
+    header_len = _HEADER_SIZE - len(_MAGIC) - 2
+    if len(header) + 1 > header_len:
+        raise ValueError(f'Array shape: {shape} too large for .npy header')
+    header = header + b' ' * (header_len - len(header) - 1) + b'\n'
+    return _MAGIC + struct.pack('<H', header_len) + header
@@ -0,0 +1,209 @@
+"""Shared memory result transport for the ProcessPool
+
+Each subprocess is given a ring of :py:class:`multiprocessing.shared_memory.SharedMemory` slabs
+that are created and owned by the parent process.
+With each invocation, the parent hands the subprocess the index of a free slab.
+The subprocess copies the numpy arrays of its result directly into that slab
+and only sends a small header (the array offsets, shapes and dtypes) through the stdout pipe.
+The parent then returns numpy arrays that are views of the slab.
+
+A slab is returned to the ring once all of the numpy arrays (and any views of those arrays)
+referencing it have been garbage collected. If no slab is free, or the result does not fit
+into a slab, then the result is pickled through the pipe as usual.
+"""
+from typing import List, Callable
+import ctypes
+import threading
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+SHM_SLOT_KWARG = '__mltk_process_pool_shm_slot__'
+SHM_NAMES_ENV = 'MLTK_PROCESS_POOL_SHM_NAMES'
+ALIGNMENT = 64
+
+
+class SharedArrayRef:
+    """Placeholder for a numpy array that was written to a shared memory slab"""
+    __slots__ = ('offset', 'shape', 'dtype')
+
+    def __init__(self, offset:int, shape:tuple, dtype:np.dtype):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return (self.offset, self.shape, self.dtype)
+
+    def __setstate__(self, state):
+        self.offset, self.shape, self.dtype = state
+
+
+class SharedMemoryRing:
+    """Ring of shared memory slabs used by a single subprocess
+
+    This is instantiated in the parent process which owns the slabs.
+
+    Args:
+        n_slots: The number of slabs in the ring
+        slot_size: The size of each slab in bytes
+    """
+    def __init__(self, n_slots:int, slot_size:int):
+        if n_slots <= 0 or slot_size <= 0:
+            raise ValueError('Both n_slots and slot_size must be greater than 0')
+
+        self.slot_size = slot_size
+        self._lock = threading.Lock()
+        self._free_slots = list(range(n_slots))
+        self._slabs:List[shared_memory.SharedMemory] = []
+        # NOTE: A Python subclass of a ctypes array is used as the numpy array base object.
+        #       numpy collapses view chains to the first non-ndarray base object,
+        #       so all views of the returned arrays keep a reference to this object.
+        #       Unlike memoryview, this object also supports weak references
+        #       which allows for detecting when the slab is no longer used.
+        self._buffer_type = type('_SharedMemorySlabBuffer', (ctypes.c_uint8 * slot_size,), {})
+        try:
+            for _ in range(n_slots):
+                self._slabs.append(shared_memory.SharedMemory(create=True, size=slot_size))
+        except:
+            self.close()
+            raise
+
+    @property
+    def names(self) -> List[str]:
+        """The OS names of the shared memory slabs"""
+        return [x.name for x in self._slabs]
+
+    @property
+    def n_free(self) -> int:
+        """The number of slabs that are not referenced by any results"""
+        with self._lock:
+            return len(self._free_slots)
+
+    def acquire(self) -> int:
+        """Acquire a free slab and return its index, return -1 if no slab is available"""
+        with self._lock:
+            if not self._free_slots:
+                return -1
+            return self._free_slots.pop(0)
+
+    def release(self, slot:int):
+        """Return the given slab to the ring"""
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def decode(self, slot:int, obj:object) -> object:
+        """Replace the :py:class:`SharedArrayRef` in the given object with numpy array views of the slab
+
+        The slab is automatically released once all returned views have been garbage collected.
+        """
+        if slot == -1:
+            return obj
+
+        slab_buffer = self._buffer_type.from_buffer(self._slabs[slot].buf)
+
+        def _decode(x):
+            if not isinstance(x, SharedArrayRef):
+                return x
+            count = int(np.prod(x.shape, dtype=np.int64))
+            arr = np.frombuffer(slab_buffer, dtype=x.dtype, count=count, offset=x.offset)
+            return arr.reshape(x.shape)
+
+        retval = map_structure(obj, _decode)
+        weakref.finalize(slab_buffer, self.release, slot)
+        return retval
+
+    def close(self):
+        """Close and unlink all of the shared memory slabs"""
+        for slab in self._slabs:
+            try:
+                slab.unlink()
+            except:
+                pass
+            try:
+                slab.close()
+            except BufferError:
+                # Results still reference this slab,
+                # the memory is released once they are garbage collected
+                pass
+            except:
+                pass
+        self._slabs = []
+
+
+class SharedMemoryWriter:
+    """Writes the numpy arrays of a result into a shared memory slab
+
+    This is instantiated in the subprocess.
+
+    Args:
+        names: The OS names of the slabs created by the parent's :py:class:`SharedMemoryRing`
+    """
+    def __init__(self, names:List[str]):
+        self._slabs:List[shared_memory.SharedMemory] = []
+        for name in names:
+            slab = shared_memory.SharedMemory(name=name, create=False)
+            _unregister_from_resource_tracker(slab)
+            self._slabs.append(slab)
+
+    def encode(self, slot:int, obj:object) -> object:
+        """Copy the numpy arrays of the given object into the slab and replace them with :py:class:`SharedArrayRef`
+
+        Arrays that do not fit into the remaining space of the slab are left as-is
+        and are pickled through the pipe.
+        """
+        if slot == -1:
+            return obj
+
+        buf = self._slabs[slot].buf
+        offset = 0
+
+        def _encode(x):
+            nonlocal offset
+            if not isinstance(x, np.ndarray) or x.dtype.hasobject:
+                return x
+            start = (offset + ALIGNMENT - 1) & ~(ALIGNMENT - 1)
+            end = start + x.nbytes
+            if end > len(buf):
+                return x
+            dst = np.ndarray(x.shape, dtype=x.dtype, buffer=buf, offset=start)
+            dst[...] = x
+            del dst
+            offset = end
+            return SharedArrayRef(start, x.shape, x.dtype)
+
+        return map_structure(obj, _encode)
+
+    def close(self):
+        for slab in self._slabs:
+            try:
+                slab.close()
+            except:
+                pass
+        self._slabs = []
+
+
+def map_structure(obj:object, func:Callable) -> object:
+    """Apply the given function to each leaf of the nested tuples, lists and dicts"""
+    if isinstance(obj, tuple):
+        if hasattr(obj, '_fields'): # namedtuple
+            return type(obj)(*(map_structure(x, func) for x in obj))
+        return tuple(map_structure(x, func) for x in obj)
+    if isinstance(obj, list):
+        return [map_structure(x, func) for x in obj]
+    if isinstance(obj, dict):
+        return {k: map_structure(v, func) for k, v in obj.items()}
+    return func(obj)
+
+
+def _unregister_from_resource_tracker(slab:shared_memory.SharedMemory):
+    # The parent process owns the slab.
+    # Python's resource tracker would otherwise unlink the slab when the subprocess exits
+    # See: https://bugs.python.org/issue38119
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(slab._name, 'shared_memory') # pylint: disable=protected-access
+    except:
+        pass
@@ -11,12 +11,14 @@ sys.path.append(os.getcwd())
 
 
 from mltk.utils.python import import_module_at_path
-from mltk.utils.process_pool._utils import (read_data, write_data)
+from mltk.utils.process_pool._utils import (read_data, write_data, CONTEXT_KWARG)
+from mltk.utils.process_pool._shared_memory import (SHM_SLOT_KWARG, SHM_NAMES_ENV)
 
 
 MODULE_PATH = os.environ['MODULE_PATH']
 FUNCTION_NAME = os.environ['FUNCTION_NAME']
 PROCESS_POOL_NAME = os.environ['PROCESS_POOL_NAME']
+SHM_NAMES = os.environ.get(SHM_NAMES_ENV, '')
 
 
 try:
@@ -37,18 +39,34 @@ except Exception as e:
 
 
 def main():
+    shm_writer = None
+    if SHM_NAMES:
+        from mltk.utils.process_pool._shared_memory import SharedMemoryWriter
+        shm_writer = SharedMemoryWriter(SHM_NAMES.split(','))
+
+    # The "sticky" context is only sent when it changes,
+    # it is merged into the kwargs of every invocation
+    context = {}
+
     while True:
         args, kwargs = read_data(stdin)
         if not args and not kwargs:
             return
 
-        tx_data = function_instance(*args, **kwargs)
+        shm_slot = kwargs.pop(SHM_SLOT_KWARG, -1)
+        if CONTEXT_KWARG in kwargs:
+            context = kwargs.pop(CONTEXT_KWARG)
+
+        tx_data = function_instance(*args, **{**context, **kwargs})
 
         if isinstance(tx_data, (tuple,list)):
             args = tx_data
         else:
             args = (tx_data,)
 
+        if shm_writer is not None:
+            args = shm_writer.encode(shm_slot, args)
+
         write_data(stdout, args, {})
 
 
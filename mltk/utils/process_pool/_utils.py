@@ -11,6 +11,7 @@ except ModuleNotFoundError:
 
 
 MAX_LENGTH = ((1 << 28) - 1)
+CONTEXT_KWARG = '__mltk_process_pool_context__'
 
 
 def write_data(
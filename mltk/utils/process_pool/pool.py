@@ -10,7 +10,8 @@ import copy
 import logging
 from  multiprocessing import cpu_count as get_cpu_count
 
-from ._utils import (read_data, write_data)
+from ._utils import (read_data, write_data, CONTEXT_KWARG)
+from ._shared_memory import (SharedMemoryRing, SHM_SLOT_KWARG, SHM_NAMES_ENV)
 
 
 class ProcessPool:
@@ -83,6 +84,24 @@ class ProcessPool:
             results.append(y)
 
 
+    Additionally, a "sticky" context may be given to the pool.
+    The context is a dictionary of keyword arguments that is sent once to each subprocess
+    (rather than with every invocation) and is automatically merged into the keyword arguments
+    of each entry_point call. This is useful when the entry_point requires large, static parameters.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        def my_processing_func(x, params):
+            return x * params.scale
+
+        pool = ProcessPool(my_processing_func, 0.5, context=dict(params=my_params))
+        y = pool(3) # my_processing_func(3, params=my_params)
+
+        # Update the context, it is re-sent to each subprocess before its next invocation
+        pool.set_context(params=my_new_params)
+
+
     See the source code on Github: `mltk/utils/process_pool <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/process_pool>`_
 
     Args:
@@ -99,6 +118,20 @@ class ProcessPool:
         env: The OS environment variables to export in the subprocesses
         disable_gpu_in_subprocesses: Disables NVidia GPU usage in the subprocesses. This is necessary if the Tensorflow python package is imported in the entry_point's module
         logger: Optional Python logger
+        shared_memory_size: If greater than 0, then return the numpy arrays of the entry_point's results
+            through shared memory instead of pickling them through the subprocess's pipe.
+            This specifies the size in bytes of each shared memory slab, it should be large enough to hold
+            all of the numpy arrays returned by a single call to the entry_point.
+            The returned numpy arrays are views of the shared memory.
+            A slab is re-used once all of the arrays (and views of the arrays) referencing it have been garbage collected.
+            If no slab is available or the result does not fit in a slab then the result is pickled.
+            This is ignored if ``debug=True``
+        shared_memory_slots: The number of shared memory slabs allocated for each subprocess.
+            This is only used if ``shared_memory_size > 0``
+        context: Optional dictionary of keyword arguments that is installed once in each subprocess
+            and merged into the keyword arguments of every entry_point invocation.
+            Keyword arguments given to an invocation take precedence over the context.
+            See :py:meth:`~set_context`
     """
     def __init__(
         self,
@@ -109,7 +142,10 @@ class ProcessPool:
         debug=False,
         env:Dict[str,str]=None,
         disable_gpu_in_subprocesses=True,
-        logger:logging.Logger=None
+        logger:logging.Logger=None,
+        shared_memory_size:int=0,
+        shared_memory_slots:int=4,
+        context:Dict[str,object]=None,
     ):
         if os.environ.get('MLTK_PROCESS_POOL_SUBPROCESS', ''):
             return
@@ -127,6 +163,11 @@ class ProcessPool:
         self._lock = threading.Lock()
         self._detected_pthread_error = False
         self._detected_subprocess_error:str = None
+        self._shared_memory_size = 0 if debug else shared_memory_size
+        self._shared_memory_slots = shared_memory_slots
+        self._context:Dict[str,object] = dict(context) if context else {}
+        self._context_version = 0
+        self._shutdown_listeners:List[Callable] = []
 
         self.logger.info(f'{self.name} is using {self.n_jobs} subprocesses')
 
@@ -162,6 +203,11 @@ class ProcessPool:
         """The name of this processing pool instance"""
         return self._name
 
+    @property
+    def shared_memory_enabled(self) -> bool:
+        """Returns true if results are returned through shared memory"""
+        return self._shared_memory_size > 0
+
     @property
     def is_running(self) -> bool:
         """Returns true if the processing pool is actively running"""
@@ -178,6 +224,29 @@ class ProcessPool:
                 self._detected_subprocess_error = v
 
 
+    @property
+    def context(self) -> Dict[str,object]:
+        """The keyword arguments that are merged into every entry_point invocation"""
+        with self._lock:
+            return self._context
+
+    def set_context(self, **kwargs):
+        """Set the "sticky" context of the subprocesses
+
+        The given keyword arguments are sent once to each subprocess
+        (before the subprocess's next invocation) and are then merged into the keyword arguments
+        of every entry_point invocation.
+        This replaces any previously set context.
+        """
+        with self._lock:
+            self._context = kwargs
+            self._context_version += 1
+
+    def _get_context(self):
+        with self._lock:
+            return self._context_version, self._context
+
+
     def start(self):
         """Start the processing pool subprocesses"""
         if self.is_running:
@@ -192,12 +261,24 @@ class ProcessPool:
                 entry_point=self._entry_point,
                 debug=self._debug,
                 env=self._env,
-                logger=self.logger
+                logger=self.logger,
+                shared_memory_size=self._shared_memory_size,
+                shared_memory_slots=self._shared_memory_slots,
             )
             self._processes.append(subprocess)
             self._ready_q.put(subprocess)
 
 
+    def add_shutdown_listener(self, callback:Callable):
+        """Register a function that is called (without arguments) when the processing pool is shutdown
+
+        This allows for threads that are waiting on the pool's results to be notified of the shutdown
+        rather than polling :py:attr:`~is_running`
+        """
+        with self._lock:
+            self._shutdown_listeners.append(callback)
+
+
     def shutdown(self):
         """Shutdown the processing pool subprocesses immediately"""
         if self.is_running:
@@ -205,6 +286,14 @@ class ProcessPool:
             for subprocess in self._processes:
                 subprocess.shutdown()
 
+            with self._lock:
+                listeners = list(self._shutdown_listeners)
+            for callback in listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    self.logger.debug(f'{self.name} shutdown listener failed, err: {e}', exc_info=e)
+
             if self._detected_pthread_error:
                 self.logger.warning(
                     '\n***\nYour system may be running low on resources.\n'
@@ -359,7 +448,9 @@ class _Subprocess(threading.Thread):
         entry_point:Callable,
         debug:bool,
         env:Dict[str,str],
-        logger:logging
+        logger:logging,
+        shared_memory_size:int=0,
+        shared_memory_slots:int=0,
     ):
         threading.Thread.__init__(
             self,
@@ -377,6 +468,8 @@ class _Subprocess(threading.Thread):
         self._invoke_batch:ProcessPoolBatch=None
         self._invoke_batch_index:int=-1
         self._shutdown_event = threading.Event()
+        self._shm_ring:SharedMemoryRing = None
+        self._context_version = -1
 
         if not debug:
             curdir = os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')
@@ -388,6 +481,12 @@ class _Subprocess(threading.Thread):
                 PROCESS_POOL_NAME=name,
             ))
             os_env.update(env)
+            if shared_memory_size > 0:
+                self._shm_ring = SharedMemoryRing(
+                    n_slots=shared_memory_slots,
+                    slot_size=shared_memory_size
+                )
+                os_env[SHM_NAMES_ENV] = ','.join(self._shm_ring.names)
             self._subprocess = subprocess.Popen(
                 [sys.executable, '-u', subprocess_main_path],
                 stdin=subprocess.PIPE,
@@ -450,43 +549,69 @@ class _Subprocess(threading.Thread):
                     raise RuntimeError(f'{self.name} terminated with error code: {retcode}')
                 return
 
-            write_data(
-                self._subprocess.stdin,
-                self._invoke_args,
-                self._invoke_kwargs,
-            )
-            self._invoke_args = None
-            self._invoke_kwargs = None
+            invoke_kwargs = dict(self._invoke_kwargs)
+            # Only send the context if the subprocess does not have the latest version
+            context_version, context = self.pool._get_context()
+            if context_version != self._context_version:
+                invoke_kwargs[CONTEXT_KWARG] = context
+                self._context_version = context_version
 
-            result, _ = read_data(
-                self._subprocess.stdout
-            )
+            shm_slot = -1
+            if self._shm_ring is not None:
+                shm_slot = self._shm_ring.acquire()
+                invoke_kwargs[SHM_SLOT_KWARG] = shm_slot
 
-            # If the subprocess failed to return data
-            if len(result) == 0:
-                # Wait a moment for the subprocess to complete
-                self._subprocess.wait(1)
-                # Poll the subprocesses exit code
-                retcode = self._subprocess.poll()
-
-                # If an exit code was returned
-                if retcode is not None:
-                    # If the retcode is non-zero then the subprocess failed
-                    # So throw an exception
-                    if retcode != 0:
-                        raise RuntimeError(f'{self.name} terminated with error code: {retcode}')
+            try:
+                write_data(
+                    self._subprocess.stdin,
+                    self._invoke_args,
+                    invoke_kwargs,
+                )
+                self._invoke_args = None
+                self._invoke_kwargs = None
 
-                    # Otherwise just return as the subprocess is being gracefully terminated
-                    return
+                result, _ = read_data(
+                    self._subprocess.stdout
+                )
 
-                # Otherwise the subprocess is not properly generating data
-                # So throw an exception
-                raise RuntimeError(f'{self.name} did not return a result')
+                # If the subprocess failed to return data
+                if len(result) == 0:
+                    # Wait a moment for the subprocess to complete
+                    self._subprocess.wait(1)
+                    # Poll the subprocesses exit code
+                    retcode = self._subprocess.poll()
+
+                    # If an exit code was returned
+                    if retcode is not None:
+                        # If the retcode is non-zero then the subprocess failed
+                        # So throw an exception
+                        if retcode != 0:
+                            raise RuntimeError(f'{self.name} terminated with error code: {retcode}')
+
+                        # Otherwise just return as the subprocess is being gracefully terminated
+                        return
+
+                    # Otherwise the subprocess is not properly generating data
+                    # So throw an exception
+                    raise RuntimeError(f'{self.name} did not return a result')
+
+                if self._shm_ring is not None:
+                    result = self._shm_ring.decode(shm_slot, result)
+                    # The slab is now released once the result has been garbage collected
+                    shm_slot = -1
+            finally:
+                # If the subprocess failed before its result was decoded
+                # then return the slab to the ring
+                if shm_slot != -1:
+                    self._shm_ring.release(shm_slot)
 
             if isinstance(result, (tuple,list)) and len(result) == 1:
                 result = result[0]
 
             self._invoke_batch._add_results(self._invoke_batch_index, result)
+            # Release the local reference to the result
+            # so that its shared memory slab can be re-used as soon as the caller is done with it
+            result = None
             self._invoke_batch = None
             self._invoke_batch_index = -1
             self.pool._ready_q.put(self)
@@ -498,7 +623,8 @@ class _Subprocess(threading.Thread):
             if self._shutdown_event.is_set():
                 break
 
-            result = self._entry_point(*self._invoke_args, **self._invoke_kwargs)
+            _, context = self.pool._get_context()
+            result = self._entry_point(*self._invoke_args, **{**context, **self._invoke_kwargs})
             result = result or (None, )
             self._invoke_args = None
             self._invoke_kwargs = None
@@ -549,6 +675,8 @@ class _Subprocess(threading.Thread):
             self._subprocess.kill()
         except:
             pass
+        if self._shm_ring is not None:
+            self._shm_ring.close()
 
         self._shutdown_event.set()
         self._invoke_sem.release()
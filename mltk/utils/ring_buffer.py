@@ -0,0 +1,110 @@
+"""Fixed-size FIFO of bytes
+
+See the source code on Github: `mltk/utils/ring_buffer.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/ring_buffer.py>`_
+"""
+
+
+class RingBuffer:
+    """Fixed-size FIFO of bytes
+
+    Data is copied directly between the ring's storage and the caller's buffers,
+    so reading does not shift (i.e. copy) the remaining data.
+
+    Data written with :py:meth:`~write_pending` is not readable until it is committed with :py:meth:`~commit`,
+    this way e.g. a partially received packet is not visible to the reader.
+
+    .. note:: This is not thread-safe, the caller must synchronize access
+
+    Args:
+        capacity: The size of the buffer in bytes
+    """
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._head = 0
+        self._length = 0
+        self._pending = 0
+
+    def __len__(self) -> int:
+        """The number of committed bytes"""
+        return self._length
+
+    @property
+    def free(self) -> int:
+        """The number of bytes that may be written"""
+        return self.capacity - self._length - self._pending
+
+    def write(self, data) -> int:
+        """Write and commit the given data, return the number of bytes written"""
+        n = self.write_pending(data)
+        self.commit()
+        return n
+
+    def write_pending(self, data) -> int:
+        """Write the given data after the committed data, return the number of bytes written"""
+        data = memoryview(data).cast('B')
+        n = min(len(data), self.free)
+        pos = (self._head + self._length + self._pending) % self.capacity
+        first = min(n, self.capacity - pos)
+        self._view[pos:pos+first] = data[:first]
+        if n > first:
+            self._view[:n-first] = data[first:n]
+        self._pending += n
+        return n
+
+    def commit(self):
+        """Make the pending data readable"""
+        self._length += self._pending
+        self._pending = 0
+
+    def discard_pending(self):
+        """Drop the pending data"""
+        self._pending = 0
+
+    def readinto(self, buffer) -> int:
+        """Read the committed data into the given buffer, return the number of bytes read"""
+        out = memoryview(buffer).cast('B')
+        n = min(len(out), self._length)
+        first = min(n, self.capacity - self._head)
+        out[:first] = self._view[self._head:self._head+first]
+        if n > first:
+            out[first:n] = self._view[:n-first]
+        self.consume(n)
+        return n
+
+    def read(self, max_size:int=None) -> bytes:
+        """Return up to max_size bytes of the committed data"""
+        n = self._length if max_size is None else min(max_size, self._length)
+        first = min(n, self.capacity - self._head)
+        if n > first:
+            retval = bytes(self._view[self._head:]) + bytes(self._view[:n-first])
+        else:
+            retval = bytes(self._view[self._head:self._head+n])
+        self.consume(n)
+        return retval
+
+    def peek(self, max_size:int=None) -> memoryview:
+        """Return a view of the committed data at the head of the buffer, without consuming it
+
+        Only the contiguous data is returned, i.e. up to the end of the ring's storage.
+        The view is only valid until the buffer is next modified.
+        """
+        n = self._length if max_size is None else min(max_size, self._length)
+        n = min(n, self.capacity - self._head)
+        return self._view[self._head:self._head+n]
+
+    def consume(self, n:int):
+        """Drop n bytes of the committed data"""
+        n = min(n, self._length)
+        self._length -= n
+        self._head = (self._head + n) % self.capacity
+        if self._length == 0 and self._pending == 0:
+            # Start at the beginning of the buffer so that subsequent reads do not wrap
+            self._head = 0
+
+    def clear(self):
+        """Drop all data"""
+        self._head = 0
+        self._length = 0
+        self._pending = 0
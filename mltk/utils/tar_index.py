@@ -0,0 +1,396 @@
+"""Random access to the files in an uncompressed .tar archive
+
+This allows for reading dataset samples directly from a .tar archive, i.e. without extracting it.
+The path to a file in an archive has the form: ``<archive path>.tar/<file path in archive>``, e.g.::
+
+    ~/.mltk/datasets/speech_commands.tar/yes/0a7c2a8d_nohash_0.wav
+
+.. highlight:: python
+.. code-block:: python
+
+    from mltk.utils import tar_index
+
+    with tar_index.open_file('~/.mltk/datasets/speech_commands.tar/yes/0a7c2a8d_nohash_0.wav') as f:
+        header = f.read(44)
+
+See the source code on Github: `mltk/utils/tar_index.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/tar_index.py>`_
+"""
+from typing import Dict, List, Tuple, BinaryIO
+import os
+import io
+import json
+import tarfile
+import posixpath
+import threading
+
+from .path import fullpath, create_user_dir
+from .hasher import generate_hash
+
+
+TAR_EXTENSION = '.tar'
+
+_INDEX_VERSION = 1
+_index_cache:Dict[str,'TarIndex'] = {}
+_tar_path_cache:Dict[str,bool] = {}
+_cache_lock = threading.Lock()
+
+
+
+class TarIndex:
+    """Index of the files in an uncompressed .tar archive
+
+    The index maps the path of each file in the archive to the offset and size of its data in the archive,
+    so a file can be read with a single seek and read (or memory-mapped) of the archive.
+
+    Generating the index requires reading each member header of the archive (but not the member data).
+    The index is saved to ``<archive path>.index.json`` (or to ``<user dir>/tar_index/`` if the archive's directory is not writable)
+    and is re-used until the archive's modification time or size changes.
+
+    .. note:: Only uncompressed archives are supported, compressed archives do not allow for random access
+
+    Use :py:meth:`~load` to load the index of an archive, the loaded indices are cached by the current process.
+
+    Args:
+        tar_path: Path to the .tar archive
+        files: Dictionary of <file path in archive>: (data offset, size)
+    """
+    def __init__(self, tar_path:str, files:Dict[str,Tuple[int,int]]):
+        self.tar_path = tar_path
+        self._files = files
+        self._dirs:Dict[str,Tuple[List[str],List[str]]] = None
+        self._lock = threading.Lock()
+        self._stat_key:List[int] = None
+
+
+    @staticmethod
+    def load(tar_path:str) -> 'TarIndex':
+        """Load the index of the given .tar archive
+
+        The index is generated if necessary.
+        """
+        tar_path = fullpath(tar_path).replace('\\', '/')
+        st = os.stat(tar_path)
+        stat_key = [st.st_mtime_ns, st.st_size]
+
+        with _cache_lock:
+            index = _index_cache.get(tar_path)
+        if index is not None and index._stat_key == stat_key:
+            return index
+
+        index = _read_index_file(tar_path, stat_key)
+        if index is None:
+            index = TarIndex(tar_path, _scan_tar_file(tar_path))
+            _write_index_file(index, stat_key)
+        index._stat_key = stat_key
+
+        with _cache_lock:
+            _index_cache[tar_path] = index
+        return index
+
+
+    @property
+    def files(self) -> Dict[str,Tuple[int,int]]:
+        """Dictionary of <file path in archive>: (data offset, size)"""
+        return self._files
+
+
+    def exists(self, name:str) -> bool:
+        """Return if the given file or directory exists in the archive"""
+        name = _normalize_name(name)
+        return name in self._files or name in self._get_dirs()
+
+
+    def isfile(self, name:str) -> bool:
+        """Return if the given file exists in the archive"""
+        return _normalize_name(name) in self._files
+
+
+    def isdir(self, name:str) -> bool:
+        """Return if the given directory exists in the archive"""
+        return _normalize_name(name) in self._get_dirs()
+
+
+    def listdir(self, name:str='') -> Tuple[List[str],List[str]]:
+        """Return the names of the (sub-directories, files) in the given directory of the archive
+
+        Raises:
+            FileNotFoundError: If the directory is not in the archive
+        """
+        dirs = self._get_dirs().get(_normalize_name(name))
+        if dirs is None:
+            raise FileNotFoundError(f'Directory {name} not found in {self.tar_path}')
+        return list(dirs[0]), list(dirs[1])
+
+
+    def get_file(self, name:str) -> Tuple[int,int]:
+        """Return the (data offset, size) of the given file in the archive
+
+        Raises:
+            FileNotFoundError: If the file is not in the archive
+        """
+        try:
+            return self._files[_normalize_name(name)]
+        except KeyError:
+            raise FileNotFoundError(f'{name} not found in {self.tar_path}') # pylint: disable=raise-missing-from
+
+
+    def open(self, name:str) -> 'TarMemberFile':
+        """Open the given file in the archive for reading"""
+        offset, size = self.get_file(name)
+        return TarMemberFile(self.tar_path, offset=offset, size=size, name=f'{self.tar_path}/{_normalize_name(name)}')
+
+
+    def read(self, name:str) -> bytes:
+        """Return the contents of the given file in the archive"""
+        with self.open(name) as f:
+            return f.read()
+
+
+    def _get_dirs(self) -> Dict[str,Tuple[List[str],List[str]]]:
+        with self._lock:
+            if self._dirs is None:
+                # <dir path>: ([sub-directory names], [file names])
+                dirs = {'': ([], [])}
+                def _add_dir(dir_path:str):
+                    entry = dirs.get(dir_path)
+                    if entry is None:
+                        entry = dirs[dir_path] = ([], [])
+                        parent, _, dn = dir_path.rpartition('/')
+                        _add_dir(parent)[0].append(dn)
+                    return entry
+
+                for name in self._files:
+                    parent, _, fn = name.rpartition('/')
+                    _add_dir(parent)[1].append(fn)
+                self._dirs = dirs
+            return self._dirs
+
+
+
+class TarMemberFile(io.RawIOBase):
+    """Read-only file object of a file in an uncompressed .tar archive
+
+    The file object's positions are relative to the beginning of the file in the archive.
+    The file's data is located at ``offset`` bytes in the archive returned by ``fileno()``,
+    which allows for memory-mapping the file.
+    """
+    def __init__(self, tar_path:str, offset:int, size:int, name:str=None):
+        super().__init__()
+        self.tar_path = tar_path
+        self.offset = offset
+        self.size = size
+        self.name = name or tar_path
+        self._f = open(tar_path, 'rb', buffering=0) # pylint: disable=consider-using-with
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos:int, whence:int=io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self.size
+        if pos < 0:
+            raise ValueError(f'Negative seek position {pos}')
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        n = max(min(len(buffer), self.size - self._pos), 0)
+        if n == 0:
+            return 0
+        self._f.seek(self.offset + self._pos)
+        n = self._f.readinto(memoryview(buffer)[:n])
+        self._pos += n
+        return n
+
+    def readall(self) -> bytes:
+        n = max(self.size - self._pos, 0)
+        self._f.seek(self.offset + self._pos)
+        data = self._f.read(n)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+
+def split_tar_path(path:str) -> Tuple[str,str]:
+    """Split the given path into the path to a .tar archive and the path of a file in the archive
+
+    e.g. ``/datasets/speech_commands.tar/yes/sample.wav`` -> (``/datasets/speech_commands.tar``, ``yes/sample.wav``)
+
+    Returns:
+        (tar path, path in archive), if the given path is not in a .tar archive then (None, path)
+    """
+    norm_path = path.replace('\\', '/')
+    if TAR_EXTENSION + '/' not in norm_path:
+        if norm_path.endswith(TAR_EXTENSION) and _is_tar_file(norm_path):
+            return norm_path, ''
+        return None, path
+
+    start = 0
+    while True:
+        i = norm_path.find(TAR_EXTENSION + '/', start)
+        if i == -1:
+            break
+        tar_path = norm_path[:i + len(TAR_EXTENSION)]
+        if _is_tar_file(tar_path):
+            return tar_path, norm_path[i + len(TAR_EXTENSION) + 1:]
+        start = i + 1
+
+    return None, path
+
+
+def is_tar_path(path:str) -> bool:
+    """Return if the given path is a .tar archive or a path in a .tar archive"""
+    return split_tar_path(path)[0] is not None
+
+
+def open_file(path:str) -> BinaryIO:
+    """Open the given file for reading in binary mode
+
+    If the path is a path to a file in a .tar archive (e.g. ``/datasets/speech_commands.tar/yes/sample.wav``),
+    then a :py:class:`TarMemberFile` is returned, otherwise the file is opened with ``open(path, 'rb')``
+    """
+    tar_path, name = split_tar_path(path)
+    if tar_path is None:
+        return open(path, 'rb') # pylint: disable=consider-using-with
+    return TarIndex.load(tar_path).open(name)
+
+
+def read_file(path:str) -> bytes:
+    """Return the contents of the given file, the path may be a path to a file in a .tar archive"""
+    with open_file(path) as f:
+        return f.read()
+
+
+def exists(path:str) -> bool:
+    """Return if the given file or directory exists, the path may be a path in a .tar archive"""
+    tar_path, name = split_tar_path(path)
+    if tar_path is None:
+        return os.path.exists(path)
+    return TarIndex.load(tar_path).exists(name)
+
+
+def listdir(path:str) -> List[str]:
+    """Return the names of the entries in the given directory, the path may be a path in a .tar archive"""
+    tar_path, name = split_tar_path(path)
+    if tar_path is None:
+        return os.listdir(path)
+    dirs, files = TarIndex.load(tar_path).listdir(name)
+    return dirs + files
+
+
+def get_file_stat(path:str) -> Tuple[int,int]:
+    """Return the (size, modification time in nanoseconds) of the given file
+
+    If the path is a path to a file in a .tar archive,
+    then the file's size in the archive and the archive's modification time are returned.
+    """
+    tar_path, name = split_tar_path(path)
+    if tar_path is None:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    tar_index = TarIndex.load(tar_path)
+    _, size = tar_index.get_file(name)
+    return size, tar_index._stat_key[0] # pylint: disable=protected-access
+
+
+
+def _is_tar_file(path:str) -> bool:
+    # NOTE: Only existing archives are cached, an archive may be created after it was first checked
+    if path in _tar_path_cache:
+        return True
+    if not os.path.isfile(path):
+        return False
+    with _cache_lock:
+        _tar_path_cache[path] = True
+    return True
+
+
+def _normalize_name(name:str) -> str:
+    name = name.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.strip('/')
+
+
+def _scan_tar_file(tar_path:str) -> Dict[str,Tuple[int,int]]:
+    files = {}
+    symlinks = {}
+    try:
+        # NOTE: Only uncompressed archives are supported,
+        #       in this mode tarfile seeks over the member data (i.e. only the member headers are read)
+        with tarfile.open(tar_path, mode='r:') as tar:
+            for member in tar:
+                name = _normalize_name(member.name)
+                if not name or name.startswith('../') or '/../' in name:
+                    continue
+                if member.isreg() and not member.issparse():
+                    files[name] = (member.offset_data, member.size)
+                elif member.islnk():
+                    target = files.get(_normalize_name(member.linkname))
+                    if target is not None:
+                        files[name] = target
+                elif member.issym():
+                    symlinks[name] = posixpath.normpath(posixpath.join(posixpath.dirname(name), member.linkname))
+    except tarfile.ReadError as e:
+        raise ValueError(f'{tar_path} is not an uncompressed .tar archive, err: {e}') # pylint: disable=raise-missing-from
+
+    # Symbolic links to files in the archive refer to the target's data
+    for name, target in symlinks.items():
+        if target in files:
+            files[name] = files[target]
+
+    return files
+
+
+def _get_index_paths(tar_path:str) -> List[str]:
+    return [
+        f'{tar_path}.index.json',
+        f'{create_user_dir("tar_index")}/{generate_hash(tar_path)}.json'
+    ]
+
+
+def _read_index_file(tar_path:str, stat_key:List[int]) -> TarIndex:
+    for index_path in _get_index_paths(tar_path):
+        try:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if data.get('version') == _INDEX_VERSION and data.get('stat') == stat_key and data.get('tar_path') == tar_path:
+            return TarIndex(tar_path, {name: tuple(entry) for name, entry in data['files'].items()})
+    return None
+
+
+def _write_index_file(index:TarIndex, stat_key:List[int]):
+    data = dict(version=_INDEX_VERSION, tar_path=index.tar_path, stat=stat_key, files=index.files)
+    for index_path in _get_index_paths(index.tar_path):
+        tmp_path = f'{index_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            # NOTE: The index is replaced atomically in case another process is reading it
+            os.replace(tmp_path, index_path)
+            return
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except:
+                pass
@@ -0,0 +1,146 @@
+import os
+import io
+import time
+import hashlib
+import tarfile
+import zipfile
+import pytest
+
+from mltk.utils.archive import extract_archive, ArchiveHashError
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+FILES = {
+    'root/a.txt': b'a' * 100,
+    'root/sub/b.bin': os.urandom(4096),
+    'root/sub/deeper/c.txt': b'c' * 10,
+}
+
+
+@pytest.fixture
+def tmp_dir():
+    d = create_tempdir('utests/archive')
+    remove_directory(d)
+    os.makedirs(d)
+    yield d
+    remove_directory(d)
+
+
+def _create_tar(path:str, files:dict, mode='w:gz'):
+    mtime = int(time.time()) - 3600
+    with tarfile.open(path, mode) as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = mtime
+            tar.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _create_zip(path:str, files:dict):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return path
+
+
+def _read_dir(d:str) -> dict:
+    retval = {}
+    for root, _, files in os.walk(d):
+        for fn in files:
+            p = os.path.join(root, fn)
+            with open(p, 'rb') as f:
+                retval[os.path.relpath(p, d).replace('\\', '/')] = f.read()
+    return retval
+
+
+def _md5(path:str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+@pytest.mark.parametrize('ext', ['.tar.gz', '.zip'])
+def test_extract(tmp_dir, ext):
+    archive_path = f'{tmp_dir}/archive{ext}'
+    if ext == '.zip':
+        _create_zip(archive_path, FILES)
+    else:
+        _create_tar(archive_path, FILES)
+
+    dest_dir = f'{tmp_dir}/out'
+    extract_archive(archive_path, dest_dir, file_hash=_md5(archive_path))
+    assert _read_dir(dest_dir) == FILES
+
+
+@pytest.mark.parametrize('ext', ['.tar.gz', '.zip'])
+def test_remove_root_dir(tmp_dir, ext):
+    archive_path = f'{tmp_dir}/archive{ext}'
+    if ext == '.zip':
+        _create_zip(archive_path, FILES)
+    else:
+        _create_tar(archive_path, FILES)
+
+    dest_dir = f'{tmp_dir}/out'
+    extract_archive(archive_path, dest_dir, remove_root_dir=True)
+    assert _read_dir(dest_dir) == {k[len('root/'):]: v for k, v in FILES.items()}
+
+    # An archive without a single root directory cannot have its root directory removed
+    archive_path = _create_tar(f'{tmp_dir}/no_root.tar', {'a.txt': b'a', 'b/c.txt': b'c'}, mode='w')
+    with pytest.raises(RuntimeError):
+        extract_archive(archive_path, f'{tmp_dir}/out2', remove_root_dir=True)
+
+
+def test_extract_nested(tmp_dir):
+    nested_path = _create_tar(f'{tmp_dir}/nested.tar.gz', FILES)
+    with open(nested_path, 'rb') as f:
+        nested_data = f.read()
+    archive_path = _create_zip(f'{tmp_dir}/archive.zip', {'readme.txt': b'readme', 'data/nested.tar.gz': nested_data})
+
+    dest_dir = f'{tmp_dir}/out'
+    extract_archive(archive_path, dest_dir, extract_nested=True)
+    # Only the nested archive's contents are extracted, starting at its common directory
+    assert _read_dir(dest_dir) == {k[len('root/'):]: v for k, v in FILES.items()}
+
+
+def test_skip_unchanged(tmp_dir):
+    archive_path = _create_tar(f'{tmp_dir}/archive.tar', FILES, mode='w')
+    dest_dir = f'{tmp_dir}/out'
+    extract_archive(archive_path, dest_dir)
+
+    unchanged_path = f'{dest_dir}/root/a.txt'
+    modified_path = f'{dest_dir}/root/sub/deeper/c.txt'
+    unchanged_mtime = os.stat(unchanged_path).st_mtime_ns
+    with open(modified_path, 'wb') as f:
+        f.write(b'modified')
+
+    extract_archive(archive_path, dest_dir, clean_dest_dir=False)
+    # The unchanged file should not be re-written, the modified file should be restored
+    assert os.stat(unchanged_path).st_mtime_ns == unchanged_mtime
+    assert _read_dir(dest_dir) == FILES
+
+
+@pytest.mark.parametrize('clean_dest_dir', [True, False])
+@pytest.mark.parametrize('ext', ['.tar.gz', '.zip'])
+def test_hash_mismatch(tmp_dir, ext, clean_dest_dir):
+    archive_path = f'{tmp_dir}/archive{ext}'
+    if ext == '.zip':
+        _create_zip(archive_path, FILES)
+    else:
+        _create_tar(archive_path, FILES)
+
+    dest_dir = f'{tmp_dir}/out'
+    existing_path = f'{dest_dir}/root/a.txt'
+    os.makedirs(os.path.dirname(existing_path))
+    with open(existing_path, 'wb') as f:
+        f.write(b'existing')
+
+    with pytest.raises(ArchiveHashError):
+        extract_archive(archive_path, dest_dir, file_hash='0' * 32, clean_dest_dir=clean_dest_dir)
+
+    if clean_dest_dir:
+        # The extracted files should be removed
+        assert _read_dir(dest_dir) == {}
+    else:
+        # The existing files in the destination directory should not be modified
+        assert _read_dir(dest_dir) == {'root/a.txt': b'existing'}
@@ -0,0 +1,256 @@
+import os
+import re
+import io
+import hashlib
+import tarfile
+import zipfile
+import threading
+import http.server
+import pytest
+
+from mltk.utils import archive_downloader
+from mltk.utils.archive_downloader import (
+    download_url,
+    download_verify_extract,
+    DownloadQueue
+)
+from mltk.utils.archive import ArchiveHashError
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+class _FileServer(http.server.ThreadingHTTPServer):
+    """Local HTTP server that serves the files in a directory and (optionally) supports range requests"""
+    daemon_threads = True
+
+    def __init__(self, directory:str, support_ranges:bool=True):
+        super().__init__(('127.0.0.1', 0), _RangeRequestHandler)
+        self.directory = directory
+        self.support_ranges = support_ranges
+        # If not None, then the connections are closed after sending this number of bytes (in total)
+        self.max_sent_bytes:int = None
+        self.sent_bytes = 0
+        self.requested_ranges = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, name:str) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/{name}'
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+
+class _RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self): # pylint: disable=invalid-name
+        server:_FileServer = self.server
+        file_path = f'{server.directory}/{self.path.lstrip("/")}'
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        start, end = 0, len(data)
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if match and server.support_ranges:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(data)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end-1}/{len(data)}')
+        else:
+            self.send_response(200)
+        with server._lock: # pylint: disable=protected-access
+            server.requested_ranges.append((start, end))
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('ETag', '"test"')
+        self.end_headers()
+
+        pos = start
+        while pos < end:
+            n = min(64*1024, end - pos)
+            with server._lock: # pylint: disable=protected-access
+                if server.max_sent_bytes is not None:
+                    n = min(n, server.max_sent_bytes - server.sent_bytes)
+                server.sent_bytes += max(n, 0)
+            if n <= 0:
+                # Simulate a dropped connection
+                return
+            self.wfile.write(data[pos:pos+n])
+            pos += n
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+
+@pytest.fixture
+def server_dir(monkeypatch):
+    # Use small segments so that the test files are downloaded with multiple connections
+    monkeypatch.setattr(archive_downloader, 'DOWNLOAD_SEGMENT_SIZE', 128*1024)
+    monkeypatch.setattr(archive_downloader, 'DOWNLOAD_READ_SIZE', 16*1024)
+    d = create_tempdir('utests/archive_downloader')
+    remove_directory(d)
+    os.makedirs(f'{d}/server')
+    os.makedirs(f'{d}/downloads')
+    yield d
+    remove_directory(d)
+
+
+def _generate_file(path:str, size:int) -> str:
+    data = os.urandom(size)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return hashlib.md5(data).hexdigest()
+
+
+def _read_file(path:str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+
+def test_download_segments(server_dir):
+    file_hash = _generate_file(f'{server_dir}/server/data.bin', 1024*1024 + 123)
+    server = _FileServer(f'{server_dir}/server')
+    try:
+        dst_path = f'{server_dir}/downloads/data.bin'
+        download_url(server.url('data.bin'), dst_path, file_hash=file_hash, max_connections=4)
+        assert _read_file(dst_path) == _read_file(f'{server_dir}/server/data.bin')
+        assert not os.path.exists(dst_path + '.tmp')
+        assert not os.path.exists(dst_path + '.tmp.json')
+        # The file is downloaded with multiple range requests
+        assert len(server.requested_ranges) > 2
+    finally:
+        server.close()
+
+
+def test_download_resume(server_dir, monkeypatch):
+    monkeypatch.setattr(archive_downloader, 'DOWNLOAD_RETRIES', 0)
+    file_size = 1024*1024
+    file_hash = _generate_file(f'{server_dir}/server/data.bin', file_size)
+    server = _FileServer(f'{server_dir}/server')
+    try:
+        dst_path = f'{server_dir}/downloads/data.bin'
+        server.max_sent_bytes = file_size // 2
+        with pytest.raises(Exception):
+            download_url(server.url('data.bin'), dst_path, file_hash=file_hash, max_connections=2)
+        assert not os.path.exists(dst_path)
+        assert os.path.exists(dst_path + '.tmp.json')
+
+        # Only the remaining bytes should be requested
+        server.max_sent_bytes = None
+        server.sent_bytes = 0
+        download_url(server.url('data.bin'), dst_path, file_hash=file_hash, max_connections=2)
+        assert _read_file(dst_path) == _read_file(f'{server_dir}/server/data.bin')
+        assert server.sent_bytes < file_size
+        assert not os.path.exists(dst_path + '.tmp.json')
+    finally:
+        server.close()
+
+
+def test_download_without_range_support(server_dir):
+    file_hash = _generate_file(f'{server_dir}/server/data.bin', 300*1024)
+    server = _FileServer(f'{server_dir}/server', support_ranges=False)
+    try:
+        dst_path = f'{server_dir}/downloads/data.bin'
+        download_url(server.url('data.bin'), dst_path, file_hash=file_hash)
+        assert _read_file(dst_path) == _read_file(f'{server_dir}/server/data.bin')
+        assert len(server.requested_ranges) == 1
+    finally:
+        server.close()
+
+
+def test_download_invalid_hash(server_dir):
+    _generate_file(f'{server_dir}/server/data.bin', 300*1024)
+    server = _FileServer(f'{server_dir}/server')
+    try:
+        dst_path = f'{server_dir}/downloads/data.bin'
+        with pytest.raises(ArchiveHashError):
+            download_url(server.url('data.bin'), dst_path, file_hash='0'*32)
+        assert not os.path.exists(dst_path)
+        assert not os.path.exists(dst_path + '.tmp')
+        assert not os.path.exists(dst_path + '.tmp.json')
+    finally:
+        server.close()
+
+
+def test_download_queue(server_dir):
+    file_hashes = {}
+    for name in ('dataset1', 'dataset2', 'dataset3'):
+        with tarfile.open(f'{server_dir}/server/{name}.tar.gz', 'w:gz') as tar_file:
+            for i in range(4):
+                data = os.urandom(64*1024)
+                info = tarfile.TarInfo(f'{name}/sample{i}.bin')
+                info.size = len(data)
+                tar_file.addfile(info, io.BytesIO(data))
+        file_hashes[name] = hashlib.sha256(_read_file(f'{server_dir}/server/{name}.tar.gz')).hexdigest()
+
+    server = _FileServer(f'{server_dir}/server')
+    try:
+        with DownloadQueue(max_concurrent=3) as download_queue:
+            for name, file_hash in file_hashes.items():
+                download_queue.add(
+                    server.url(f'{name}.tar.gz'),
+                    dest_dir=f'{server_dir}/extracted/{name}',
+                    download_dir=f'{server_dir}/downloads',
+                    file_hash=file_hash,
+                    remove_root_dir=True
+                )
+
+        for name, dest_dir in zip(file_hashes, download_queue.results):
+            assert dest_dir.replace('\\', '/').endswith(f'extracted/{name}')
+            assert sorted(x for x in os.listdir(dest_dir) if x.endswith('.bin')) == [f'sample{i}.bin' for i in range(4)]
+
+        # The archives are up-to-date, so they should not be downloaded again
+        n_requests = len(server.requested_ranges)
+        download_verify_extract(
+            server.url('dataset1.tar.gz'),
+            dest_dir=f'{server_dir}/extracted/dataset1',
+            download_dir=f'{server_dir}/downloads',
+            file_hash=file_hashes['dataset1'],
+            remove_root_dir=True
+        )
+        assert len(server.requested_ranges) == n_requests
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize('archive_ext', ['tar.gz', 'zip'])
+def test_corrupt_cached_archive(server_dir, archive_ext):
+    archive_path = f'{server_dir}/server/dataset.{archive_ext}'
+    samples = {f'sample{i}.bin': os.urandom(32*1024) for i in range(3)}
+    if archive_ext == 'zip':
+        with zipfile.ZipFile(archive_path, 'w') as zip_file:
+            for name, data in samples.items():
+                zip_file.writestr(f'dataset/{name}', data)
+    else:
+        with tarfile.open(archive_path, 'w:gz') as tar_file:
+            for name, data in samples.items():
+                info = tarfile.TarInfo(f'dataset/{name}')
+                info.size = len(data)
+                tar_file.addfile(info, io.BytesIO(data))
+
+    # Simulate a truncated archive in the download cache
+    with open(f'{server_dir}/downloads/dataset.{archive_ext}', 'wb') as f:
+        f.write(_read_file(archive_path)[:1000])
+
+    server = _FileServer(f'{server_dir}/server')
+    try:
+        # The cached archive cannot be extracted, so it should be re-downloaded
+        dest_dir = download_verify_extract(
+            server.url(f'dataset.{archive_ext}'),
+            dest_dir=f'{server_dir}/extracted',
+            download_dir=f'{server_dir}/downloads',
+            remove_root_dir=True
+        )
+        assert len(server.requested_ranges) > 0
+        for name, data in samples.items():
+            assert _read_file(f'{dest_dir}/{name}') == data
+        assert _read_file(f'{server_dir}/downloads/dataset.{archive_ext}') == _read_file(archive_path)
+    finally:
+        server.close()
@@ -0,0 +1,172 @@
+import os
+import wave
+import pytest
+
+from mltk.utils.audio_dataset_generator import (
+    generator,
+    AudioDatasetGenerator,
+    Keyword,
+    Augmentation,
+    VoiceRate,
+    VoicePitch,
+)
+from mltk.utils.audio_dataset_generator.generator_types import RATE_LIMIT_MARGIN
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def out_dir(monkeypatch):
+    # Retry the simulated failures without waiting
+    monkeypatch.setattr(generator, 'RETRY_BASE_DELAY', 0.001)
+    d = create_tempdir('utests/audio_dataset_generator')
+    remove_directory(d)
+    yield d
+    remove_directory(d)
+
+
+def _list_configurations(gen:AudioDatasetGenerator) -> list:
+    augmentations = [
+        Augmentation(rate=rate, pitch=pitch)
+        for rate in (VoiceRate.xslow, VoiceRate.medium, VoiceRate.xfast)
+        for pitch in (VoicePitch.low, VoicePitch.high)
+    ]
+    configs = gen.list_configurations(
+        keywords=[Keyword('on'), Keyword('off', aliases=('of',))],
+        augmentations=augmentations,
+        voices=gen.list_voices(),
+    )
+    retval = []
+    for config_list in configs.values():
+        retval.extend(config_list)
+    return retval
+
+
+def _generate_all(gen:AudioDatasetGenerator, configs:list) -> list:
+    paths = []
+    for config in configs:
+        gen.generate(config, on_finished=paths.append)
+    assert gen.join(timeout=30)
+    return paths
+
+
+def test_generate(out_dir):
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=8) as gen:
+        gen.load_backend('fake', latency=0.01, transactions_per_second=1000)
+        configs = _list_configurations(gen)
+        paths = _generate_all(gen, configs)
+        stats = gen.get_stats()
+
+    # 2 languages * 2 voices * 6 augmentations * 3 keywords
+    assert len(configs) == 72
+    assert len(set(paths)) == len(configs)
+    assert stats.generated == len(configs)
+    assert stats.failed == stats.pending == stats.active == 0
+    assert stats.samples_per_second > 0
+
+    for path in paths:
+        with wave.open(path, 'r') as wav:
+            assert wav.getframerate() == 16000
+            assert wav.getnframes() > 0
+    assert sorted(os.listdir(out_dir)) == ['off', 'on']
+
+
+def test_max_concurrent_requests(out_dir):
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=16) as gen:
+        gen.load_backend('fake', latency=0.05, transactions_per_second=1000, max_concurrent_requests=3)
+        _generate_all(gen, _list_configurations(gen))
+        backend = gen._backends['fake'] # pylint: disable=protected-access
+
+    assert backend.max_active_requests == 3
+
+
+def test_rate_limit(out_dir):
+    tps = 50
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=8) as gen:
+        gen.load_backend('fake', latency=0.001, transactions_per_second=tps)
+        configs = _list_configurations(gen)[:30]
+        _generate_all(gen, configs)
+        backend = gen._backends['fake'] # pylint: disable=protected-access
+
+    timestamps = backend.request_timestamps
+    assert len(timestamps) == len(configs)
+    # The requests are sent at (at most) the backend's quota, minus a margin
+    elapsed = timestamps[-1] - timestamps[0]
+    assert elapsed >= (len(timestamps) - 1) / (tps * RATE_LIMIT_MARGIN) * 0.95
+
+
+def test_retries(out_dir):
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=8, max_retries=10) as gen:
+        gen.load_backend('fake', latency=0.001, transactions_per_second=1000, failure_rate=0.3, seed=42)
+        configs = _list_configurations(gen)
+        paths = _generate_all(gen, configs)
+        stats = gen.get_stats()
+
+    assert stats.retries > 0
+    assert stats.failed == 0
+    assert stats.generated == len(paths) == len(configs)
+    assert all(os.path.exists(p) for p in paths)
+
+
+def test_failures(out_dir):
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=4, max_retries=2) as gen:
+        gen.load_backend('fake', latency=0.001, transactions_per_second=1000, failure_rate=1.0)
+        configs = _list_configurations(gen)[:5]
+        paths = _generate_all(gen, configs)
+        stats = gen.get_stats()
+
+    # The callback is not invoked for failed samples
+    assert len(paths) == 0
+    assert stats.failed == len(configs)
+    assert stats.retries == 2*len(configs)
+
+
+def test_resume(out_dir):
+    with AudioDatasetGenerator(out_dir=out_dir) as gen:
+        gen.load_backend('fake', latency=0.001, transactions_per_second=1000)
+        configs = _list_configurations(gen)
+        _generate_all(gen, configs[:20])
+
+    with AudioDatasetGenerator(out_dir=out_dir) as gen:
+        gen.load_backend('fake', latency=0.001, transactions_per_second=1000)
+        paths = _generate_all(gen, configs)
+        stats = gen.get_stats()
+        backend = gen._backends['fake'] # pylint: disable=protected-access
+
+    # The previously generated samples are not requested again
+    assert stats.skipped == 20
+    assert stats.generated == len(configs) - 20
+    assert len(backend.request_timestamps) == len(configs) - 20
+    assert len(paths) == len(configs)
+
+
+def test_generate_tasks_are_referenced(out_dir):
+    import gc
+    import time
+
+    with AudioDatasetGenerator(out_dir=out_dir, n_jobs=4) as gen:
+        gen.load_backend('fake', latency=0.05, transactions_per_second=1000)
+        configs = _list_configurations(gen)[:12]
+        paths = []
+        for config in configs:
+            gen.generate(config, on_finished=paths.append)
+
+        # The in-flight generation tasks are referenced by the scheduler,
+        # so they complete even if the garbage collector runs
+        scheduler = gen._schedulers['fake'] # pylint: disable=protected-access
+        max_in_flight = 0
+        while not gen.join(timeout=0.01):
+            max_in_flight = max(max_in_flight, len(scheduler._generate_tasks)) # pylint: disable=protected-access
+            gc.collect()
+            time.sleep(0.01)
+
+        stats = gen.get_stats()
+        # NOTE: A task is released by its done callback which runs just after the task invokes on_finished
+        for _ in range(100):
+            if not scheduler._generate_tasks: # pylint: disable=protected-access
+                break
+            time.sleep(0.01)
+        assert len(scheduler._generate_tasks) == 0 # pylint: disable=protected-access
+
+    assert 0 < max_in_flight <= 4
+    assert stats.generated == len(paths) == len(configs)
@@ -0,0 +1,89 @@
+import os
+import time
+import pytest
+
+from mltk.utils.file_cache import LruFileCache
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def cache_dir():
+    d = create_tempdir('utests/file_cache')
+    remove_directory(d)
+    yield d
+    remove_directory(d)
+
+
+def _write(cache:LruFileCache, name:str, size:int=100) -> str:
+    path = f'{cache.directory}/{name}'
+    cache.write_entry(path, lambda f: f.write(b'x' * size))
+    return path
+
+
+def test_write_entry(cache_dir):
+    cache = LruFileCache(cache_dir, max_size=1024*1024)
+    path = _write(cache, 'sub/entry.bin', size=123)
+    assert os.path.getsize(path) == 123
+    assert os.listdir(f'{cache_dir}/sub') == ['entry.bin']
+
+    # A failed write should not leave a partial entry
+    def _fail(f):
+        f.write(b'partial')
+        raise RuntimeError('Write failed')
+    with pytest.raises(RuntimeError):
+        cache.write_entry(f'{cache_dir}/sub/failed.bin', _fail)
+    assert os.listdir(f'{cache_dir}/sub') == ['entry.bin']
+
+
+def test_evict(cache_dir):
+    cache = LruFileCache(cache_dir, max_size=1024*1024)
+    paths = []
+    for i in range(10):
+        paths.append(_write(cache, f'{i % 3}/entry{i}.bin', size=200))
+        # Make the first entries the least recently used
+        os.utime(paths[-1], (i, i))
+
+    cache = LruFileCache(cache_dir, max_size=1000)
+    # Use the first entry so that it is not evicted
+    cache.touch_entry(paths[0])
+    cache.evict()
+
+    remaining = [p for p in paths if os.path.exists(p)]
+    assert sum(os.path.getsize(p) for p in remaining) <= int(cache.max_size * 0.9)
+    assert paths[0] in remaining
+    assert paths[-1] in remaining
+    assert paths[1] not in remaining
+    # The directories are kept by default
+    assert sorted(os.listdir(cache_dir)) == ['0', '1', '2']
+
+
+def test_evict_remove_empty_dirs(cache_dir):
+    cache = LruFileCache(cache_dir, max_size=300, remove_empty_dirs=True)
+    old_path = _write(cache, 'old/entry.bin', size=200)
+    os.utime(old_path, (0, 0))
+    # Writing this entry exceeds the max size, so the old entry is evicted
+    _write(cache, 'new/entry.bin', size=200)
+
+    assert os.listdir(cache_dir) == ['new']
+
+
+def test_evict_stale_temp_files(cache_dir):
+    cache = LruFileCache(cache_dir, max_size=1024)
+    os.makedirs(cache_dir)
+    for name, mtime in (('stale.tmp', time.time() - 2*3600), ('pending.tmp', time.time())):
+        with open(f'{cache_dir}/{name}', 'wb') as f:
+            f.write(b'x' * 10)
+        os.utime(f'{cache_dir}/{name}', (mtime, mtime))
+    cache.evict()
+
+    # Temp files of crashed processes are removed, temp files of other processes are not
+    assert os.listdir(cache_dir) == ['pending.tmp']
+
+
+def test_clear(cache_dir):
+    cache = LruFileCache(cache_dir, max_size=1024)
+    for i in range(3):
+        _write(cache, f'{i}/entry.bin')
+    cache.clear()
+    assert not any(files for _, _, files in os.walk(cache_dir))
@@ -0,0 +1,92 @@
+import os
+import time
+import queue
+
+from mltk.utils.jlink_stream import (JlinkStream, MockDeviceInterface)
+
+
+def _pattern(length:int, offset:int=0) -> bytes:
+    return bytes((offset + i) % 256 for i in range(length))
+
+
+def test_read_all():
+    device = MockDeviceInterface(read_streams={'data': 1e6}, max_length=100*1024)
+    with JlinkStream(device_interface=device) as jlink_stream:
+        stream = jlink_stream.open('data', mode='r')
+        data = stream.read_all(100*1024, timeout=10)
+
+    assert data == _pattern(100*1024)
+    assert device.get_stats('data')['dropped'] == 0
+
+
+def test_readinto():
+    device = MockDeviceInterface(read_streams={'data': 1e6}, max_length=1000)
+    with JlinkStream(device_interface=device) as jlink_stream:
+        stream = jlink_stream.open('data', mode='r')
+        buffer = bytearray(1024)
+        length = 0
+        while length < 1000:
+            n = stream.readinto(memoryview(buffer)[length:], timeout=10)
+            assert n > 0
+            length += n
+
+        # No more data should be generated
+        assert stream.readinto(buffer, timeout=0.2) == 0
+
+    assert buffer[:length] == _pattern(1000)
+
+
+def test_read_frames():
+    frame_size = 12*1024 + 7
+    device = MockDeviceInterface(read_streams={'data': 1e6}, max_length=frame_size*8 + 100)
+    with JlinkStream(device_interface=device) as jlink_stream:
+        stream = jlink_stream.open('data', mode='r')
+        frames = list(stream.read_frames(frame_size, timeout=0.5))
+
+    # The partial frame at the end is dropped
+    assert len(frames) == 8
+    for i, frame in enumerate(frames):
+        assert frame == _pattern(frame_size, offset=i*frame_size)
+    assert device.get_stats('data')['dropped'] == 0
+
+
+def test_frame_callbacks():
+    # Receive multiple streams at the same time,
+    # the frames are queued by the processing thread and processed by this thread
+    rates = {'audio': 32000*4, 'raw_spec': 64000, 'quant_spec': 32000}
+    frame_sizes = {'audio': 4096, 'raw_spec': 3920, 'quant_spec': 1960}
+    device = MockDeviceInterface(read_streams=rates)
+    frame_queue = queue.Queue()
+
+    with JlinkStream(device_interface=device) as jlink_stream:
+        for name, frame_size in frame_sizes.items():
+            stream = jlink_stream.open(name, mode='r')
+            stream.set_frame_callback(lambda frame, name=name: frame_queue.put((name, frame)), frame_size)
+
+        counts = {name: 0 for name in frame_sizes}
+        start_time = time.time()
+        while time.time() - start_time < 2.0:
+            try:
+                name, frame = frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            frame_size = frame_sizes[name]
+            assert len(frame) == frame_size
+            assert frame == _pattern(frame_size, offset=counts[name]*frame_size)
+            counts[name] += 1
+            # Simulate writing the frame to a file
+            time.sleep(0.002)
+
+    for name in frame_sizes:
+        assert counts[name] > 0
+        assert device.get_stats(name)['dropped'] == 0
+
+
+def test_write():
+    device = MockDeviceInterface()
+    data = os.urandom(20*1024)
+    with JlinkStream(device_interface=device) as jlink_stream:
+        stream = jlink_stream.open('data', mode='w')
+        assert stream.write(data, timeout=10, flush=True) == len(data)
+
+    assert device.get_written_data('data') == data
@@ -0,0 +1,118 @@
+import os
+import gc
+import pytest
+import numpy as np
+
+from mltk.utils.process_pool import ProcessPool
+
+
+SLOT_SIZE = 4096
+N_SLOTS = 3
+
+
+def _generate_array(x):
+    if x < 0:
+        raise ValueError(f'Invalid value: {x}')
+    return np.full((16,), x, dtype=np.int32)
+
+
+def _get_shm_ring(pool:ProcessPool):
+    return pool._processes[0]._shm_ring # pylint: disable=protected-access
+
+
+def _create_pool() -> ProcessPool:
+    return ProcessPool(
+        _generate_array,
+        n_jobs=1,
+        name='test_process_pool',
+        shared_memory_size=SLOT_SIZE,
+        shared_memory_slots=N_SLOTS
+    )
+
+
+def test_shared_memory_results():
+    with _create_pool() as pool:
+        ring = _get_shm_ring(pool)
+        batch = pool.create_batch(N_SLOTS)
+        for i in range(N_SLOTS):
+            pool(i, pool_batch=batch)
+        results = batch.wait()
+
+        for i, arr in enumerate(results):
+            assert np.array_equal(arr, np.full((16,), i, dtype=np.int32))
+        # Each result references a slab
+        assert ring.n_free == 0
+
+        # The slabs are returned to the ring once the results are garbage collected
+        del arr, results, batch
+        gc.collect()
+        assert ring.n_free == N_SLOTS
+
+
+def test_shared_memory_worker_exception():
+    with _create_pool() as pool:
+        ring = _get_shm_ring(pool)
+        assert np.array_equal(pool(1), np.full((16,), 1, dtype=np.int32))
+        gc.collect()
+        assert ring.n_free == N_SLOTS
+
+        # The worker raises before writing its result to the slab
+        with pytest.raises(RuntimeError):
+            pool(-1)
+
+        assert not pool.is_running
+        # The slab reserved for the failed invocation was returned to the ring
+        assert ring.n_free == N_SLOTS
+
+
+class _ContextParams:
+    """Records the number of times it is pickled (i.e. sent to a subprocess) and unpickled (i.e. received by a subprocess)"""
+    n_pickled = 0
+    n_unpickled = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __getstate__(self):
+        _ContextParams.n_pickled += 1
+        return self.__dict__
+
+    def __setstate__(self, state):
+        _ContextParams.n_unpickled += 1
+        self.__dict__.update(state)
+
+
+def _get_context_info(x, params:_ContextParams=None):
+    return os.getpid(), _ContextParams.n_unpickled, params.value + x
+
+
+def test_sticky_context():
+    n_jobs = 2
+    _ContextParams.n_pickled = 0
+    params = _ContextParams(100)
+    with ProcessPool(_get_context_info, n_jobs=n_jobs, name='test_process_pool', context=dict(params=params)) as pool:
+        batch = pool.create_batch(20)
+        for i in range(20):
+            pool(i, pool_batch=batch)
+        results = batch.wait()
+
+        assert [r[2] for r in results] == [100 + i for i in range(20)]
+        # Each subprocess should unpickle the context once and re-use it for every invocation
+        for _, n_unpickled, _ in results:
+            assert n_unpickled == 1
+        # The context should be sent at most once to each subprocess
+        assert _ContextParams.n_pickled <= n_jobs
+
+        # Updating the context should re-send it to each subprocess
+        pool.set_context(params=_ContextParams(200))
+        batch = pool.create_batch(20)
+        for i in range(20):
+            pool(i, pool_batch=batch)
+        results = batch.wait()
+        assert [r[2] for r in results] == [200 + i for i in range(20)]
+        for _, n_unpickled, _ in results:
+            assert n_unpickled == 2
+        assert _ContextParams.n_pickled <= 2*n_jobs
+
+        # Keyword arguments given to an invocation take precedence over the context
+        assert pool(1, params=_ContextParams(300))[2] == 301
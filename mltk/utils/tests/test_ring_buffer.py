@@ -0,0 +1,43 @@
+from mltk.utils.ring_buffer import RingBuffer
+
+
+def test_wrap_around():
+    ring = RingBuffer(16)
+    assert ring.write(bytes(range(12))) == 12
+    assert ring.read(10) == bytes(range(10))
+
+    # The data wraps around the end of the buffer
+    assert ring.write(bytes(range(12, 30))) == 14
+    assert len(ring) == 16
+    assert ring.free == 0
+    assert bytes(ring.peek()) == bytes(range(10, 16))
+
+    out = bytearray(20)
+    assert ring.readinto(out) == 16
+    assert out[:16] == bytes(range(10, 26))
+    assert len(ring) == 0
+
+
+def test_pending():
+    ring = RingBuffer(8)
+    ring.write(b'ab')
+    assert ring.write_pending(b'cdefgh') == 6
+    assert ring.free == 0
+    # Pending data is not readable until it is committed
+    assert ring.read() == b'ab'
+    ring.discard_pending()
+    assert ring.free == 8
+
+    ring.write_pending(b'xyz')
+    ring.commit()
+    assert ring.read() == b'xyz'
+
+
+def test_consume():
+    ring = RingBuffer(8)
+    ring.write(b'0123456')
+    ring.consume(5)
+    ring.write(b'789ab')
+    assert bytes(ring.peek()) == b'567'
+    ring.consume(3)
+    assert ring.read() == b'89ab'
@@ -0,0 +1,64 @@
+import os
+import io
+import tarfile
+import pytest
+
+from mltk.utils import tar_index
+from mltk.utils.tar_index import TarIndex
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def tar_path():
+    d = create_tempdir('utests/tar_index')
+    remove_directory(d)
+    os.makedirs(d)
+    path = f'{d}/dataset.tar'
+    with tarfile.open(path, 'w') as tar:
+        for name, data in (('yes/1.wav', b'yes1'), ('yes/2.wav', b'yes2' * 1000), ('no/1.wav', b'no1')):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        info = tarfile.TarInfo('yes/link.wav')
+        info.type = tarfile.SYMTYPE
+        info.linkname = '1.wav'
+        tar.addfile(info)
+    yield path
+    remove_directory(d)
+
+
+def test_tar_paths(tar_path):
+    assert tar_index.split_tar_path(f'{tar_path}/yes/1.wav') == (tar_path, 'yes/1.wav')
+    assert tar_index.split_tar_path(tar_path) == (tar_path, '')
+    assert tar_index.split_tar_path('some/dir/file.wav') == (None, 'some/dir/file.wav')
+    assert tar_index.is_tar_path(f'{tar_path}/yes')
+
+    assert tar_index.read_file(f'{tar_path}/yes/1.wav') == b'yes1'
+    assert tar_index.read_file(f'{tar_path}/yes/2.wav') == b'yes2' * 1000
+    assert tar_index.read_file(f'{tar_path}/yes/link.wav') == b'yes1'
+    assert tar_index.exists(f'{tar_path}/no/1.wav')
+    assert not tar_index.exists(f'{tar_path}/no/2.wav')
+    assert sorted(tar_index.listdir(tar_path)) == ['no', 'yes']
+    assert sorted(tar_index.listdir(f'{tar_path}/yes')) == ['1.wav', '2.wav', 'link.wav']
+    assert tar_index.get_file_stat(f'{tar_path}/no/1.wav')[0] == 3
+
+    with tar_index.open_file(f'{tar_path}/yes/2.wav') as f:
+        f.seek(4)
+        assert f.read(4) == b'yes2'
+
+    with pytest.raises(FileNotFoundError):
+        tar_index.read_file(f'{tar_path}/missing.wav')
+
+
+def test_index_file(tar_path):
+    index = TarIndex.load(tar_path)
+    assert os.path.exists(f'{tar_path}.index.json')
+    assert index.isdir('yes') and index.isfile('yes/1.wav')
+
+    # The index should be re-generated when the archive changes
+    with tarfile.open(tar_path, 'a') as tar:
+        info = tarfile.TarInfo('no/2.wav')
+        info.size = 3
+        tar.addfile(info, io.BytesIO(b'no2'))
+    assert TarIndex.load(tar_path).read('no/2.wav') == b'no2'
@@ -0,0 +1,234 @@
+import os
+import time
+import threading
+import pytest
+
+serial = pytest.importorskip('serial')
+if not hasattr(os, 'openpty'):
+    pytest.skip('Pseudo-terminals not supported', allow_module_level=True)
+
+from mltk.utils.uart_stream import (UartStream, PacketHeader, PACKET_HEADER_LENGTH, PACKET_DELIMITER1)
+
+
+
+class _FakeDevice:
+    """Implements the device side of the UART stream protocol on the master side of a pseudo-terminal"""
+    def __init__(self, master_fd:int, rx_buffer_length:int=512):
+        self.fd = master_fd
+        self.rx_buffer_length = rx_buffer_length
+        self.rx_data = bytearray()
+        self.rx_commands = []
+        self._host_rx_available = -1
+        self._unacked_packet_id = 0
+        self._next_packet_id = 1
+        self._previous_rx_packet_id = 0
+        self._condition = threading.Condition()
+        self._active = True
+        self._thread = threading.Thread(target=self._rx_loop, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._active = False
+        self._thread.join(5)
+
+    def send_data(self, data:bytes, junk:bytes=b'', split:bool=False, timeout:float=10):
+        """Send the data to the host, respecting the host's flow control"""
+        data = memoryview(data)
+        while len(data) > 0:
+            with self._condition:
+                assert self._condition.wait_for(
+                    lambda: self._unacked_packet_id == 0 and self._host_rx_available > 0,
+                    timeout=timeout
+                ), 'Timed-out waiting for host'
+                length = min(len(data), self._host_rx_available)
+                packet_id = self._next_header_id()
+                self._unacked_packet_id = packet_id
+                self._host_rx_available -= length
+                header = PacketHeader.create_data_header(
+                    id=packet_id,
+                    ack_id=self._previous_rx_packet_id,
+                    tx_length=length,
+                    rx_available=self.rx_buffer_length
+                )
+            packet = junk + header.serialize() + bytes(data[:length])
+            if split:
+                # Send the packet in small pieces so that the headers are split across reads
+                for i in range(0, len(packet), 5):
+                    os.write(self.fd, packet[i:i+5])
+                    time.sleep(0.001)
+            else:
+                os.write(self.fd, packet)
+            data = data[length:]
+
+    def send_command(self, code:int, payload:bytes=None):
+        os.write(self.fd, PacketHeader.create_cmd_header(code=code, payload=payload).serialize())
+
+    def wait_rx_data(self, length:int, timeout:float=10) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.rx_data) >= length, timeout=timeout)
+
+    def wait_rx_command(self, timeout:float=10) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.rx_commands) > 0, timeout=timeout)
+
+    def _next_header_id(self) -> int:
+        packet_id = self._next_packet_id
+        self._next_packet_id = max((self._next_packet_id + 1) % 128, 1)
+        return packet_id
+
+    def _send_ack(self):
+        header = PacketHeader.create_data_header(
+            id=self._next_header_id(),
+            ack_id=self._previous_rx_packet_id,
+            tx_length=0,
+            rx_available=self.rx_buffer_length
+        )
+        os.write(self.fd, header.serialize())
+
+    def _read(self) -> bytes:
+        import select
+        while self._active:
+            readable, _, _ = select.select([self.fd], [], [], 0.05)
+            if readable:
+                try:
+                    return os.read(self.fd, 4096)
+                except OSError:
+                    return None
+        return None
+
+    def _rx_loop(self):
+        buffer = bytearray()
+        rx_remaining = 0
+        while self._active:
+            data = self._read()
+            if not data:
+                continue
+            buffer.extend(data)
+            while buffer:
+                if rx_remaining > 0:
+                    n = min(rx_remaining, len(buffer))
+                    with self._condition:
+                        self.rx_data.extend(buffer[:n])
+                        rx_remaining -= n
+                        if rx_remaining == 0:
+                            self._send_ack()
+                        self._condition.notify_all()
+                    del buffer[:n]
+                    continue
+
+                i = buffer.find(PACKET_DELIMITER1)
+                if i == -1:
+                    buffer.clear()
+                    break
+                if len(buffer) - i < PACKET_HEADER_LENGTH:
+                    del buffer[:i]
+                    break
+                header = PacketHeader.deserialize(bytes(buffer[i:i+PACKET_HEADER_LENGTH]))
+                if header is None:
+                    del buffer[:i+1]
+                    continue
+                del buffer[:i+PACKET_HEADER_LENGTH]
+
+                with self._condition:
+                    if header.is_cmd_packet:
+                        self.rx_commands.append((header.cmd_code, bytes(header.cmd_payload)))
+                    else:
+                        if header.data_ack_id == self._unacked_packet_id:
+                            self._unacked_packet_id = 0
+                        self._host_rx_available = header.data_rx_available
+                        if header.data_tx_length == -1:
+                            # Acknowledge the synchronization request
+                            self._unacked_packet_id = 0
+                            self._send_ack()
+                        elif header.data_tx_length > 0:
+                            self._previous_rx_packet_id = header.id
+                            rx_remaining = header.data_tx_length
+                    self._condition.notify_all()
+
+
+
+@pytest.fixture
+def loopback():
+    master_fd, slave_fd = os.openpty()
+    device = _FakeDevice(master_fd)
+    stream = UartStream(port=os.ttyname(slave_fd), rx_buffer_length=1024)
+    stream.open(timeout=10)
+    try:
+        assert stream.is_synchronized
+        yield stream, device
+    finally:
+        stream.close()
+        device.close()
+        os.close(slave_fd)
+        os.close(master_fd)
+
+
+
+def test_read_all(loopback):
+    stream, device = loopback
+    data = os.urandom(10*1024 + 13)
+
+    # Junk bytes, including a partial delimiter, between packets should be ignored
+    t = threading.Thread(target=device.send_data, args=(data,), kwargs=dict(junk=b'\x00\xde\x01\xde'), daemon=True)
+    t.start()
+    assert stream.read_all(len(data), timeout=10) == data
+    t.join()
+
+
+def test_read_split_headers(loopback):
+    stream, device = loopback
+    data = os.urandom(3*1024 + 7)
+
+    t = threading.Thread(target=device.send_data, args=(data,), kwargs=dict(split=True), daemon=True)
+    t.start()
+    assert stream.read_all(len(data), timeout=10) == data
+    t.join()
+
+
+def test_readinto(loopback):
+    stream, device = loopback
+    data = os.urandom(700)
+    device.send_data(data)
+
+    buffer = bytearray(1024)
+    length = 0
+    start_time = time.time()
+    while length < len(data) and (time.time() - start_time) < 10:
+        n = stream.readinto(memoryview(buffer)[length:len(data)])
+        if n == 0:
+            stream.wait(0.050)
+        length += n
+    assert buffer[:length] == data
+
+
+def test_read_all_timeout(loopback):
+    stream, _ = loopback
+    start_time = time.time()
+    assert stream.read_all(100, timeout=0.3) == b''
+    elapsed = time.time() - start_time
+    assert 0.25 < elapsed < 5
+
+
+def test_write_all(loopback):
+    stream, device = loopback
+    data = os.urandom(2*1024 + 100)
+    assert stream.write_all(data, timeout=10) == len(data)
+    assert device.wait_rx_data(len(data))
+    assert bytes(device.rx_data) == data
+
+
+def test_commands(loopback):
+    stream, device = loopback
+    assert stream.write_command(7, b'\x01\x02\x03')
+    assert device.wait_rx_command()
+    assert device.rx_commands[0] == (7, b'\x01\x02\x03\x00\x00\x00')
+
+    device.send_command(9, b'abc')
+    start_time = time.time()
+    while (time.time() - start_time) < 10:
+        cmd = stream.read_command()
+        if cmd.code is not None:
+            break
+        stream.wait(0.050)
+    assert cmd.code == 9
+    assert bytes(cmd.payload) == b'abc\x00\x00\x00'
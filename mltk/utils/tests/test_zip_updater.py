@@ -0,0 +1,136 @@
+import os
+import zipfile
+import pytest
+
+from mltk.utils.zip_updater import ZipUpdater
+from mltk.utils.path import create_tempdir, remove_directory
+
+
+
+@pytest.fixture
+def archive_path():
+    d = create_tempdir('utests/zip_updater')
+    remove_directory(d)
+    os.makedirs(d)
+    path = f'{d}/archive.zip'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('model.py', 'my_model = None\n' * 100)
+        zf.writestr('logs/train.txt', os.urandom(1024) + b'epoch\n' * 1000)
+        zf.writestr('model.tflite', os.urandom(4096), compress_type=zipfile.ZIP_STORED)
+        zf.writestr('eval/summary.txt', 'accuracy: 0.9\n')
+    yield path
+    remove_directory(d)
+
+
+def _read_raw_members(path:str) -> dict:
+    """Return the local header fields, CRC and compressed bytes of each member"""
+    retval = {}
+    with open(path, 'rb') as fp, zipfile.ZipFile(path, 'r') as zf:
+        for info in zf.infolist():
+            fp.seek(info.header_offset + 26)
+            fname_len = int.from_bytes(fp.read(2), 'little')
+            extra_len = int.from_bytes(fp.read(2), 'little')
+            fp.seek(fname_len + extra_len, os.SEEK_CUR)
+            retval[info.filename] = dict(
+                CRC=info.CRC,
+                compress_type=info.compress_type,
+                compress_size=info.compress_size,
+                file_size=info.file_size,
+                date_time=info.date_time,
+                data=fp.read(info.compress_size)
+            )
+    return retval
+
+
+def _check_archive(path:str):
+    with zipfile.ZipFile(path, 'r') as zf:
+        assert zf.testzip() is None
+
+
+def test_update_member(archive_path):
+    before = _read_raw_members(archive_path)
+    with ZipUpdater(archive_path) as updater:
+        updater.add_data('eval/summary.txt', 'accuracy: 0.95\n')
+
+    _check_archive(archive_path)
+    after = _read_raw_members(archive_path)
+    assert sorted(after) == sorted(before)
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        assert zf.read('eval/summary.txt') == b'accuracy: 0.95\n'
+
+    # The other members should be copied verbatim
+    for name in ('model.py', 'logs/train.txt', 'model.tflite'):
+        assert after[name] == before[name]
+
+
+def test_remove_member(archive_path):
+    before = _read_raw_members(archive_path)
+    with ZipUpdater(archive_path) as updater:
+        updater.remove('logs/train.txt')
+        updater.remove('does/not/exist.txt')
+
+    _check_archive(archive_path)
+    after = _read_raw_members(archive_path)
+    assert sorted(after) == ['eval/summary.txt', 'model.py', 'model.tflite']
+    for name in after:
+        assert after[name] == before[name]
+
+
+def test_add_member(archive_path):
+    d = os.path.dirname(archive_path)
+    with open(f'{d}/weights.h5', 'wb') as f:
+        f.write(b'weights' * 1000)
+    before = _read_raw_members(archive_path)
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        members_size = zf.start_dir
+    with open(archive_path, 'rb') as f:
+        members_before = f.read(members_size)
+
+    with ZipUpdater(archive_path) as updater:
+        updater.add_file(f'{d}/weights.h5', 'weights.h5')
+        updater.add_data('eval/details.txt', 'details')
+
+    _check_archive(archive_path)
+    after = _read_raw_members(archive_path)
+    assert sorted(after) == sorted([*before, 'weights.h5', 'eval/details.txt'])
+    for name in before:
+        assert after[name] == before[name]
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        assert zf.read('weights.h5') == b'weights' * 1000
+        assert zf.read('eval/details.txt') == b'details'
+    # The new members are appended to the archive, i.e. the existing members are not re-written
+    with open(archive_path, 'rb') as f:
+        assert f.read(members_size) == members_before
+
+
+def test_batched_updates(archive_path):
+    before = _read_raw_members(archive_path)
+    with ZipUpdater(archive_path) as updater:
+        updater.add_data('model.py', 'my_model = 1\n')
+        updater.remove('eval/summary.txt')
+        updater.add_data('eval/new.txt', 'new')
+        # Removing then re-adding a member should add it
+        updater.remove('model.tflite')
+        updater.add_data('model.tflite', b'tflite', store=True)
+        # Adding then removing a member should remove it
+        updater.add_data('tmp.txt', 'tmp')
+        updater.remove('tmp.txt')
+
+    _check_archive(archive_path)
+    after = _read_raw_members(archive_path)
+    assert sorted(after) == ['eval/new.txt', 'logs/train.txt', 'model.py', 'model.tflite']
+    assert after['logs/train.txt'] == before['logs/train.txt']
+    assert after['model.tflite']['compress_type'] == zipfile.ZIP_STORED
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        assert zf.read('model.py') == b'my_model = 1\n'
+        assert zf.read('model.tflite') == b'tflite'
+        assert zf.read('eval/new.txt') == b'new'
+
+
+def test_create_new(archive_path):
+    with ZipUpdater(archive_path, create_new=True) as updater:
+        updater.add_data('model.py', 'my_model = 2\n')
+
+    _check_archive(archive_path)
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        assert zf.namelist() == ['model.py']
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import List, Dict, NamedTuple
+import os
 import threading
 import re
 import time
@@ -11,16 +12,29 @@ from dataclasses import dataclass
 import serial
 import serial.tools.list_ports
 
+from .ring_buffer import RingBuffer
+
 
 logger = logging.getLogger(__file__)
 
 
+# The maximum number of bytes read from the serial port at a time
+RX_READ_CHUNK_SIZE = 16*1024
+# The serial port's read timeout in seconds.
+# This is the maximum amount of time the RX thread blocks before checking if the port was closed
+RX_READ_TIMEOUT = 0.100
+# A partially received data packet is dropped if no data is received for this many seconds
+RX_PACKET_TIMEOUT = 10.0
+# The maximum amount of time to block before re-sending a synchronization request
+SYNCHRONIZE_RETRY_INTERVAL = 0.010
+
+
 class UartStream:
     """Allows for streaming binary data between a Python script and embedded device via UART
 
     Features:
 
-    - Asynchronous reception of binary data
+    - Asynchronous reception of binary data into a fixed-size ring buffer
     - Data flow control
     - C++ library (see <mltk repo>/cpp/shared/uart_stream)
     - Send/receive "commands"
@@ -51,8 +65,13 @@ class UartStream:
         self._handle : serial.Serial = None
         self._rx_thread_active = threading.Event()
         self._rx_thread:threading.Thread = None
-        self._rx_buffer = bytearray()
+        self._rx_buffer = RingBuffer(rx_buffer_length)
         self._rx_buffer_length = rx_buffer_length
+        # Bytes of a packet header that has not been completely received
+        self._rx_header_buffer = bytearray()
+        # The number of bytes remaining of the data packet being received
+        self._rx_packet_remaining = 0
+        self._rx_packet_timestamp = 0.0
         self._rx_previous_data_packet_id = 0
         self._rx_cmd_code:int = None
         self._rx_cmd_payload:bytes = None
@@ -125,6 +144,10 @@ class UartStream:
         if not port:
             raise ValueError('Null port provided')
 
+        # Serial devices that are not listed (e.g. pseudo-terminals) may be given by path
+        if not port.startswith('regex:') and port.startswith('/dev/') and os.path.exists(port):
+            return port
+
         ports = UartStream.list_ports()
 
         port_re = None
@@ -175,6 +198,7 @@ class UartStream:
                     parity=serial.PARITY_NONE,
                     stopbits=serial.STOPBITS_ONE,
                     bytesize=serial.EIGHTBITS,
+                    timeout=RX_READ_TIMEOUT,
                     write_timeout=30.0,
                 )
             except Exception as e:
@@ -188,7 +212,9 @@ class UartStream:
             self._handle.reset_output_buffer()
 
             self._tx_active_packet_id = 0
-            self._rx_buffer = bytearray()
+            self._rx_buffer.clear()
+            self._rx_header_buffer = bytearray()
+            self._rx_packet_remaining = 0
             self._rx_thread_active.clear()
             self._rx_thread = threading.Thread(
                 name='UartStreamRx',
@@ -209,7 +235,7 @@ class UartStream:
             self._rx_thread_active.set()
             self._rx_thread.join(5)
             self._rx_thread = None
-            self._rx_buffer = bytearray()
+            self._rx_buffer.clear()
             self._tx_bytes_available = -1
 
         with self._lock:
@@ -300,8 +326,7 @@ class UartStream:
 
         if rx_length > 0:
             with self._lock:
-                retval = bytes(self._rx_buffer[:rx_length])
-                self._rx_buffer = self._rx_buffer[rx_length:]
+                retval = self._rx_buffer.read(rx_length)
                 logger.debug(f'Read {len(retval)} bytes ({self.rx_bytes_available} still pending)')
 
             self._write_data_packet_header(0)
@@ -312,6 +337,35 @@ class UartStream:
         return retval
 
 
+    def readinto(
+        self,
+        buffer:bytearray,
+    ) -> int:
+        """Read binary data into the given buffer
+
+        Read any data that is immediately available in the RX buffer
+        directly into the given buffer (e.g. a bytearray, memoryview or numpy array).
+
+        Arguments:
+            buffer: The writable buffer to read into
+
+        Return:
+            The number of bytes read, up to min(rx_bytes_available, len(buffer))
+        """
+        if not self.synchronize():
+            return 0
+
+        with self._lock:
+            rx_length = self._rx_buffer.readinto(buffer)
+            if rx_length > 0:
+                logger.debug(f'Read {rx_length} bytes ({self.rx_bytes_available} still pending)')
+
+        if rx_length > 0:
+            self._write_data_packet_header(0)
+
+        return rx_length
+
+
     def read_all(
         self,
         length:int=None,
@@ -328,25 +382,45 @@ class UartStream:
         Return:
             Read binary data which may be less than length if the timeout is exceeded
         """
-        retval = bytearray()
-        start_time = time.time()
+        deadline = None if not timeout else time.time() + timeout
         if length and length < 0:
             if not timeout:
                 raise ValueError('Must specify timeout if length < 0')
-            length = 1e9
+
+            # Read everything that is received until the timeout expires
+            retval = bytearray()
+            while True:
+                data = self.read()
+                if data:
+                    retval.extend(data)
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return bytes(retval)
+                self._wait_rx_data(remaining)
+
         length = length or self.rx_bytes_available
+        if length <= 0:
+            return bytes()
 
-        while length > 0:
-            data = self.read(length)
-            if len(data) == 0:
-                if timeout and (time.time() - start_time) > timeout:
-                    return retval
-                self.wait(0.010)
+        # Read directly into the returned buffer
+        retval = bytearray(length)
+        view = memoryview(retval)
+        offset = 0
+        while offset < length:
+            n = self.readinto(view[offset:])
+            if n > 0:
+                offset += n
                 continue
 
-            length -= len(data)
-            retval.extend(data)
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                break
+            self._wait_rx_data(remaining)
 
+        view.release()
+        if offset < length:
+            del retval[offset:]
         return bytes(retval)
 
     def flush_input(self, timeout:float=0.100):
@@ -417,7 +491,7 @@ class UartStream:
                 if timeout and (time.time() - start_time) > timeout:
                     return initial_length - len(data)
 
-                self.wait(0.010)
+                self._wait_tx_available(None if not timeout else timeout - (time.time() - start_time))
                 continue
 
             data = data[bytes_written:]
@@ -515,6 +589,31 @@ class UartStream:
                 return self._condition.wait(timeout)
 
 
+    def _wait_rx_data(self, timeout:float=None):
+        """Block until data is available in the RX buffer, the link needs to be synchronized, or the timeout expires"""
+        with self._condition:
+            if not self.is_synchronized or not self.is_open:
+                # Return shortly so that the caller re-sends the synchronization request
+                timeout = SYNCHRONIZE_RETRY_INTERVAL if timeout is None else min(timeout, SYNCHRONIZE_RETRY_INTERVAL)
+                self._condition.wait(timeout)
+                return
+
+            # NOTE: The predicate is checked while holding the lock,
+            #       so a notification from the RX thread can not be missed
+            self._condition.wait_for(lambda: self.rx_bytes_available != 0 or not self.is_open, timeout)
+
+
+    def _wait_tx_available(self, timeout:float=None):
+        """Block until data may be written, the link needs to be synchronized, or the timeout expires"""
+        with self._condition:
+            if not self.is_synchronized or not self.is_open:
+                timeout = SYNCHRONIZE_RETRY_INTERVAL if timeout is None else min(timeout, SYNCHRONIZE_RETRY_INTERVAL)
+                self._condition.wait(timeout)
+                return
+
+            self._condition.wait_for(lambda: self.tx_bytes_available != 0 or not self.is_open, timeout)
+
+
     def __enter__(self):
         self.open()
         return self
@@ -549,92 +648,126 @@ class UartStream:
     def _rx_loop(self):
         try:
             while not self._rx_thread_active.is_set():
-                header = self._parse_packet_header()
-                if header is None:
-                    continue
-
-                logger.debug(f'RX {header}')
-                with self._lock:
-                    if header.is_cmd_packet:
-                        self._rx_cmd_code = header.cmd_code
-                        self._rx_cmd_payload = header.cmd_payload
-                        continue
-
-                    if header.data_ack_id == self._tx_active_packet_id:
-                        self._tx_active_packet_id = 0
-
-                    if header.data_tx_length == PACKET_REQUEST_SYNCHRONIZATION:
-                        header.data_tx_length = 0
-                        self._sync_requested = True
-                        self._tx_active_packet_id = 0
-
-                    if header.data_tx_length > 0:
-                        self._rx_previous_data_packet_id = header.id
-
-                    self._tx_bytes_available = header.data_rx_available
-                    self._condition.notify_all()
-
-                    if header.data_tx_length <= 0:
-                        continue
-
-                assert self.rx_bytes_available + header.data_tx_length <= self._rx_buffer_length, 'RX buffer overflow'
-                self._read_packet_data(header.data_tx_length)
+                # Block until at least one byte is received (or the read times out),
+                # then read everything that is buffered by the serial driver
+                rx_length = min(max(self._handle.in_waiting, 1), RX_READ_CHUNK_SIZE)
+                data = self._handle.read(rx_length)
+                if data:
+                    self._process_rx_data(data)
+
+                elif self._rx_packet_remaining > 0 and \
+                    (time.time() - self._rx_packet_timestamp) > RX_PACKET_TIMEOUT:
+                    logger.warning(f'Timed-out waiting for packet, {self._rx_packet_remaining} bytes remaining')
+                    with self._lock:
+                        self._rx_buffer.discard_pending()
+                    self._rx_packet_remaining = 0
 
         except:
             if self.is_open:
                 raise
         finally:
             self._rx_thread_active.set()
+            # Wake any threads that are blocked on the data link
+            with self._lock:
+                self._condition.notify_all()
 
 
-    def _parse_packet_header(self) -> PacketHeader:
-        packet_buffer = bytearray()
+    def _process_rx_data(self, data:bytes):
+        """Process the bytes received from the serial port
+
+        The data is scanned for packet headers and the packet data is copied directly into the RX ring buffer
+        """
+        view = memoryview(data)
+        offset = 0
 
-        while not self._rx_thread_active.is_set():
-            if self._handle.in_waiting == 0:
-                time.sleep(0.005)
+        while offset < len(data):
+            if self._rx_packet_remaining > 0:
+                n = min(self._rx_packet_remaining, len(data) - offset)
+                with self._lock:
+                    self._rx_buffer.write_pending(view[offset:offset+n])
+                offset += n
+                self._rx_packet_remaining -= n
+                self._rx_packet_timestamp = time.time()
+
+                if self._rx_packet_remaining == 0:
+                    # The packet is only visible to the application once it has been completely received
+                    with self._lock:
+                        self._rx_buffer.commit()
+                        self._write_data_packet_header(0)
+                        self._condition.notify_all()
                 continue
-            c = self._handle.read(1)[0]
 
-            packet_buffer.append(c)
-            if len(packet_buffer) < PACKET_HEADER_LENGTH:
+            if self._rx_header_buffer:
+                # Complete the partially received header
+                n = min(PACKET_HEADER_LENGTH - len(self._rx_header_buffer), len(data) - offset)
+                self._rx_header_buffer.extend(view[offset:offset+n])
+                offset += n
+                if len(self._rx_header_buffer) < PACKET_HEADER_LENGTH:
+                    return
+
+                header_data = self._rx_header_buffer
+                self._rx_header_buffer = bytearray()
+                header = PacketHeader.deserialize(header_data)
+                if header is None:
+                    # Re-scan the buffered bytes after the invalid delimiter,
+                    # NOTE: These are less than a header's length, so at most a partial header is buffered
+                    self._process_rx_data(bytes(header_data[1:]))
+                    continue
+
+                self._process_packet_header(header)
                 continue
 
-            header = PacketHeader.deserialize(packet_buffer)
-            if header:
-                return header
+            # Scan for the next packet header
+            i = data.find(PACKET_DELIMITER1, offset)
+            if i == -1:
+                # The last byte may be the start of a delimiter
+                if data[-1] == PACKET_DELIMITER1[0]:
+                    self._rx_header_buffer = bytearray(data[-1:])
+                return
 
-            packet_buffer = packet_buffer[1:]
-            continue
+            if i + PACKET_HEADER_LENGTH > len(data):
+                self._rx_header_buffer = bytearray(view[i:])
+                return
 
-        return None
+            header = PacketHeader.deserialize(view[i:i+PACKET_HEADER_LENGTH])
+            if header is None:
+                offset = i + 1
+                continue
 
+            offset = i + PACKET_HEADER_LENGTH
+            self._process_packet_header(header)
 
-    def _read_packet_data(self, packet_length:int):
-        activity_timestamp = time.time()
-        packet_data = bytearray()
 
-        while len(packet_data) < packet_length and not self._rx_thread_active.is_set():
-            max_read_length = self._handle.in_waiting
-            if max_read_length == 0:
-                time.sleep(0.005)
-                continue
-            elif (time.time() - activity_timestamp) > 10.0:
-                logger.warning(f'Timed-out waiting for packet of length {packet_length}')
+    def _process_packet_header(self, header:PacketHeader):
+        logger.debug(f'RX {header}')
+        with self._lock:
+            if header.is_cmd_packet:
+                self._rx_cmd_code = header.cmd_code
+                self._rx_cmd_payload = header.cmd_payload
                 return
 
-            chunk_length = min(max_read_length, packet_length - len(packet_data))
-            data = self._handle.read(chunk_length)
-            if data:
-                activity_timestamp = time.time()
-                packet_data.extend(data)
+            if header.data_ack_id == self._tx_active_packet_id:
+                self._tx_active_packet_id = 0
 
-        with self._lock:
-            #logger.debug(binascii.hexlify(bytearray(packet_data)))
-            self._rx_buffer.extend(packet_data)
-            self._write_data_packet_header(0)
+            if header.data_tx_length == PACKET_REQUEST_SYNCHRONIZATION:
+                header.data_tx_length = 0
+                self._sync_requested = True
+                self._tx_active_packet_id = 0
+
+            if header.data_tx_length > 0:
+                self._rx_previous_data_packet_id = header.id
+
+            self._tx_bytes_available = header.data_rx_available
             self._condition.notify_all()
 
+            if header.data_tx_length <= 0:
+                return
+
+            assert len(self._rx_buffer) + header.data_tx_length <= self._rx_buffer_length, 'RX buffer overflow'
+            self._rx_packet_remaining = header.data_tx_length
+            self._rx_packet_timestamp = time.time()
+
+
 
 class Command(NamedTuple):
     code:int = -1
@@ -642,8 +775,6 @@ class Command(NamedTuple):
 
 
 
-
-
 PACKET_HEADER_LENGTH = 12
 PACKET_DELIMITER1:bytes = b'\xDE\xAD'
 PACKET_DELIMITER2:bytes = b'\xBE\xEF'
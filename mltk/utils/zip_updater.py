@@ -0,0 +1,231 @@
+"""Incrementally update .zip archives
+
+See the source code on Github: `mltk/utils/zip_updater.py <https://github.com/siliconlabs/mltk/blob/master/mltk/utils/zip_updater.py>`_
+"""
+from typing import Dict, List, Set, Tuple, Union
+import os
+import copy
+import struct
+import zipfile
+
+from .logger import get_logger
+
+
+# File extensions of data that is already compressed
+# These files are stored as-is in the archive (i.e. without compression)
+COMPRESSED_EXTENSIONS = (
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.zst', '.npz',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.mp3', '.mp4', '.ogg', '.flac',
+)
+
+_LOCAL_HEADER_FORMAT = '<4s2B4HL2L2H'
+_LOCAL_HEADER_SIZE = struct.calcsize(_LOCAL_HEADER_FORMAT)
+_COPY_CHUNK_SIZE = 4*1024*1024
+
+
+class ZipUpdater:
+    """Add or replace the members of a .zip archive without re-compressing the existing members
+
+    Members are queued with :py:meth:`~add_file`, :py:meth:`~add_data` and :py:meth:`~remove` and written when :py:meth:`~commit` is called
+    (or when the context manager exits), so several updates are batched into a single update:
+
+    - If none of the queued members already exist in the archive (and no members are removed), then they are appended to the archive in-place
+    - Otherwise, a new archive is generated. The compressed bytes of the unchanged members are copied verbatim
+      from the existing archive (i.e. they are not decompressed and re-compressed).
+      The new archive is written to a temporary file which then replaces the existing archive.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        with ZipUpdater('my_model.mltk.zip') as updater:
+            updater.add_file('logs/my_model.h5', 'my_model.h5')
+            updater.add_file('logs/eval/summary.txt', 'eval/summary.txt')
+
+    Args:
+        path: Path to the .zip archive, it is created if necessary
+        create_new: If true, then all of the existing members of the archive are discarded
+        compression: The compression method used for new members
+        compresslevel: The compression level used for new members
+    """
+    def __init__(
+        self,
+        path:str,
+        create_new:bool=False,
+        compression:int=zipfile.ZIP_DEFLATED,
+        compresslevel:int=None
+    ):
+        self.path = path
+        self.create_new = create_new
+        self.compression = compression
+        self.compresslevel = compresslevel
+        # arcname -> (src_path or bytes, compress_type)
+        self._pending:Dict[str,Tuple[Union[str,bytes],int]] = {}
+        self._removed:Set[str] = set()
+
+
+    @property
+    def pending(self) -> List[str]:
+        """List of queued member names"""
+        return list(self._pending.keys())
+
+
+    @property
+    def removed(self) -> List[str]:
+        """List of member names queued for removal"""
+        return sorted(self._removed)
+
+
+    def clear(self):
+        """Discard the queued members and removals"""
+        self._pending.clear()
+        self._removed.clear()
+
+
+    def add_file(self, src_path:str, arcname:str=None, store:bool=None):
+        """Queue the given file to be added to the archive
+
+        Args:
+            src_path: Path to the file
+            arcname: The name of the member in the archive, default is the basename of the file
+            store: If true then store the file without compression.
+                If None then only files with an extension in ``COMPRESSED_EXTENSIONS`` are stored without compression
+        """
+        if not os.path.isfile(src_path):
+            raise FileNotFoundError(f'File not found: {src_path}')
+        arcname = (arcname or os.path.basename(src_path)).replace('\\', '/')
+        if store is None:
+            store = src_path.lower().endswith(COMPRESSED_EXTENSIONS)
+        self._pending[arcname] = (src_path, zipfile.ZIP_STORED if store else self.compression)
+        self._removed.discard(arcname)
+
+
+    def add_data(self, arcname:str, data:Union[str,bytes], store:bool=False):
+        """Queue the given data to be added to the archive"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        arcname = arcname.replace('\\', '/')
+        self._pending[arcname] = (data, zipfile.ZIP_STORED if store else self.compression)
+        self._removed.discard(arcname)
+
+
+    def remove(self, arcname:str):
+        """Queue the given member to be removed from the archive
+
+        This also discards the member if it was previously queued to be added.
+        It is not an error if the member does not exist in the archive.
+        """
+        arcname = arcname.replace('\\', '/')
+        self._pending.pop(arcname, None)
+        self._removed.add(arcname)
+
+
+    def commit(self):
+        """Write the queued members to the archive"""
+        if not self._pending and not self._removed and not self.create_new:
+            return
+
+        existing_names = set()
+        if not self.create_new and os.path.exists(self.path):
+            with zipfile.ZipFile(self.path, 'r') as zf:
+                existing_names = set(zf.namelist())
+
+        if not existing_names:
+            mode = 'a' if not self.create_new and os.path.exists(self.path) else 'w'
+            with zipfile.ZipFile(self.path, mode, self.compression, compresslevel=self.compresslevel) as zf:
+                self._write_pending(zf)
+
+        elif existing_names.isdisjoint(self._pending) and existing_names.isdisjoint(self._removed):
+            # None of the members are being replaced or removed, so just append them to the archive
+            if self._pending:
+                with zipfile.ZipFile(self.path, 'a', self.compression, compresslevel=self.compresslevel) as zf:
+                    self._write_pending(zf)
+
+        else:
+            self._rewrite()
+
+        self._pending.clear()
+        self._removed.clear()
+        self.create_new = False
+
+
+    def _rewrite(self):
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(self.path, 'rb') as src_fp, \
+                zipfile.ZipFile(self.path, 'r') as src_zf, \
+                zipfile.ZipFile(tmp_path, 'w', self.compression, compresslevel=self.compresslevel) as dst_zf:
+                for info in src_zf.infolist():
+                    if info.filename in self._pending or info.filename in self._removed:
+                        continue
+                    _copy_raw_member(src_fp, info, dst_zf)
+                self._write_pending(dst_zf)
+
+            os.replace(tmp_path, self.path)
+        except:
+            try:
+                os.remove(tmp_path)
+            except:
+                pass
+            raise
+
+
+    def _write_pending(self, zf:zipfile.ZipFile):
+        logger = get_logger()
+        for arcname, (src, compress_type) in self._pending.items():
+            if isinstance(src, bytes):
+                zf.writestr(arcname, src, compress_type=compress_type)
+            else:
+                logger.debug(f'Archiving {src} -> {arcname}')
+                zf.write(src, arcname=arcname, compress_type=compress_type)
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+
+
+
+def _copy_raw_member(src_fp, info:zipfile.ZipInfo, dst_zf:zipfile.ZipFile):
+    """Copy the compressed bytes of the given member to the destination archive"""
+    src_fp.seek(info.header_offset)
+    header = struct.unpack(_LOCAL_HEADER_FORMAT, src_fp.read(_LOCAL_HEADER_SIZE))
+    if header[0] != b'PK\x03\x04':
+        raise zipfile.BadZipFile(f'Bad local file header for member: {info.filename}')
+    fname_len, extra_len = header[-2], header[-1]
+    src_fp.seek(fname_len + extra_len, os.SEEK_CUR)
+
+    dst_info = copy.copy(info)
+    # The CRC and sizes are written in the local header, so no data descriptor is required
+    dst_info.flag_bits &= ~0x08
+    # The ZIP64 extra field is re-generated (if necessary) by FileHeader()
+    dst_info.extra = _strip_zip64_extra(info.extra)
+    dst_info.header_offset = dst_zf.fp.tell()
+    dst_zf.fp.write(dst_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = src_fp.read(min(remaining, _COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f'Truncated data for member: {info.filename}')
+        dst_zf.fp.write(chunk)
+        remaining -= len(chunk)
+
+    # NOTE: These ZipFile attributes are used to generate the central directory when the archive is closed
+    dst_zf.filelist.append(dst_info)
+    dst_zf.NameToInfo[dst_info.filename] = dst_info
+    dst_zf.start_dir = dst_zf.fp.tell()
+
+
+def _strip_zip64_extra(extra:bytes) -> bytes:
+    retval = b''
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack('<HH', extra[offset:offset+4])
+        if header_id != 0x0001:
+            retval += extra[offset:offset+4+size]
+        offset += 4 + size
+    return retval